@@ -45,6 +45,7 @@ def main(launch_args: list[str] | None = None):
             prog='releng-tool', add_help=False, usage=usage())
 
         parser.add_argument('--api', action='store_true')
+        parser.add_argument('--artifact-cache-dir')
         parser.add_argument('--assets-dir')
         parser.add_argument('--cache-dir')
         parser.add_argument('--config')
@@ -52,6 +53,7 @@ def main(launch_args: list[str] | None = None):
         parser.add_argument('--debug-extended', action='store_true')
         parser.add_argument('--development', '-D', nargs='?', default=False)
         parser.add_argument('--dl-dir')
+        parser.add_argument('--fetch-jobs', type=type_nonnegativeint)
         parser.add_argument('--force', '-F', action='store_true')
         parser.add_argument('--help', '-h', action='store_true')
         parser.add_argument('--help-quirks', action='store_true')
@@ -61,11 +63,14 @@ def main(launch_args: list[str] | None = None):
         parser.add_argument('--nocolorout', action='store_true')
         parser.add_argument('--only-mirror', action='store_true')
         parser.add_argument('--out-dir')
+        parser.add_argument('--package-jobs', type=type_nonnegativeint)
+        parser.add_argument('--package-logs', action='store_true')
         parser.add_argument('--profile', '-P', action='append')
         parser.add_argument('--relaxed-args', action='store_true')
         parser.add_argument('--release', action='store_true')
         parser.add_argument('--root-dir', '-R')
         parser.add_argument('--sbom-format', type=type_sbom_format)
+        parser.add_argument('--source-store-dir')
         parser.add_argument('--success-exit-code', default=0,
             type=type_nonnegativeint)
         parser.add_argument('--quiet', action='store_true')
@@ -398,6 +403,8 @@ def usage():
 
 (options)
  --api                     Enable API (programmatic response) mode
+ --artifact-cache-dir <dir>
+                           Directory for sharing package outputs between runs
  --assets-dir <dir>        Container directory for download and VCS-cache
                             directories (e.g. <ASSETS_DIR>/cache)
  --cache-dir <dir>         Directory for VCS-cache (default: <ROOT>/cache)
@@ -407,6 +414,8 @@ def usage():
  --debug                   Show debug-related messages
  --debug-extended          Show even more debug-related messages
  --dl-dir <dir>            Directory for download archives (default: <ROOT>/dl)
+ --fetch-jobs <jobs>       Numbers of packages to fetch at the same time
+                            (default: 1; 0 to use the job count)
  --force, -F               Trigger a forced request
  --help, -h                Show this help
  --help-quirks             Show available quirks
@@ -423,6 +432,9 @@ def usage():
  --only-mirror             Only fetch external projects with configured mirror
  --out-dir <dir>           Directory for output (builds, images, etc.)
                             (default: <ROOT>/output)
+ --package-jobs <jobs>     Numbers of packages to process at the same time
+                            (default: 1; 0 to use the job count)
+ --package-logs            Log package stages into files (condensed output)
  --profile <profile>, -D <profile>
                            Configure a profile to run with; providing this
                             option is only applicable if the project accepts
@@ -438,6 +450,7 @@ def usage():
  --sbom-format <format>    Override the output format for a software build of
                             materials (csv, html, json, json-cyclonedx,
                             json-spdx, rdf-spdx, text, xml, xml-cyclonedx)
+ --source-store-dir <dir>  Directory for sharing unpacked sources between runs
  --success-exit-code <n>   Exit code to use on success
  --verbose, -V             Show additional messages
  --version                 Show the version
@@ -467,14 +480,20 @@ releng.disable_devmode_ignore_cache    Disable package ignore-cache flags
 releng.disable_prerequisites_check     Disable prerequisites check
 releng.disable_remote_configs          Disable remote configurations
 releng.disable_remote_scripts          Disable remote scripts
+releng.disable_script_cache            Disable caching of compiled/loaded scripts
+releng.disable_stage_fingerprints      Disable input tracking for stage flags
 releng.disable_verbose_patch           Disable use of --verbose in patch calls
 releng.git.no_depth                    Disable depth-limits for Git calls
 releng.git.no_quick_fetch              Disable quick-fetching for Git calls
 releng.git.replicate_cache             Copy Git repositories into build outputs
 releng.ignore_failed_extensions        Ignore if extensions fail to load
 releng.ignore_release_check            Ignore any release check failures
+releng.install.hardlink                Permit hardlinks when replicating installs
+releng.install.replicate               Install once for staging and target
 releng.log.execute_args                Enable execute argument line logging
 releng.log.execute_env                 Enable execute environment debug logging
+releng.skeleton.details                Include file details in target skeletons
+releng.source_store.hardlink           Permit hardlinks from a source store
 releng.stats.no_pdf                    Never generate PDF statistics output
 releng.xmake.disable_arch_detection    Disable architecture detection for Xmake
 releng.xmake.disable_deps_init         Disable dependency folder setup for Xmake
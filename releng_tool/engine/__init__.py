@@ -1,8 +1,9 @@
 # SPDX-License-Identifier: BSD-2-Clause
 # Copyright releng-tool
 
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
 from datetime import datetime
-from datetime import timezone
 from difflib import get_close_matches
 from pathlib import Path
 from releng_tool import __version__ as releng_version
@@ -37,24 +38,33 @@ from releng_tool.exceptions import RelengToolMissingConfigurationError
 from releng_tool.exceptions import RelengToolUnknownAction
 from releng_tool.lint import lint
 from releng_tool.opts import RELENG_CONF_NAME
+from releng_tool.packages.artifact_cache import RelengArtifactCache
 from releng_tool.packages.exceptions import RelengToolMissingPackageScript
 from releng_tool.packages.exceptions import RelengToolStageFailure
+from releng_tool.packages.fingerprint import RelengStageFingerprints
 from releng_tool.packages.manager import RelengPackageManager
 from releng_tool.packages.pipeline import PipelineResult
 from releng_tool.packages.pipeline import RelengPackagePipeline
+from releng_tool.packages.scheduler import RelengPackageScheduler
+from releng_tool.packages.source_store import RelengSourceStore
 from releng_tool.prerequisites import RelengPrerequisites
 from releng_tool.registry import RelengRegistry
 from releng_tool.stats import RelengStats
+from releng_tool.tool.git import GIT
 from releng_tool.tool.python import PYTHON
 from releng_tool.util import nullish_coalescing as NC
 from releng_tool.util.env import extend_script_env
 from releng_tool.util.file_flags import FileFlag
 from releng_tool.util.file_flags import check_file_flag
 from releng_tool.util.file_flags import process_file_flag
+from releng_tool.util.hash_cache import VERIFIED_HASH_CACHE_FNAME
+from releng_tool.util.hash_cache import VerifiedHashCache
 from releng_tool.util.io import run_script
 from releng_tool.util.io_mkdir import mkdir
 from releng_tool.util.io_opt_file import opt_file
 from releng_tool.util.io_remove import path_remove
+from releng_tool.util.io_remove import path_remove_deferred
+from releng_tool.util.io_remove import path_remove_wait
 from releng_tool.util.io_wd import FailedToPrepareWorkingDirectoryError
 from releng_tool.util.io_wd import wd
 from releng_tool.util.log import debug
@@ -62,16 +72,19 @@ from releng_tool.util.log import err
 from releng_tool.util.log import hint
 from releng_tool.util.log import log
 from releng_tool.util.log import note
+from releng_tool.util.log import releng_log_buffered
 from releng_tool.util.log import releng_log_tag
 from releng_tool.util.log import success
 from releng_tool.util.log import verbose
 from releng_tool.util.log import warn
 from releng_tool.util.log import warn_wrap
+from releng_tool.util.manifest import manifest_write
 from typing import Any
 import json
 import os
 import re
 import sys
+import threading
 
 
 class RelengEngine:
@@ -85,15 +98,25 @@ class RelengEngine:
         opts: options used to configure the engine
 
     Attributes:
+        artifacts: cache of package outputs shared between runs
+        fingerprints: fingerprints for package stages
+        hash_cache: cache of previously verified file hashes
         opts: options used to configure the engine
         pkgman: manager for package-related tasks
         registry: extension registry
+        sources: store of unpacked package sources shared between runs
         stats: statistics tracker
     """
     def __init__(self, opts):
         self.registry = RelengRegistry()
         self.opts = opts
-        self.pkgman = RelengPackageManager(opts, self.registry, dvcs_cache=True)
+        self.artifacts = RelengArtifactCache(opts)
+        self.fingerprints = RelengStageFingerprints(opts)
+        self.hash_cache = VerifiedHashCache(
+            os.path.join(opts.cache_dir, VERIFIED_HASH_CACHE_FNAME))
+        self.pkgman = RelengPackageManager(opts, self.registry,
+            dvcs_cache=True, script_cache=True)
+        self.sources = RelengSourceStore(opts, self.hash_cache)
         self.stats = RelengStats(opts)
 
         # load spdx license data
@@ -142,6 +165,31 @@ class RelengEngine:
             configuration/package definitions
         """
 
+        try:
+            return self._run()
+        finally:
+            # stop any long-lived git query processes used during this run
+            GIT.release_all()
+
+            # wait for any directories still being removed in the background
+            path_remove_wait()
+
+            # persist any hashes verified during this run
+            self.hash_cache.save()
+
+    def _run(self) -> bool:
+        """
+        run the engine
+
+        Performs the processing of the release engineering steps for
+        ``run``.
+
+        Returns:
+            ``True`` if the engine has completed without error; ``False`` if an
+            issue has occurred when interpreting or running the user's
+            configuration/package definitions
+        """
+
         opts = self.opts
         gaction = opts.gbl_action
         pa = opts.pkg_action
@@ -185,6 +233,9 @@ class RelengEngine:
         debug('loading statistics...')
         self.stats.load()
 
+        # ensure stage fingerprints are calculated from this run's definitions
+        self.fingerprints = RelengStageFingerprints(opts)
+
         # verify the project's configuration exists before performing any
         # actions
         verbose('detecting project configuration...')
@@ -317,6 +368,12 @@ unknown/unsupported option has been provided ("{key}").{extra}''')
             cfg_args.update(kwargs)
         gbls['releng_config'] = releng_config
 
+        # compiled configuration/package definitions are cached (unless
+        # disabled)
+        script_cache_dir = None
+        if 'releng.disable_script_cache' not in opts.quirks:
+            script_cache_dir = opts.cache_dir
+
         verbose(f'loading project configuration: {conf_point}')
         settings = run_script(
             conf_point,
@@ -325,6 +382,7 @@ unknown/unsupported option has been provided ("{key}").{extra}''')
             ignore=(
                 RelengToolInvalidConfigurationOption,
             ),
+            cache_dir=script_cache_dir,
         )
         if not settings:
             raise RelengToolInvalidConfigurationScript
@@ -332,6 +390,14 @@ unknown/unsupported option has been provided ("{key}").{extra}''')
         script_env = gbls.copy()
         extend_script_env(script_env, settings)
         self.pkgman.script_env = script_env
+
+        # track values defined by the project's configuration for stage
+        # fingerprints (ignoring project options and provided globals)
+        self.fingerprints.script_env = {
+            key: value for key, value in script_env.items()
+            if key not in ConfKey and  # type: ignore[attr-defined]
+                not key.startswith('RELENG_') and gbls.get(key) is not value
+        }
         verbose('configuration file loaded')
 
         # handle cleaning requests
@@ -490,8 +556,10 @@ unknown/unsupported option has been provided ("{key}").{extra}''')
                     pkg_verbose_clean('cleaning cargo output')
                     cargo_package_clean(opts, pkg)
 
+                # (note: directories are removed in the background, allowing
+                # a fresh request to proceed while contents are removed)
                 pkg_verbose_clean('removing output directory')
-                rv = path_remove(pkg.build_output_dir)
+                rv = path_remove_deferred(pkg.build_output_dir)
 
                 if pa == PkgAction.DISTCLEAN:
                     rv &= path_remove(pkg._ff_fetch)
@@ -500,11 +568,12 @@ unknown/unsupported option has been provided ("{key}").{extra}''')
                         rv &= path_remove(pkg.cache_file)
                     if os.path.isdir(pkg.cache_dir):
                         pkg_verbose_clean('removing cache directory')
-                        rv &= path_remove(pkg.cache_dir)
+                        rv &= path_remove_deferred(pkg.cache_dir)
 
                 if rv and pa == PkgAction.FRESH:
                     break
 
+                rv &= path_remove_wait()
                 return rv
 
         # ensure any of required host tools do exist
@@ -517,7 +586,8 @@ unknown/unsupported option has been provided ("{key}").{extra}''')
                 if pkg.host_provides:
                     exclude_host_check.update(pkg.host_provides)
 
-            prerequisites = RelengPrerequisites(pkgs, opts.prerequisites)
+            prerequisites = RelengPrerequisites(pkgs, opts.prerequisites,
+                cache_dir=opts.cache_dir)
             if not prerequisites.check(exclude=exclude_host_check):
                 return False
 
@@ -553,6 +623,7 @@ unknown/unsupported option has been provided ("{key}").{extra}''')
 
         try:
             # ensure all package sources are acquired first
+            fetch_pkgs = []
             for pkg in pkgs:
                 if not self._stage_init(pkg):
                     return False
@@ -576,21 +647,18 @@ unknown/unsupported option has been provided ("{key}").{extra}''')
                 # a user re-triggers a build and all ignore-cache packages
                 # will be re-fetched again (where really, we only want to
                 # have the ignore-cache flag fetch once from a cleaned state).
-                fflag = pkg._ff_fetch
                 if not req_fetch and not pkg.local_srcs:
-                    if check_file_flag(fflag) == FileFlag.EXISTS:
+                    fp = self.fingerprints.fingerprint(pkg, 'fetch')
+                    fflag = pkg._ff_fetch
+                    if check_file_flag(fflag, fp) == FileFlag.EXISTS:
                         if os.path.exists(pkg.cache_dir) or \
                                 os.path.exists(pkg.cache_file):
                             continue
 
-                self.stats.track_duration_start(pkg.name, 'fetch')
-                fetched = fetch_stage(self, pkg, req_fetch, pkg.fetch_opts)
-                self.stats.track_duration_end(pkg.name, 'fetch')
-                if not fetched:
-                    return False
+                fetch_pkgs.append(pkg)
 
-                if process_file_flag(fflag, flag=True) != FileFlag.CONFIGURED:
-                    return False
+            if not self._fetch_packages(fetch_pkgs, req_fetch):
+                return False
 
             # re-apply script environment to ensure previous script environment
             # changes have not manipulated the environment (from standard
@@ -654,29 +722,38 @@ unknown/unsupported option has been provided ("{key}").{extra}''')
                     cargo_register_pkg_paths(cargo_pkgs)
 
                 # main package processing stage
-                for pkg in pkgs:
-                    # if this is a package-specific pre-configure action, only
-                    # process the specific action
-                    if requested_preconfig and pkg.name != opts.target_action:
-                        continue
-
-                    # if this was a host targeted python package, attempt to
-                    # register additional host directories into the path to
-                    # allow them to be used by later packages/post-scripts;
-                    # only adds new paths if the package has a custom prefix
-                    if pkg.type == PackageType.PYTHON and \
-                            pkg.install_type == 'host' and \
-                            not pkg.python_installer_scheme:
-                        pfx = NC(pkg.prefix, opts.sysroot_prefix)
-                        PYTHON.register_host_python(opts.host_dir, pfx)
-
-                    verbose('processing package: {}', pkg.name)
-                    prv = pipeline.process(pkg)
+                #
+                # If configured to process multiple packages at the same time
+                # (and not targeting a specific package), packages will be
+                # processed as soon as all of their dependencies have been
+                # processed.
+                if opts.package_jobs > 1 and not opts.target_action:
+                    scheduler = RelengPackageScheduler(
+                        pkgs, opts.package_jobs, opts.jobs)
+
+                    def process(pkg):
+                        return self._process_package(pipeline, pkg)
+
+                    prv = scheduler.run(process)
                     if prv == PipelineResult.ERROR:
                         return False
 
                     if prv == PipelineResult.STOP:
                         return True
+                else:
+                    for pkg in pkgs:
+                        # if this is a package-specific pre-configure action,
+                        # only process the specific action
+                        if requested_preconfig and \
+                                pkg.name != opts.target_action:
+                            continue
+
+                        prv = self._process_package(pipeline, pkg)
+                        if prv == PipelineResult.ERROR:
+                            return False
+
+                        if prv == PipelineResult.STOP:
+                            return True
 
                 if not is_action:
                     note('all packages have been processed')
@@ -783,6 +860,31 @@ has failed. Ensure the following path is accessible for this user:
             log('Local-sources mode: Disabled')
             api_data['localsrcs'] = False
 
+    def _process_package(self, pipeline, pkg):
+        """
+        process a package through its pipeline
+
+        Args:
+            pipeline: the package pipeline
+            pkg: the package to process
+
+        Returns:
+            the pipeline result
+        """
+
+        # if this was a host targeted python package, attempt to register
+        # additional host directories into the path to allow them to be used
+        # by later packages/post-scripts; only adds new paths if the package
+        # has a custom prefix
+        if pkg.type == PackageType.PYTHON and \
+                pkg.install_type == 'host' and \
+                not pkg.python_installer_scheme:
+            pfx = NC(pkg.prefix, self.opts.sysroot_prefix)
+            PYTHON.register_host_python(self.opts.host_dir, pfx)
+
+        verbose('processing package: {}', pkg.name)
+        return pipeline.process(pkg)
+
     def _stage_init(self, pkg):
         """
         initialize the package environment for processing
@@ -836,6 +938,117 @@ has failed. Ensure the following path is accessible for this user:
 
         return rv
 
+    def _fetch_packages(self, pkgs, req_fetch):
+        """
+        fetch the sources for the provided packages
+
+        Performs the fetch stage for each provided package. When configured
+        with more than a single fetch job, packages are fetched concurrently
+        using a pool of worker threads. Packages sharing the same cache
+        location are always fetched one after another (in the provided order)
+        and any package which cannot be safely fetched from a worker thread
+        (e.g. an extension-provided fetch type) is fetched from the calling
+        thread. Output generated for each package fetched concurrently is
+        held and written out once the package's fetch stage has completed.
+
+        Args:
+            pkgs: the packages to fetch
+            req_fetch: whether an explicit fetch request has been made
+
+        Returns:
+            ``True`` if all packages have been fetched; ``False`` otherwise
+        """
+
+        fetch_jobs = min(self.opts.fetch_jobs, len(pkgs))
+        if fetch_jobs <= 1:
+            return all(self._fetch_package(pkg, req_fetch) for pkg in pkgs)
+
+        debug('fetching packages with {} jobs', fetch_jobs)
+
+        # group packages which share a cache location, to ensure that multiple
+        # workers do not attempt to populate the same cache at the same time
+        pool_groups: dict[str, list] = {}
+        main_pkgs = []
+        for pkg in pkgs:
+            if self._fetch_requires_main_thread(pkg):
+                main_pkgs.append(pkg)
+            else:
+                pool_groups.setdefault(pkg.cache_dir, []).append(pkg)
+
+        failed = threading.Event()
+
+        def fetch_group(group):
+            for pkg in group:
+                if failed.is_set():
+                    return
+                with releng_log_buffered():
+                    fetched = self._fetch_package(pkg, req_fetch)
+                if not fetched:
+                    failed.set()
+
+        with ThreadPoolExecutor(max_workers=fetch_jobs) as executor:
+            futures = [
+                executor.submit(fetch_group, group)
+                for group in pool_groups.values()
+            ]
+
+            try:
+                fetch_group(main_pkgs)
+            except BaseException:
+                failed.set()
+                raise
+            finally:
+                wait(futures)
+
+        # raise any issue detected while fetching a package in a worker
+        for future in futures:
+            future.result()
+
+        return not failed.is_set()
+
+    def _fetch_package(self, pkg, req_fetch):
+        """
+        fetch the sources for a provided package
+
+        Args:
+            pkg: the package to fetch
+            req_fetch: whether an explicit fetch request has been made
+
+        Returns:
+            ``True`` if the package has been fetched; ``False`` otherwise
+        """
+
+        self.stats.track_duration_start(pkg.name, 'fetch')
+        fetched = fetch_stage(self, pkg, req_fetch, pkg.fetch_opts)
+        self.stats.track_duration_end(pkg.name, 'fetch')
+        if not fetched:
+            return False
+
+        fflag = pkg._ff_fetch
+        fp = self.fingerprints.fingerprint(pkg, 'fetch')
+        rv = process_file_flag(fflag, flag=True, fingerprint=fp)
+        return rv == FileFlag.CONFIGURED
+
+    def _fetch_requires_main_thread(self, pkg):
+        """
+        return whether a package's fetch stage must be run on the main thread
+
+        Args:
+            pkg: the package to check
+
+        Returns:
+            ``True`` if the package must be fetched from the main thread;
+            ``False`` if the package can be fetched from a worker thread
+        """
+
+        # extension-provided fetch types may rely on process-wide state (such
+        # as the working directory)
+        if pkg.vcs_type in self.registry.fetch_types:
+            return True
+
+        # submodules may be shared between multiple packages
+        return pkg.vcs_type == VcsType.GIT and pkg.git_submodules
+
     def _handle_clean_request(self, gaction):
         """
         handle a global clean request
@@ -844,7 +1057,8 @@ has failed. Ensure the following path is accessible for this user:
         request will remove generated build, host, staging and target
         directories. In the event of "proper"-based cleans are requested,
         additional content such as the entire output directory (along with known
-        file flags) can be removed.
+        file flags) can be removed. Directories are removed at the same time
+        (in the background) and this call returns once all have been removed.
 
         Args:
             gaction: the specific clean action being requested
@@ -854,13 +1068,13 @@ has failed. Ensure the following path is accessible for this user:
 
         if gaction == GlobalAction.DISTCLEAN:
             verbose('removing cache directory')
-            rv &= path_remove(self.opts.cache_dir)
+            rv &= path_remove_deferred(self.opts.cache_dir)
             verbose('removing download directory')
-            rv &= path_remove(self.opts.dl_dir)
+            rv &= path_remove_deferred(self.opts.dl_dir)
 
         if gaction in (GlobalAction.MRPROPER, GlobalAction.DISTCLEAN):
             verbose('removing output directory')
-            rv &= path_remove(self.opts.out_dir)
+            rv &= path_remove_deferred(self.opts.out_dir)
 
             verbose('removing file flags')
             if os.path.exists(self.opts.ff_devmode):
@@ -875,17 +1089,20 @@ has failed. Ensure the following path is accessible for this user:
                     rv = False
         else:
             verbose('removing build directory')
-            rv &= path_remove(self.opts.build_dir)
+            rv &= path_remove_deferred(self.opts.build_dir)
             verbose('removing host directory')
-            rv &= path_remove(self.opts.host_dir)
+            rv &= path_remove_deferred(self.opts.host_dir)
             verbose('removing license directory')
-            rv &= path_remove(self.opts.license_dir)
+            rv &= path_remove_deferred(self.opts.license_dir)
             verbose('removing staging directory')
-            rv &= path_remove(self.opts.staging_dir)
+            rv &= path_remove_deferred(self.opts.staging_dir)
             verbose('removing symbols directory')
-            rv &= path_remove(self.opts.symbols_dir)
+            rv &= path_remove_deferred(self.opts.symbols_dir)
             verbose('removing target directory')
-            rv &= path_remove(self.opts.target_dir)
+            rv &= path_remove_deferred(self.opts.target_dir)
+
+        # wait for all directories to be removed
+        rv &= path_remove_wait()
 
         return rv
 
@@ -959,30 +1176,23 @@ has failed. Ensure the following path is accessible for this user:
 
         - Generate a `skeleton-target.txt` file capturing the structure of the
            target directory.
+        - Generate a `skeleton-target-changes.txt` file capturing the changes
+           in the target directory since the previous run (if any).
         """
 
-        target_path = Path(self.opts.target_dir)
-        if not target_path.is_dir():
+        if not os.path.isdir(self.opts.target_dir):
             return
 
-        def _desc(path: Path) -> str:
-            desc = ''
-
-            if path.is_dir():
-                desc += '/'
-
-            if path.is_symlink():
-                desc += f' -> {path.readlink()}'
+        details = 'releng.skeleton.details' in self.opts.quirks
+        target_skeleton = os.path.join(self.opts.out_dir, 'skeleton-target.txt')
+        target_changes = os.path.join(
+            self.opts.out_dir, 'skeleton-target-changes.txt')
 
-            return desc
-
-        target_skeleton = Path(self.opts.out_dir) / 'skeleton-target.txt'
-        with target_skeleton.open('w') as f:
-            capture_dt = datetime.now() \
-                .astimezone(timezone.utc).replace(microsecond=0)
-            f.write(f'# {capture_dt}\n')
-            for p in sorted(target_path.rglob('*')):
-                f.write(f'{p.relative_to(target_path).as_posix()}{_desc(p)}\n')
+        try:
+            manifest_write(self.opts.target_dir, target_skeleton,
+                details=details, changes=target_changes)
+        except OSError as e:
+            warn(f'unable to generate target skeleton: {e}')
 
     def _process_file_flags(self):
         """
@@ -4,23 +4,26 @@
 from releng_tool.api import RelengBuildOptions
 from releng_tool.defs import PackageInstallType
 from releng_tool.defs import PackageType
-from releng_tool.engine.autotools.build import build as build_autotools
-from releng_tool.engine.cargo.build import build as build_cargo
-from releng_tool.engine.cmake.build import build as build_cmake
-from releng_tool.engine.make.build import build as build_make
-from releng_tool.engine.meson.build import build as build_meson
-from releng_tool.engine.python.build import build as build_python
-from releng_tool.engine.scons.build import build as build_scons
-from releng_tool.engine.script.build import build as build_script
-from releng_tool.engine.waf.build import build as build_waf
-from releng_tool.engine.xmake.build import build as build_xmake
 from releng_tool.packages import clamp_jobs
 from releng_tool.util import nullish_coalescing as NC
 from releng_tool.util.api import replicate_package_attribs
 from releng_tool.util.io_wd import wd
+from releng_tool.util.lazy import lazy_function
 from releng_tool.util.log import err
 from releng_tool.util.log import note
 
+# implementations are imported when first used
+build_autotools = lazy_function('releng_tool.engine.autotools.build', 'build')
+build_cargo = lazy_function('releng_tool.engine.cargo.build', 'build')
+build_cmake = lazy_function('releng_tool.engine.cmake.build', 'build')
+build_make = lazy_function('releng_tool.engine.make.build', 'build')
+build_meson = lazy_function('releng_tool.engine.meson.build', 'build')
+build_python = lazy_function('releng_tool.engine.python.build', 'build')
+build_scons = lazy_function('releng_tool.engine.scons.build', 'build')
+build_script = lazy_function('releng_tool.engine.script.build', 'build')
+build_waf = lazy_function('releng_tool.engine.waf.build', 'build')
+build_xmake = lazy_function('releng_tool.engine.xmake.build', 'build')
+
 
 def stage(engine, pkg, script_env):
     """
@@ -4,21 +4,25 @@
 from releng_tool.api import RelengConfigureOptions
 from releng_tool.defs import PackageInstallType
 from releng_tool.defs import PackageType
-from releng_tool.engine.autotools.configure import configure as conf_autotools
-from releng_tool.engine.cmake.configure import configure as conf_cmake
-from releng_tool.engine.make.configure import configure as conf_make
-from releng_tool.engine.meson.configure import configure as conf_meson
-from releng_tool.engine.scons.configure import configure as conf_scons
-from releng_tool.engine.script.configure import configure as conf_script
-from releng_tool.engine.waf.configure import configure as conf_waf
-from releng_tool.engine.xmake.configure import configure as conf_xmake
 from releng_tool.packages import clamp_jobs
 from releng_tool.util import nullish_coalescing as NC
 from releng_tool.util.api import replicate_package_attribs
 from releng_tool.util.io_wd import wd
+from releng_tool.util.lazy import lazy_function
 from releng_tool.util.log import err
 from releng_tool.util.log import note
 
+# implementations are imported when first used
+conf_autotools = lazy_function(
+    'releng_tool.engine.autotools.configure', 'configure')
+conf_cmake = lazy_function('releng_tool.engine.cmake.configure', 'configure')
+conf_make = lazy_function('releng_tool.engine.make.configure', 'configure')
+conf_meson = lazy_function('releng_tool.engine.meson.configure', 'configure')
+conf_scons = lazy_function('releng_tool.engine.scons.configure', 'configure')
+conf_script = lazy_function('releng_tool.engine.script.configure', 'configure')
+conf_waf = lazy_function('releng_tool.engine.waf.configure', 'configure')
+conf_xmake = lazy_function('releng_tool.engine.xmake.configure', 'configure')
+
 
 def stage(engine, pkg, script_env):
     """
@@ -3,15 +3,13 @@
 
 from releng_tool.api import RelengExtractOptions
 from releng_tool.defs import VcsType
-from releng_tool.extract.archive import extract as extract_archive
-from releng_tool.extract.git import extract as extract_git
-from releng_tool.extract.mercurial import extract as extract_mercurial
 from releng_tool.util.api import replicate_package_attribs
 from releng_tool.util.hash import HashResult
 from releng_tool.util.hash import verify as verify_hashes
 from releng_tool.util.io_remove import path_remove
 from releng_tool.util.io_temp_dir import temp_dir
 from releng_tool.util.io_wd import wd
+from releng_tool.util.lazy import lazy_function
 from releng_tool.util.log import debug
 from releng_tool.util.log import err
 from releng_tool.util.log import note
@@ -20,6 +18,11 @@ from releng_tool.util.log import warn
 import os
 import shutil
 
+# implementations are imported when first used
+extract_archive = lazy_function('releng_tool.extract.archive', 'extract')
+extract_git = lazy_function('releng_tool.extract.git', 'extract')
+extract_mercurial = lazy_function('releng_tool.extract.mercurial', 'extract')
+
 
 def stage(engine, pkg):
     """
@@ -60,6 +63,7 @@ def stage(engine, pkg):
     extract_opts.strip_count = pkg.strip_count
     extract_opts.version = pkg.version
     extract_opts._extract_override = engine.opts.extract_override
+    extract_opts._jobs = engine.opts.jobs
     extract_opts._quirks = engine.opts.quirks
 
     if os.path.exists(pkg.build_dir):
@@ -103,13 +107,23 @@ def stage(engine, pkg):
                 err('extract type is not implemented: {}', pkg.vcs_type)
                 return False
 
+            # archives previously extracted (and verified) into a source
+            # store can populate the build directory from the store
+            store_key = None
+            if extracter is extract_archive:
+                store_key = engine.sources.key(pkg)
+                if store_key and engine.sources.restore(
+                        pkg, store_key, pkg.build_dir):
+                    return True
+
             # perform the extract request
             extracted = extracter(extract_opts)
             if not extracted:
                 return False
 
             result = verify_hashes(pkg.hash_file, work_dir,
-                exclude=hash_exclude, relaxed=pkg.hash_relaxed)
+                exclude=hash_exclude, relaxed=pkg.hash_relaxed,
+                jobs=engine.opts.jobs)
             if result == HashResult.VERIFIED:
                 pass
             elif result == HashResult.BAD_PATH:
@@ -128,6 +142,10 @@ def stage(engine, pkg):
                     'hash-check failure: {})', result)
                 return False
 
+            if store_key and result not in (
+                    HashResult.MISMATCH, HashResult.MISSING_LISTED):
+                engine.sources.store(pkg, store_key, work_dir)
+
         debug('extraction successful; moving sources into package output '
             'directory: ' + pkg.build_dir)
         shutil.move(work_dir, pkg.build_dir)
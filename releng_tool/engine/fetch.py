@@ -1,27 +1,19 @@
 # SPDX-License-Identifier: BSD-2-Clause
 # Copyright releng-tool
 
+from contextlib import nullcontext
 from releng_tool.api import RelengFetchOptions
 from releng_tool.defs import VcsType
-from releng_tool.fetch.brz import fetch as fetch_brz
-from releng_tool.fetch.cvs import fetch as fetch_cvs
-from releng_tool.fetch.file import fetch as fetch_file
-from releng_tool.fetch.git import fetch as fetch_git
-from releng_tool.fetch.lore import fetch as fetch_lore
-from releng_tool.fetch.mercurial import fetch as fetch_mercurial
-from releng_tool.fetch.perforce import fetch as fetch_perforce
-from releng_tool.fetch.rsync import fetch as fetch_rsync
-from releng_tool.fetch.scp import fetch as fetch_scp
-from releng_tool.fetch.svn import fetch as fetch_svn
-from releng_tool.fetch.url import fetch as fetch_url
 from releng_tool.tool.gpg import GPG
 from releng_tool.util.api import replicate_package_attribs
 from releng_tool.util.hash import HashResult
+from releng_tool.util.hash import prepare_hashers
 from releng_tool.util.hash import verify as verify_hashes
 from releng_tool.util.io_mkdir import mkdir
 from releng_tool.util.io_remove import path_remove
 from releng_tool.util.io_temp_dir import temp_dir
 from releng_tool.util.io_wd import wd
+from releng_tool.util.lazy import lazy_function
 from releng_tool.util.log import debug
 from releng_tool.util.log import err
 from releng_tool.util.log import log
@@ -30,6 +22,22 @@ from releng_tool.util.log import warn
 import os
 import shutil
 
+# implementations are imported when first used
+fetch_brz = lazy_function('releng_tool.fetch.brz', 'fetch')
+fetch_cvs = lazy_function('releng_tool.fetch.cvs', 'fetch')
+fetch_file = lazy_function('releng_tool.fetch.file', 'fetch')
+fetch_git = lazy_function('releng_tool.fetch.git', 'fetch')
+fetch_lore = lazy_function('releng_tool.fetch.lore', 'fetch')
+fetch_mercurial = lazy_function('releng_tool.fetch.mercurial', 'fetch')
+fetch_perforce = lazy_function('releng_tool.fetch.perforce', 'fetch')
+fetch_rsync = lazy_function('releng_tool.fetch.rsync', 'fetch')
+fetch_scp = lazy_function('releng_tool.fetch.scp', 'fetch')
+fetch_svn = lazy_function('releng_tool.fetch.svn', 'fetch')
+fetch_url = lazy_function('releng_tool.fetch.url', 'fetch')
+
+#: extension of a partially downloaded file
+PART_EXT = '.part'
+
 
 def stage(engine, pkg, ignore_cache, extra_opts):
     """
@@ -64,11 +72,13 @@ def stage(engine, pkg, ignore_cache, extra_opts):
 
     # find fetching method for the target vcs-type
     fetcher = None
+    ext_fetcher = False
     if pkg.vcs_type in engine.registry.fetch_types:
         def _(opts):
             return engine.registry.fetch_types[pkg.vcs_type].fetch(
                 pkg.vcs_type, opts)
         fetcher = _
+        ext_fetcher = True
     elif pkg.vcs_type == VcsType.BRZ:
         fetcher = fetch_brz
     elif pkg.vcs_type == VcsType.CVS:
@@ -132,14 +142,32 @@ local sources option to use the default process).
     fetch_opts.revision = pkg.revision
     fetch_opts.site = pkg.site
     fetch_opts.version = pkg.version
+    fetch_opts._digests = None
+    fetch_opts._hashers = None
     fetch_opts._mirror = False
+    fetch_opts._part_file = None
     fetch_opts._quirks = engine.opts.quirks
     fetch_opts._urlopen_context = engine.opts.urlopen_context
 
     cache_filename = os.path.basename(pkg.cache_file)
+
+    if pkg.vcs_type == VcsType.URL:
+        # for url-based fetches, allow the hashes of a resource to be
+        # calculated while it is downloaded (avoiding a second read of the
+        # cache file)
+        if perform_file_hash_check:
+            fetch_opts._hashers = prepare_hashers(
+                pkg.hash_file, cache_filename)
+
+        # track partial downloads alongside the expected cache file, allowing
+        # an interrupted download to be resumed (even over multiple runs)
+        fetch_opts._part_file = pkg.cache_file + PART_EXT
     out_dir = engine.opts.out_dir
     with temp_dir(out_dir) as work_dir, temp_dir(out_dir) as interim_cache_dir:
-        with wd(work_dir):
+        # extension-provided fetch types may expect to be invoked inside the
+        # interim working directory; built-in fetch types always operate on
+        # explicit paths, which permits them to run alongside other fetches
+        with wd(work_dir) if ext_fetcher else nullcontext():
             interim_cache_file = os.path.join(interim_cache_dir, cache_filename)
             fetch_opts.cache_file = interim_cache_file
             fetch_opts.work_dir = work_dir
@@ -183,8 +211,8 @@ local sources option to use the default process).
             if os.path.exists(pkg.cache_file):
                 rv = None
                 if perform_file_hash_check:
-                    hr = verify_hashes(
-                        pkg.hash_file, pkg.cache_file, relaxed=True)
+                    hr = verify_hashes(pkg.hash_file, pkg.cache_file,
+                        relaxed=True, cache=engine.hash_cache)
 
                     if hr == HashResult.VERIFIED:
                         rv = True
@@ -282,10 +310,12 @@ file. Ensure that the package's public key has been registered into gpg.
             # if the fetch type has returned a file, the file needs to be hash
             # checked and then be moved into the download cache
             elif fetched == interim_cache_file:
+                hr = None
                 if perform_file_hash_check:
                     relaxed_devmode_check = pkg.devmode and pkg.devmode_skip_ic
                     hr = verify_hashes(pkg.hash_file, fetched,
-                        relaxed=relaxed_devmode_check)
+                        relaxed=relaxed_devmode_check,
+                        hashers=fetch_opts._digests)
                     if hr == HashResult.VERIFIED:
                         pass
                     elif hr == HashResult.BAD_PATH:
@@ -343,6 +373,11 @@ file. Ensure that the package's public key has been registered into gpg.
                     err('invalid fetch operation (internal error; fetch mode '
                         '"{}" has provided a missing cache file)', pkg.vcs_type)
                     return False
+
+                # track the verified cache file to avoid re-hashing the file
+                # on future runs
+                if hr == HashResult.VERIFIED:
+                    engine.hash_cache.record(pkg.hash_file, pkg.cache_file)
             else:
                 err('invalid fetch operation (internal error; fetch mode "{}" '
                     'has returned an unsupported value)', pkg.vcs_type)
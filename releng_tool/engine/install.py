@@ -4,22 +4,40 @@
 from releng_tool.api import RelengInstallOptions
 from releng_tool.defs import PackageInstallType
 from releng_tool.defs import PackageType
-from releng_tool.engine.autotools.install import install as install_autotools
-from releng_tool.engine.cargo.install import install as install_cargo
-from releng_tool.engine.cmake.install import install as install_cmake
-from releng_tool.engine.make.install import install as install_make
-from releng_tool.engine.meson.install import install as install_meson
-from releng_tool.engine.python.install import install as install_python
-from releng_tool.engine.scons.install import install as install_scons
-from releng_tool.engine.script.install import install as install_script
-from releng_tool.engine.waf.install import install as install_waf
-from releng_tool.engine.xmake.install import install as install_xmake
 from releng_tool.util import nullish_coalescing as NC
 from releng_tool.util.api import replicate_package_attribs
+from releng_tool.util.io_clone import replicate_tree
+from releng_tool.util.io_temp_dir import temp_dir
 from releng_tool.util.io_wd import wd
+from releng_tool.util.lazy import lazy_function
 from releng_tool.util.log import err
 from releng_tool.util.log import note
 from releng_tool.util.log import verbose
+import os
+
+# implementations are imported when first used
+install_autotools = lazy_function(
+    'releng_tool.engine.autotools.install', 'install')
+install_cargo = lazy_function('releng_tool.engine.cargo.install', 'install')
+install_cmake = lazy_function('releng_tool.engine.cmake.install', 'install')
+install_make = lazy_function('releng_tool.engine.make.install', 'install')
+install_meson = lazy_function('releng_tool.engine.meson.install', 'install')
+install_python = lazy_function('releng_tool.engine.python.install', 'install')
+install_scons = lazy_function('releng_tool.engine.scons.install', 'install')
+install_script = lazy_function('releng_tool.engine.script.install', 'install')
+install_waf = lazy_function('releng_tool.engine.waf.install', 'install')
+install_xmake = lazy_function('releng_tool.engine.xmake.install', 'install')
+
+# package types which can install once and replicate into other destinations
+REPLICATED_INSTALL_TYPES = [
+    PackageType.AUTOTOOLS,
+    PackageType.CMAKE,
+    PackageType.MAKE,
+    PackageType.MESON,
+    PackageType.SCONS,
+    PackageType.WAF,
+    PackageType.XMAKE,
+]
 
 
 def stage(engine, pkg, script_env):
@@ -136,9 +154,31 @@ def stage(engine, pkg, script_env):
         err('installer type is not implemented: {}', pkg.type)
         return False
 
-    with wd(build_dir):
-        installed = installer(install_opts)
-        if not installed:
+    # for packages installing into multiple destinations, perform a single
+    # installation into an interim directory and replicate the results into
+    # each destination (if enabled; since a package may embed a destination
+    # directory into installed files)
+    replicate = len(dest_dirs) > 1 and \
+        pkg.type in REPLICATED_INSTALL_TYPES and \
+        'releng.install.replicate' in engine.opts.quirks
+
+    if not replicate:
+        with wd(build_dir):
+            return bool(installer(install_opts))
+
+    # (note: the interim directory is created alongside a destination to
+    # help support reflinks/moves)
+    with temp_dir(os.path.dirname(dest_dirs[-1])) as interim_dir:
+        install_opts.dest_dirs = [interim_dir]
+
+        with wd(build_dir):
+            installed = installer(install_opts)
+            if not installed:
+                return False
+
+        hardlink = 'releng.install.hardlink' in engine.opts.quirks
+        if not replicate_tree(interim_dir, dest_dirs, hardlink=hardlink):
+            err('failed to replicate installation: {}', pkg.name)
             return False
 
     return True
@@ -8,7 +8,7 @@ from releng_tool.defs import PackageInstallType
 from releng_tool.exceptions import RelengToolException
 from releng_tool.tool.python import PYTHON
 from releng_tool.tool.python import PythonTool
-from releng_tool.util.io_copy import path_copy
+from releng_tool.util.io_clone import replicate_tree
 from releng_tool.util.io_temp_dir import temp_dir
 from releng_tool.util.log import debug
 from releng_tool.util.log import err
@@ -156,7 +156,9 @@ def install(opts):
     else:
         optimization = [0, 1]  # default
 
-    with temp_dir() as tmp_dir:
+    # (note: the interim directory is created alongside a destination to
+    # help support reflinks/moves)
+    with temp_dir(os.path.dirname(opts.dest_dirs[-1])) as tmp_dir:
         # prepare absolute scheme paths
         #
         # Resolving a configuration scheme addresses two issues. First, we
@@ -220,13 +222,10 @@ def install(opts):
             }) from ex
 
         # replicate into each destination
-        for dest_dir in opts.dest_dirs:
-            debug(f'copying install to destination: {dest_dir}')
-
-            copied = path_copy(f'{tmp_dir}/', f'{dest_dir}', critical=False)
-            if not copied:
-                err('failed to install python project: {}', opts.name)
-                return False
+        hardlink = 'releng.install.hardlink' in opts._quirks
+        if not replicate_tree(tmp_dir, opts.dest_dirs, hardlink=hardlink):
+            err('failed to install python project: {}', opts.name)
+            return False
 
     return True
 
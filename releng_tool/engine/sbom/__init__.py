@@ -8,27 +8,34 @@ from releng_tool import __version__ as releng_version
 from releng_tool.defs import PackageInstallType
 from releng_tool.defs import SbomFormatType
 from releng_tool.defs import VcsType
-from releng_tool.engine.sbom.csv import generate_csv
-from releng_tool.engine.sbom.html import generate_html
-from releng_tool.engine.sbom.json import generate_json
-from releng_tool.engine.sbom.json_cyclonedx import generate_json_cyclonedx
-from releng_tool.engine.sbom.json_spdx import generate_json_spdx
-from releng_tool.engine.sbom.rdf_spdx import generate_rdf_spdx
-from releng_tool.engine.sbom.text import generate_text
-from releng_tool.engine.sbom.xml import generate_xml
-from releng_tool.engine.sbom.xml_cyclonedx import generate_xml_cyclonedx
 from releng_tool.tool.git import GIT
 from releng_tool.tool.hg import HG
 from releng_tool.util.hash import BadFileHashLoadError
 from releng_tool.util.hash import BadFormatHashLoadError
 from releng_tool.util.hash import load as load_hashes
 from releng_tool.util.io_mkdir import mkdir
+from releng_tool.util.lazy import lazy_function
 from releng_tool.util.log import debug
 from releng_tool.util.log import err
 from releng_tool.util.log import warn
 import hashlib
 import uuid
 
+# implementations are imported when first used
+generate_csv = lazy_function('releng_tool.engine.sbom.csv', 'generate_csv')
+generate_html = lazy_function('releng_tool.engine.sbom.html', 'generate_html')
+generate_json = lazy_function('releng_tool.engine.sbom.json', 'generate_json')
+generate_json_cyclonedx = lazy_function(
+    'releng_tool.engine.sbom.json_cyclonedx', 'generate_json_cyclonedx')
+generate_json_spdx = lazy_function(
+    'releng_tool.engine.sbom.json_spdx', 'generate_json_spdx')
+generate_rdf_spdx = lazy_function(
+    'releng_tool.engine.sbom.rdf_spdx', 'generate_rdf_spdx')
+generate_text = lazy_function('releng_tool.engine.sbom.text', 'generate_text')
+generate_xml = lazy_function('releng_tool.engine.sbom.xml', 'generate_xml')
+generate_xml_cyclonedx = lazy_function(
+    'releng_tool.engine.sbom.xml_cyclonedx', 'generate_xml_cyclonedx')
+
 
 # version string of the SBOM definition generated by releng-tool
 SBOM_VERSION = '1'
@@ -120,12 +127,11 @@ class SbomManager:
             revision_desc = pkg.revision
 
             if pkg.vcs_type == VcsType.GIT:
-                rv, detected_revision = GIT.execute_rv(
+                detected_revision = GIT.resolve(
                     f'--git-dir={pkg.cache_dir}',
-                    'rev-parse',
                     f'{pkg.revision}^{{commit}}',
                 )
-                if rv == 0:
+                if detected_revision:
                     revision_desc = detected_revision
             elif pkg.vcs_type == VcsType.HG:
                 rv, detected_revision = HG.execute_rv(
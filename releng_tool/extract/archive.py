@@ -1,14 +1,19 @@
 # SPDX-License-Identifier: BSD-2-Clause
 # Copyright releng-tool
 
+from concurrent.futures import ThreadPoolExecutor
 from releng_tool.exceptions import RelengToolOutsidePathError
+from releng_tool.tool.pigz import PIGZ
 from releng_tool.tool.tar import TAR
+from releng_tool.tool.xz import XZ
+from releng_tool.util import nullish_coalescing as NC
 from releng_tool.util.io import execute
 from releng_tool.util.io import interpret_stem_extension
 from releng_tool.util.io_mkdir import mkdir
 from releng_tool.util.log import debug
 from releng_tool.util.log import err
-from releng_tool.util.log import log
+from releng_tool.util.log import is_verbose
+from releng_tool.util.log import verbose
 from releng_tool.util.log import warn
 from zipfile import ZipFile
 import os
@@ -23,6 +28,15 @@ TAR_SUPPORTED = (
     'tgz',
 )
 
+#: list of multi-threaded decompressors (extensions, tool, invoke format)
+TAR_PARALLEL_DECOMPRESSORS = (
+    (('gz', 'tgz'), PIGZ, '{tool} -p {jobs}'),
+    (('xz', 'txz'), XZ, '{tool} -T{jobs}'),
+)
+
+#: block size to use when copying out zip members
+ZIP_COPY_BLOCKSIZE = 1024 * 1024
+
 
 def extract(opts):
     """
@@ -45,6 +59,7 @@ def extract(opts):
 
     assert opts
     cache_file = opts.cache_file
+    jobs = NC(getattr(opts, '_jobs', None), os.cpu_count() or 1)
     strip_count = opts.strip_count
     work_dir = opts.work_dir
 
@@ -90,12 +105,21 @@ def extract(opts):
                     '--extract',
                     '--file=' + cache_file,
                     f'--strip-components={strip_count}',
-                    '--verbose',
                 ]
 
+                # only list each extracted member when running verbosely,
+                # as logging large archives can be costly
+                if is_verbose():
+                    tar_args.append('--verbose')
+
                 if needs_force_local:
                     tar_args.append('--force-local')
 
+                decompressor = _tar_decompressor(cache_ext, jobs)
+                if decompressor:
+                    debug('using parallel decompressor: {}', decompressor)
+                    tar_args.append('--use-compress-program=' + decompressor)
+
                 if TAR.execute(tar_args, cwd=work_dir):
                     has_extracted = True
                 else:
@@ -125,7 +149,7 @@ def extract(opts):
                                 member.name = parts[-1]
 
                             # notify the user of the target member to extract
-                            log(member.name)
+                            verbose(member.name)
                             yield member
 
                     with tarfile.open(cache_file, 'r') as tar:
@@ -144,35 +168,7 @@ def extract(opts):
             is_extractable = True
 
             try:
-                with ZipFile(cache_file, 'r') as zip_:
-                    for member in zip_.namelist():
-                        # strip members from package defined count
-                        member_s = member
-                        if strip_count > 0:
-                            np = os.path.normpath(member_s)
-                            parts = np.split(os.path.sep, strip_count)
-                            if len(parts) <= strip_count:
-                                continue
-                            member_s = parts[-1]
-                        dest = os.path.join(work_dir, member_s)
-
-                        # notify the user of the target member to extract
-                        log(member)
-
-                        # if this is a directory entry, ensure the directory
-                        # exists for the destination
-                        if not os.path.basename(member):
-                            mkdir(dest)
-                        else:
-                            # always ensure the container directory for a file
-                            # exists before attempting to extract a member into
-                            # it, as not all processed zip files may process
-                            # a directory entry (to be created) ahead of time
-                            mkdir(os.path.dirname(dest))
-
-                            with zip_.open(member) as s, open(dest, 'wb') as f:
-                                shutil.copyfileobj(s, f)
-
+                _extract_zip(cache_file, work_dir, strip_count, jobs)
             except Exception as e:
                 err('unable to extract zip file\n'
                     '    {}\n'
@@ -192,3 +188,120 @@ def extract(opts):
             return False
 
     return True
+
+
+def _extract_zip(cache_file, work_dir, strip_count, jobs):
+    """
+    extract a zip file into a working directory
+
+    Directory entries (and containers for file members) are created ahead of
+    time, followed by the extraction of all file members. If multiple jobs are
+    permitted, file members are distributed (by size) over a series of threads
+    where each thread uses its own handle on the archive.
+
+    Args:
+        cache_file: the zip file
+        work_dir: the working directory
+        strip_count: strip-count for the extraction
+        jobs: maximum number of threads to extract with
+    """
+
+    containers = set()
+    members = {}
+
+    with ZipFile(cache_file, 'r') as zip_:
+        for info in zip_.infolist():
+            member = info.filename
+
+            # strip members from package defined count
+            member_s = member
+            if strip_count > 0:
+                np = os.path.normpath(member_s)
+                parts = np.split(os.path.sep, strip_count)
+                if len(parts) <= strip_count:
+                    continue
+                member_s = parts[-1]
+            dest = os.path.join(work_dir, member_s)
+
+            # notify the user of the target member to extract
+            verbose(member)
+
+            # if this is a directory entry, ensure the directory exists for the
+            # destination; otherwise, always ensure the container directory for
+            # a file exists before attempting to extract a member into it, as
+            # not all processed zip files may process a directory entry (to be
+            # created) ahead of time
+            if not os.path.basename(member):
+                container = dest
+            else:
+                container = os.path.dirname(dest)
+                members[dest] = info
+
+            if container not in containers:
+                mkdir(container)
+                containers.add(container)
+
+    workers = min(len(members), jobs)
+    if workers > 1:
+        # balance members over each worker by their size, largest first
+        batches = [[] for _ in range(workers)]
+        totals = [0] * workers
+        ordered = sorted(members.items(),
+            key=lambda x: x[1].file_size, reverse=True)
+        for entry in ordered:
+            idx = totals.index(min(totals))
+            batches[idx].append(entry)
+            totals[idx] += entry[1].file_size
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(_extract_zip_members, cache_file, batch)
+                for batch in batches]
+            for future in futures:
+                future.result()
+    elif members:
+        _extract_zip_members(cache_file, members.items())
+
+
+def _extract_zip_members(cache_file, members):
+    """
+    extract a series of file members from a zip file
+
+    Args:
+        cache_file: the zip file
+        members: list of destination and zip-info pairs to extract
+    """
+
+    with ZipFile(cache_file, 'r') as zip_:
+        for dest, info in members:
+            with zip_.open(info) as s, open(dest, 'wb') as f:
+                shutil.copyfileobj(s, f, ZIP_COPY_BLOCKSIZE)
+
+
+def _tar_decompressor(cache_ext, jobs):
+    """
+    return a multi-threaded decompressor for a tar archive (if any)
+
+    Args:
+        cache_ext: the extension of the archive
+        jobs: the number of threads permitted for decompression
+
+    Returns:
+        the decompression program to invoke; ``None`` if no multi-threaded
+        decompressor is available
+    """
+
+    if jobs <= 1 or not TAR.compress_program:
+        return None
+
+    for exts, tool, fmt in TAR_PARALLEL_DECOMPRESSORS:
+        if not cache_ext.endswith(exts):
+            continue
+
+        # tar will split the program on whitespace
+        tool_path = str(tool.tool)
+        if ' ' in tool_path or not tool.exists():
+            return None
+
+        return fmt.format(tool=tool_path, jobs=jobs)
+
+    return None
@@ -3,12 +3,16 @@
 
 from releng_tool.packages import pkg_cache_key
 from releng_tool.tool.git import GIT
+from releng_tool.tool.git import GIT_CACHE_LOCKS
+from releng_tool.tool.git import GIT_SUBMODULE_JOBS
 from releng_tool.util.io_copy import path_copy_into
 from releng_tool.util.log import debug
 from releng_tool.util.log import err
 from releng_tool.util.log import log
+from releng_tool.util.log import releng_log_task
 from releng_tool.util.log import verbose
 from releng_tool.util.log import warn
+from releng_tool.util.task_pool import run_tasks
 import os
 
 
@@ -36,9 +40,11 @@ def extract(opts):
         err('unable to extract package; git is not installed')
         return None
 
-    # extract the package
-    if not _workdir_extract(opts, cache_dir, work_dir, revision):
-        return False
+    # extract the package (ensuring no other package or submodule sharing
+    # this cache directory is checking out from the cache at the same time)
+    with GIT_CACHE_LOCKS.hold(cache_dir):
+        if not _workdir_extract(opts, cache_dir, work_dir, revision):
+            return False
 
     # extract submodules (if configured to do so)
     if opts._git_submodules:
@@ -55,7 +61,9 @@ def _process_submodules(opts, cache_dir, work_dir, revision):
     After extracting a repository to a working tree, this call can be used to
     extract any tracked submodules configured on the repository. The
     ``.gitmodules`` file is parsed for submodules and caches will be populated
-    for each submodule. This call is recursive.
+    for each submodule. Submodules (and any nested submodules) are extracted
+    concurrently, where the cache directory of each submodule is locked while
+    being checked out (since other packages may share the same submodule).
 
     Args:
         opts: the extraction options
@@ -67,18 +75,57 @@ def _process_submodules(opts, cache_dir, work_dir, revision):
         ``True`` if submodules have been processed; ``False`` otherwise
     """
 
+    submodules = _find_submodules(opts, cache_dir, work_dir, revision)
+    if submodules is None:
+        return False
+
+    def extract_submodule(submodule):
+        path, sm_cache_dir, sm_work_dir, sm_revision = submodule
+
+        log('extracting submodule ({}): {}', opts.name, path)
+        debug('submodule revision: {}', sm_revision)
+
+        with GIT_CACHE_LOCKS.hold(sm_cache_dir):
+            if not _workdir_extract(
+                    opts, sm_cache_dir, sm_work_dir, sm_revision):
+                return None
+
+        # process nested submodules
+        return _find_submodules(opts, sm_cache_dir, sm_work_dir, sm_revision)
+
+    return run_tasks(releng_log_task(extract_submodule), submodules,
+        GIT_SUBMODULE_JOBS)
+
+
+def _find_submodules(opts, cache_dir, work_dir, revision):
+    """
+    find the submodules for an extracted repository
+
+    Args:
+        opts: the extraction options
+        cache_dir: the cache repository that may be holding submodules
+        work_dir: the working directory to look for submodules
+        revision: the revision of the repository that may be holding submodules
+
+    Returns:
+        a list of 4-tuples (path, cache directory, working directory and
+        revision) for each submodule; ``None`` if the submodules could not be
+        determined
+    """
+
     git_dir = '--git-dir=' + cache_dir
 
     git_modules_file = os.path.join(work_dir, '.gitmodules')
     if not os.path.exists(git_modules_file):
-        return True
+        return []
 
     debug('parsing git submodules file: {}', git_modules_file)
     cfg = GIT.parse_cfg_file(git_modules_file)
     if not cfg:
         err('failed to parse git submodule')
-        return False
+        return None
 
+    submodules = []
     for sec_name in cfg.sections():
         if not sec_name.startswith('submodule'):
             continue
@@ -98,10 +145,7 @@ def _process_submodules(opts, cache_dir, work_dir, revision):
         rv, submodule_revision = GIT.execute_rv(git_dir, 'rev-parse', rev_ref)
         if rv != 0:
             err(f'unable to determine submodule revision: {submodule_path}')
-            return False
-
-        log('extracting submodule ({}): {}', opts.name, submodule_path)
-        debug('submodule revision: {}', submodule_revision)
+            return None
 
         ckey = pkg_cache_key(submodule_url)
         root_cache_dir = os.path.abspath(
@@ -111,16 +155,10 @@ def _process_submodules(opts, cache_dir, work_dir, revision):
         postfix_path = os.path.split(submodule_path)
         sm_work_dir = os.path.join(work_dir, *postfix_path)
 
-        if not _workdir_extract(
-                opts, sm_cache_dir, sm_work_dir, submodule_revision):
-            return False
-
-        # process nested submodules
-        if not _process_submodules(
-                opts, sm_cache_dir, sm_work_dir, submodule_revision):
-            return False
+        submodules.append((submodule_path, sm_cache_dir, sm_work_dir,
+            submodule_revision))
 
-    return True
+    return submodules
 
 
 def _workdir_extract(opts, cache_dir, work_dir, revision):
@@ -153,17 +191,15 @@ def _workdir_extract(opts, cache_dir, work_dir, revision):
         err('unable to checkout revision')
         return False
 
+    # the checkout has updated the repository; ensure future lookups observe
+    # the updated state
+    GIT.release(git_dir)
+
     verbose('ensure target revision is up-to-date in work tree')
     origin_revision = f'origin/{revision}'
-    output = []
-    if GIT.execute([git_dir, 'rev-parse', '--quiet', '--verify',
-            origin_revision], quiet=True, capture=output):
-        remote_revision = ''.join(output)
-
-        output = []
-        GIT.execute([git_dir, 'rev-parse', '--quiet', '--verify', 'HEAD'],
-            quiet=True, capture=output)
-        local_revision = ''.join(output)
+    remote_revision = GIT.resolve(git_dir, origin_revision)
+    if remote_revision:
+        local_revision = GIT.resolve(git_dir, 'HEAD') or ''
 
         debug('remote revision: {}', remote_revision)
         debug('local revision: {}', local_revision)
@@ -185,11 +221,10 @@ diverged revision detected; attempting to correct...
                 err('unable to checkout revision')
                 return False
 
+            GIT.release(git_dir)
+
     # always dump git hash to aid in logging
-    output = []
-    GIT.execute([git_dir, 'rev-parse', '--quiet', '--verify', 'HEAD'],
-        quiet=True, capture=output)
-    local_revision = ''.join(output)
+    local_revision = GIT.resolve(git_dir, 'HEAD') or ''
     if revision != local_revision:
         log(f'working tree hash: {local_revision}')
 
@@ -3,16 +3,21 @@
 
 from releng_tool.packages import pkg_cache_key
 from releng_tool.tool.git import GIT
+from releng_tool.tool.git import GIT_CACHE_LOCKS
+from releng_tool.tool.git import GIT_SUBMODULE_JOBS
 from releng_tool.util.io_mkdir import mkdir
 from releng_tool.util.io_remove import path_remove
 from releng_tool.util.log import debug
 from releng_tool.util.log import err
 from releng_tool.util.log import log
 from releng_tool.util.log import note
+from releng_tool.util.log import releng_log_task
 from releng_tool.util.log import verbose
 from releng_tool.util.log import warn
 from releng_tool.util.strccenum import StrCcEnum
+from releng_tool.util.task_pool import run_tasks
 import os
+import re
 
 
 class GitExistsType(StrCcEnum):
@@ -35,6 +40,9 @@ class GitExistsType(StrCcEnum):
     MISSING = 'missing'
     MISSING_HASH = 'missing_hash'
 
+# pattern matching a full (sha-1 or sha-256) object hash
+FULL_HASH_PATTERN = re.compile(r'[0-9a-f]{40}|[0-9a-f]{64}')
+
 # types indicating a revision exists
 REVISION_EXISTS = [
     GitExistsType.EXISTS_BRANCH,
@@ -83,6 +91,38 @@ def fetch_default(opts):
         the fetched cache directory; ``None`` if fetching has failed
     """
 
+    cache_dir = opts.cache_dir
+
+    # fetch the repository, ensuring no other package (or submodule) sharing
+    # this cache directory is populating the cache at the same time
+    with GIT_CACHE_LOCKS.hold(cache_dir):
+        fetched, updated = _fetch_repository(opts)
+
+    if not fetched:
+        return None
+
+    if not updated:
+        return cache_dir
+
+    # fetch submodules (if configured to do so)
+    if opts._git_submodules:
+        if not _fetch_submodules(opts, cache_dir, opts.revision):
+            return None
+
+    return cache_dir
+
+
+def _fetch_repository(opts):
+    """
+    fetch a package's repository into its cache directory
+
+    Args:
+        opts: fetch options
+
+    Returns:
+        a 2-tuple (if the fetch has succeeded; and if the cache was updated)
+    """
+
     cache_dir = opts.cache_dir
     name = opts.name
     revision = opts.revision
@@ -95,39 +135,40 @@ def fetch_default(opts):
         if erv in REVISION_EXISTS:
             # ensure configuration is properly synchronized
             if not _sync_git_configuration(opts):
-                return None
+                return False, False
 
             # if no explicit ignore-cache request and if the revision is a
             # branch, force ignore-cache on and allow fetching to proceed
             if opts.ignore_cache is None and erv == GitExistsType.EXISTS_BRANCH:
                 opts.ignore_cache = True
-            # return cache dir if not verifying or verification succeeds
+            # cache is ready if not verifying or verification succeeds
             elif not opts._git_verify_revision or _verify_revision(
                     git_dir, revision, quiet=True):
-                return cache_dir
+                return True, False
 
     note('fetching {}...', name)
 
     # validate any cache directory (if one exists)
     has_cache, bad_validation = _validate_cache(cache_dir)
     if bad_validation:
-        return None
+        return False, False
 
     # if we have no cache for this repository, build one
     if not has_cache:
         if not mkdir(cache_dir):
-            return None
+            return False, False
 
         if not _create_bare_git_repo(cache_dir):
-            return None
+            return False, False
 
     # ensure configuration is properly synchronized
     if not _sync_git_configuration(opts):
-        return None
+        return False, False
 
     # fetch sources for this repository
-    if not _fetch_srcs(opts, cache_dir, revision, refspecs=opts._git_refspecs):
-        return None
+    if not _fetch_srcs(opts, cache_dir, revision, refspecs=opts._git_refspecs,
+            site=opts.site):
+        return False, False
 
     # verify revision (if configured to check it)
     if opts._git_verify_revision:
@@ -141,17 +182,13 @@ is signed and that the package's public key has been registered in the system.
 
       Package: {}
      Revision: {}''', name, revision)
-            return None
+            return False, False
 
-    # fetch submodules (if configured to do so)
-    if opts._git_submodules:
-        if not _fetch_submodules(opts, cache_dir, revision):
-            return None
-
-    return cache_dir
+    return True, True
 
 
-def _fetch_srcs(opts, cache_dir, revision, desc=None, refspecs=None):
+def _fetch_srcs(opts, cache_dir, revision, desc=None, refspecs=None,
+        site=None):
     """
     invokes a git fetch call of the configured origin into a bare repository
 
@@ -170,6 +207,7 @@ def _fetch_srcs(opts, cache_dir, revision, desc=None, refspecs=None):
         revision: expected revision desired from the repository
         desc (optional): description to use for error message
         refspecs (optional): additional refspecs to add to the fetch call
+        site (optional): the site of the configured origin
 
     Returns:
         ``True`` if the fetch was successful; ``False`` otherwise
@@ -203,14 +241,12 @@ def _fetch_srcs(opts, cache_dir, revision, desc=None, refspecs=None):
     # if a revision is provided, first attempt to do a revision-specific fetch
     quick_fetch = 'releng.git.no_quick_fetch' not in opts._quirks
     if revision and quick_fetch:
-        ls_cmd = [
-            'ls-remote',
-            '--exit-code',
-            'origin',
-        ]
+        # query the references available on the remote (shared between all
+        # packages/submodules using the same remote)
+        remote_refs = GIT.remote_refs(git_dir, site or git_dir) or {}
+
         debug('checking if tag exists on remote')
-        if GIT.execute([*ls_cmd, '--tags', f'refs/tags/{revision}'],
-                cwd=cache_dir, quiet=True):
+        if f'refs/tags/{revision}' in remote_refs:
             debug('attempting a tag reference fetch operation')
             fetch_cmd = list(prepared_fetch_cmd)
             fetch_cmd.append(f'+refs/tags/{revision}:refs/tags/{revision}')
@@ -219,11 +255,11 @@ def _fetch_srcs(opts, cache_dir, revision, desc=None, refspecs=None):
 
             if GIT.execute(fetch_cmd, cwd=cache_dir):
                 debug('found the reference')
+                GIT.release(git_dir)
                 return True
 
         debug('checking if reference exists on remote')
-        if GIT.execute([*ls_cmd, '--heads', f'refs/heads/{revision}'],
-                cwd=cache_dir, quiet=True):
+        if f'refs/heads/{revision}' in remote_refs:
             debug('attempting a head reference fetch operation')
             fetch_cmd = list(prepared_fetch_cmd)
             fetch_cmd.append(
@@ -233,6 +269,7 @@ def _fetch_srcs(opts, cache_dir, revision, desc=None, refspecs=None):
 
             if GIT.execute(fetch_cmd, cwd=cache_dir):
                 debug('found the reference')
+                GIT.release(git_dir)
                 return True
 
     # fetch standard (and configured) refspecs
@@ -256,6 +293,9 @@ def _fetch_srcs(opts, cache_dir, revision, desc=None, refspecs=None):
         err('unable to fetch branches/tags from remote repository')
         return False
 
+    # the repository has been updated; ensure future lookups observe it
+    GIT.release(git_dir)
+
     if revision:
         verbose('verifying target revision exists')
         exists_state = revision_exists(git_dir, revision)
@@ -272,6 +312,8 @@ def _fetch_srcs(opts, cache_dir, revision, desc=None, refspecs=None):
                 err('unable to unshallow fetch state')
                 return False
 
+            GIT.release(git_dir)
+
             if revision_exists(git_dir, revision) not in REVISION_EXISTS:
                 err(f'unable to find matching revision in {revision}\n'
                     f' (revision: {desc})')
@@ -299,29 +341,25 @@ def revision_exists(git_dir, revision):
         a value of ``GitExistsType``
     """
 
-    if GIT.execute([git_dir, 'rev-parse', '--quiet', '--verify',
-            'refs/tags/' + revision], quiet=True):
+    # object lookups are performed through a shared query process for the
+    # repository, avoiding a new git process for each lookup
+    if GIT.resolve(git_dir, 'refs/tags/' + revision):
         return GitExistsType.EXISTS_TAG
 
-    output = []
-    if not GIT.execute([git_dir, 'rev-parse', '--quiet', '--verify',
-            revision], quiet=True, capture=output):
-        if not GIT.execute([git_dir, 'rev-parse', '--quiet', '--verify',
-                'origin/' + revision], quiet=True, capture=output):
-            return GitExistsType.MISSING
+    oid = GIT.resolve(git_dir, revision)
+    if not oid:
+        # a full hash-provided revision which is not found in the repository
+        if FULL_HASH_PATTERN.fullmatch(revision):
+            return GitExistsType.MISSING_HASH
 
-    # confirm a hash-provided revision exists
-    #
-    # A call to `rev-parse` with a full hash may succeed even through the
-    # hash does not exist in a repository (short hashes are valid though).
-    # To handle this case, check if the revision matches the returned hash
-    # valid provided. If so, perform a `cat-file` request to ensure the long
-    # hash entry is indeed a valid commit.
-    if output and output[0] == revision:
-        if GIT.execute([git_dir, 'cat-file', '-t', revision], quiet=True):
-            return GitExistsType.EXISTS_HASH
+        oid = GIT.resolve(git_dir, 'origin/' + revision)
+        if not oid:
+            return GitExistsType.MISSING
 
-        return GitExistsType.MISSING_HASH
+    # a resolved object which matches the revision indicates the revision
+    # is an (existing) hash
+    if oid == revision:
+        return GitExistsType.EXISTS_HASH
 
     return GitExistsType.EXISTS_BRANCH
 
@@ -452,7 +490,9 @@ def _fetch_submodules(opts, cache_dir, revision):
     Using a provided bare repository, submodules configured at the provided
     revision will be fetched into the bare repository's modules directory. If it
     has been detected that a submodule contains additional submodules, they will
-    also be fetched into a cache directory.
+    also be fetched into a cache directory. Submodules are fetched concurrently,
+    where the cache directory of each submodule is locked while being fetched
+    (since other packages may share the same submodule).
 
     Args:
         opts: fetch options
@@ -462,6 +502,40 @@ def _fetch_submodules(opts, cache_dir, revision):
     Returns:
         ``True`` if submodules have been processed; ``False`` otherwise
     """
+
+    submodules = _find_submodules(opts, cache_dir, revision)
+    if submodules is None:
+        return False
+
+    def fetch_submodule(submodule):
+        name, sm_cache_dir, sm_revision, site = submodule
+
+        # fetch/cache the submodule repository
+        with GIT_CACHE_LOCKS.hold(sm_cache_dir):
+            if not _fetch_submodule(opts, name, sm_cache_dir, sm_revision,
+                    site):
+                return None
+
+        # process nested submodules
+        return _find_submodules(opts, sm_cache_dir, sm_revision)
+
+    return run_tasks(releng_log_task(fetch_submodule), submodules,
+        GIT_SUBMODULE_JOBS)
+
+
+def _find_submodules(opts, cache_dir, revision):
+    """
+    find the submodules on a provided cache/bar repository
+
+    Args:
+        opts: fetch options
+        cache_dir: the cache/bare repository
+        revision: the revision (branch, tag, hash) to inspect
+
+    Returns:
+        a list of 4-tuples (name, cache directory, revision and site) for each
+        submodule; ``None`` if the submodules could not be determined
+    """
     assert revision
 
     git_dir = '--git-dir=' + cache_dir
@@ -476,14 +550,15 @@ def _fetch_submodules(opts, cache_dir, revision):
         rv, raw_submodules = GIT.execute_rv(git_dir, 'show', submodule_ref)
         if rv != 0:
             verbose('no git submodules file detected for this revision')
-            return True
+            return []
 
     debug('parsing git submodules file...')
     cfg = GIT.parse_cfg_str(raw_submodules)
     if not cfg:
         verbose('no git submodules file detected for this revision')
-        return False
+        return None
 
+    submodules = []
     for sec_name in cfg.sections():
         if not sec_name.startswith('submodule'):
             continue
@@ -503,7 +578,7 @@ def _fetch_submodules(opts, cache_dir, revision):
         rv, submodule_revision = GIT.execute_rv(git_dir, 'rev-parse', rev_ref)
         if rv != 0:
             err(f'unable to determine submodule revision: {submodule_path}')
-            return False
+            return None
 
         debug('submodule revision: {}', submodule_revision)
 
@@ -520,18 +595,12 @@ def _fetch_submodules(opts, cache_dir, revision):
             err('unable to process submodule pathed outside of bare repository')
             verbose('submodule expected base: {}', check_common)
             verbose('submodule absolute path: {}', check_abs)
-            return False
+            return None
 
-        # fetch/cache the submodule repository
-        if not _fetch_submodule(opts, submodule_path, submodule_cache_dir,
-                submodule_revision, submodule_url):
-            return False
+        submodules.append((submodule_path, submodule_cache_dir,
+            submodule_revision, submodule_url))
 
-        # process nested submodules
-        if not _fetch_submodules(opts, submodule_cache_dir, submodule_revision):
-            return False
-
-    return True
+    return submodules
 
 
 def _fetch_submodule(opts, name, cache_dir, revision, site):
@@ -585,7 +654,7 @@ def _fetch_submodule(opts, name, cache_dir, revision, site):
 
     # fetch sources for this submodule
     desc = f'submodule ({opts.name}): {name}'
-    return _fetch_srcs(opts, cache_dir, revision, desc=desc)
+    return _fetch_srcs(opts, cache_dir, revision, desc=desc, site=site)
 
 
 def _validate_cache(cache_dir):
@@ -644,16 +713,15 @@ def _verify_revision(git_dir, revision, quiet=False):
     else:
         verbose('verifying the gpg signature on the target revision')
 
-    if GIT.execute([git_dir, 'rev-parse', '--quiet',
-            '--verify', revision + '^{tag}'], quiet=True):
+    if GIT.resolve(git_dir, revision + '^{tag}'):
         verified_cmd = 'verify-tag'
     else:
         verified_cmd = 'verify-commit'
 
         # acquire the commit if (if not already set), to ensure we can verify
         # against commits or branches
-        rv, revision = GIT.execute_rv(git_dir, 'rev-parse', revision)
-        if rv != 0:
+        revision = GIT.resolve(git_dir, revision)
+        if not revision:
             verbose('failed to determine the commit id for a revision')
             return False
 
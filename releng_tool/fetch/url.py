@@ -1,19 +1,27 @@
 # SPDX-License-Identifier: BSD-2-Clause
 # Copyright releng-tool
 
+from http import HTTPStatus
+from releng_tool.util.hash import update_hashers
+from releng_tool.util.http_pool import HTTP_POOL
+from releng_tool.util.io_mkdir import mkdir
+from releng_tool.util.io_remove import path_remove
+from releng_tool.util.log import debug
 from releng_tool.util.log import err
 from releng_tool.util.log import log
 from releng_tool.util.log import note
+from releng_tool.util.log import verbose
 from releng_tool.util.log import warn
 from urllib.error import HTTPError
-from urllib.request import urlopen
+import json
 import math
 import os
 import random
+import shutil
 import time
 
 #: size of blocks read when downloading a resource
-REQUEST_READ_BLOCKSIZE = 8192
+REQUEST_READ_BLOCKSIZE = 65536
 
 #: total number of retries (including initial request) before giving up
 RETRY_ATTEMPTS = 3
@@ -21,6 +29,9 @@ RETRY_ATTEMPTS = 3
 # the maximum duration (in seconds) to wait for a retry event
 RETRY_DURATION = 10
 
+# extension of the file tracking information about a partial download
+PART_META_EXT = '.meta'
+
 
 def fetch(opts):
     """
@@ -29,6 +40,12 @@ def fetch(opts):
     With provided fetch options (``RelengFetchOptions``), the fetch stage will
     be processed.
 
+    If a partial download file is configured, downloaded content is written
+    into the partial file and moved into the cache file once completed. An
+    interrupted download can then be resumed by a later attempt (using a
+    range request), as long as the server reports the resource has not
+    changed. Requests reuse keep-alive connections when possible.
+
     Args:
         opts: fetch options
 
@@ -43,9 +60,11 @@ def fetch(opts):
 
     note('fetching {}...', name)
 
+    opts._digests = None
+
     attempt = 1
     while True:
-        cache_file, code, msg = _fetch_attempt(opts)
+        cache_file, code, msg, resumable = _fetch_attempt(opts)
         if cache_file:
             return cache_file
 
@@ -53,8 +72,9 @@ def fetch(opts):
         if attempt > RETRY_ATTEMPTS:
             break
 
-        # ignore non-transient errors
-        if code not in [408, 429, 500, 502, 503, 504]:
+        # ignore non-transient errors (unless a partially downloaded
+        # resource can be resumed)
+        if code not in [408, 429, 500, 502, 503, 504] and not resumable:
             break
 
         # we still attempt a retry; first inform the user of the state
@@ -79,25 +99,68 @@ def fetch(opts):
 
 def _fetch_attempt(opts):
     cache_file = opts.cache_file
+    part_file = opts._part_file
     site = opts.site
     urlopen_context = opts._urlopen_context
 
     filename = os.path.basename(cache_file)
 
+    # if hashers have been provided for this resource, calculate the hashes
+    # of the resource while it is being downloaded
+    hashers = None
+    if opts._hashers:
+        hashers = [hasher.copy() for hasher in opts._hashers.values()]
+
+    # if a previous attempt has partially downloaded this resource, request
+    # the remaining content of the resource (if it has not changed)
+    headers = {}
+    offset = 0
+    if part_file:
+        validator = _part_validator(part_file, site)
+        if validator:
+            offset = os.path.getsize(part_file)
+            headers['Range'] = f'bytes={offset}-'
+            headers['If-Range'] = validator
+        else:
+            _part_remove(part_file)
+
+    target_file = part_file or cache_file
     read = 0
+    progressed = False
     log('requesting: ' + site)
     try:
-        with urlopen(site, context=urlopen_context) as rsp:
+        with HTTP_POOL.urlopen(site, headers=headers,
+                context=urlopen_context) as rsp:
+            # only resume if the server provides the expected partial content
+            resumed = False
+            if offset:
+                status = getattr(rsp, 'status', None)
+                content_range = rsp.headers.get('content-range', '')
+                if status == HTTPStatus.PARTIAL_CONTENT and \
+                        content_range.startswith(f'bytes {offset}-'):
+                    verbose('resuming download at {}', display_size(offset))
+                    resumed = True
+                else:
+                    offset = 0
+
             total = 0
             total_str = ''
             if 'content-length' in rsp.headers:
                 try:
-                    total = int(rsp.headers['content-length'])
+                    total = offset + int(rsp.headers['content-length'])
                     total_str = display_size(total)
                 except ValueError:
                     pass
 
-            with open(cache_file, 'wb') as f:
+            if part_file:
+                _part_track(part_file, site, rsp.headers)
+
+            if resumed and hashers and not update_hashers(part_file, hashers):
+                msg = f'unable to read partial download: {part_file}'
+                raise OSError(msg)
+
+            read = offset
+            with open(target_file, 'ab' if resumed else 'wb') as f:
                 while True:
                     buf = rsp.read(REQUEST_READ_BLOCKSIZE)
                     if not buf:
@@ -105,6 +168,9 @@ def _fetch_attempt(opts):
                     read += len(buf)
                     read_str = display_size(read)
 
+                    if 0 < total < read:
+                        break
+
                     if total != read:
                         if total > 0:
                             pct = 100 * float(read) / float(total)
@@ -116,17 +182,145 @@ def _fetch_attempt(opts):
                                  '            ', end='\r')
 
                     f.write(buf)
+                    progressed = True
+
+                    if hashers:
+                        for hasher in hashers:
+                            hasher.update(buf)
     except HTTPError as e:
-        return None, e.code, e
+        # a range request the server cannot satisfy; drop the partial
+        # download and allow the resource to be downloaded from the start
+        if offset and e.code == HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE:
+            _part_remove(part_file)
+            return None, None, e, True
+
+        return None, e.code, e, False
     except Exception as e:
-        return None, None, e
+        return None, None, e, progressed and _part_resumable(part_file, site)
     finally:
         # cleanup any download progress prints
         if read > 0:
             log('')
 
+    # verify the size of the resource matches the length advertised by the
+    # server (if any) to help detect truncated downloads
+    if 0 < total != read:
+        msg = (f'unexpected download size: {read} bytes '
+            f'(expected {total} bytes)')
+
+        # a truncated download may be resumed; otherwise, the partial
+        # download is unusable
+        if read < total and _part_resumable(part_file, site):
+            return None, None, msg, progressed
+
+        if part_file:
+            _part_remove(part_file)
+        return None, None, msg, False
+
+    if part_file:
+        try:
+            shutil.move(part_file, cache_file)
+        except OSError as e:
+            return None, None, e, False
+        _part_remove(part_file)
+
     log('completed download ({})', display_size(read))
-    return cache_file, None, None
+
+    if hashers:
+        opts._digests = dict(zip(opts._hashers, hashers, strict=True))
+
+    return cache_file, None, None, False
+
+
+def _part_remove(part_file):
+    """
+    remove a partial download (and any tracked information)
+
+    Args:
+        part_file: the partial download file
+    """
+
+    path_remove(part_file, quiet=True)
+    path_remove(part_file + PART_META_EXT, quiet=True)
+
+
+def _part_resumable(part_file, site):
+    """
+    return whether a partial download can be resumed
+
+    Args:
+        part_file: the partial download file (if any)
+        site: the site of the resource
+
+    Returns:
+        whether the partial download can be resumed
+    """
+
+    return bool(part_file) and _part_validator(part_file, site) is not None
+
+
+def _part_track(part_file, site, headers):
+    """
+    track validators for a partial download
+
+    Stores the entity tag and last-modified time provided by a server for a
+    resource being downloaded. These values are used to help ensure a
+    download is only resumed if the resource has not changed.
+
+    Args:
+        part_file: the partial download file
+        site: the site of the resource
+        headers: the response headers
+    """
+
+    meta = {
+        'etag': headers.get('etag'),
+        'last-modified': headers.get('last-modified'),
+        'site': site,
+    }
+
+    if not mkdir(os.path.dirname(part_file)):
+        return
+
+    try:
+        with open(part_file + PART_META_EXT, 'w', encoding='utf_8') as f:
+            json.dump(meta, f)
+    except OSError:
+        debug('unable to track partial download: {}', part_file)
+
+
+def _part_validator(part_file, site):
+    """
+    return the validator to use for resuming a partial download
+
+    Args:
+        part_file: the partial download file
+        site: the site of the resource
+
+    Returns:
+        the validator to use for an ``If-Range`` header; ``None`` if the
+        partial download cannot be resumed
+    """
+
+    if not os.path.isfile(part_file) or not os.path.getsize(part_file):
+        return None
+
+    try:
+        with open(part_file + PART_META_EXT, encoding='utf_8') as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if not isinstance(meta, dict) or meta.get('site') != site:
+        return None
+
+    # only strong entity tags can be used for range requests
+    etag = meta.get('etag')
+    if etag and not etag.startswith('W/'):
+        return etag
+
+    return meta.get('last-modified')
+
 
 def display_size(val):
     """
@@ -24,6 +24,7 @@ DEFAULT_DL_DIR = 'dl'             # default download container directory
 DEFAULT_HOST_DIR = 'host'         # default host container directory
 DEFAULT_IMAGES_DIR = 'images'     # default images container directory
 DEFAULT_LICENSE_DIR = 'licenses'  # default licenses container directory
+DEFAULT_LOGS_DIR = 'logs'         # default logs container directory
 DEFAULT_OUTPUT_DIR = 'output'     # default output container directory
 DEFAULT_PKG_DIR = 'package'       # default package container directory
 DEFAULT_STAGING_DIR = 'staging'   # default staging container directory
@@ -57,6 +58,7 @@ class RelengEngineOptions:
             be forwarded to the releng-tool project's configuration
 
     Attributes:
+        artifact_cache_dir: directory container for cached package outputs
         assets_dir: directory container for cache/download directories
         build_dir: directory container for all builds
         cache_dir: directory container for cache (vcs bare sources)
@@ -75,6 +77,7 @@ class RelengEngineOptions:
         environment: environment options to apply
         extern_pkg_dirs: external package directories (if any)
         extract_override: dictionary to override extraction commands
+        fetch_jobs: number of packages to fetch at a given time
         ff_devmode: the file flag path for development mode detection
         ff_local_srcs: the file flag path for local sources mode detection
         force: whether or not the force flag is set
@@ -89,10 +92,13 @@ class RelengEngineOptions:
         license_header: header content for a generated license file (if any)
         lint_max_version: maximum lint version to check (if any)
         local_srcs: dictionary of local source configurations
+        logs_dir: directory container for package log files
         network_isolation: network isolation for packages non-fetch stages
         no_color_out: whether or not colored messages are shown
         only_mirror: require mirror for external packages
         out_dir: directory container for all output data
+        package_jobs: number of packages to process at a given time
+        package_logs: whether package stages are logged into log files
         pkg_action: the specific package-action to perform (if any)
         prerequisites: list of required host tools (if any)
         profiles: the active profiles for this run
@@ -101,6 +107,7 @@ class RelengEngineOptions:
         revisions: dictionary to configure revision values
         root_dir: directory container for all (configuration, output, etc.)
         sbom_format: format(s) to use for sbom generation
+        source_store_dir: directory container for unpacked package sources
         spdx: spdx license database
         staging_dir: directory container for staged content
         symbols_dir: directory container for symbols content
@@ -115,6 +122,7 @@ class RelengEngineOptions:
         vsdevcmd_products: vswhere products to search for
     """
     def __init__(self, args=None, forward_args=None):
+        self.artifact_cache_dir = None
         self.assets_dir = None
         self.build_dir = None
         self.cache_dir = None
@@ -133,6 +141,7 @@ class RelengEngineOptions:
         self.environment = {}
         self.extern_pkg_dirs = []
         self.extract_override = None
+        self.fetch_jobs = None
         self.ff_devmode = None
         self.ff_local_srcs = None
         self.force = False
@@ -147,10 +156,13 @@ class RelengEngineOptions:
         self.license_header = None
         self.lint_max_version = None
         self.local_srcs = {}
+        self.logs_dir = None
         self.network_isolation = False
         self.no_color_out = False
         self.only_mirror = False
         self.out_dir = None
+        self.package_jobs = None
+        self.package_logs = False
         self.pkg_action = None
         self.prerequisites = []
         self.profiles = []
@@ -159,6 +171,7 @@ class RelengEngineOptions:
         self.revisions = None
         self.root_dir = None
         self.sbom_format = []
+        self.source_store_dir = None
         self.spdx = {}
         self.staging_dir = None
         self.symbols_dir = None
@@ -192,6 +205,8 @@ class RelengEngineOptions:
         Args:
             args: the arguments
         """
+        if args.artifact_cache_dir:
+            self.artifact_cache_dir = os.path.abspath(args.artifact_cache_dir)
         if args.assets_dir:
             self.assets_dir = os.path.abspath(args.assets_dir)
         if args.cache_dir:
@@ -210,10 +225,13 @@ class RelengEngineOptions:
         self.conf_point = args.config
         self.debug = args.debug
         self.debug_extended = args.debug_extended
+        self.fetch_jobs = args.fetch_jobs
         self.force = args.force
         self.jobs = self.jobsconf = (args.jobs or 0)
         self.no_color_out = args.nocolorout
         self.only_mirror = args.only_mirror
+        self.package_jobs = args.package_jobs
+        self.package_logs = args.package_logs
         self.release = args.release
         self.verbose = args.verbose
 
@@ -223,6 +241,8 @@ class RelengEngineOptions:
             self.injected_kv = args.injected_kv
         if args.sbom_format:
             self.sbom_format = args.sbom_format
+        if args.source_store_dir:
+            self.source_store_dir = os.path.abspath(args.source_store_dir)
 
         # add any new profile entries
         if args.profile:
@@ -331,6 +351,10 @@ class RelengEngineOptions:
         environment variable.
         """
 
+        if not self.artifact_cache_dir:
+            self.artifact_cache_dir = os.environ.get('RELENG_ARTIFACT_CACHE_DIR')
+            if self.artifact_cache_dir:
+                verbose('configured artifact cache directory from environment')
         if not self.assets_dir:
             self.assets_dir = os.environ.get('RELENG_ASSETS_DIR')
             if self.assets_dir:
@@ -351,6 +375,10 @@ class RelengEngineOptions:
             self.out_dir = os.environ.get('RELENG_OUTPUT_DIR')
             if self.out_dir:
                 verbose('configured output directory from environment')
+        if not self.source_store_dir:
+            self.source_store_dir = os.environ.get('RELENG_SOURCE_STORE_DIR')
+            if self.source_store_dir:
+                verbose('configured source store directory from environment')
 
         if not self.jobs and 'RELENG_PARALLEL_LEVEL' in os.environ:
             with contextlib.suppress(ValueError):
@@ -359,6 +387,16 @@ class RelengEngineOptions:
                 if self.jobs:
                     verbose('configured job count from environment')
 
+        if self.fetch_jobs is None and 'RELENG_FETCH_JOBS' in os.environ:
+            with contextlib.suppress(ValueError):
+                self.fetch_jobs = int(os.environ.get('RELENG_FETCH_JOBS'))
+                verbose('configured fetch job count from environment')
+
+        if self.package_jobs is None and 'RELENG_PACKAGE_JOBS' in os.environ:
+            with contextlib.suppress(ValueError):
+                self.package_jobs = int(os.environ.get('RELENG_PACKAGE_JOBS'))
+                verbose('configured package job count from environment')
+
         rlmv = os.environ.get('RELENG_LINT_MAX_VERSION')
         if rlmv:
             try:
@@ -431,6 +469,8 @@ class RelengEngineOptions:
             self.images_dir = join(images_base_dir, DEFAULT_IMAGES_DIR)
         if not self.license_dir:
             self.license_dir = join(self.out_dir, DEFAULT_LICENSE_DIR)
+        if not self.logs_dir:
+            self.logs_dir = join(self.out_dir, DEFAULT_LOGS_DIR)
         if not self.staging_dir:
             self.staging_dir = join(self.out_dir, DEFAULT_STAGING_DIR)
         if not self.symbols_dir:
@@ -462,6 +502,20 @@ class RelengEngineOptions:
         if self.jobsconf < 0:
             self.jobs = max(self.jobs + self.jobsconf, 1)
 
+        # packages are fetched one at a time unless explicitly configured; a
+        # fetch job count of zero will use the calculated job count
+        if self.fetch_jobs is None:
+            self.fetch_jobs = 1
+        elif self.fetch_jobs < 1:
+            self.fetch_jobs = self.jobs
+
+        # packages are processed one at a time unless explicitly configured; a
+        # package job count of zero will use the calculated job count
+        if self.package_jobs is None:
+            self.package_jobs = 1
+        elif self.package_jobs < 1:
+            self.package_jobs = self.jobs
+
     def _calculate_physical_cores(self) -> int:
         """
         calculate the number of physical cores detected on the platform
@@ -3,6 +3,7 @@
 
 from __future__ import annotations
 from releng_tool.defs import VOID
+from releng_tool.packages.jobserver import granted_jobs
 from releng_tool.packages.package import RelengPackage
 from releng_tool.util.interpret import interpret_dict
 from releng_tool.util.interpret import interpret_opts
@@ -58,6 +59,10 @@ def clamp_jobs(pkg: RelengPackage, jobs: int) -> int | None:
     A package can define the limit of jobs to use based on a package's
     configuration over the releng-tool's limit. This call checks these
     configurations to see if an override is needed and returns this value.
+    If the package is being processed with a granted job budget (when
+    processing multiple packages at the same time), the budget will be used.
+    A package's fixed job count is never permitted to exceed its granted
+    budget, where the package will use the lesser of the two counts.
 
     Args:
         pkg: the package
@@ -68,6 +73,16 @@ def clamp_jobs(pkg: RelengPackage, jobs: int) -> int | None:
     """
     final_jobs = None
 
+    # if a job budget has been granted for this package, the budget has
+    # already been limited by any package-specific configuration; a fixed
+    # job count is capped to the budget since the package cannot use more
+    # jobs than the tokens it holds
+    budget = granted_jobs()
+    if budget:
+        if pkg.fixed_jobs:
+            return min(pkg.fixed_jobs, budget)
+        return budget if budget != jobs else None
+
     # if package defines an explicit fixed jobs count, use is
     if pkg.fixed_jobs:
         final_jobs = pkg.fixed_jobs
@@ -0,0 +1,383 @@
+# SPDX-License-Identifier: BSD-2-Clause
+# Copyright releng-tool
+
+from __future__ import annotations
+from releng_tool.defs import VcsType
+from releng_tool.util.io_mkdir import mkdir
+from releng_tool.util.io_remove import path_remove
+from releng_tool.util.log import debug
+from releng_tool.util.log import verbose
+from releng_tool.util.log import warn
+import hashlib
+import json
+import os
+import platform
+import shutil
+import sys
+import tarfile
+import tempfile
+
+
+# extension used for artifact cache entries
+ARTIFACT_EXT = '.tar'
+
+# whether extraction filters are supported by this interpreter
+FILTER_SUPPORTED = hasattr(tarfile, 'data_filter')
+
+
+class ArtifactEntryError(ValueError):
+    """
+    raised when an unexpected entry is detected in a cached artifact
+    """
+
+
+class RelengArtifactCache:
+    """
+    a content-addressed cache of package outputs
+
+    Provides a means to store the outputs a package installs into the
+    staging, target and host directories, keyed by the fingerprint of the
+    package's install stage. When another run (e.g. from another project or
+    workspace using the same cache directory) processes a package with a
+    matching fingerprint, the outputs can be restored from the cache instead
+    of bootstrapping, configuring, building and installing the package again.
+
+    An artifact cache is only used if a cache directory has been configured.
+    Packages using local sources (or any package when running in development
+    mode) are never cached, since their sources may change without changing
+    the package's definition.
+
+    Since a cache may be shared between projects, a cache key tracks the
+    package's install fingerprint (which includes the environment a package
+    is configured with), the host platform and the output directories a
+    package is installed into. Restored entries are validated to ensure no
+    entry (or link) is extracted outside of the output directories.
+
+    Args:
+        opts: options used to configure the engine
+
+    Attributes:
+        cache_dir: the directory holding cached artifacts (if any)
+        opts: options used to configure the engine
+    """
+    def __init__(self, opts):
+        self.opts = opts
+        self.cache_dir = opts.artifact_cache_dir
+
+    def key(self, pkg, fingerprint: str | None) -> str | None:
+        """
+        return the artifact cache key for a package
+
+        Args:
+            pkg: the package
+            fingerprint: the fingerprint of the package's install stage
+
+        Returns:
+            the key; ``None`` if the package's outputs cannot be cached
+        """
+
+        if not self.cache_dir or not fingerprint:
+            return None
+
+        if self.opts.devmode or pkg.local_srcs or \
+                pkg.vcs_type == VcsType.LOCAL:
+            return None
+
+        # (note: outputs may embed the paths they are installed into, such as
+        # runtime search paths or pkg-config files)
+        inputs = {
+            'fingerprint': fingerprint,
+            'machine': platform.machine(),
+            'platform': sys.platform,
+            'roots': self._roots(),
+            'sysroot-prefix': self.opts.sysroot_prefix,
+        }
+
+        data = json.dumps(inputs, sort_keys=True)
+        return hashlib.sha256(data.encode('utf_8')).hexdigest()
+
+    def restore(self, pkg, key: str) -> bool:
+        """
+        restore the outputs of a package from the cache
+
+        Args:
+            pkg: the package
+            key: the artifact cache key
+
+        Returns:
+            ``True`` if the outputs were restored; ``False`` otherwise
+        """
+
+        entry = self._entry(key)
+        if not os.path.isfile(entry):
+            debug('no cached artifacts for {}: {}', pkg.name, key)
+            return False
+
+        verbose('restoring artifacts for {}: {}', pkg.name, entry)
+
+        roots = self._roots()
+
+        try:
+            with tarfile.open(entry) as tar:
+                for member in tar:
+                    root, name = _resolve_member(member.name, roots)
+                    member.name = name
+
+                    # hardlinks are restored from the restored path it links
+                    # to (which may exist in another output directory)
+                    if member.islnk():
+                        _restore_hardlink(member, root, roots)
+                    elif FILTER_SUPPORTED:
+                        tar.extract(member, root, filter=_filter_member)
+                    else:
+                        tar.extract(_filter_member(member, root), root)
+        except (ArtifactEntryError, KeyError, OSError, tarfile.TarError) as e:
+            warn('unable to restore artifacts for {}: {}', pkg.name, e)
+            return False
+
+        return True
+
+    def snapshot(self) -> dict[str, dict[str, tuple[int, int, int]]]:
+        """
+        capture the state of the output directories
+
+        Returns:
+            the snapshot to use when storing the outputs of a package
+        """
+
+        return {name: _scan(root) for name, root in self._roots().items()}
+
+    def store(self, pkg, key: str,
+            snapshot: dict[str, dict[str, tuple[int, int, int]]]) -> bool:
+        """
+        store the outputs of a package into the cache
+
+        Any file, link or directory which has been created or modified in the
+        output directories since the provided snapshot was captured is stored
+        as the package's outputs.
+
+        Args:
+            pkg: the package
+            key: the artifact cache key
+            snapshot: the snapshot captured before the package was installed
+
+        Returns:
+            ``True`` if the outputs were stored; ``False`` otherwise
+        """
+
+        entry = self._entry(key)
+        if not mkdir(os.path.dirname(entry)):
+            return False
+
+        verbose('storing artifacts for {}: {}', pkg.name, entry)
+
+        fd, tmp_entry = tempfile.mkstemp(
+            dir=os.path.dirname(entry), suffix=ARTIFACT_EXT + '.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f, \
+                    tarfile.open(fileobj=f, mode='w') as tar:
+                for name, root in self._roots().items():
+                    previous = snapshot.get(name, {})
+                    for rel, state in sorted(_scan(root).items()):
+                        if previous.get(rel) == state:
+                            continue
+
+                        tar.add(os.path.join(root, rel),
+                            arcname=f'{name}/{rel}', recursive=False)
+
+            # atomically publish the entry, allowing other runs sharing this
+            # cache to never observe a partially written entry
+            os.replace(tmp_entry, entry)
+        except (OSError, tarfile.TarError) as e:
+            warn('unable to store artifacts for {}: {}', pkg.name, e)
+            path_remove(tmp_entry, quiet=True)
+            return False
+
+        return True
+
+    def _entry(self, key: str) -> str:
+        """
+        return the path of a cache entry
+
+        Args:
+            key: the artifact cache key
+
+        Returns:
+            the path
+        """
+
+        return os.path.join(self.cache_dir, key[:2], key + ARTIFACT_EXT)
+
+    def _roots(self) -> dict[str, str]:
+        """
+        return the output directories tracked for a package
+
+        Returns:
+            the output directories keyed by their archive names
+        """
+
+        return {
+            'host': self.opts.host_dir,
+            'staging': self.opts.staging_dir,
+            'target': self.opts.target_dir,
+        }
+
+
+def _filter_member(member: tarfile.TarInfo, dest: str) -> tarfile.TarInfo:
+    """
+    validate an artifact member before it is extracted
+
+    Ensures a member is only extracted inside its output directory; where no
+    parent path of the member resolves outside of the output directory (e.g.
+    through a symbolic link) and any relative symbolic link does not refer
+    outside of the output directory. Absolute symbolic links are permitted,
+    since outputs (e.g. a target's root file system) may define them. Any
+    existing file at the member's path is removed before extraction, to avoid
+    writing into a file shared with another (hardlinked) path.
+
+    Args:
+        member: the member
+        dest: the output directory the member is extracted into
+
+    Returns:
+        the member
+
+    Raises:
+        ArtifactEntryError: if the member is not permitted
+    """
+
+    if not (member.isreg() or member.isdir() or member.issym()):
+        msg = f'unsupported artifact entry type: {member.name}'
+        raise ArtifactEntryError(msg)
+
+    target = _member_path(member.name, dest)
+
+    if member.issym() and not os.path.isabs(member.linkname):
+        link = os.path.normpath(
+            os.path.join(os.path.dirname(member.name), member.linkname))
+        if link == '..' or link.startswith('..' + os.sep):
+            msg = f'artifact link outside of outputs: {member.name}'
+            raise ArtifactEntryError(msg)
+
+    if not member.isdir() and os.path.lexists(target) and \
+            (os.path.islink(target) or not os.path.isdir(target)):
+        os.remove(target)
+
+    return member
+
+
+def _member_path(name: str, dest: str) -> str:
+    """
+    return the path a member is extracted to in an output directory
+
+    Args:
+        name: the name of the member (relative to the output directory)
+        dest: the output directory
+
+    Returns:
+        the path
+
+    Raises:
+        ArtifactEntryError: if the path resolves outside of the directory
+    """
+
+    real_dest = os.path.realpath(dest)
+    parent = os.path.realpath(os.path.join(dest, os.path.dirname(name)))
+    if parent != real_dest and not parent.startswith(real_dest + os.sep):
+        msg = f'artifact entry outside of outputs: {name}'
+        raise ArtifactEntryError(msg)
+
+    return os.path.join(dest, name)
+
+
+def _resolve_member(name: str, roots: dict[str, str]) -> tuple[str, str]:
+    """
+    resolve the output directory and relative path of an artifact member
+
+    Args:
+        name: the name of the member (prefixed with an output's name)
+        roots: the output directories keyed by their archive names
+
+    Returns:
+        the output directory and the member's relative path
+
+    Raises:
+        ArtifactEntryError: if the name does not refer to an output
+    """
+
+    root_name, _, rel = name.partition('/')
+    root = roots.get(root_name)
+    if not root or not rel or os.path.isabs(rel) or '..' in rel.split('/'):
+        msg = f'unexpected artifact entry: {name}'
+        raise ArtifactEntryError(msg)
+
+    return root, rel
+
+
+def _restore_hardlink(member: tarfile.TarInfo, dest: str,
+        roots: dict[str, str]) -> None:
+    """
+    restore a hardlink member from an artifact
+
+    A hardlink member refers to a previously restored member (by its archive
+    name). If a link cannot be created (e.g. outputs on different file
+    systems), the linked file is copied instead.
+
+    Args:
+        member: the member (with a name relative to its output directory)
+        dest: the output directory the member is extracted into
+        roots: the output directories keyed by their archive names
+
+    Raises:
+        ArtifactEntryError: if the member is not permitted
+        OSError: if the link could not be restored
+    """
+
+    src_root, src_rel = _resolve_member(member.linkname, roots)
+    src = _member_path(src_rel, src_root)
+    target = _member_path(member.name, dest)
+
+    if os.path.lexists(target):
+        os.remove(target)
+
+    try:
+        os.link(src, target)
+    except OSError:
+        shutil.copy2(src, target)
+
+
+def _scan(root: str) -> dict[str, tuple[int, int, int]]:
+    """
+    scan the state of all entries in a directory
+
+    Args:
+        root: the directory to scan
+
+    Returns:
+        the mode, size and modification time of each entry (keyed by their
+        relative paths using forward slashes)
+    """
+
+    state = {}
+
+    pending = ['']
+    while pending:
+        rel_dir = pending.pop()
+        try:
+            with os.scandir(os.path.join(root, rel_dir)) as it:
+                entries = list(it)
+        except FileNotFoundError:
+            continue
+
+        for entry in entries:
+            rel = f'{rel_dir}/{entry.name}' if rel_dir else entry.name
+            st = entry.stat(follow_symlinks=False)
+
+            # directories only track their existence
+            if entry.is_dir(follow_symlinks=False):
+                state[rel] = (st.st_mode, 0, 0)
+                pending.append(rel)
+            else:
+                state[rel] = (st.st_mode, st.st_size, st.st_mtime_ns)
+
+    return state
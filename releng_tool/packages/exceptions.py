@@ -39,9 +39,14 @@ class RelengToolCyclicPackageDependency(RelengToolInvalidPackageConfiguration):
     raised when a cyclic package dependency is detected
     """
     def __init__(self, args):
+        cycles = ''.join(
+            '\n (cycle: {})'.format(' -> '.join(cycle))
+            for cycle in args.get('cycles', [])
+        )
+
         super().__init__('''\
-cyclic package dependency detected: {pkg_name}
-'''.strip().format(**args))
+cyclic package dependency detected: {pkg_name}{cycles}
+'''.strip().format(**dict(args, cycles=cycles)))
 
 
 class RelengToolInvalidPackageKeyValue(RelengToolInvalidPackageConfiguration):
@@ -0,0 +1,307 @@
+# SPDX-License-Identifier: BSD-2-Clause
+# Copyright releng-tool
+
+from __future__ import annotations
+from glob import glob
+from releng_tool.util import nullish_coalescing as NC
+from releng_tool.util.exec_context import context_environ
+from releng_tool.util.hash import HASH_READ_BLOCKSIZE
+from releng_tool.util.io_opt_file import opt_file
+import hashlib
+import json
+import os
+
+
+# order of stages where the fingerprint of a stage includes the fingerprint of
+# the stage before it (i.e. a change to a stage's inputs invalidates all later
+# stages)
+STAGE_ORDER = [
+    'fetch',
+    'extract',
+    'patch',
+    'fetch-post',
+    'license',
+    'bootstrap',
+    'configure',
+    'build',
+    'install',
+    'post',
+]
+
+# environment variables which are considered inputs when configuring a package
+# (e.g. toolchain options provided by a user's environment)
+#
+# Note that the path variable is not tracked from a user's environment, since
+# it may vary between shells and includes paths registered by the engine; a
+# path configured by a project is tracked with other environment options.
+ENVIRONMENT_INPUTS = [
+    'AR',
+    'ARCH',
+    'AS',
+    'CC',
+    'CFLAGS',
+    'CPP',
+    'CPPFLAGS',
+    'CROSS_COMPILE',
+    'CXX',
+    'CXXFLAGS',
+    'LD',
+    'LDFLAGS',
+    'LDLIBS',
+    'LIBS',
+    'NM',
+    'OBJCOPY',
+    'OBJDUMP',
+    'PKG_CONFIG',
+    'PKG_CONFIG_LIBDIR',
+    'PKG_CONFIG_PATH',
+    'PKG_CONFIG_SYSROOT_DIR',
+    'RANLIB',
+    'READELF',
+    'STRIP',
+]
+
+# package attributes which are considered inputs for a specific stage
+STAGE_ATTRIBUTES = {
+    'fetch': [
+        'fetch_opts',
+        'git_config',
+        'git_depth',
+        'git_refspecs',
+        'git_submodules',
+        'git_verify_revision',
+        'revision',
+        'site',
+        'vcs_type',
+        'version',
+    ],
+    'extract': [
+        'extract_type',
+        'hash_relaxed',
+        'local_srcs',
+        'no_extraction',
+        'strip_count',
+    ],
+    'patch': [
+        'devmode_patches',
+        'ignore_patches',
+        'patch_subdir',
+    ],
+    'fetch-post': [
+    ],
+    'license': [
+        'license_files',
+    ],
+    'bootstrap': [
+        'build_subdir',
+        'type',
+    ],
+    'configure': [
+        'autotools_autoreconf',
+        'cargo_name',
+        'cmake_build_type',
+        'conf_defs',
+        'conf_env',
+        'conf_opts',
+        'install_type',
+        'make_configure',
+        'meson_build_type',
+        'vsdevcmd',
+        'vsdevcmd_products',
+        'xmake_build_type',
+    ],
+    'build': [
+        'build_defs',
+        'build_env',
+        'build_opts',
+        'python_dist_path',
+        'python_interpreter',
+        'python_setup_type',
+    ],
+    'install': [
+        'cargo_noinstall',
+        'cmake_noinstall',
+        'install_defs',
+        'install_env',
+        'install_opts',
+        'make_noinstall',
+        'meson_noinstall',
+        'python_installer_interpreter',
+        'python_installer_launcher_kind',
+        'python_installer_scheme',
+        'scons_noinstall',
+        'waf_noinstall',
+        'xmake_noinstall',
+    ],
+    'post': [
+    ],
+}
+
+
+class RelengStageFingerprints:
+    """
+    stage fingerprints for packages
+
+    Provides a means to calculate a fingerprint (digest) of the inputs which
+    are used for a package's stage. Inputs can include package options, files
+    from a package's definition directory (e.g. patches and stage scripts) and
+    the fingerprints of dependent packages. The fingerprint of a stage will
+    include the fingerprint of the stage that runs before it. This allows a
+    file flag to track the fingerprint a stage was completed with, to help
+    determine if a stage should be performed again.
+
+    The configuration stage also tracks the environment a package is
+    configured with: known toolchain-related environment variables, any
+    project-defined environment options, injected key-value entries and
+    values defined by the project's configuration script.
+
+    Args:
+        opts: options used to configure the engine
+
+    Attributes:
+        opts: options used to configure the engine
+        script_env: values defined by the project's configuration script
+    """
+    def __init__(self, opts):
+        self.opts = opts
+        self.script_env = {}
+        self._cache = {}
+        self._file_cache = {}
+
+    def fingerprint(self, pkg, stage):
+        """
+        return the fingerprint for a package's stage
+
+        Args:
+            pkg: the package
+            stage: the name of the stage
+
+        Returns:
+            the fingerprint; ``None`` if fingerprints have been disabled
+        """
+
+        if 'releng.disable_stage_fingerprints' in self.opts.quirks:
+            return None
+
+        key = (pkg.name, stage)
+        fingerprint = self._cache.get(key)
+        if fingerprint:
+            return fingerprint
+
+        inputs = {
+            'stage': stage,
+        }
+
+        idx = STAGE_ORDER.index(stage)
+        if idx > 0:
+            inputs['previous'] = self.fingerprint(pkg, STAGE_ORDER[idx - 1])
+
+        for attrib in STAGE_ATTRIBUTES[stage]:
+            inputs[attrib] = getattr(pkg, attrib)
+
+        if stage == 'fetch':
+            inputs['hash-file'] = self._digest_file(pkg.hash_file)
+            inputs['asc-file'] = self._digest_file(pkg.asc_file)
+        elif stage == 'patch':
+            patches = sorted(glob(os.path.join(pkg.def_dir, '*.patch')))
+            inputs['patches'] = {
+                os.path.basename(patch): self._digest_file(patch)
+                for patch in patches
+            }
+        elif stage == 'configure':
+            inputs['prefix'] = NC(pkg.prefix, self.opts.sysroot_prefix)
+            inputs['deps'] = {
+                dep.name: self.fingerprint(dep, STAGE_ORDER[-1])
+                for dep in pkg.deps
+            }
+            inputs['env'] = self._environment()
+            inputs['script-env'] = {
+                key: value for key, value in self.script_env.items()
+                if _is_stable(value)
+            }
+
+        # track any stage-specific script defined for the package
+        if stage in ('patch', 'bootstrap', 'configure', 'build', 'install',
+                'post'):
+            script = os.path.join(pkg.def_dir, f'{pkg.name}-{stage}')
+            script, exists = opt_file(script, warn_deprecated=False)
+            if exists:
+                inputs['script'] = self._digest_file(script)
+
+        data = json.dumps(inputs, default=str, sort_keys=True)
+        fingerprint = hashlib.sha256(data.encode('utf_8')).hexdigest()
+        self._cache[key] = fingerprint
+        return fingerprint
+
+    def _environment(self):
+        """
+        return the environment variables tracked for a package's configuration
+
+        Known toolchain-related variables are tracked from the environment a
+        package is processed with. Environment options defined by a project
+        and injected key-value entries are tracked by their configured values.
+
+        Returns:
+            the tracked environment variables
+        """
+
+        env = context_environ()
+        tracked = {key: env.get(key) for key in ENVIRONMENT_INPUTS}
+        tracked.update(self.opts.environment)
+        tracked.update(self.opts.injected_kv)
+        return tracked
+
+    def _digest_file(self, path):
+        """
+        return the digest of a file's contents
+
+        Args:
+            path: the path of the file
+
+        Returns:
+            the digest; ``None`` if the file does not exist
+        """
+
+        if not path or not os.path.isfile(path):
+            return None
+
+        digest = self._file_cache.get(path)
+        if not digest:
+            hasher = hashlib.sha256()
+            with open(path, 'rb') as f:
+                buf = f.read(HASH_READ_BLOCKSIZE)
+                while buf:
+                    hasher.update(buf)
+                    buf = f.read(HASH_READ_BLOCKSIZE)
+            digest = hasher.hexdigest()
+            self._file_cache[path] = digest
+
+        return digest
+
+
+def _is_stable(value):
+    """
+    check if a value can be consistently tracked in a fingerprint
+
+    Only primitive values (or containers of primitive values) are tracked,
+    since the representation of other objects (e.g. class instances) may
+    change between runs.
+
+    Args:
+        value: the value
+
+    Returns:
+        whether the value can be tracked
+    """
+
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return True
+
+    if isinstance(value, (list, tuple)):
+        return all(_is_stable(entry) for entry in value)
+
+    if isinstance(value, dict):
+        return all(isinstance(key, str) and _is_stable(entry)
+            for key, entry in value.items())
+
+    return False
@@ -0,0 +1,79 @@
+# SPDX-License-Identifier: BSD-2-Clause
+# Copyright releng-tool
+
+from __future__ import annotations
+from collections.abc import Iterator
+from contextlib import contextmanager
+from releng_tool.util.exec_context import active_context
+from releng_tool.util.exec_context import execution_context
+import threading
+
+
+class JobTokenPool:
+    """
+    a pool of job tokens shared between concurrently processed packages
+
+    Provides a jobserver-style pool of tokens used to limit the total number of
+    jobs used across all packages being processed at the same time. Before a
+    package is processed, the package will request a series of tokens from
+    this pool. The amount of tokens granted to a package is the job budget the
+    package can use for its stages (e.g. the number of jobs passed into a
+    build tool). The granted tokens are returned to the pool once a package
+    has completed processing.
+
+    Args:
+        tokens: the total number of tokens in the pool
+
+    Attributes:
+        tokens: the total number of tokens in the pool
+    """
+    def __init__(self, tokens: int):
+        self.tokens = max(tokens, 1)
+        self._available = self.tokens
+        self._cond = threading.Condition()
+
+    @contextmanager
+    def grant(self, desired: int, share: int | None = None) -> Iterator[int]:
+        """
+        acquire tokens from the pool for a context
+
+        Blocks until at least a single token is available. The number of
+        tokens granted will not exceed the desired count, the provided share
+        (if any) or the number of tokens available at the time of acquisition.
+        While in this context, the granted job count can be queried using
+        ``granted_jobs``.
+
+        Args:
+            desired: the number of tokens desired
+            share (optional): the maximum number of tokens to grant
+
+        Yields:
+            the number of tokens granted
+        """
+
+        limit = max(min(desired, share or desired), 1)
+
+        with self._cond:
+            self._cond.wait_for(lambda: self._available > 0)
+            granted = min(limit, self._available)
+            self._available -= granted
+
+        try:
+            with execution_context(jobs=granted):
+                yield granted
+        finally:
+            with self._cond:
+                self._available += granted
+                self._cond.notify_all()
+
+
+def granted_jobs() -> int | None:
+    """
+    return the number of jobs granted for the active execution context
+
+    Returns:
+        the granted job count; ``None`` if no jobs have been granted
+    """
+
+    ctx = active_context()
+    return ctx.jobs if ctx else None
@@ -2,6 +2,7 @@
 # Copyright releng-tool
 
 from __future__ import annotations
+from collections import deque
 from dataclasses import dataclass
 from dataclasses import field
 from pathlib import Path
@@ -9,6 +10,7 @@ from releng_tool.defs import DEFAULT_CMAKE_BUILD_TYPE
 from releng_tool.defs import DEFAULT_ENTRY
 from releng_tool.defs import DEFAULT_MESON_BUILD_TYPE
 from releng_tool.defs import GBL_LSRCS
+from releng_tool.defs import GlobalAction
 from releng_tool.defs import PackageInstallType
 from releng_tool.defs import PackageType
 from releng_tool.defs import PythonSetupType
@@ -40,6 +42,7 @@ from releng_tool.packages.exceptions import RelengToolUnknownPackageType
 from releng_tool.packages.exceptions import RelengToolUnknownPythonSetupType
 from releng_tool.packages.exceptions import RelengToolUnknownVcsType
 from releng_tool.packages.package import RelengPackage
+from releng_tool.packages.package_cache import RelengPackageCache
 from releng_tool.packages.site import site_vcs
 from releng_tool.util.env import env_wrap
 from releng_tool.util.env import extend_script_env
@@ -51,6 +54,7 @@ from releng_tool.util.log import debug
 from releng_tool.util.log import verbose
 from releng_tool.util.log import warn
 from releng_tool.util.path import P
+from releng_tool.util.script_cache import track_scripts
 from releng_tool.util.sort import TopologicalSorter
 from releng_tool.util.string import expand
 from typing import Any
@@ -104,20 +108,25 @@ class RelengPackageManager:
         opts: options used to configure the package manager (same as engine)
         registry: registry for extension information (same as engine)
         dvcs_cache (optional): whether or not to permit dvcs caching
+        script_cache (optional): whether or not to permit caching of compiled
+                                  package definitions and loaded packages
 
     Attributes:
         opts: options used to configure the package manager
         registry: registry for extension information
         script_env: package script environment dictionary
     """
-    def __init__(self, opts, registry, dvcs_cache=False):
+    def __init__(self, opts, registry, dvcs_cache=False, script_cache=False):
         self.opts = opts
         self.registry = registry
         self.script_env = {}
         self._dvcs_cache = {}
         self._dvcs_cache_enabled = dvcs_cache
         self._dvcs_cache_fname = os.path.join(opts.cache_dir, DVCS_CACHE_FNAME)
+        self._interim_keys = []
         self._key_types = {}
+        self._pkg_cache = RelengPackageCache(opts)
+        self._script_cache_enabled = script_cache
 
         # load any cached dvcs information
         self._load_dvcs_cache()
@@ -204,6 +213,14 @@ class RelengPackageManager:
         for key in Rpk:
             assert key in self._key_types, f'key {key} is missing'
 
+        # track keys which are pre-allocated with an iterable when loading
+        # package definition scripts
+        for key, type_ in self._key_types.items():
+            if type_ in (PkgKeyType.DICT_STR_PSTR, PkgKeyType.OPTS):
+                self._interim_keys.append((key, dict))
+            elif type_ == PkgKeyType.STRS:
+                self._interim_keys.append((key, list))
+
     def is_defless_package(self, pkg_def_dir, name):
         """
         determine if the provided package is considered a package
@@ -257,6 +274,44 @@ class RelengPackageManager:
         not play a role in the required order of the releng process, a
         first-configured first-returned approach is used.
 
+        When only printing package names, packages loaded from a previous
+        run with the same inputs will be returned without running any package
+        definition scripts (since no package script environment is needed).
+
+        Args:
+            names: the names of packages to load
+
+        Returns:
+            returns an ordered list of packages to use
+
+        Raises:
+            RelengToolInvalidPackageConfiguration: when an error has been
+                                                    detected loading the package
+        """
+        cache_entry = None
+        if self._script_cache_enabled and \
+                self.opts.gbl_action == GlobalAction.PRINTPKGS:
+            cache_entry = self._pkg_cache.entry(names)
+            if cache_entry:
+                sorted_pkgs = self._pkg_cache.fetch(cache_entry)
+                if sorted_pkgs is not None:
+                    return sorted_pkgs
+
+        if not cache_entry:
+            return self._load(names)
+
+        # track every script run while loading, to validate a cached entry
+        with track_scripts() as scripts:
+            sorted_pkgs = self._load(names)
+
+        self._pkg_cache.store(cache_entry, sorted_pkgs, list(scripts))
+
+        return sorted_pkgs
+
+    def _load(self, names):
+        """
+        load one or more packages from the provided collection of names
+
         Args:
             names: the names of packages to load
 
@@ -271,9 +326,10 @@ class RelengPackageManager:
         final_deps = {}
 
         # cycle through all pending packages until the complete list is known
-        names_left = list(names)
+        names_left = deque(names)
+        names_known = set(names_left)
         while names_left:
-            name = names_left.pop(0)
+            name = names_left.popleft()
 
             ple = RelengLoadedPackage()
 
@@ -301,12 +357,14 @@ class RelengPackageManager:
                 if dep == name:
                     raise RelengToolCyclicPackageDependency({
                         'pkg_name': name,
+                        'cycles': [[name, name]],
                     })
 
                 if dep not in pkgs:
-                    if dep not in names_left:
+                    if dep not in names_known:
                         verbose('adding implicitly defined package: {}', dep)
                         names_left.append(dep)
+                        names_known.add(dep)
 
                     if ple.package not in final_deps:
                         final_deps[ple.package] = []
@@ -326,13 +384,17 @@ class RelengPackageManager:
         def fetch_deps(pkg):
             return pkg.deps
         sorter = TopologicalSorter(fetch_deps)
-        sorted_pkgs = []
         for pkg in pkgs.values():
-            sorted_pkgs = sorter.sort(pkg)
-            if sorted_pkgs is None:
-                raise RelengToolCyclicPackageDependency({
-                    'pkg_name': name,
-                })
+            sorter.sort(pkg)
+
+        if sorter.cycles:
+            cycles = [[pkg.name for pkg in cycle] for cycle in sorter.cycles]
+            raise RelengToolCyclicPackageDependency({
+                'pkg_name': cycles[0][0],
+                'cycles': cycles,
+            })
+
+        sorted_pkgs = sorter.sorted
         debug('sorted packages)')
         for pkg in sorted_pkgs:
             debug(' {}', pkg.name)
@@ -1120,23 +1182,23 @@ explicit url vcs-type with files is deprecated: {}
         # without needing to make sure the configuration dictionary already
         # exists
         interim_ids = set()
-        for k, v in self._key_types.items():
-            interim_obj = None
-
-            if v in (PkgKeyType.DICT_STR_PSTR, PkgKeyType.OPTS):
-                interim_obj = {}
-            elif v == PkgKeyType.STRS:
-                interim_obj = []
-
-            if interim_obj is not None:
-                pkg_cfg_key = pkg_key(name, k)
-                if pkg_cfg_key not in self.script_env:
-                    self.script_env[pkg_cfg_key] = interim_obj
-                    interim_ids.add(id(interim_obj))
+        for k, interim_type in self._interim_keys:
+            pkg_cfg_key = pkg_key(name, k)
+            if pkg_cfg_key not in self.script_env:
+                interim_obj = interim_type()
+                self.script_env[pkg_cfg_key] = interim_obj
+                interim_ids.add(id(interim_obj))
+
+        # compiled package definitions are cached (unless disabled)
+        cache_dir = None
+        if self._script_cache_enabled and \
+                'releng.disable_script_cache' not in self.opts.quirks:
+            cache_dir = self.opts.cache_dir
 
         # run the package script
         try:
-            env = run_script(script, self.script_env, catch=False)
+            env = run_script(script, self.script_env, catch=False,
+                cache_dir=cache_dir)
         except Exception as ex:
             raise RelengToolInvalidPackageScript({
                 'description': str(ex),
@@ -1146,19 +1208,16 @@ explicit url vcs-type with files is deprecated: {}
 
         # if an interim configuration has not been used, automatically remove
         # them from the environment as if it was ``None`` in the first place
-        for k, v in self._key_types.items():
-            if v in (PkgKeyType.DICT_STR_PSTR,
-                     PkgKeyType.STRS,
-                     PkgKeyType.OPTS):
-                pkg_cfg_key = pkg_key(name, k)
-                if env[pkg_cfg_key]:
-                    continue
-
-                ref_id = id(env[pkg_cfg_key])
-                if ref_id in interim_ids:
-                    env[pkg_cfg_key] = None
-                    self.script_env[pkg_cfg_key] = None
-                    interim_ids.remove(ref_id)
+        for k, _ in self._interim_keys:
+            pkg_cfg_key = pkg_key(name, k)
+            if env[pkg_cfg_key]:
+                continue
+
+            ref_id = id(env[pkg_cfg_key])
+            if ref_id in interim_ids:
+                env[pkg_cfg_key] = None
+                self.script_env[pkg_cfg_key] = None
+                interim_ids.remove(ref_id)
 
         return env
 
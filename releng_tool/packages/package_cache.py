@@ -0,0 +1,261 @@
+# SPDX-License-Identifier: BSD-2-Clause
+# Copyright releng-tool
+
+from __future__ import annotations
+from releng_tool import __version__ as releng_version
+from releng_tool.util.log import debug
+from releng_tool.util.log import verbose
+from releng_tool.util.script_cache import SCRIPT_CACHE_DIR
+import contextlib
+import hashlib
+import os
+import pickle
+import tempfile
+
+# extension for cached package entries
+PACKAGES_EXT = '.pkgs'
+
+# option types which are tracked as inputs for cached packages
+TRACKED_OPTION_TYPES = (bool, dict, float, int, list, str, tuple, type(None))
+
+# options which are not tracked as inputs for cached packages
+UNTRACKED_OPTIONS = (
+    'spdx',  # static data for a releng-tool version
+)
+
+
+class RelengPackageCache:
+    """
+    a cache of loaded packages
+
+    Provides a means to store the packages loaded for a set of package names,
+    which can be restored on a later run with the same inputs without needing
+    to run any package definition scripts. The inputs of a cached entry are:
+
+    - The requested package names
+    - The project's configuration and options (e.g. injected key-values,
+      profiles, development mode, local-sources, etc.)
+    - The environment
+    - The modification time and size of every script which was executed
+      when loading packages (e.g. package definitions and any scripts
+      included by them)
+    - The contents (names, modification times and sizes) of each package
+      definition directory which was (or could be) used to load a package
+
+    Caching is disabled if the ``releng.disable_script_cache`` quirk is set.
+
+    Args:
+        opts: options used to configure the engine
+
+    Attributes:
+        opts: options used to configure the engine
+    """
+    def __init__(self, opts):
+        self.opts = opts
+
+    def entry(self, names) -> str | None:
+        """
+        return the path of the cached entry for a set of package names
+
+        The entry for a set of package names should be determined before
+        loading any packages, since loading packages will update the
+        environment.
+
+        Args:
+            names: the names of packages to load
+
+        Returns:
+            the path; ``None`` if packages cannot be cached
+        """
+
+        opts = self.opts
+        if not opts.cache_dir or 'releng.disable_script_cache' in opts.quirks:
+            return None
+
+        options = sorted(
+            (key, value) for key, value in vars(opts).items()
+            if key not in UNTRACKED_OPTIONS and
+                isinstance(value, TRACKED_OPTION_TYPES)
+        )
+
+        conf_fingerprint = None
+        if opts.conf_point:
+            try:
+                st = os.stat(opts.conf_point)
+                conf_fingerprint = (st.st_mtime_ns, st.st_size)
+            except OSError:
+                pass
+
+        inputs = repr((
+            releng_version,
+            list(names),
+            options,
+            conf_fingerprint,
+            sorted(os.environ.items()),
+        ))
+
+        key = hashlib.sha256(inputs.encode('utf_8', errors='replace'))
+        name = key.hexdigest()[:32] + PACKAGES_EXT
+        return os.path.join(opts.cache_dir, SCRIPT_CACHE_DIR, name)
+
+    def fetch(self, entry: str) -> list | None:
+        """
+        fetch cached packages from a cached entry
+
+        Args:
+            entry: the cached entry
+
+        Returns:
+            the ordered list of packages; ``None`` if no valid entry exists
+        """
+
+        try:
+            with open(entry, 'rb') as f:
+                data = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, EOFError, pickle.UnpicklingError,
+                AttributeError, ImportError, ValueError) as e:
+            verbose('unable to load cached packages: {}', e)
+            return None
+
+        for path, fingerprint in data['fingerprints'].items():
+            if _dir_fingerprint(path) != fingerprint:
+                debug('cached packages are stale: {}', path)
+                return None
+
+        # entries without any tracked scripts cannot be validated
+        scripts = data.get('scripts')
+        if scripts is None:
+            debug('cached packages are stale: {}', entry)
+            return None
+
+        for path, fingerprint in scripts.items():
+            if _file_fingerprint(path) != fingerprint:
+                debug('cached packages are stale: {}', path)
+                return None
+
+        debug('using cached packages: {}', entry)
+        return data['pkgs']
+
+    def store(self, entry: str, pkgs, scripts: list[str]) -> None:
+        """
+        store loaded packages into a cached entry
+
+        Args:
+            entry: the cached entry
+            pkgs: the ordered list of loaded packages
+            scripts: the scripts executed when loading the packages
+        """
+
+        data = {
+            'fingerprints': {
+                path: _dir_fingerprint(path)
+                for path in self._def_dirs(pkgs)
+            },
+            'pkgs': pkgs,
+            'scripts': {
+                path: _file_fingerprint(path)
+                for path in scripts
+            },
+        }
+
+        container = os.path.dirname(entry)
+        tmp_entry = None
+        try:
+            os.makedirs(container, exist_ok=True)
+
+            fd, tmp_entry = tempfile.mkstemp(dir=container, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+            os.replace(tmp_entry, entry)
+            tmp_entry = None
+        except (OSError, pickle.PicklingError, TypeError) as e:
+            verbose('unable to cache packages: {}', e)
+        finally:
+            if tmp_entry:
+                with contextlib.suppress(OSError):
+                    os.remove(tmp_entry)
+
+    def _def_dirs(self, pkgs) -> list[str]:
+        """
+        return all package definition directories used to load packages
+
+        Args:
+            pkgs: the loaded packages
+
+        Returns:
+            the possible package definition directories
+        """
+
+        opts = self.opts
+        pkg_dirs = [*opts.extern_pkg_dirs, opts.default_pkg_dir]
+
+        def_dirs: dict[str, None] = {}
+        for pkg in pkgs:
+            for pkg_dir in pkg_dirs:
+                def_dirs[os.path.join(pkg_dir, pkg.name)] = None
+            if pkg.def_dir:
+                def_dirs[pkg.def_dir] = None
+
+        return list(def_dirs)
+
+
+def _dir_fingerprint(path: str) -> list | None:
+    """
+    return a fingerprint of a directory's contents
+
+    Args:
+        path: the directory
+
+    Returns:
+        the fingerprint; ``None`` if the directory does not exist
+    """
+
+    try:
+        with os.scandir(path) as it:
+            fingerprint = [_entry_fingerprint(entry) for entry in it]
+    except OSError:
+        return None
+
+    fingerprint.sort()
+    return fingerprint
+
+
+def _entry_fingerprint(entry: os.DirEntry) -> tuple:
+    """
+    return a fingerprint of a directory entry
+
+    Args:
+        entry: the directory entry
+
+    Returns:
+        the fingerprint
+    """
+
+    try:
+        st = entry.stat()
+    except OSError:
+        return (entry.name, None, None)
+
+    return (entry.name, st.st_mtime_ns, st.st_size)
+
+
+def _file_fingerprint(path: str) -> tuple | None:
+    """
+    return a fingerprint of a file
+
+    Args:
+        path: the file
+
+    Returns:
+        the fingerprint; ``None`` if the file does not exist
+    """
+
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+
+    return (st.st_mtime_ns, st.st_size)
@@ -6,6 +6,7 @@ from releng_tool.apimode import API_STATE
 from releng_tool.defs import GlobalAction
 from releng_tool.defs import ListenerEvent
 from releng_tool.defs import PkgAction
+from releng_tool.defs import VcsType
 from releng_tool.engine.bootstrap import stage as bootstrap_stage
 from releng_tool.engine.build import stage as build_stage
 from releng_tool.engine.configure import stage as configure_stage
@@ -28,15 +29,18 @@ from releng_tool.packages.exceptions import RelengToolLicenseStageFailure
 from releng_tool.packages.exceptions import RelengToolPatchStageFailure
 from releng_tool.packages.exceptions import RelengToolPostStageFailure
 from releng_tool.util.env import env_wrap
+from releng_tool.util.exec_context import scoped_environ
 from releng_tool.util.file_flags import FileFlag
 from releng_tool.util.file_flags import check_file_flag
 from releng_tool.util.file_flags import process_file_flag
 from releng_tool.util.io import cmd_args_to_str
 from releng_tool.util.io_copy import path_copy
 from releng_tool.util.io_mkdir import mkdir
+from releng_tool.util.io_remove import path_remove
 from releng_tool.util.log import debug
 from releng_tool.util.log import err
 from releng_tool.util.log import note
+from releng_tool.util.log import releng_log_file
 from releng_tool.util.log import warn
 from releng_tool.util.network_isolation import network_isolate
 from releng_tool.util.path import P
@@ -128,7 +132,18 @@ class RelengPackagePipeline:
 
         # extracting
         fflag = pkg._ff_extract
-        if check_file_flag(fflag) == FileFlag.NO_EXIST:
+        fp = self.engine.fingerprints.fingerprint(pkg, 'extract')
+        if check_file_flag(fflag, fp) == FileFlag.NO_EXIST:
+            # if the inputs for a previously extracted package have changed,
+            # cleanup the existing build directory before extracting again
+            # (only for packages which extract into their build directory)
+            extracts = not pkg.local_srcs and not pkg.no_extraction and \
+                pkg.vcs_type not in (VcsType.LOCAL, VcsType.NONE)
+            if extracts and os.path.exists(fflag):
+                note('re-extracting {} (inputs have changed)...', pkg.name)
+                if not path_remove(pkg.build_dir):
+                    raise RelengToolExtractionStageFailure
+
             with self._stage_invoke(pkg, 'extract'):
                 if not extract_stage(self.engine, pkg):
                     raise RelengToolExtractionStageFailure
@@ -137,7 +152,8 @@ class RelengPackagePipeline:
                 # exists as well (for file flags and other content)
                 if not mkdir(pkg.build_output_dir):
                     raise RelengToolExtractionStageFailure
-            if process_file_flag(fflag, flag=True) != FileFlag.CONFIGURED:
+            flagged = process_file_flag(fflag, flag=True, fingerprint=fp)
+            if flagged != FileFlag.CONFIGURED:
                 return PipelineResult.ERROR
         if gaction == GlobalAction.EXTRACT:
             return PipelineResult.CONTINUE
@@ -178,11 +194,13 @@ class RelengPackagePipeline:
 
         # patching
         fflag = pkg._ff_patch
-        if check_file_flag(fflag) == FileFlag.NO_EXIST:
+        fp = self.engine.fingerprints.fingerprint(pkg, 'patch')
+        if check_file_flag(fflag, fp) == FileFlag.NO_EXIST:
             with self._stage_invoke(pkg, 'patch'):
                 if not patch_stage(self.engine, pkg, pkg_env):
                     raise RelengToolPatchStageFailure
-            if process_file_flag(fflag, flag=True) != FileFlag.CONFIGURED:
+            flagged = process_file_flag(fflag, flag=True, fingerprint=fp)
+            if flagged != FileFlag.CONFIGURED:
                 return PipelineResult.ERROR
         if gaction == GlobalAction.PATCH:
             return PipelineResult.CONTINUE
@@ -196,12 +214,14 @@ class RelengPackagePipeline:
         # required).
         fetch_paction = paction == PkgAction.FETCH_FULL and pkg.name == target
         fflag = pkg._ff_fetch_post
+        fp = self.engine.fingerprints.fingerprint(pkg, 'fetch-post')
         if gaction == GlobalAction.FETCH_FULL or fetch_paction or \
-                check_file_flag(fflag) == FileFlag.NO_EXIST:
+                check_file_flag(fflag, fp) == FileFlag.NO_EXIST:
             with self._stage_invoke(pkg, 'fetch-post'):
                 if not fetch_post(self.engine, pkg):
                     raise RelengToolFetchPostStageFailure
-            if process_file_flag(fflag, flag=True) != FileFlag.CONFIGURED:
+            flagged = process_file_flag(fflag, flag=True, fingerprint=fp)
+            if flagged != FileFlag.CONFIGURED:
                 return PipelineResult.ERROR
         if gaction == GlobalAction.FETCH_FULL:
             return PipelineResult.CONTINUE
@@ -216,10 +236,12 @@ class RelengPackagePipeline:
         license_strict = (gaction == GlobalAction.LICENSES or
             (paction == PkgAction.LICENSE and pkg.name == target))
         fflag = pkg._ff_license
-        if check_file_flag(fflag) == FileFlag.NO_EXIST:
+        fp = self.engine.fingerprints.fingerprint(pkg, 'license')
+        if check_file_flag(fflag, fp) == FileFlag.NO_EXIST:
             if not self._stage_license(pkg, license_strict):
                 raise RelengToolLicenseStageFailure
-            if process_file_flag(fflag, flag=True) != FileFlag.CONFIGURED:
+            flagged = process_file_flag(fflag, flag=True, fingerprint=fp)
+            if flagged != FileFlag.CONFIGURED:
                 return PipelineResult.ERROR
         if gaction == GlobalAction.LICENSES:
             return PipelineResult.CONTINUE
@@ -246,9 +268,36 @@ class RelengPackagePipeline:
                 self._stage_exec(pkg)
                 return PipelineResult.STOP
 
+            # if this package needs to be installed, attempt to restore its
+            # outputs from an artifact cache (if configured); otherwise,
+            # capture the state of the output directories to help populate
+            # the cache once the package has been installed
+            artifact_key = None
+            artifact_snapshot = None
+            fp = self.engine.fingerprints.fingerprint(pkg, 'install')
+            if check_file_flag(pkg._ff_install, fp) == FileFlag.NO_EXIST:
+                artifact_key = self.engine.artifacts.key(pkg, fp)
+
+            if artifact_key:
+                restorable = not (
+                    self.opts.force or
+                    gaction == GlobalAction.PUNCH or
+                    (paction and pkg.name == target)
+                )
+
+                if restorable and self._stage_restore(pkg, artifact_key):
+                    has_worked = True
+
+                # outputs from other packages may be installed at the same
+                # time when processing packages concurrently; only capture
+                # outputs when processing packages one at a time
+                elif self.opts.package_jobs <= 1:
+                    artifact_snapshot = self.engine.artifacts.snapshot()
+
             # bootstrapping
             fflag = pkg._ff_bootstrap
-            if check_file_flag(fflag) == FileFlag.NO_EXIST:
+            fp = self.engine.fingerprints.fingerprint(pkg, 'bootstrap')
+            if check_file_flag(fflag, fp) == FileFlag.NO_EXIST:
                 with self._stage_invoke(pkg, 'boot'):
                     self.engine.registry.emit(
                         ListenerEvent.PKG_BOOTSTRAP_STARTED, env=pkg_env)
@@ -256,13 +305,15 @@ class RelengPackagePipeline:
                         raise RelengToolBootstrapStageFailure
                     self.engine.registry.emit(
                         ListenerEvent.PKG_BOOTSTRAP_FINISHED, env=pkg_env)
-                if process_file_flag(fflag, flag=True) != FileFlag.CONFIGURED:
+                flagged = process_file_flag(fflag, flag=True, fingerprint=fp)
+                if flagged != FileFlag.CONFIGURED:
                     return PipelineResult.ERROR
                 has_worked = True
 
             # configuring
             fflag = pkg._ff_configure
-            if check_file_flag(fflag) == FileFlag.NO_EXIST:
+            fp = self.engine.fingerprints.fingerprint(pkg, 'configure')
+            if check_file_flag(fflag, fp) == FileFlag.NO_EXIST:
                 with self._stage_invoke(pkg, 'configure'):
                     self.engine.registry.emit(
                         ListenerEvent.PKG_CONFIGURE_STARTED, env=pkg_env)
@@ -270,7 +321,8 @@ class RelengPackagePipeline:
                         raise RelengToolConfigurationStageFailure
                     self.engine.registry.emit(
                         ListenerEvent.PKG_CONFIGURE_FINISHED, env=pkg_env)
-                if process_file_flag(fflag, flag=True) != FileFlag.CONFIGURED:
+                flagged = process_file_flag(fflag, flag=True, fingerprint=fp)
+                if flagged != FileFlag.CONFIGURED:
                     return PipelineResult.ERROR
                 has_worked = True
             if paction in (PkgAction.CONFIGURE, PkgAction.RECONFIGURE_ONLY):
@@ -279,7 +331,8 @@ class RelengPackagePipeline:
 
             # building
             fflag = pkg._ff_build
-            if check_file_flag(fflag) == FileFlag.NO_EXIST:
+            fp = self.engine.fingerprints.fingerprint(pkg, 'build')
+            if check_file_flag(fflag, fp) == FileFlag.NO_EXIST:
                 with self._stage_invoke(pkg, 'build'):
                     self.engine.registry.emit(
                         ListenerEvent.PKG_BUILD_STARTED, env=pkg_env)
@@ -287,7 +340,8 @@ class RelengPackagePipeline:
                         raise RelengToolBuildStageFailure
                     self.engine.registry.emit(
                         ListenerEvent.PKG_BUILD_FINISHED, env=pkg_env)
-                if process_file_flag(fflag, flag=True) != FileFlag.CONFIGURED:
+                flagged = process_file_flag(fflag, flag=True, fingerprint=fp)
+                if flagged != FileFlag.CONFIGURED:
                     return PipelineResult.ERROR
                 has_worked = True
             if paction in (PkgAction.BUILD, PkgAction.REBUILD_ONLY):
@@ -296,7 +350,8 @@ class RelengPackagePipeline:
 
             # installing
             fflag = pkg._ff_install
-            if check_file_flag(fflag) == FileFlag.NO_EXIST:
+            fp = self.engine.fingerprints.fingerprint(pkg, 'install')
+            if check_file_flag(fflag, fp) == FileFlag.NO_EXIST:
                 with self._stage_invoke(pkg, 'install'):
                     self.engine.registry.emit(
                         ListenerEvent.PKG_INSTALL_STARTED, env=pkg_env)
@@ -304,15 +359,20 @@ class RelengPackagePipeline:
                         raise RelengToolInstallStageFailure
                     self.engine.registry.emit(
                         ListenerEvent.PKG_INSTALL_FINISHED, env=pkg_env)
-                if process_file_flag(fflag, flag=True) != FileFlag.CONFIGURED:
+                flagged = process_file_flag(fflag, flag=True, fingerprint=fp)
+                if flagged != FileFlag.CONFIGURED:
                     return PipelineResult.ERROR
+                if artifact_snapshot is not None:
+                    self.engine.artifacts.store(
+                        pkg, artifact_key, artifact_snapshot)
                 has_worked = True
             # (note: re-install requests will re-invoke package-specific
             # post-processing)
 
             # package-specific post-processing
             fflag = pkg._ff_post
-            if check_file_flag(fflag) == FileFlag.NO_EXIST:
+            fp = self.engine.fingerprints.fingerprint(pkg, 'post')
+            if check_file_flag(fflag, fp) == FileFlag.NO_EXIST:
                 with self._stage_invoke(pkg, 'post'):
                     self.engine.registry.emit(
                         ListenerEvent.PKG_POSTPROCESS_STARTED, env=pkg_env)
@@ -320,7 +380,8 @@ class RelengPackagePipeline:
                         raise RelengToolPostStageFailure
                     self.engine.registry.emit(
                         ListenerEvent.PKG_POSTPROCESS_FINISHED, env=pkg_env)
-                if process_file_flag(fflag, flag=True) != FileFlag.CONFIGURED:
+                flagged = process_file_flag(fflag, flag=True, fingerprint=fp)
+                if flagged != FileFlag.CONFIGURED:
                     return PipelineResult.ERROR
                 has_worked = True
             if paction in (
@@ -359,26 +420,6 @@ class RelengPackagePipeline:
             the prepared package-enhanced environment variables
         """
 
-        pkg_keys = [
-            'PKG_BUILD_BASE_DIR',
-            'PKG_BUILD_DIR',
-            'PKG_BUILD_OUTPUT_DIR',
-            'PKG_CACHE_DIR',
-            'PKG_CACHE_FILE',
-            'PKG_DEFDIR',
-            'PKG_DEVMODE',
-            'PKG_INTERNAL',
-            'PKG_LOCALSRCS',
-            'PKG_NAME',
-            'PKG_REVISION',
-            'PKG_SITE',
-            'PKG_VERSION',
-        ]
-
-        saved_env = {}
-        for key in pkg_keys:
-            saved_env[key] = os.environ.get(key, None)
-
         # copy environment since packages do not share values
         pkg_env = self.script_env.copy()
 
@@ -392,36 +433,32 @@ class RelengPackagePipeline:
         pkg_env['PKG_DEVMODE'] = None
         pkg_env['PKG_LOCALSRCS'] = None
 
-        try:
-            for env in (env_wrap(), pkg_env):
-                env['PKG_BUILD_BASE_DIR'] = pkg.build_dir
-                env['PKG_BUILD_DIR'] = P(build_dir)
-                env['PKG_BUILD_OUTPUT_DIR'] = P(pkg.build_output_dir)
-                env['PKG_CACHE_DIR'] = P(pkg.cache_dir)
-                env['PKG_CACHE_FILE'] = P(pkg.cache_file)
-                env['PKG_DEFDIR'] = P(pkg.def_dir)
-                env['PKG_NAME'] = pkg.name
-                env['PKG_SITE'] = pkg.site or ''
-                env['PKG_REVISION'] = pkg.revision
-                env['PKG_VERSION'] = pkg.version
-
-                if pkg.devmode:
-                    env['PKG_DEVMODE'] = True
-
-                if pkg.is_internal:
-                    env['PKG_INTERNAL'] = True
-
-                if pkg.local_srcs:
-                    env['PKG_LOCALSRCS'] = True
-
+        # apply package specific overrides into the package's execution
+        # context and the package/script environment
+        ctx_env = {}
+        for env in (env_wrap(ctx_env), pkg_env):
+            env['PKG_BUILD_BASE_DIR'] = pkg.build_dir
+            env['PKG_BUILD_DIR'] = P(build_dir)
+            env['PKG_BUILD_OUTPUT_DIR'] = P(pkg.build_output_dir)
+            env['PKG_CACHE_DIR'] = P(pkg.cache_dir)
+            env['PKG_CACHE_FILE'] = P(pkg.cache_file)
+            env['PKG_DEFDIR'] = P(pkg.def_dir)
+            env['PKG_NAME'] = pkg.name
+            env['PKG_SITE'] = pkg.site or ''
+            env['PKG_REVISION'] = pkg.revision
+            env['PKG_VERSION'] = pkg.version
+
+            if pkg.devmode:
+                env['PKG_DEVMODE'] = True
+
+            if pkg.is_internal:
+                env['PKG_INTERNAL'] = True
+
+            if pkg.local_srcs:
+                env['PKG_LOCALSRCS'] = True
+
+        with scoped_environ(ctx_env):
             yield pkg_env
-        finally:
-            # restore any overrides that may have been set
-            for k, v in saved_env.items():
-                if v is not None:
-                    os.environ[k] = v
-                else:
-                    os.environ.pop(k, None)
 
     @contextmanager
     def _stage_env_finalize(self, pkg, pkg_env):
@@ -441,27 +478,6 @@ class RelengPackagePipeline:
             the prepared package-enhanced environment variables
         """
 
-        pkg_keys = [
-            'HOST_BIN_DIR',
-            'HOST_INCLUDE_DIR',
-            'HOST_LIB_DIR',
-            'HOST_SHARE_DIR',
-            'NJOBS',
-            'NJOBSCONF',
-            'PREFIX',
-            'PREFIXED_HOST_DIR',
-            'PREFIXED_STAGING_DIR',
-            'PREFIXED_TARGET_DIR',
-            'STAGING_BIN_DIR',
-            'STAGING_INCLUDE_DIR',
-            'STAGING_LIB_DIR',
-            'STAGING_SHARE_DIR',
-            'TARGET_BIN_DIR',
-            'TARGET_INCLUDE_DIR',
-            'TARGET_LIB_DIR',
-            'TARGET_SHARE_DIR',
-        ]
-
         # check if we should preload environment variables from vsdevcmd
         extra_env = {}
         if pkg.vsdevcmd and sys.platform == 'win32':
@@ -470,69 +486,56 @@ class RelengPackagePipeline:
                 prodstr=pkg.vsdevcmd_products,
                 verstr=pkg.vsdevcmd,
             )
-            pkg_keys.extend(extra_env)
-
-        saved_env = {}
-        for key in pkg_keys:
-            saved_env[key] = os.environ.get(key, None)
-
-        # apply package specific overrides into the OS environment and the
-        # package/script environment
-        try:
-            os.environ.update(extra_env)
-
-            for env in (env_wrap(), pkg_env):
-                if pkg.prefix is not None:
-                    opts = self.opts
-                    nprefix = pkg.prefix
-                    host_pdir = os.path.normpath(opts.host_dir + nprefix)
-                    staging_pdir = os.path.normpath(opts.staging_dir + nprefix)
-                    target_pdir = os.path.normpath(opts.target_dir + nprefix)
-
-                    host_bin_dir = os.path.join(host_pdir, 'bin')
-                    host_include_dir = os.path.join(host_pdir, 'include')
-                    host_lib_dir = os.path.join(host_pdir, 'lib')
-                    host_share_dir = os.path.join(host_pdir, 'share')
-                    staging_bin_dir = os.path.join(staging_pdir, 'bin')
-                    staging_include_dir = os.path.join(staging_pdir, 'include')
-                    staging_lib_dir = os.path.join(staging_pdir, 'lib')
-                    staging_share_dir = os.path.join(staging_pdir, 'share')
-                    target_bin_dir = os.path.join(target_pdir, 'bin')
-                    target_include_dir = os.path.join(target_pdir, 'include')
-                    target_lib_dir = os.path.join(target_pdir, 'lib')
-                    target_share_dir = os.path.join(target_pdir, 'share')
-
-                    # will override existing prefix related variables
-                    env['HOST_BIN_DIR'] = P(host_bin_dir)
-                    env['HOST_INCLUDE_DIR'] = P(host_include_dir)
-                    env['HOST_LIB_DIR'] = P(host_lib_dir)
-                    env['HOST_SHARE_DIR'] = P(host_share_dir)
-                    env['PREFIX'] = pkg.prefix
-                    env['PREFIXED_HOST_DIR'] = P(host_pdir)
-                    env['PREFIXED_STAGING_DIR'] = P(staging_pdir)
-                    env['PREFIXED_TARGET_DIR'] = P(target_pdir)
-                    env['STAGING_BIN_DIR'] = P(staging_bin_dir)
-                    env['STAGING_INCLUDE_DIR'] = P(staging_include_dir)
-                    env['STAGING_LIB_DIR'] = P(staging_lib_dir)
-                    env['STAGING_SHARE_DIR'] = P(staging_share_dir)
-                    env['TARGET_BIN_DIR'] = P(target_bin_dir)
-                    env['TARGET_INCLUDE_DIR'] = P(target_include_dir)
-                    env['TARGET_LIB_DIR'] = P(target_lib_dir)
-                    env['TARGET_SHARE_DIR'] = P(target_share_dir)
-
-                total_jobs = clamp_jobs(pkg, self.opts.jobs)
-                if total_jobs:
-                    env['NJOBS'] = str(total_jobs)
-                    env['NJOBSCONF'] = str(total_jobs)
 
+        # apply package specific overrides into the package's execution
+        # context and the package/script environment
+        ctx_env = dict(extra_env)
+        for env in (env_wrap(ctx_env), pkg_env):
+            if pkg.prefix is not None:
+                opts = self.opts
+                nprefix = pkg.prefix
+                host_pdir = os.path.normpath(opts.host_dir + nprefix)
+                staging_pdir = os.path.normpath(opts.staging_dir + nprefix)
+                target_pdir = os.path.normpath(opts.target_dir + nprefix)
+
+                host_bin_dir = os.path.join(host_pdir, 'bin')
+                host_include_dir = os.path.join(host_pdir, 'include')
+                host_lib_dir = os.path.join(host_pdir, 'lib')
+                host_share_dir = os.path.join(host_pdir, 'share')
+                staging_bin_dir = os.path.join(staging_pdir, 'bin')
+                staging_include_dir = os.path.join(staging_pdir, 'include')
+                staging_lib_dir = os.path.join(staging_pdir, 'lib')
+                staging_share_dir = os.path.join(staging_pdir, 'share')
+                target_bin_dir = os.path.join(target_pdir, 'bin')
+                target_include_dir = os.path.join(target_pdir, 'include')
+                target_lib_dir = os.path.join(target_pdir, 'lib')
+                target_share_dir = os.path.join(target_pdir, 'share')
+
+                # will override existing prefix related variables
+                env['HOST_BIN_DIR'] = P(host_bin_dir)
+                env['HOST_INCLUDE_DIR'] = P(host_include_dir)
+                env['HOST_LIB_DIR'] = P(host_lib_dir)
+                env['HOST_SHARE_DIR'] = P(host_share_dir)
+                env['PREFIX'] = pkg.prefix
+                env['PREFIXED_HOST_DIR'] = P(host_pdir)
+                env['PREFIXED_STAGING_DIR'] = P(staging_pdir)
+                env['PREFIXED_TARGET_DIR'] = P(target_pdir)
+                env['STAGING_BIN_DIR'] = P(staging_bin_dir)
+                env['STAGING_INCLUDE_DIR'] = P(staging_include_dir)
+                env['STAGING_LIB_DIR'] = P(staging_lib_dir)
+                env['STAGING_SHARE_DIR'] = P(staging_share_dir)
+                env['TARGET_BIN_DIR'] = P(target_bin_dir)
+                env['TARGET_INCLUDE_DIR'] = P(target_include_dir)
+                env['TARGET_LIB_DIR'] = P(target_lib_dir)
+                env['TARGET_SHARE_DIR'] = P(target_share_dir)
+
+            total_jobs = clamp_jobs(pkg, self.opts.jobs)
+            if total_jobs:
+                env['NJOBS'] = str(total_jobs)
+                env['NJOBSCONF'] = str(total_jobs)
+
+        with scoped_environ(ctx_env):
             yield
-        finally:
-            # restore any overrides that may have been set
-            for k, v in saved_env.items():
-                if v is not None:
-                    os.environ[k] = v
-                else:
-                    os.environ.pop(k, None)
 
     def _stage_exec(self, pkg):
         """
@@ -584,7 +587,14 @@ class RelengPackagePipeline:
 
         self.engine.stats.track_duration_start(pkg.name, stage_name)
 
-        yield
+        # if requested, capture the output of the stage into a log file
+        if self.opts.package_logs:
+            log_file = os.path.join(
+                self.opts.logs_dir, pkg.name, stage_name + '.log')
+            with releng_log_file(log_file):
+                yield
+        else:
+            yield
 
         duration = self.engine.stats.track_duration_end(pkg.name, stage_name)
 
@@ -635,3 +645,39 @@ class RelengPackagePipeline:
                 return not strict
 
         return True
+
+    def _stage_restore(self, pkg, key):
+        """
+        restore a package's outputs from the artifact cache
+
+        Attempts to restore the outputs of a package which have been stored
+        in the artifact cache. If restored, the file flags of all stages up to
+        (and including) the installation stage will be configured.
+
+        Args:
+            pkg: the package being processed
+            key: the artifact cache key
+
+        Returns:
+            ``True`` if the outputs were restored; ``False`` otherwise
+        """
+
+        if not self.engine.artifacts.restore(pkg, key):
+            return False
+
+        note('restored {} from artifact cache', pkg.name)
+
+        flags = [
+            (pkg._ff_bootstrap, 'bootstrap'),
+            (pkg._ff_configure, 'configure'),
+            (pkg._ff_build, 'build'),
+            (pkg._ff_install, 'install'),
+        ]
+
+        for fflag, stage in flags:
+            fp = self.engine.fingerprints.fingerprint(pkg, stage)
+            flagged = process_file_flag(fflag, flag=True, fingerprint=fp)
+            if flagged != FileFlag.CONFIGURED:
+                raise RelengToolInstallStageFailure
+
+        return True
@@ -0,0 +1,155 @@
+# SPDX-License-Identifier: BSD-2-Clause
+# Copyright releng-tool
+
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
+from releng_tool.packages import clamp_jobs
+from releng_tool.packages.jobserver import JobTokenPool
+from releng_tool.packages.pipeline import PipelineResult
+from releng_tool.util.log import debug
+from releng_tool.util.log import releng_log_buffered
+from releng_tool.util.process_gate import PROCESS_GATE
+import heapq
+
+
+class RelengPackageScheduler:
+    """
+    a dependency-aware package scheduler
+
+    A scheduler will process a series of packages, where multiple packages can
+    be processed at the same time once all of their respective dependencies
+    have been processed. Packages which are ready to be processed are started
+    in the order they were provided (e.g. a dependency-sorted order).
+
+    All packages being processed share a pool of job tokens, where each
+    package is granted a portion of the configured job count. This ensures
+    that multiple packages processed at the same time do not each use the
+    total number of jobs configured for a run.
+
+    Since package stages rely on process-wide state, a package must hold the
+    process gate while processing. The gate is only released while a package
+    waits on a spawned process, which allows the processing of multiple
+    packages (e.g. running their build tools) to overlap.
+
+    Args:
+        pkgs: the packages to process
+        package_jobs: the number of packages to process at a given time
+        jobs: the number of jobs shared between all packages
+
+    Attributes:
+        jobs: the number of jobs shared between all packages
+        package_jobs: the number of packages to process at a given time
+        pkgs: the packages to process
+        pool: the job token pool shared between all packages
+    """
+    def __init__(self, pkgs, package_jobs, jobs):
+        self.jobs = jobs
+        self.package_jobs = max(package_jobs, 1)
+        self.pkgs = pkgs
+        self.pool = JobTokenPool(jobs)
+
+    def run(self, process):
+        """
+        process all packages
+
+        Invokes the provided process call for each package. A package will only
+        be processed when all of its dependencies have been processed. If any
+        package fails to process (or requests to stop processing), no new
+        packages will be started and this call will return once all active
+        packages have completed.
+
+        Args:
+            process: the call to process a package (returning a pipeline result)
+
+        Returns:
+            the pipeline result
+
+        Raises:
+            any exception raised while processing a package
+        """
+
+        order = {pkg.name: idx for idx, pkg in enumerate(self.pkgs)}
+
+        # track the pending dependencies for each package, as well as the
+        # packages which depend on each package
+        pending = {}
+        dependents = {pkg.name: [] for pkg in self.pkgs}
+        for pkg in self.pkgs:
+            deps = {dep.name for dep in pkg.deps if dep.name in order}
+            pending[pkg.name] = deps
+            for dep in deps:
+                dependents[dep].append(pkg)
+
+        ready = [(order[pkg.name], pkg) for pkg in self.pkgs
+            if not pending[pkg.name]]
+        heapq.heapify(ready)
+
+        debug('processing packages with {} jobs', self.package_jobs)
+
+        result = PipelineResult.CONTINUE
+        issue = None
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.package_jobs) as executor, \
+                PROCESS_GATE.activate():
+            while ready or running:
+                # start any packages that are ready to be processed
+                while ready and len(running) < self.package_jobs and \
+                        result == PipelineResult.CONTINUE:
+                    _, pkg = heapq.heappop(ready)
+
+                    # share the job pool between all active packages
+                    active = min(len(running) + len(ready) + 1,
+                        self.package_jobs)
+                    share = max(self.pool.tokens // active, 1)
+
+                    future = executor.submit(self._process, process, pkg, share)
+                    running[future] = pkg
+
+                if not running:
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    pkg = running.pop(future)
+
+                    try:
+                        prv = future.result()
+                    except BaseException as e:
+                        if not issue:
+                            issue = e
+                        prv = PipelineResult.ERROR
+
+                    if prv == PipelineResult.CONTINUE:
+                        for dependent in dependents[pkg.name]:
+                            deps = pending[dependent.name]
+                            deps.discard(pkg.name)
+                            if not deps:
+                                entry = (order[dependent.name], dependent)
+                                heapq.heappush(ready, entry)
+                    elif result != PipelineResult.ERROR:
+                        result = prv
+
+        if issue:
+            raise issue
+
+        return result
+
+    def _process(self, process, pkg, share):
+        """
+        process a package
+
+        Args:
+            process: the call to process a package
+            pkg: the package to process
+            share: the maximum number of job tokens to grant this package
+
+        Returns:
+            the pipeline result
+        """
+
+        desired = clamp_jobs(pkg, self.jobs) or self.jobs
+
+        with self.pool.grant(desired, share), \
+                PROCESS_GATE.hold(), releng_log_buffered():
+            return process(pkg)
@@ -0,0 +1,289 @@
+# SPDX-License-Identifier: BSD-2-Clause
+# Copyright releng-tool
+
+from __future__ import annotations
+from releng_tool.util.hash import BadFileHashLoadError
+from releng_tool.util.hash import BadFormatHashLoadError
+from releng_tool.util.hash import load as load_hashes
+from releng_tool.util.io_clone import clone_tree
+from releng_tool.util.io_mkdir import mkdir
+from releng_tool.util.io_remove import path_remove
+from releng_tool.util.log import debug
+from releng_tool.util.log import verbose
+from releng_tool.util.log import warn
+import hashlib
+import os
+import stat
+import tempfile
+
+#: block size to use when calculating the digest of an archive
+SOURCE_STORE_READ_BLOCKSIZE = 8 * 1024 * 1024
+
+# hash types which are not trusted to identify the contents of an archive
+WEAK_HASH_TYPES = (
+    'md5',
+    'sha1',
+)
+
+# permission bits to remove from files held in the store
+WRITE_BITS = stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH
+
+
+class RelengSourceStore:
+    """
+    a store of unpacked package sources
+
+    Provides a means to hold the (verified) extracted contents of package
+    archives, keyed by the digest of the archive and the options used to
+    extract it. When another run (e.g. from another workspace using the same
+    store directory) extracts a package with a matching archive, the package's
+    build directory can be populated from the store using reflinks instead of
+    extracting the archive again.
+
+    An archive is identified by the (strong) hash entries of its package's
+    hash file when the archive has been verified against the hash file and
+    has not changed since (as tracked by the verified hash cache). Otherwise,
+    the archive is read to calculate its digest.
+
+    Files held in the store are read-only. If the
+    ``releng.source_store.hardlink`` quirk is set, build directories can be
+    populated with hardlinks (when reflinks are not supported), where the
+    hardlinked sources in a build directory remain read-only.
+
+    A source store is only used if a store directory has been configured.
+
+    Args:
+        opts: options used to configure the engine
+        hash_cache (optional): cache of previously verified file hashes
+
+    Attributes:
+        hash_cache: cache of previously verified file hashes (if any)
+        opts: options used to configure the engine
+        store_dir: the directory holding unpacked sources (if any)
+    """
+    def __init__(self, opts, hash_cache=None):
+        self.hash_cache = hash_cache
+        self.opts = opts
+        self.store_dir = opts.source_store_dir
+
+    def key(self, pkg) -> str | None:
+        """
+        return the source store key for a package
+
+        Args:
+            pkg: the package
+
+        Returns:
+            the key; ``None`` if the package's sources cannot be stored
+        """
+
+        if not self.store_dir:
+            return None
+
+        try:
+            archive_digest = self._verified_digest(pkg)
+            if not archive_digest:
+                archive_digest = _archive_digest(pkg.cache_file)
+
+            hash_digest = ''
+            if pkg.hash_file and os.path.isfile(pkg.hash_file):
+                with open(pkg.hash_file, 'rb') as f:
+                    hash_digest = hashlib.sha256(f.read()).hexdigest()
+        except OSError as e:
+            verbose('unable to calculate source store key for {}: {}',
+                pkg.name, e)
+            return None
+
+        override = sorted((self.opts.extract_override or {}).items())
+        data = ':'.join([
+            archive_digest,
+            str(pkg.strip_count),
+            hash_digest,
+            str(override),
+        ])
+        return hashlib.sha256(data.encode('utf_8')).hexdigest()
+
+    def restore(self, pkg, key: str, build_dir: str) -> bool:
+        """
+        populate a build directory from the store
+
+        Args:
+            pkg: the package
+            key: the source store key
+            build_dir: the build directory to populate (must not exist)
+
+        Returns:
+            ``True`` if the build directory was populated; ``False`` otherwise
+        """
+
+        entry = self._entry(key)
+        if not os.path.isdir(entry):
+            debug('no stored sources for {}: {}', pkg.name, key)
+            return False
+
+        verbose('populating sources for {}: {}', pkg.name, entry)
+
+        hardlink = 'releng.source_store.hardlink' in self.opts.quirks
+        if not clone_tree(entry, build_dir, hardlink=hardlink):
+            verbose('unable to clone stored sources for {}', pkg.name)
+            path_remove(build_dir, quiet=True)
+            return False
+
+        # reflinked files do not share their data with the store, so these
+        # files can be made writable again
+        if not hardlink:
+            try:
+                _update_modes(build_dir, lambda mode: mode | stat.S_IWUSR)
+            except OSError as e:
+                verbose('unable to prepare stored sources for {}: {}',
+                    pkg.name, e)
+                path_remove(build_dir, quiet=True)
+                return False
+
+        return True
+
+    def store(self, pkg, key: str, work_dir: str) -> bool:
+        """
+        store the unpacked sources of a package
+
+        Args:
+            pkg: the package
+            key: the source store key
+            work_dir: the directory holding the (verified) unpacked sources
+
+        Returns:
+            ``True`` if the sources were stored; ``False`` otherwise
+        """
+
+        entry = self._entry(key)
+        if os.path.isdir(entry):
+            return True
+
+        container = os.path.dirname(entry)
+        if not mkdir(container):
+            return False
+
+        verbose('storing sources for {}: {}', pkg.name, entry)
+
+        hardlink = 'releng.source_store.hardlink' in self.opts.quirks
+        tmp_entry = None
+        try:
+            tmp_entry = tempfile.mkdtemp(dir=container, suffix='.tmp')
+            if not clone_tree(work_dir, tmp_entry, hardlink=hardlink,
+                    copy=True):
+                warn('unable to store sources for {}', pkg.name)
+                return False
+
+            _update_modes(tmp_entry, lambda mode: mode & ~WRITE_BITS)
+
+            # atomically publish the entry, allowing other runs sharing this
+            # store to never observe a partially populated entry
+            try:
+                os.rename(tmp_entry, entry)
+            except OSError:
+                # another run may have published this entry already
+                if not os.path.isdir(entry):
+                    raise
+        except OSError as e:
+            warn('unable to store sources for {}: {}', pkg.name, e)
+            return False
+        finally:
+            if tmp_entry and os.path.isdir(tmp_entry):
+                path_remove(tmp_entry, quiet=True)
+
+        return True
+
+    def _verified_digest(self, pkg) -> str | None:
+        """
+        return the digest of a package's archive from its verified hashes
+
+        Args:
+            pkg: the package
+
+        Returns:
+            the digest; ``None`` if the archive has not been verified with
+            any strong hash entries
+        """
+
+        if not self.hash_cache or not pkg.hash_file:
+            return None
+
+        if not self.hash_cache.verified(pkg.hash_file, pkg.cache_file):
+            return None
+
+        try:
+            hash_info = load_hashes(pkg.hash_file)
+        except (BadFileHashLoadError, BadFormatHashLoadError):
+            return None
+
+        asset = os.path.basename(pkg.cache_file)
+        digests = sorted(
+            f'{type_.lower()}={hash_.lower()}'
+            for type_, hash_, entry_asset in hash_info
+            if entry_asset == asset and
+                type_.partition(':')[0].lower() not in WEAK_HASH_TYPES
+        )
+
+        return ','.join(digests) or None
+
+    def _entry(self, key: str) -> str:
+        """
+        return the path of a store entry
+
+        Args:
+            key: the source store key
+
+        Returns:
+            the path
+        """
+
+        return os.path.join(self.store_dir, key[:2], key)
+
+
+def _archive_digest(archive: str) -> str:
+    """
+    return the digest of an archive by reading its contents
+
+    Args:
+        archive: the archive
+
+    Returns:
+        the digest
+
+    Raises:
+        OSError: if the archive could not be read
+    """
+
+    digest = hashlib.sha256()
+    with open(archive, 'rb') as f:
+        while True:
+            block = f.read(SOURCE_STORE_READ_BLOCKSIZE)
+            if not block:
+                break
+            digest.update(block)
+
+    return 'sha256=' + digest.hexdigest()
+
+
+def _update_modes(root: str, update) -> None:
+    """
+    update the permission bits of all files in a directory
+
+    Args:
+        root: the directory
+        update: callable to return a new mode from a file's existing mode
+    """
+
+    pending = [root]
+    while pending:
+        path = pending.pop()
+        with os.scandir(path) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append(entry.path)
+                elif not entry.is_symlink():
+                    st = entry.stat(follow_symlinks=False)
+                    mode = stat.S_IMODE(st.st_mode)
+                    new_mode = update(mode)
+                    if new_mode != mode:
+                        os.chmod(entry.path, new_mode)
@@ -1,13 +1,17 @@
 # SPDX-License-Identifier: BSD-2-Clause
 # Copyright releng-tool
 
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from releng_tool.defs import PackageType
 from releng_tool.defs import PythonSetupType
 from releng_tool.defs import VcsType
+from releng_tool.tool import RelengTool
 from releng_tool.tool.autoreconf import AUTORECONF
 from releng_tool.tool.autoreconf import AUTORECONF_COMMAND
 from releng_tool.tool.brz import BRZ
+from releng_tool.tool.cache import RelengToolCache
+from releng_tool.tool.cache import TOOL_CACHE_NAME
 from releng_tool.tool.cargo import CARGO
 from releng_tool.tool.cmake import CMAKE
 from releng_tool.tool.cvs import CVS
@@ -26,8 +30,13 @@ from releng_tool.tool.waf import WAF
 from releng_tool.tool.xmake import XMAKE
 from releng_tool.util.log import err
 from releng_tool.util.log import verbose
+from releng_tool.util.script_cache import SCRIPT_CACHE_DIR
 from shutil import which
 import importlib.util
+import os
+
+#: maximum number of host tools checked at the same time
+PREREQUISITES_MAX_WORKERS = 8
 
 
 class RelengPrerequisites:
@@ -44,12 +53,15 @@ class RelengPrerequisites:
     Args:
         pkgs: the packages to check for prerequisites
         tools: the tools to check for existence
+        cache_dir (optional): cache directory to persist detected tools into
 
     Attributes:
+        cache_dir: cache directory to persist detected tools into
         pkgs: the packages to check for prerequisites
         tools: the tools to check for existence
     """
-    def __init__(self, pkgs, tools):
+    def __init__(self, pkgs, tools, cache_dir=None):
+        self.cache_dir = cache_dir
         self.pkgs = pkgs
         self.tools = tools
 
@@ -59,6 +71,10 @@ class RelengPrerequisites:
 
         For each loaded package, a series of required host tools will be checked
         and a caller will be notified whether or not anything is missing.
+        Required host tools are checked concurrently. If a cache directory is
+        configured, detected tools are persisted into the cache directory and
+        will not be re-invoked on future checks (unless a tool's executable
+        has changed).
 
         Args:
             quiet (optional): whether or not to suppress output (defaults to
@@ -74,6 +90,7 @@ class RelengPrerequisites:
         pkg_types = set()
         python_interpreters = set()
         python_setup_types = set()
+        required = []
         vcs_types = set()
 
         # package-defined requirements check
@@ -86,10 +103,7 @@ class RelengPrerequisites:
             if pkg.type == PackageType.AUTOTOOLS:
                 if pkg.autotools_autoreconf:
                     if AUTORECONF_COMMAND not in exclude:
-                        if AUTORECONF.exists():
-                            self._verbose_exists(AUTORECONF)
-                        else:
-                            missing.add(AUTORECONF.tool)
+                        required.append(AUTORECONF)
 
             elif pkg.type == PackageType.PYTHON:
                 if pkg.python_interpreter:
@@ -105,35 +119,19 @@ class RelengPrerequisites:
                     python_setup_types.add(PythonSetupType.PEP517)
 
         if PackageType.AUTOTOOLS in pkg_types or PackageType.MAKE in pkg_types:
-            if MAKE.exists():
-                self._verbose_exists(MAKE)
-            else:
-                missing.add(MAKE.tool)
+            required.append(MAKE)
 
         if PackageType.CARGO in pkg_types:
-            if CARGO.exists():
-                self._verbose_exists(CARGO)
-            else:
-                missing.add(CARGO.tool)
+            required.append(CARGO)
 
         if PackageType.CMAKE in pkg_types:
-            if CMAKE.exists():
-                self._verbose_exists(CMAKE)
-            else:
-                missing.add(CMAKE.tool)
+            required.append(CMAKE)
 
         if PackageType.MESON in pkg_types:
-            if MESON.exists():
-                self._verbose_exists(MESON)
-            else:
-                missing.add(MESON.tool)
+            required.append(MESON)
 
         if PackageType.PYTHON in pkg_types:
-            for interpreter in python_interpreters:
-                if interpreter.exists():
-                    self._verbose_exists(interpreter)
-                else:
-                    missing.add(interpreter.tool)
+            required.extend(python_interpreters)
 
             for python_setup_type in python_setup_types:
                 match python_setup_type:
@@ -166,76 +164,44 @@ class RelengPrerequisites:
                 missing.add('python-installer')
 
         if PackageType.SCONS in pkg_types:
-            if SCONS.exists():
-                self._verbose_exists(SCONS)
-            else:
-                missing.add(SCONS.tool)
+            required.append(SCONS)
 
         if PackageType.WAF in pkg_types:
-            if WAF.exists():
-                self._verbose_exists(WAF)
-            else:
-                missing.add(WAF.tool)
+            required.append(WAF)
 
         if PackageType.XMAKE in pkg_types:
-            if XMAKE.exists():
-                self._verbose_exists(XMAKE)
-            else:
-                missing.add(XMAKE.tool)
+            required.append(XMAKE)
 
         if VcsType.BRZ in vcs_types:
-            if BRZ.exists():
-                self._verbose_exists(BRZ)
-            else:
-                missing.add(BRZ.tool)
+            required.append(BRZ)
 
         if VcsType.CVS in vcs_types:
-            if CVS.exists():
-                self._verbose_exists(CVS)
-            else:
-                missing.add(CVS.tool)
+            required.append(CVS)
 
         if VcsType.GIT in vcs_types:
-            if GIT.exists():
-                self._verbose_exists(GIT)
-            else:
-                missing.add(GIT.tool)
+            required.append(GIT)
 
         if VcsType.HG in vcs_types:
-            if HG.exists():
-                self._verbose_exists(HG)
-            else:
-                missing.add(HG.tool)
+            required.append(HG)
 
         if VcsType.LORE in vcs_types:
-            if LORE.exists():
-                self._verbose_exists(LORE)
-            else:
-                missing.add(LORE.tool)
+            required.append(LORE)
 
         if VcsType.PERFORCE in vcs_types:
-            if GIT.exists():
-                self._verbose_exists(GIT)
-            else:
-                missing.add(GIT.tool)
+            required.append(GIT)
 
         if VcsType.RSYNC in vcs_types:
-            if RSYNC.exists():
-                self._verbose_exists(RSYNC)
-            else:
-                missing.add(RSYNC.tool)
+            required.append(RSYNC)
 
         if VcsType.SCP in vcs_types:
-            if SCP.exists():
-                self._verbose_exists(SCP)
-            else:
-                missing.add(SCP.tool)
+            required.append(SCP)
 
         if VcsType.SVN in vcs_types:
-            if SVN.exists():
-                self._verbose_exists(SVN)
-            else:
-                missing.add(SVN.tool)
+            required.append(SVN)
+
+        # check the existence of all required host tools
+        for tool in self._detect(required):
+            missing.add(tool.tool)
 
         # project-provided tools check
         for tool in self.tools:
@@ -265,6 +231,47 @@ class RelengPrerequisites:
 
         return len(missing) == 0
 
+    def _detect(self, tools):
+        """
+        check the existence of a series of host tools
+
+        Args:
+            tools: the tools to check
+
+        Returns:
+            the tools which do not exist
+        """
+
+        # remove duplicate tools while maintaining order
+        tools = list({id(tool): tool for tool in tools}.values())
+        if not tools:
+            return []
+
+        cache = None
+        if self.cache_dir:
+            cache = RelengToolCache(
+                os.path.join(self.cache_dir, SCRIPT_CACHE_DIR, TOOL_CACHE_NAME))
+
+        RelengTool.cache = cache
+        try:
+            workers = min(len(tools), PREREQUISITES_MAX_WORKERS)
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(lambda x: x.exists(), tools))
+        finally:
+            RelengTool.cache = None
+
+        if cache:
+            cache.save()
+
+        missing = []
+        for tool, exists in zip(tools, results, strict=True):
+            if exists:
+                self._verbose_exists(tool)
+            else:
+                missing.append(tool)
+
+        return missing
+
     def _verbose_exists(self, tool):
         """
         verbose log that a provided tool exists
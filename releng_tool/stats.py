@@ -9,21 +9,9 @@ from time import monotonic
 import math
 import os
 import pickle
+import threading
 import warnings
 
-# optional imports
-try:
-    # disable xwindows backend (as it is not required and may cause issue with
-    # systems without a display configured)
-    import matplotlib as mpl
-    mpl.use('Agg')
-
-    import matplotlib.pyplot as plt
-    import numpy as np
-    has_matplotlib = True
-except ImportError:
-    has_matplotlib = False
-
 # filename for the statistics database
 STATISTICS_NAME = 'statistics.dat'
 
@@ -42,11 +30,13 @@ class RelengStats:
         cache: cache of statistics for this runtime
         dat_file: file to store persisted statistics
         data: dictionary of data that can be persisted
+        lock: lock to guard tracking from concurrent package processing
         opts: options used to configure the engine
         out_dir: directory to generate final statistics to
     """
     def __init__(self, opts):
         self.cache = defaultdict(lambda: defaultdict(dict))
+        self.lock = threading.Lock()
         self.opts = opts
         self.out_dir = os.path.join(self.opts.out_dir, 'misc')
         self.dat_file = os.path.join(self.out_dir, STATISTICS_NAME)
@@ -114,7 +104,8 @@ class RelengStats:
             pkg: the package
             stage: the stage which has started
         """
-        self.cache[pkg][stage]['start'] = monotonic()
+        with self.lock:
+            self.cache[pkg][stage]['start'] = monotonic()
 
     def track_duration_end(self, pkg, stage, save=True):
         """
@@ -133,20 +124,22 @@ class RelengStats:
             the duration
         """
         end_time = monotonic()
-        start_time = self.cache[pkg][stage]['start']
 
-        if 'duration' not in self.data:
-            self.data['duration'] = {}
-        if pkg not in self.data['duration']:
-            self.data['duration'][pkg] = {}
-        if stage not in self.data['duration'][pkg]:
-            self.data['duration'][pkg][stage] = {}
+        with self.lock:
+            start_time = self.cache[pkg][stage]['start']
+
+            if 'duration' not in self.data:
+                self.data['duration'] = {}
+            if pkg not in self.data['duration']:
+                self.data['duration'][pkg] = {}
+            if stage not in self.data['duration'][pkg]:
+                self.data['duration'][pkg][stage] = {}
 
-        duration = end_time - start_time
-        self.data['duration'][pkg][stage] = duration
+            duration = end_time - start_time
+            self.data['duration'][pkg][stage] = duration
 
-        if save:
-            self.save(desc=f'{pkg}-{stage}')
+            if save:
+                self.save(desc=f'{pkg}-{stage}')
 
         return duration
 
@@ -228,20 +221,23 @@ class RelengStats:
             verbose('failed to write duration statistics: {}', e)
 
         # duration statistics to plot (if available)
-        generate_pdf = True
-
-        if not has_matplotlib:
-            generate_pdf = False
-            debug('duration statistics plot not supported (no matplotlib)')
-        elif isinstance(mpl.__version__, tuple) and mpl.__version__ < (2, 1):
-            generate_pdf = False
-            debug('duration statistics plot not supported (old matplotlib)')
-        elif 'releng.stats.no_pdf' in self.opts.quirks:
-            generate_pdf = False
-            debug('duration statistics plot disabled by quirk')
+        plot_modules = None
 
-        if generate_pdf:
+        if 'releng.stats.no_pdf' in self.opts.quirks:
+            debug('duration statistics plot disabled by quirk')
+        else:
+            plot_modules = _import_plot_modules()
+            if not plot_modules:
+                debug('duration statistics plot not supported (no matplotlib)')
+            elif isinstance(plot_modules[0].__version__, tuple) and \
+                    plot_modules[0].__version__ < (2, 1):
+                plot_modules = None
+                debug('duration statistics plot not supported '
+                    '(old matplotlib)')
+
+        if plot_modules:
             verbose('generating duration statistics (pdf)...')
+            _, plt, np = plot_modules
 
             BAR_HEIGHT = 0.4
             EXTRA_HEIGHT = 1
@@ -322,3 +318,29 @@ class RelengStats:
 
             # close/cleanup figures
             plt.close()
+
+
+def _import_plot_modules():
+    """
+    import the (optional) modules used to generate plots
+
+    Plotting modules are only imported when statistics are generated, to
+    avoid their (considerable) import cost for any other releng-tool call.
+
+    Returns:
+        3-tuple of the matplotlib, pyplot and numpy modules; ``None`` if the
+        modules are not available
+    """
+
+    try:
+        # disable xwindows backend (as it is not required and may cause issue
+        # with systems without a display configured)
+        import matplotlib as mpl  # noqa: PLC0415
+        mpl.use('Agg')
+
+        import matplotlib.pyplot as plt  # noqa: PLC0415
+        import numpy as np  # noqa: PLC0415
+    except ImportError:
+        return None
+
+    return mpl, plt, np
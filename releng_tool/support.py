@@ -11,6 +11,7 @@ from releng_tool.util.env import extend_script_env
 from releng_tool.util.io_path import path_input
 from releng_tool.util.log import err
 from releng_tool.util.path import P
+from releng_tool.util.script_cache import record_script
 from releng_tool.util.version import str_to_version
 from runpy import run_path
 import inspect
@@ -78,6 +79,8 @@ def releng_script_envs(script, ctxenv):
     script_dir = os.path.dirname(script)
     script_env = ctxenv.copy()
 
+    record_script(script)
+
     # when invoking an include script, we will override the script
     # environment hints based on the path of the included script; but
     # restore back to the original variables once completed
@@ -1,7 +1,10 @@
 # SPDX-License-Identifier: BSD-2-Clause
 # Copyright releng-tool
 
+from __future__ import annotations
 from pathlib import Path
+from releng_tool.tool.cache import RelengToolCache
+from releng_tool.util.exec_context import context_environ
 from releng_tool.util.io import _execute
 from releng_tool.util.io import execute
 from releng_tool.util.log import debug
@@ -22,6 +25,7 @@ class RelengTool:
     existence of a host tool as well as the execution of a host tool.
 
     Attributes:
+        cache: persisted cache of detected tools (if any)
         detected: tracking whether or not a tool is available on the host system
 
     Args:
@@ -30,6 +34,7 @@ class RelengTool:
         env_sanitize (optional): environment variables to sanitize
         env_include (optional): environment variables to always include
     """
+    cache: ClassVar[RelengToolCache | None] = None
     detected: ClassVar[dict[Path, bool]] = {}
 
     def __init__(self, tool, exists_args=None, env_sanitize=None,
@@ -114,9 +119,33 @@ class RelengTool:
                 + str(args))
             return 1
 
+        final_env = self._environment(env)
+
+        final_args = self._invoked_tool()
+        if args:
+            final_args.extend(args)
+
+        return _execute(final_args, cwd=cwd, env=final_env, quiet=quiet,
+            critical=False, capture=capture)
+
+    def _environment(self, env=None):
+        """
+        returns the environment to use when invoking the tool
+
+        Prepares the environment for an invocation of the tool, where the
+        environment is sanitized and extended based on the tool's
+        configuration.
+
+        Args:
+            env (optional): environment variables to include
+
+        Returns:
+            the environment; ``None`` if the current environment can be used
+        """
+
         final_env = None
         if self.include or self.sanitize or env:
-            final_env = os.environ.copy()
+            final_env = context_environ()
             if self.sanitize:
                 for key in self.sanitize:
                     final_env.pop(key, None)
@@ -125,14 +154,7 @@ class RelengTool:
             if env:
                 final_env.update(env)
 
-        final_env = expand(final_env)
-
-        final_args = self._invoked_tool()
-        if args:
-            final_args.extend(args)
-
-        return _execute(final_args, cwd=cwd, env=final_env, quiet=quiet,
-            critical=False, capture=capture)
+        return expand(final_env)
 
     def _invoked_tool(self):
         """
@@ -159,7 +181,36 @@ class RelengTool:
         if self.tool in RelengTool.detected:
             return RelengTool.detected[self.tool]
 
-        exist_args = [self.tool, *self.exists_args]
+        if self._probe(self.tool):
+            RelengTool.detected[self.tool] = True
+            verbose(f'{self.tool} tool is detected on this system')
+        else:
+            verbose(f'{self.tool} tool is not detected on this system')
+            RelengTool.detected[self.tool] = False
+
+        return RelengTool.detected[self.tool]
+
+    def _probe(self, tool):
+        """
+        check whether a tool can be invoked on the host system
+
+        Invokes the provided tool with the tool's existence-check arguments
+        to determine whether the tool is available. If a persisted cache of
+        detected tools is active, a tool which has been previously detected
+        (and resolves to the same executable) will not be invoked.
+
+        Args:
+            tool: the tool to check
+
+        Returns:
+            ``True``, if the tool can be invoked; ``False`` otherwise
+        """
+
+        cache = RelengTool.cache
+        if cache and cache.lookup(tool, self.exists_args, self.include):
+            return True
+
+        exist_args = [tool, *self.exists_args]
         output = []
         found = execute(
             exist_args, capture=output, critical=False, env_update=self.include)
@@ -167,11 +218,7 @@ class RelengTool:
         if output_str:
             debug(output_str)
 
-        if found:
-            RelengTool.detected[self.tool] = True
-            verbose(f'{self.tool} tool is detected on this system')
-        else:
-            verbose(f'{self.tool} tool is not detected on this system')
-            RelengTool.detected[self.tool] = False
+        if found and cache:
+            cache.record(tool, self.exists_args, self.include, output_str)
 
-        return RelengTool.detected[self.tool]
+        return found
@@ -0,0 +1,187 @@
+# SPDX-License-Identifier: BSD-2-Clause
+# Copyright releng-tool
+
+from __future__ import annotations
+from releng_tool import __version__ as releng_version
+from releng_tool.util.log import debug
+from releng_tool.util.log import verbose
+from shutil import which
+import contextlib
+import json
+import os
+import tempfile
+import threading
+
+#: name of the file (inside a cache directory) holding detected host tools
+TOOL_CACHE_NAME = 'tools.json'
+
+
+class RelengToolCache:
+    """
+    a persisted cache of detected host tools
+
+    Provides a means to remember host tools which have been detected on a
+    system across multiple runs. Each detected tool tracks the resolved path
+    of the tool's executable, the executable's inode, modification time and
+    size as well as the tool's reported version. A cached detection is only
+    used if the tool still resolves to the same unmodified executable, which
+    allows a run to avoid invoking each tool to verify its existence.
+
+    Only tools which have been detected are cached, ensuring tools which are
+    installed after a run are always re-checked.
+
+    Args:
+        path: the file holding the cached detections
+
+    Attributes:
+        path: the file holding the cached detections
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._dirty = False
+        self._entries: dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+        try:
+            with open(path, encoding='utf_8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            verbose('unable to load cached tool detections: {}', e)
+            return
+
+        if isinstance(data, dict) and data.get('version') == releng_version:
+            entries = data.get('tools')
+            if isinstance(entries, dict):
+                self._entries = entries
+
+    def lookup(self, tool, args, env=None) -> bool:
+        """
+        return whether a tool has a valid cached detection
+
+        Args:
+            tool: the tool
+            args: the arguments used to check the tool's existence
+            env (optional): the environment used to check the tool's existence
+
+        Returns:
+            ``True`` if the tool has been detected; ``False`` otherwise
+        """
+
+        key = _key(tool, args, env)
+        with self._lock:
+            entry = self._entries.get(key)
+
+        if not entry:
+            return False
+
+        if _fingerprint(tool) != entry.get('fingerprint'):
+            debug('cached tool detection is stale: {}', tool)
+            with self._lock:
+                self._entries.pop(key, None)
+                self._dirty = True
+            return False
+
+        debug('{} tool is detected on this system (cached): {}',
+            tool, entry.get('detail'))
+        return True
+
+    def record(self, tool, args, env=None, detail: str | None = None) -> None:
+        """
+        record the detection of a tool
+
+        Args:
+            tool: the tool
+            args: the arguments used to check the tool's existence
+            env (optional): the environment used to check the tool's existence
+            detail (optional): the output (e.g. version) reported by the tool
+        """
+
+        fingerprint = _fingerprint(tool)
+        if not fingerprint:
+            return
+
+        key = _key(tool, args, env)
+        with self._lock:
+            self._entries[key] = {
+                'detail': detail,
+                'fingerprint': fingerprint,
+            }
+            self._dirty = True
+
+    def save(self) -> None:
+        """
+        store any updated detections into the cache file
+        """
+
+        with self._lock:
+            if not self._dirty:
+                return
+
+            data = {
+                'tools': self._entries,
+                'version': releng_version,
+            }
+            self._dirty = False
+
+        container = os.path.dirname(self.path)
+        tmp_file = None
+        try:
+            os.makedirs(container, exist_ok=True)
+
+            fd, tmp_file = tempfile.mkstemp(dir=container, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf_8') as f:
+                json.dump(data, f, indent=1, sort_keys=True)
+
+            os.replace(tmp_file, self.path)
+            tmp_file = None
+        except (OSError, TypeError, ValueError) as e:
+            verbose('unable to cache tool detections: {}', e)
+        finally:
+            if tmp_file:
+                with contextlib.suppress(OSError):
+                    os.remove(tmp_file)
+
+
+def _fingerprint(tool) -> list | None:
+    """
+    return a fingerprint of the executable a tool resolves to
+
+    Args:
+        tool: the tool
+
+    Returns:
+        the fingerprint; ``None`` if the tool does not resolve to a file
+    """
+
+    path = which(str(tool))
+    if not path:
+        return None
+
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+
+    return [os.path.abspath(path), st.st_ino, st.st_mtime_ns, st.st_size]
+
+
+def _key(tool, args, env) -> str:
+    """
+    return the key used to track a tool's detection
+
+    Args:
+        tool: the tool
+        args: the arguments used to check the tool's existence
+        env: the environment used to check the tool's existence
+
+    Returns:
+        the key
+    """
+
+    return json.dumps([
+        str(tool),
+        [str(arg) for arg in args or []],
+        sorted((env or {}).items()),
+    ])
@@ -1,8 +1,14 @@
 # SPDX-License-Identifier: BSD-2-Clause
 # Copyright releng-tool
 
+from __future__ import annotations
 from releng_tool.tool import RelengTool
+from releng_tool.util.keyed_lock import KeyedLock
+from releng_tool.util.log import debug
 import configparser
+import contextlib
+import subprocess
+import threading
 
 
 #: executable used to run git commands
@@ -30,6 +36,12 @@ GIT_SANITIZE_ENV_KEYS = [
     'P4PASSWD',
 ]
 
+#: time (in seconds) to wait for a git query process to exit when closed
+GIT_QUERY_CLOSE_TIMEOUT = 5
+
+#: maximum number of submodules processed at the same time
+GIT_SUBMODULE_JOBS = 8
+
 #: dictionary of environment entries append to the environment dictionary
 GIT_EXTEND_ENV = {
     # disable all advice messages
@@ -41,12 +53,110 @@ GIT_EXTEND_ENV = {
 }
 
 
+class GitObjectQuery:
+    """
+    a long-lived git object query process
+
+    Provides a means to resolve object names (revisions, references, etc.)
+    for a repository using a single ``git cat-file --batch-check`` process,
+    instead of spawning a new git process for each lookup.
+
+    Args:
+        args: the arguments used to start the query process
+        env: the environment used to start the query process
+
+    Raises:
+        OSError: if the query process could not be started
+    """
+    def __init__(self, args, env):
+        self._lock = threading.Lock()
+        self._proc = subprocess.Popen(args,
+            env=env,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            encoding='utf_8',
+            errors='replace',
+        )
+
+    def alive(self) -> bool:
+        """
+        return whether the query process can still be used
+
+        Returns:
+            ``True`` if the query process is running; ``False`` otherwise
+        """
+
+        return self._proc.poll() is None
+
+    def close(self) -> None:
+        """
+        close the query process
+        """
+
+        with self._lock:
+            proc = self._proc
+            if proc.stdin:
+                with contextlib.suppress(OSError):
+                    proc.stdin.close()
+
+            try:
+                proc.wait(timeout=GIT_QUERY_CLOSE_TIMEOUT)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+                proc.wait()
+
+            if proc.stdout:
+                proc.stdout.close()
+
+    def resolve(self, name: str) -> str | None:
+        """
+        resolve an object name into an object identifier
+
+        Args:
+            name: the object name (e.g. a revision or reference)
+
+        Returns:
+            the object identifier; ``None`` if the object does not exist
+        """
+
+        # the query process accepts a single object name per line
+        if not name or '\n' in name or '\r' in name:
+            return None
+
+        with self._lock:
+            proc = self._proc
+            if proc.poll() is not None or not proc.stdin or not proc.stdout:
+                return None
+
+            try:
+                proc.stdin.write(name + '\n')
+                proc.stdin.flush()
+                line = proc.stdout.readline()
+            except (OSError, ValueError):
+                return None
+
+        # a found object is reported as "<oid> <type> <size>", where a
+        # missing object is reported as "<name> missing" (or "ambiguous")
+        parts = line.split()
+        if len(parts) != 3 or not parts[2].isdigit():  # noqa: PLR2004
+            return None
+
+        return parts[0]
+
+
 class GitTool(RelengTool):
     """
     git host tool
 
     Provides addition helper methods for git-based tool interaction.
     """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._queries: dict[str, GitObjectQuery] = {}
+        self._queries_lock = threading.Lock()
+        self._remote_refs: dict[str, dict[str, str] | None] = {}
+        self._remote_refs_lock = KeyedLock()
 
     def parse_cfg_file(self, target):
         """
@@ -91,6 +201,121 @@ class GitTool(RelengTool):
 
         return cfg
 
+    def release(self, git_dir):
+        """
+        release a repository's object query process (if any)
+
+        Releases the long-lived object query process used for a repository.
+        This should be invoked after a repository has been modified (e.g.
+        after a fetch or checkout), to ensure future object queries observe
+        the updated repository.
+
+        Args:
+            git_dir: the git directory argument of the repository
+        """
+
+        with self._queries_lock:
+            query = self._queries.pop(git_dir, None)
+
+        if query:
+            query.close()
+
+    def release_all(self):
+        """
+        release all object query processes and cached remote references
+        """
+
+        with self._queries_lock:
+            queries = list(self._queries.values())
+            self._queries.clear()
+            self._remote_refs.clear()
+
+        for query in queries:
+            query.close()
+
+    def remote_refs(self, git_dir, site):
+        """
+        return the references advertised by a repository's remote
+
+        Queries the branches and tags available on the ``origin`` remote of
+        a repository using a single ``ls-remote`` request. Other references
+        (e.g. ``refs/changes/*`` or ``refs/pull/*``) are not requested, since
+        remotes may advertise a large amount of these references. Results are
+        cached by the remote's site, allowing all repositories sharing the
+        same remote to use the same query (until released).
+
+        Args:
+            git_dir: the git directory argument of the repository
+            site: the site of the repository's ``origin`` remote
+
+        Returns:
+            dictionary of references to object identifiers; ``None`` if the
+            remote could not be queried
+        """
+
+        with self._remote_refs_lock.hold(site):
+            with self._queries_lock:
+                if site in self._remote_refs:
+                    return self._remote_refs[site]
+
+            rv, output = self.execute_rv(git_dir,
+                'ls-remote', '--heads', '--tags', 'origin')
+            if rv == 0:
+                refs = {}
+                for line in output.splitlines():
+                    oid, _, ref = line.partition('\t')
+                    if ref:
+                        refs[ref.strip()] = oid.strip()
+            else:
+                debug('unable to query remote references: {}', site)
+                refs = None
+
+            with self._queries_lock:
+                self._remote_refs[site] = refs
+
+        return refs
+
+    def resolve(self, git_dir, name):
+        """
+        resolve an object name for a repository
+
+        Resolves an object name (e.g. a branch, tag, hash or revision
+        expression) into an object identifier. Lookups for a repository are
+        performed through a long-lived object query process, which is shared
+        between all lookups made on the same repository until released.
+
+        Args:
+            git_dir: the git directory argument of the repository
+            name: the object name to resolve
+
+        Returns:
+            the object identifier; ``None`` if the object does not exist
+        """
+
+        with self._queries_lock:
+            query = self._queries.get(git_dir)
+            if query and not query.alive():
+                query.close()
+                query = None
+
+            if not query:
+                args = [*self._invoked_tool(), git_dir, 'cat-file',
+                    '--batch-check']
+                try:
+                    query = GitObjectQuery(args, self._environment())
+                except OSError as e:
+                    debug('unable to start git query: {}', e)
+                    return None
+
+                self._queries[git_dir] = query
+
+        oid = query.resolve(name)
+        debug('git resolve ({}): {} -> {}', git_dir, name, oid)
+        return oid
+
 #: git host tool helper
 GIT = GitTool(GIT_COMMAND,
     env_sanitize=GIT_SANITIZE_ENV_KEYS, env_include=GIT_EXTEND_ENV)
+
+#: locks guarding git cache directories (shared between packages/submodules)
+GIT_CACHE_LOCKS = KeyedLock()
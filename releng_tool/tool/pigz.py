@@ -0,0 +1,15 @@
+# SPDX-License-Identifier: BSD-2-Clause
+# Copyright releng-tool
+
+from releng_tool.tool import RelengTool
+
+#: executable used to run pigz commands
+PIGZ_COMMAND = 'pigz'
+
+#: list of environment keys to filter from a environment dictionary
+PIGZ_SANITIZE_ENV_KEYS = [
+    'GZIP',
+]
+
+#: pigz host tool helper
+PIGZ = RelengTool(PIGZ_COMMAND, env_sanitize=PIGZ_SANITIZE_ENV_KEYS)
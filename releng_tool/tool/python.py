@@ -53,7 +53,7 @@ class PythonTool(RelengTool):
         found = True
         tool = self.tool
 
-        if execute([tool, *self.exists_args], quiet=True, critical=False):
+        if self._probe(tool):
             found = True
         # if windows and a non-path entry, try to find the interpreter on the
         # local system
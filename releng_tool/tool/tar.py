@@ -21,9 +21,11 @@ class TarTool(RelengTool):
     Provides addition helper methods for tar-based tool interaction.
 
     Attributes:
+        compress_program: whether `use-compress-program` is supported
         force_local: whether or not the `force-local` option is supported
     """
 
+    compress_program = False
     force_local = False
 
     def exists(self):
@@ -46,6 +48,9 @@ class TarTool(RelengTool):
                 TarTool.force_local = True
             else:
                 debug('{} tool does not support force-local', self.tool)
+            if '--use-compress-program' in out:
+                debug('{} tool supports use-compress-program', self.tool)
+                TarTool.compress_program = True
             RelengTool.detected[self.tool] = True
         else:
             debug('{} tool is not detected on this system', self.tool)
@@ -0,0 +1,16 @@
+# SPDX-License-Identifier: BSD-2-Clause
+# Copyright releng-tool
+
+from releng_tool.tool import RelengTool
+
+#: executable used to run xz commands
+XZ_COMMAND = 'xz'
+
+#: list of environment keys to filter from a environment dictionary
+XZ_SANITIZE_ENV_KEYS = [
+    'XZ_DEFAULTS',
+    'XZ_OPT',
+]
+
+#: xz host tool helper
+XZ = RelengTool(XZ_COMMAND, env_sanitize=XZ_SANITIZE_ENV_KEYS)
@@ -6,7 +6,7 @@ import os
 import types
 
 
-def env_wrap():
+def env_wrap(target=None):
     """
     an os environment wrapper
 
@@ -15,6 +15,13 @@ def env_wrap():
     to manually converting non-str types into str that have a representation
     that is expected to be accepted as a value for an OS environment variable.
 
+    If a ``target`` dictionary is provided, converted values are stored into
+    the dictionary instead of `os.environ` (where removed entries are tracked
+    with a value of ``None``).
+
+    Args:
+        target (optional): the dictionary to populate
+
     Returns:
         the wrapper
     """
@@ -23,7 +30,10 @@ def env_wrap():
         def __setitem__(self, key, value):
             # for a false/unset value, remove environment entry
             if value is False or value is None:
-                os.environ.pop(key, None)
+                if target is not None:
+                    target[key] = None
+                else:
+                    os.environ.pop(key, None)
                 return
 
             # a true entry is always represented as "1"
@@ -39,11 +49,18 @@ def env_wrap():
             else:
                 val = str(value)
 
-            os.environ[key] = val
+            if target is not None:
+                target[key] = val
+            else:
+                os.environ[key] = val
 
     return EnvSet()
 
 
+# unique default helper for extend_script_env
+__EXTEND_SCRIPT_ENV_MISSING = object()
+
+
 def extend_script_env(env, extra):
     """
     extend a partially filtered environment (globals) for a run_path event
@@ -68,23 +85,29 @@ def extend_script_env(env, extra):
     Returns:
         the same environment passed in
     """
-    extra_copy = extra.copy()
+    updates = {}
 
     for key, value in extra.items():
-        # remove python magic objects (if any)
+        # ignore entries already known to the environment (e.g. globals
+        # pre-populated into the script which have not been modified)
+        if env.get(key, __EXTEND_SCRIPT_ENV_MISSING) is value:
+            continue
+        # ignore python magic objects (if any)
         if key.startswith('__') and key.endswith('__'):
-            extra_copy.pop(key)
-        # remove imported built-in functions
-        elif isinstance(value, types.BuiltinFunctionType):
-            extra_copy.pop(key)
-        # remove imported functions
-        elif isinstance(value, types.FunctionType):
-            extra_copy.pop(key)
-        # remove imported modules
-        elif isinstance(value, types.ModuleType):
-            extra_copy.pop(key)
-
-    env.update(extra_copy)
+            continue
+        # ignore imported built-in functions
+        if isinstance(value, types.BuiltinFunctionType):
+            continue
+        # ignore imported functions
+        if isinstance(value, types.FunctionType):
+            continue
+        # ignore imported modules
+        if isinstance(value, types.ModuleType):
+            continue
+
+        updates[key] = value
+
+    env.update(updates)
     return env
 
 
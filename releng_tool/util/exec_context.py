@@ -0,0 +1,157 @@
+# SPDX-License-Identifier: BSD-2-Clause
+# Copyright releng-tool
+
+from __future__ import annotations
+from collections.abc import Iterator
+from collections.abc import Mapping
+from contextlib import contextmanager
+from contextvars import ContextVar
+from releng_tool.util.process_gate import PROCESS_GATE
+from releng_tool.util.process_gate import _apply_env
+import os
+
+
+class RelengExecutionContext:
+    """
+    the execution context of a package being processed
+
+    Tracks the state a package's stage expects when invoking processes: an
+    overlay of environment variables applied over the process environment,
+    the working directory and the number of jobs granted to the package.
+    Since this state is tracked per thread (or task), packages processed at
+    the same time can each invoke processes with their own state without
+    relying on process-wide state (e.g. ``os.environ`` or the working
+    directory) at the time a process is started.
+
+    Args:
+        env (optional): environment variables to overlay (``None`` values
+            remove a variable)
+        cwd (optional): the working directory
+        jobs (optional): the number of jobs granted
+
+    Attributes:
+        cwd: the working directory (``None`` if not tracked)
+        env: environment variables to overlay
+        jobs: the number of jobs granted (``None`` if not tracked)
+    """
+    def __init__(self, env: Mapping[str, str | None] | None = None,
+            cwd: str | None = None, jobs: int | None = None):
+        self.cwd = cwd
+        self.env: dict[str, str | None] = dict(env or {})
+        self.jobs = jobs
+
+    def environ(self, base: Mapping[str, str] | None = None) -> dict[str, str]:
+        """
+        return an environment with this context's overlay applied
+
+        Args:
+            base (optional): the base environment (defaults to ``os.environ``)
+
+        Returns:
+            the environment
+        """
+
+        final_env = dict(os.environ if base is None else base)
+        for key, value in self.env.items():
+            if value is None:
+                final_env.pop(key, None)
+            else:
+                final_env[key] = value
+
+        return final_env
+
+
+# the execution context active on the current thread (or task)
+_ACTIVE_CONTEXT: ContextVar[RelengExecutionContext | None] = \
+    ContextVar('releng_execution_context', default=None)
+
+
+def active_context() -> RelengExecutionContext | None:
+    """
+    return the active execution context
+
+    Returns:
+        the execution context; ``None`` if no context is active
+    """
+
+    return _ACTIVE_CONTEXT.get()
+
+
+def context_environ(base: Mapping[str, str] | None = None) -> dict[str, str]:
+    """
+    return an environment for the active execution context
+
+    Args:
+        base (optional): the base environment (defaults to ``os.environ``)
+
+    Returns:
+        the environment
+    """
+
+    ctx = _ACTIVE_CONTEXT.get()
+    if ctx:
+        return ctx.environ(base)
+
+    return dict(os.environ if base is None else base)
+
+
+@contextmanager
+def execution_context(env: Mapping[str, str | None] | None = None,
+        cwd: str | None = None,
+        jobs: int | None = None) -> Iterator[RelengExecutionContext]:
+    """
+    derive a new execution context for a context
+
+    Activates a new execution context which inherits the state of any active
+    execution context, with the provided environment variables, working
+    directory or job count applied over the inherited state. The previous
+    execution context is restored at the end of the context.
+
+    Args:
+        env (optional): environment variables to overlay (``None`` values
+            remove a variable)
+        cwd (optional): the working directory
+        jobs (optional): the number of jobs granted
+
+    Yields:
+        the execution context
+    """
+
+    parent = _ACTIVE_CONTEXT.get()
+    if parent:
+        ctx = RelengExecutionContext(
+            env={**parent.env, **(env or {})},
+            cwd=cwd or parent.cwd,
+            jobs=jobs if jobs is not None else parent.jobs,
+        )
+    else:
+        ctx = RelengExecutionContext(env=env, cwd=cwd, jobs=jobs)
+
+    token = _ACTIVE_CONTEXT.set(ctx)
+    try:
+        yield ctx
+    finally:
+        _ACTIVE_CONTEXT.reset(token)
+
+
+@contextmanager
+def scoped_environ(
+        env: Mapping[str, str | None]) -> Iterator[RelengExecutionContext]:
+    """
+    apply environment variables for a context
+
+    The provided environment variables are tracked in a new execution context,
+    which is used by any process invoked in this context. The variables are
+    also applied to the process environment (and restored at the end of the
+    context) to support scripts which read ``os.environ`` directly.
+
+    Args:
+        env: the environment variables (``None`` values remove a variable)
+
+    Yields:
+        the execution context
+    """
+
+    with execution_context(env=env) as ctx, PROCESS_GATE.scoped_env(env):
+        _apply_env(dict(env))
+        yield ctx
@@ -11,6 +11,7 @@
 # the running instance shutdown.
 
 from releng_tool.util.io_touch import touch
+from releng_tool.util.log import debug
 from releng_tool.util.log import err
 from releng_tool.util.strccenum import StrCcEnum
 import os
@@ -32,23 +33,26 @@ class FileFlag(StrCcEnum):
     NO_EXIST = 'no_exist'
 
 
-def check_file_flag(file):
+def check_file_flag(file, fingerprint=None):
     """
     check a file flag
 
     Attempt to read a file flag state by checking for the file's existence.
+    If a fingerprint is provided, the flag is only considered enabled if the
+    flag tracks the same fingerprint.
 
     Args:
         file: the filename
+        fingerprint (optional): the fingerprint expected for the flag
 
     Returns:
         ``FileFlag.EXISTS`` if the flag is enabled; ``FileFlag.NO_EXIST`` if the
             flag is not enabled
     """
-    return process_file_flag(file, None)
+    return process_file_flag(file, None, fingerprint=fingerprint)
 
 
-def process_file_flag(file, flag, quiet=False):
+def process_file_flag(file, flag, quiet=False, fingerprint=None):
     """
     process a file flag event
 
@@ -59,10 +63,18 @@ def process_file_flag(file, flag, quiet=False):
     set to ``False``, the file's existence will be checked to reflect whether or
     not the flag is considered enabled.
 
+    A fingerprint can be provided to track the inputs used when a flag was
+    configured. When configuring a flag, the fingerprint is written into the
+    file flag. When checking a flag, a flag tracking a different fingerprint
+    is considered to not be enabled. A flag which does not track any
+    fingerprint (e.g. created by an older version of releng-tool) is
+    considered enabled and will be updated to track the provided fingerprint.
+
     Args:
         file: the filename
         flag: the flag option to used; ``None`` to check flag state
         quiet: suppression of any error messages to standard out
+        fingerprint (optional): the fingerprint to write or check against
 
     Returns:
         ``FileFlag.EXISTS`` if the flag is enabled; ``FileFlag.NO_EXIST`` if the
@@ -76,7 +88,7 @@ def process_file_flag(file, flag, quiet=False):
         # modified times. For the case where may experience issues creating the
         # file flag themselves (permission errors, etc.), fallback on just the
         # existence of the file flag to still be considered as configured.
-        if touch(file):
+        if touch(file) and _write_fingerprint(file, fingerprint):
             rv = FileFlag.CONFIGURED
         elif os.path.isfile(file):
             rv = FileFlag.CONFIGURED
@@ -86,7 +98,45 @@ def process_file_flag(file, flag, quiet=False):
                 err('unable to configure file flag: {}', file)
     elif flag is None and os.path.isfile(file):
         rv = FileFlag.EXISTS
+
+        if fingerprint:
+            try:
+                with open(file) as f:
+                    tracked = f.read().strip()
+            except OSError:
+                tracked = None
+
+            if not tracked:
+                _write_fingerprint(file, fingerprint)
+            elif tracked != fingerprint:
+                debug('file flag is stale: {}', file)
+                rv = FileFlag.NO_EXIST
     else:
         rv = FileFlag.NO_EXIST
 
     return rv
+
+
+def _write_fingerprint(file, fingerprint):
+    """
+    write a fingerprint into a file flag
+
+    Args:
+        file: the filename
+        fingerprint: the fingerprint to write (if any)
+
+    Returns:
+        ``True`` if the fingerprint was written (or no fingerprint provided);
+        ``False`` if the fingerprint could not be written
+    """
+
+    if not fingerprint:
+        return True
+
+    try:
+        with open(file, 'w') as f:
+            f.write(fingerprint)
+    except OSError:
+        return False
+
+    return True
@@ -1,6 +1,8 @@
 # SPDX-License-Identifier: BSD-2-Clause
 # Copyright releng-tool
 
+from concurrent.futures import ThreadPoolExecutor
+from releng_tool.util import nullish_coalescing as NC
 from releng_tool.util.log import debug
 from releng_tool.util.log import err
 from releng_tool.util.log import warn
@@ -11,6 +13,12 @@ import os
 #: size of blocks read when calculating the hash for a file
 HASH_READ_BLOCKSIZE = 1048576
 
+#: size of blocks read when calculating the hash for a large file
+HASH_READ_LARGE_BLOCKSIZE = 8388608
+
+#: size of a file where larger blocks are used when calculating its hash
+HASH_LARGE_FILE_SIZE = 67108864
+
 #: number of expected parts for a hash entry
 HASH_ENTRY_PARTS = 3
 
@@ -120,7 +128,83 @@ def load(hash_file):
     return [tuple(x) for x in data if x]
 
 
-def verify(hash_file, path, exclude=None, relaxed=False, quiet=False):
+def prepare_hashers(hash_file, asset):
+    """
+    prepare hashers for an asset defined in the provided hash file
+
+    Builds a series of hashers for each hash entry defined for the provided
+    asset. This allows a caller to calculate the hashes of an asset while the
+    asset is being generated (e.g. downloaded). Updated hashers can then be
+    provided to ``verify`` to avoid reading the asset again.
+
+    Args:
+        hash_file: the file containing hash information
+        asset: the name of the asset
+
+    Returns:
+        a dictionary of hash entries to hashers; ``None`` if no hashers could
+        be prepared for the asset
+    """
+
+    try:
+        hash_info = load(hash_file)
+    except (BadFileHashLoadError, BadFormatHashLoadError):
+        return None
+
+    hashers = {}
+    for type_, _, entry_asset in hash_info:
+        if entry_asset != asset:
+            continue
+
+        hash_type, _, _ = type_.partition(':')
+        hasher = _get_hasher(hash_type)
+        if not hasher:
+            return None
+
+        hashers[type_] = hasher
+
+    return hashers or None
+
+
+def update_hashers(target_file, hashers):
+    """
+    update a series of hashers with the contents of a file
+
+    Reads the contents of the provided file into each provided hasher. Files
+    larger than ``HASH_LARGE_FILE_SIZE`` are read using larger blocks to
+    reduce the overhead of reading multi-gigabyte assets.
+
+    Args:
+        target_file: the file to hash
+        hashers: the hashers to update
+
+    Returns:
+        ``True`` if the file was hashed; ``False`` if the file could not be read
+    """
+
+    try:
+        with open(target_file, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size > HASH_LARGE_FILE_SIZE:
+                blocksize = HASH_READ_LARGE_BLOCKSIZE
+            else:
+                blocksize = HASH_READ_BLOCKSIZE
+
+            buf = bytearray(blocksize)
+            view = memoryview(buf)
+            read = f.readinto(buf)
+            while read:
+                for hasher in hashers:
+                    hasher.update(view[:read])
+                read = f.readinto(buf)
+    except OSError:
+        return False
+
+    return True
+
+
+def verify(hash_file, path, exclude=None, relaxed=False, quiet=False,
+        jobs=None, cache=None, hashers=None):
     """
     verify a file or directory with the hashes defined in the provided hash file
 
@@ -136,12 +220,60 @@ def verify(hash_file, path, exclude=None, relaxed=False, quiet=False):
     will return ``HashResult.VERIFIED``. Other warning/error states for
     verification will be return with a respective ``HashResult`` value.
 
+    Multiple assets are hashed at the same time. All missing or mismatched
+    assets are reported, where the result returned will be the state of the
+    first asset (in the order of the hash file) which failed verification.
+
+    If a verified hash cache is provided, a file which has previously been
+    verified (and has not changed since) will not be hashed again. Likewise,
+    if hashers are provided for a file, the file will not be read again.
+
     Args:
         hash_file: the file containing hash information
         path: the file or directory to verify
         exclude: assets to exclude from the verification check
         relaxed: relax logging to only warn on detected missing/mismatched
         quiet: disablement of error messages to standard out
+        jobs (optional): maximum number of assets to hash at the same time
+            (defaults to the number of processors)
+        cache (optional): verified hash cache to use when verifying a file
+        hashers (optional): hashers already updated with the contents of the
+            file being verified (see ``prepare_hashers``)
+
+    Returns:
+        the hash result (``HashResult``)
+    """
+
+    if cache and not exclude and os.path.isfile(path):
+        if cache.verified(hash_file, path):
+            debug('using cached hash verification: {}', path)
+            return HashResult.VERIFIED
+
+        result = _verify(hash_file, path, exclude, relaxed, quiet, jobs, hashers)
+        if result == HashResult.VERIFIED:
+            cache.record(hash_file, path)
+        else:
+            cache.discard(path)
+
+        return result
+
+    return _verify(hash_file, path, exclude, relaxed, quiet, jobs, hashers)
+
+
+def _verify(hash_file, path, exclude, relaxed, quiet, jobs, precalculated):
+    """
+    verify a file or directory with the hashes defined in the provided hash file
+
+    See ``verify`` for more details.
+
+    Args:
+        hash_file: the file containing hash information
+        path: the file or directory to verify
+        exclude: assets to exclude from the verification check
+        relaxed: relax logging to only warn on detected missing/mismatched
+        quiet: disablement of error messages to standard out
+        jobs: maximum number of assets to hash at the same time
+        precalculated: hashers already updated for a file being verified
 
     Returns:
         the hash result (``HashResult``)
@@ -199,7 +331,20 @@ Please correct the following hash file:
         types = hash_catalog.setdefault(asset, {})
         types.setdefault(type_, []).append(hash_.lower())
 
+    asset_hashers = {}
+    hashed_assets = set()
+
+    # use any hashers already updated with the contents of the file
+    if is_file and precalculated and \
+            set(precalculated) == set(hash_catalog[target]):
+        debug('using pre-calculated hashes: {}', target)
+        asset_hashers[target] = precalculated
+        hashed_assets.add(target)
+
     for asset, type_hashes in hash_catalog.items():
+        if asset in hashed_assets:
+            continue
+
         hashers = {}
         for hash_entry in type_hashes:
             # extract the specific hash type, if the entry includes a key length
@@ -223,15 +368,30 @@ library.
                 debug('unsupported hash type: {}', hash_type)
                 return HashResult.UNSUPPORTED
 
+        asset_hashers[asset] = hashers
+
+    # calculate the hashes of all assets; distinct assets are hashed at the
+    # same time since hashing (and reading) large blocks release the GIL
+    def hash_asset(asset):
+        if asset in hashed_assets:
+            return True
+
         target_file = os.path.join(path, asset)
-        try:
-            with open(target_file, 'rb') as f:
-                buf = f.read(HASH_READ_BLOCKSIZE)
-                while buf:
-                    for hasher in hashers.values():
-                        hasher.update(buf)
-                    buf = f.read(HASH_READ_BLOCKSIZE)
-        except OSError:
+        return update_hashers(target_file, asset_hashers[asset].values())
+
+    assets = list(asset_hashers.keys())
+    workers = min(len(assets), NC(jobs, os.cpu_count() or 1))
+    if workers > 1:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            hashed = list(executor.map(hash_asset, assets))
+    else:
+        hashed = [hash_asset(asset) for asset in assets]
+
+    # report all missing or mismatched assets, returning the first issue
+    # detected (in the order of the hash file)
+    result = HashResult.VERIFIED
+    for asset, asset_hashed in zip(assets, hashed, strict=True):
+        if not asset_hashed:
             if not quiet:
                 if relaxed:
                     warn('missing expected file for verification: ' + asset)
@@ -245,9 +405,12 @@ Ensure the hash file correctly names an expected file.
     Hash File: {}
          File: {}''', hash_file, asset)
 
-            return HashResult.MISSING_LISTED
+            if result == HashResult.VERIFIED:
+                result = HashResult.MISSING_LISTED
+            continue
 
-        for hash_entry, hasher in hashers.items():
+        type_hashes = hash_catalog[asset]
+        for hash_entry, hasher in asset_hashers[asset].items():
             _, _, hash_len = hash_entry.partition(':')
             if hash_len:
                 digest = hasher.hexdigest(int(hash_len))
@@ -272,9 +435,11 @@ hash mismatch detected
          File: {}
      Detected: {}{}''', hash_file, asset, digest, provided)
 
-                return HashResult.MISMATCH
+                if result == HashResult.VERIFIED:
+                    result = HashResult.MISMATCH
+                break
 
-    return HashResult.VERIFIED
+    return result
 
 
 def _get_hasher(hash_type):
@@ -0,0 +1,214 @@
+# SPDX-License-Identifier: BSD-2-Clause
+# Copyright releng-tool
+
+from __future__ import annotations
+from releng_tool.util.io_mkdir import mkdir
+from releng_tool.util.log import debug
+from releng_tool.util.log import verbose
+import contextlib
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+
+#: filename of the verified hash database
+VERIFIED_HASH_CACHE_FNAME = '.hashdb'
+
+
+class VerifiedHashCache:
+    """
+    a persistent cache of verified file hashes
+
+    Tracks files which have previously been verified against a hash file. A
+    file is tracked by its identity (size, modification time and inode) along
+    with a digest of the hash file used to verify it. If a file or its hash
+    file changes in any way, the file will no longer be considered verified.
+    This allows large files (e.g. cached archives) to avoid being re-hashed
+    when their verification is requested over multiple runs.
+
+    Changes to the cache are tracked in memory and persisted when ``save`` is
+    invoked (e.g. once at the end of a run).
+
+    Args:
+        db_file: the file used to persist the cache
+
+    Attributes:
+        db_file: the file used to persist the cache
+    """
+    def __init__(self, db_file: str):
+        self.db_file = db_file
+        self._changes: dict[str, tuple | None] = {}
+        self._db: dict | None = None
+        self._lock = threading.Lock()
+
+    def discard(self, path: str) -> None:
+        """
+        discard any verified state for a file
+
+        Args:
+            path: the file
+        """
+
+        key = os.path.abspath(path)
+        with self._lock:
+            if key in self._load():
+                self._update(key, None)
+
+    def record(self, hash_file: str, path: str) -> None:
+        """
+        record a file as verified against a hash file
+
+        Args:
+            hash_file: the hash file the file was verified against
+            path: the file
+        """
+
+        identity = _identity(hash_file, path)
+        if not identity:
+            return
+
+        key = os.path.abspath(path)
+        with self._lock:
+            if self._load().get(key) != identity:
+                self._update(key, identity)
+
+    def save(self) -> None:
+        """
+        persist any changes made to the cache
+
+        Changes made to the cache are applied over the latest persisted
+        entries (e.g. from another run sharing the same cache directory)
+        before being saved.
+        """
+
+        with self._lock:
+            if not self._changes:
+                return
+
+            db = _read_db(self.db_file)
+            for key, identity in self._changes.items():
+                if identity:
+                    db[key] = identity
+                else:
+                    db.pop(key, None)
+            self._changes.clear()
+            self._db = db
+
+            container = os.path.dirname(self.db_file)
+            if not mkdir(container):
+                verbose('unable to generate directory for verified hash cache')
+                return
+
+            tmp_file = None
+            try:
+                fd, tmp_file = tempfile.mkstemp(dir=container)
+                with os.fdopen(fd, 'wb') as f:
+                    pickle.dump(db, f)
+                os.replace(tmp_file, self.db_file)
+                debug('saved verified hash cache')
+            except (OSError, pickle.PicklingError):
+                verbose('failed to save verified hash cache')
+                if tmp_file:
+                    with contextlib.suppress(OSError):
+                        os.remove(tmp_file)
+
+    def verified(self, hash_file: str, path: str) -> bool:
+        """
+        check if a file has previously been verified against a hash file
+
+        Args:
+            hash_file: the hash file to verify against
+            path: the file
+
+        Returns:
+            ``True`` if the file has been verified; ``False`` otherwise
+        """
+
+        identity = _identity(hash_file, path)
+        if not identity:
+            return False
+
+        key = os.path.abspath(path)
+        with self._lock:
+            return self._load().get(key) == identity
+
+    def _load(self) -> dict:
+        """
+        load (if not already loaded) the persisted cache
+
+        Returns:
+            the cache
+        """
+
+        if self._db is None:
+            self._db = _read_db(self.db_file)
+
+        return self._db
+
+    def _update(self, key: str, identity: tuple | None) -> None:
+        """
+        update an entry in the cache
+
+        Args:
+            key: the key of the entry
+            identity: the identity to store; ``None`` to remove the entry
+        """
+
+        db = self._load()
+        if identity:
+            db[key] = identity
+        else:
+            db.pop(key, None)
+        self._changes[key] = identity
+
+
+def _identity(hash_file: str, path: str) -> tuple | None:
+    """
+    return the identity of a file verified against a hash file
+
+    Args:
+        hash_file: the hash file
+        path: the file
+
+    Returns:
+        the identity; ``None`` if either file could not be read
+    """
+
+    try:
+        with open(hash_file, 'rb') as f:
+            hash_digest = hashlib.sha256(f.read()).hexdigest()
+        st = os.stat(path)
+    except OSError:
+        return None
+
+    return (st.st_size, st.st_mtime_ns, st.st_ino, hash_digest)
+
+
+def _read_db(db_file: str) -> dict:
+    """
+    read a persisted verified hash database
+
+    Args:
+        db_file: the database file
+
+    Returns:
+        the database entries
+    """
+
+    if not os.path.exists(db_file):
+        return {}
+
+    try:
+        with open(db_file, 'rb') as f:
+            db = pickle.load(f)
+        debug('loaded verified hash cache')
+    except OSError:
+        verbose('failed to load verified hash cache (io error)')
+    except (EOFError, ValueError, pickle.UnpicklingError):
+        verbose('failed to load verified hash cache (pickle error)')
+    else:
+        if isinstance(db, dict):
+            return db
+
+    return {}
@@ -0,0 +1,213 @@
+# SPDX-License-Identifier: BSD-2-Clause
+# Copyright releng-tool
+
+from __future__ import annotations
+from collections.abc import Iterator
+from contextlib import contextmanager
+from http import HTTPStatus
+from urllib.error import HTTPError
+from urllib.parse import urljoin
+from urllib.parse import urlsplit
+from urllib.request import Request
+from urllib.request import getproxies
+from urllib.request import proxy_bypass
+from urllib.request import urlopen
+import http.client
+import sys
+import threading
+
+#: maximum number of redirects to follow for a pooled request
+HTTP_POOL_MAX_REDIRECTS = 10
+
+#: maximum number of idle connections to keep for a specific endpoint
+HTTP_POOL_MAX_IDLE = 4
+
+# user agent used for pooled requests (consistent with urllib requests)
+USER_AGENT = 'Python-urllib/{}.{}'.format(*sys.version_info[:2])
+
+# redirect statuses which can be followed for a pooled request
+REDIRECT_CODES = (301, 302, 303, 307, 308)
+
+
+class HttpConnectionPool:
+    """
+    a pool of keep-alive http connections
+
+    Provides a means to reuse HTTP/HTTPS connections over multiple requests
+    made to the same endpoint (e.g. multiple packages fetched from the same
+    host or mirror). Reusing a connection avoids the need to perform a new
+    TCP connection and TLS handshake for each request.
+
+    Requests which cannot use a pooled connection (e.g. non-HTTP schemes or
+    requests which need to go through a proxy) are processed using
+    ``urlopen``.
+    """
+    def __init__(self):
+        self._idle = {}
+        self._lock = threading.Lock()
+
+    def clear(self) -> None:
+        """
+        close all idle connections
+        """
+
+        with self._lock:
+            idle = self._idle
+            self._idle = {}
+
+        for conns in idle.values():
+            for conn in conns:
+                conn.close()
+
+    @contextmanager
+    def urlopen(self, url: str, headers: dict[str, str] | None = None,
+            context=None) -> Iterator:
+        """
+        open a url, reusing an idle connection to the endpoint (if any)
+
+        Performs a GET request for the provided URL. Redirects are followed
+        and any error status raises an ``HTTPError`` (mimicking ``urlopen``).
+        Once the context has completed, the connection used for the request
+        is returned to the pool if the response has been fully read.
+
+        Args:
+            url: the url to open
+            headers (optional): additional headers to send
+            context (optional): ssl context to use for https requests
+
+        Yields:
+            the response
+        """
+
+        headers = dict(headers or {})
+
+        for _ in range(HTTP_POOL_MAX_REDIRECTS + 1):
+            parts = urlsplit(url)
+            if parts.scheme not in ('http', 'https') or \
+                    _requires_proxy(parts.scheme, parts.hostname):
+                with urlopen(Request(url, headers=headers),
+                        context=context) as rsp:
+                    yield rsp
+                return
+
+            key = (parts.scheme, parts.netloc, id(context))
+            conn, rsp = self._request(key, parts, headers, context)
+
+            try:
+                if rsp.status in REDIRECT_CODES and \
+                        rsp.getheader('location'):
+                    rsp.read()
+                    url = urljoin(url, rsp.getheader('location'))
+                    continue
+
+                if rsp.status >= HTTPStatus.BAD_REQUEST:
+                    raise HTTPError(url, rsp.status, rsp.reason,
+                        rsp.headers, None)
+
+                yield rsp
+            finally:
+                self._release(key, conn, rsp)
+            return
+
+        raise HTTPError(url, rsp.status, 'too many redirects',
+            rsp.headers, None)
+
+    def _request(self, key, parts, headers, context):
+        """
+        perform a request on a pooled (or new) connection
+
+        Args:
+            key: the pool key for the endpoint
+            parts: the split url
+            headers: the headers to send
+            context: ssl context to use for https requests
+
+        Returns:
+            2-tuple of the connection and response
+        """
+
+        path = parts.path or '/'
+        if parts.query:
+            path += '?' + parts.query
+
+        request_headers = {
+            'Connection': 'keep-alive',
+            'User-Agent': USER_AGENT,
+        }
+        request_headers.update(headers)
+
+        while True:
+            conn = None
+            with self._lock:
+                idle = self._idle.get(key)
+                if idle:
+                    conn = idle.pop()
+
+            reused = conn is not None
+            # always provide an explicit port, since a connection will
+            # otherwise try to parse a port from the host (which breaks for
+            # ipv6 literals)
+            if not conn:
+                if parts.scheme == 'https':
+                    conn = http.client.HTTPSConnection(parts.hostname,
+                        parts.port or http.client.HTTPS_PORT, context=context)
+                else:
+                    conn = http.client.HTTPConnection(parts.hostname,
+                        parts.port or http.client.HTTP_PORT)
+
+            try:
+                conn.request('GET', path, headers=request_headers)
+                return conn, conn.getresponse()
+            except (OSError, http.client.HTTPException):
+                conn.close()
+
+                # an idle connection may have been closed by the server;
+                # try again with another connection
+                if reused:
+                    continue
+                raise
+
+    def _release(self, key, conn, rsp):
+        """
+        release a connection back into the pool
+
+        Args:
+            key: the pool key for the endpoint
+            conn: the connection
+            rsp: the response last received on the connection
+        """
+
+        if rsp.will_close or not rsp.isclosed():
+            conn.close()
+            return
+
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < HTTP_POOL_MAX_IDLE:
+                idle.append(conn)
+                return
+
+        conn.close()
+
+
+def _requires_proxy(scheme: str, host: str | None) -> bool:
+    """
+    check if a request to a host is required to use a proxy
+
+    Args:
+        scheme: the scheme of the request
+        host: the host of the request
+
+    Returns:
+        whether a proxy is configured for the request
+    """
+
+    proxies = getproxies()
+    if scheme not in proxies and 'all' not in proxies:
+        return False
+
+    return not (host and proxy_bypass(host))
+
+
+#: pool of keep-alive connections shared by url fetches
+HTTP_POOL = HttpConnectionPool()
@@ -4,6 +4,8 @@
 from __future__ import annotations
 from releng_tool.support import releng_script_envs
 from releng_tool.util.critical import raise_for_critical
+from releng_tool.util.exec_context import active_context
+from releng_tool.util.exec_context import context_environ
 from releng_tool.util.log import debug
 from releng_tool.util.log import err
 from releng_tool.util.log import is_debug
@@ -11,15 +13,31 @@ from releng_tool.util.log import is_verbose
 from releng_tool.util.log import log
 from releng_tool.util.log import verbose
 from releng_tool.util.log import warn
+from releng_tool.util.process_gate import PROCESS_GATE
+from releng_tool.util.script_cache import compile_script
+from releng_tool.util.script_cache import run_script_code
 from releng_tool.util.string import expand as expand_util
 from runpy import run_path
 from shlex import quote
-import io
 import os
+import re
 import subprocess
 import sys
+import time
 import traceback
 
+#: maximum number of bytes to read from a process's output at a time
+EXECUTE_READ_BLOCKSIZE = 64 * 1024
+
+#: maximum number of characters of process output to hold before logging
+EXECUTE_LOG_FLUSH_SIZE = 256 * 1024
+
+#: maximum time (in seconds) to hold process output before logging
+EXECUTE_LOG_FLUSH_INTERVAL = 0.1
+
+# pattern used to split process output into lines for capturing
+EXECUTE_LINE_SPLIT = re.compile('[\r\n]')
+
 
 #: list of (lower-cased) extension with "multiple parts"
 #: (see ``interpretStemExtension``)
@@ -196,7 +214,7 @@ def execute_rv(command, *args, **kwargs):
 
 def _execute(args, cwd=None, env=None, env_update=None, quiet=None,
         critical=True, capture=None, expand=True,
-        args_str=False, ignore_stderr=False):
+        args_str=False, ignore_stderr=False, tee=None):
     """
     execute the provided command/arguments
 
@@ -240,6 +258,7 @@ def _execute(args, cwd=None, env=None, env_update=None, quiet=None,
         expand (optional): perform variable expansion on arguments
         args_str (optional): invoke arguments as a single string
         ignore_stderr (optional): ignore any stderr output
+        tee (optional): binary file-like object to write all output into
 
     Returns:
         the return code of the execution request
@@ -259,9 +278,18 @@ def _execute(args, cwd=None, env=None, env_update=None, quiet=None,
         final_env = dict(env)
     if env_update:
         if not final_env:
-            final_env = os.environ.copy()
+            final_env = context_environ()
         final_env.update(env_update)
 
+    # when no explicit environment is provided, use the environment of the
+    # active execution context (if any) instead of the process environment
+    ctx = active_context()
+    if ctx:
+        if final_env is None and ctx.env:
+            final_env = ctx.environ()
+        if cwd is None:
+            cwd = ctx.cwd
+
     # if quiet is undefined, default its state based on whether or not the
     # caller wishes to capture output to a list
     if quiet is None:
@@ -316,41 +344,12 @@ def _execute(args, cwd=None, env=None, env_update=None, quiet=None,
                 stderr=stderr,
                 stdout=subprocess.PIPE,
             )
-            buffered_stdout = io.BufferedReader(proc.stdout)
-
-            line = bytearray()
-            while True:
-                data = buffered_stdout.read1(1024)
-                if not data:
-                    proc.wait()
-                    break
-                line += data
-
-                while data and line:
-                    for idx, c in enumerate(line):
-                        if c in (ord('\r'), ord('\n')):
-                            decoded_line = line[:idx+1].decode('utf_8')
-                            if capture is not None:
-                                capture_line = decoded_line.rstrip()
-                                if capture_line:
-                                    capture.append(capture_line)
-                            if not quiet:
-                                log(decoded_line, end='', expand=False)
-                            line = line[idx+1:]
-                            break
-                    else:
-                        break
-
-            if line:
-                decoded_line = line.decode('utf_8')
-                if capture is not None:
-                    capture_line = decoded_line.rstrip()
-                    if capture_line:
-                        capture.append(capture_line)
-                if not quiet:
-                    log(decoded_line, expand=False)
-
-            proc.communicate()
+
+            # the process has been spawned; allow other packages to progress
+            # while waiting on this process to complete
+            with PROCESS_GATE.released():
+                _execute_pump(proc, quiet, capture, tee)
+                proc.communicate()
 
             rv = proc.returncode
         except OSError as e:
@@ -376,6 +375,91 @@ def _execute(args, cwd=None, env=None, env_update=None, quiet=None,
     return rv
 
 
+def _execute_pump(proc, quiet, capture, tee):
+    """
+    process the output of an executed process until it completes
+
+    Reads a process's output in large blocks, framing the output on line
+    breaks (either a carriage return or a line feed). Completed lines are
+    captured (if requested) and logged in batches, with held output logged
+    once the process has no more output immediately available or when a
+    size or time threshold has been reached.
+
+    Args:
+        proc: the process
+        quiet: whether or not to suppress output
+        capture: list to capture output into (if any)
+        tee: binary file-like object to write all output into (if any)
+    """
+
+    stdout = proc.stdout
+    pending = bytearray()
+    held = []
+    held_size = 0
+    last_flush = time.monotonic()
+
+    while True:
+        data = stdout.read(EXECUTE_READ_BLOCKSIZE)
+        if not data:
+            break
+
+        if tee:
+            tee.write(data)
+
+        pending += data
+
+        # only process output up to the last line break, as output after this
+        # point is a partial line
+        eidx = max(pending.rfind(b'\n'), pending.rfind(b'\r')) + 1
+        if eidx:
+            output = pending[:eidx].decode('utf_8')
+            del pending[:eidx]
+
+            if capture is not None:
+                _execute_capture(capture, output)
+
+            if not quiet:
+                held.append(output)
+                held_size += len(output)
+
+        # log any held output if this process has no other output waiting to
+        # be read (i.e. a partial read) or if enough output has been held
+        if held:
+            now = time.monotonic()
+            if len(data) < EXECUTE_READ_BLOCKSIZE or \
+                    held_size >= EXECUTE_LOG_FLUSH_SIZE or \
+                    now - last_flush >= EXECUTE_LOG_FLUSH_INTERVAL:
+                log(''.join(held), end='', expand=False)
+                held = []
+                held_size = 0
+                last_flush = now
+
+    if held:
+        log(''.join(held), end='', expand=False)
+
+    if pending:
+        output = pending.decode('utf_8')
+        if capture is not None:
+            _execute_capture(capture, output)
+        if not quiet:
+            log(output, expand=False)
+
+
+def _execute_capture(capture, output):
+    """
+    capture the lines of a process's output
+
+    Args:
+        capture: list to capture output into
+        output: the output to capture
+    """
+
+    for line in EXECUTE_LINE_SPLIT.split(output):
+        capture_line = line.rstrip()
+        if capture_line:
+            capture.append(capture_line)
+
+
 def cmd_arg_to_str(arg):
     """
     convert an argument to a platform escaped string
@@ -564,7 +648,8 @@ def prepend_shebang_interpreter(args):
     return args
 
 
-def run_script(script, globals_, subject=None, catch=True, ignore=None):
+def run_script(script, globals_, subject=None, catch=True, ignore=None,
+        cache_dir=None):
     """
     execute the provided script and provide the resulting globals module
 
@@ -574,6 +659,10 @@ def run_script(script, globals_, subject=None, catch=True, ignore=None):
     invoked in various stages of a releng-tool run. The provided ``globals``
     will be passed into the ``run_path`` call.
 
+    If a ``cache_dir`` is provided, the script will be compiled using a
+    cache of compiled scripts held in the provided directory (avoiding the
+    need to re-compile an unchanged script on each invoke).
+
     When an issue occurs invoking the provided script, an error messaged is
     output to standard error. This includes an error message (tailored, if
     provided, by a ``subject`` value), the captured exception message and a
@@ -585,17 +674,24 @@ def run_script(script, globals_, subject=None, catch=True, ignore=None):
         subject (optional): subject value to enhance a final error message
         catch (optional): whether or not to catch any exceptions
         ignore (optional): exceptions to not catch
+        cache_dir (optional): cache directory for compiled scripts
 
     Returns:
         resulting globals module; ``None`` if an execution error occurs
     """
 
+    def invoke(script_env):
+        if cache_dir:
+            code = compile_script(script, cache_dir)
+            return run_script_code(code, script, script_env)
+        return run_path(script, init_globals=script_env)
+
     with releng_script_envs(script, globals_) as script_env:
         if not catch:
-            result = run_path(script, init_globals=script_env)
+            result = invoke(script_env)
         else:
             try:
-                result = run_path(script, init_globals=script_env)
+                result = invoke(script_env)
             except Exception as e:
                 if isinstance(e, tuple(ignore or ())):
                     raise
@@ -0,0 +1,247 @@
+# SPDX-License-Identifier: BSD-2-Clause
+# Copyright releng-tool
+
+from __future__ import annotations
+from releng_tool.util.io_move import path_move_into
+from releng_tool.util.log import debug
+from shutil import copy2
+from shutil import copystat
+from shutil import rmtree
+import errno
+import os
+import sys
+
+try:
+    import fcntl
+    has_fcntl = True
+except ImportError:
+    has_fcntl = False
+
+#: ioctl request to clone a file's extents (linux; ``FICLONE``)
+FICLONE = 0x40049409
+
+# errors indicating a filesystem cannot provide reflinks between two paths
+REFLINK_UNSUPPORTED_ERRNOS = (
+    errno.EBADF,
+    errno.EINVAL,
+    errno.ENOSYS,
+    errno.ENOTTY,
+    errno.EOPNOTSUPP,
+    errno.EXDEV,
+)
+
+
+def clone_file(src: str, dst: str, *, hardlink: bool = False) -> bool:
+    """
+    create a copy-on-write clone of a file
+
+    Attempts to create a reflink of a source file at the destination path,
+    sharing the source's data extents until either file is modified. If a
+    reflink cannot be made and ``hardlink`` is set, the destination will be
+    created as a hardlink of the source.
+
+    Args:
+        src: the source file
+        dst: the destination file (must not exist)
+        hardlink (optional): whether a hardlink can be used as a fallback
+
+    Returns:
+        ``True`` if the file was cloned; ``False`` otherwise
+    """
+
+    if _reflink(src, dst):
+        return True
+
+    if hardlink:
+        try:
+            os.link(src, dst)
+        except OSError:
+            pass
+        else:
+            return True
+
+    return False
+
+
+def clone_tree(src: str, dst: str, *, hardlink: bool = False,
+        copy: bool = False, overwrite: bool = False) -> bool:
+    """
+    create a copy-on-write clone of a directory tree
+
+    Recreates the directory structure and symbolic links of a source tree into
+    a destination directory, where each file is cloned using ``clone_file``.
+    Once a filesystem reports that it cannot provide reflinks, no further
+    reflinks are attempted for the tree. Files which cannot be cloned will be
+    copied if ``copy`` is set; otherwise, the clone is stopped.
+
+    If ``overwrite`` is set, the source tree is merged into a (populated)
+    destination directory, where any existing file or symbolic link in the
+    destination is replaced and attributes of existing directories are kept.
+    Existing symbolic links to directories in the destination are followed
+    when merging a directory, matching a move into the destination (see
+    ``path_move_into``).
+
+    Args:
+        src: the source directory
+        dst: the destination directory
+        hardlink (optional): whether hardlinks can be used as a fallback
+        copy (optional): whether files can be copied as a fallback
+        overwrite (optional): whether existing destination entries can be
+            replaced
+
+    Returns:
+        ``True`` if the tree was cloned; ``False`` otherwise
+    """
+
+    reflink = True
+    pending = ['']
+    dirs = []
+
+    try:
+        while pending:
+            rel_dir = pending.pop()
+            src_dir = os.path.join(src, rel_dir)
+            dst_dir = os.path.join(dst, rel_dir)
+            if not overwrite or not os.path.isdir(dst_dir):
+                os.makedirs(dst_dir, exist_ok=True)
+                dirs.append((src_dir, dst_dir))
+
+            with os.scandir(src_dir) as it:
+                entries = list(it)
+
+            for entry in entries:
+                target = os.path.join(dst_dir, entry.name)
+
+                # merge into existing directories in the destination (which
+                # includes symbolic links to directories; e.g. a merged-usr
+                # layout), while replacing any other existing entry
+                if overwrite and os.path.lexists(target):
+                    merge = entry.is_dir(follow_symlinks=False) and \
+                        os.path.isdir(target)
+                    if not merge:
+                        _remove_entry(target)
+
+                if entry.is_symlink():
+                    os.symlink(os.readlink(entry.path), target)
+                elif entry.is_dir():
+                    pending.append(os.path.join(rel_dir, entry.name))
+                else:
+                    if reflink:
+                        try:
+                            _reflink(entry.path, target, strict=True)
+                            continue
+                        except OSError as e:
+                            if e.errno not in REFLINK_UNSUPPORTED_ERRNOS:
+                                raise
+                            reflink = False
+
+                    if hardlink:
+                        try:
+                            os.link(entry.path, target)
+                            continue
+                        except OSError:
+                            if not copy:
+                                raise
+
+                    if not copy:
+                        return False
+
+                    copy2(entry.path, target, follow_symlinks=False)
+
+        # apply directory attributes after all contents have been populated,
+        # to ensure modification times are retained
+        for src_dir, dst_dir in reversed(dirs):
+            copystat(src_dir, dst_dir, follow_symlinks=False)
+    except OSError:
+        return False
+
+    return True
+
+
+def replicate_tree(src: str, dsts: list[str], *,
+        hardlink: bool = False) -> bool:
+    """
+    populate a series of destination directories from a source tree
+
+    Merges the contents of a source tree into each of the provided destination
+    directories. The source tree is cloned (see ``clone_tree``) into all but
+    the last destination, falling back to copying files which cannot be
+    cloned. The contents of the source tree are then moved into the last
+    destination (where the source directory is removed).
+
+    Args:
+        src: the source directory
+        dsts: the destination directories
+        hardlink (optional): whether hardlinks can be used as a fallback
+
+    Returns:
+        ``True`` if each destination was populated; ``False`` otherwise
+    """
+
+    if not dsts:
+        return True
+
+    for dst in dsts[:-1]:
+        debug('replicating tree into destination: {}', dst)
+        if not clone_tree(src, dst, hardlink=hardlink, copy=True,
+                overwrite=True):
+            return False
+
+    debug('moving tree into destination: {}', dsts[-1])
+    return path_move_into(src, dsts[-1], quiet=True, critical=False)
+
+
+def _remove_entry(path: str) -> None:
+    """
+    remove a file, symbolic link or directory
+
+    Args:
+        path: the path to remove
+
+    Raises:
+        OSError: if the path could not be removed
+    """
+
+    if os.path.isdir(path) and not os.path.islink(path):
+        rmtree(path)
+    else:
+        os.unlink(path)
+
+
+def _reflink(src: str, dst: str, *, strict: bool = False) -> bool:
+    """
+    create a reflink of a file
+
+    Args:
+        src: the source file
+        dst: the destination file (must not exist)
+        strict (optional): whether to raise any error encountered
+
+    Returns:
+        ``True`` if a reflink was created; ``False`` otherwise
+
+    Raises:
+        OSError: if a reflink could not be created with ``strict=True``
+    """
+
+    if not has_fcntl or not sys.platform.startswith('linux'):
+        if strict:
+            raise OSError(errno.EOPNOTSUPP, 'reflinks are not supported')
+        return False
+
+    try:
+        with open(src, 'rb') as s, open(dst, 'xb') as d:
+            try:
+                fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+            except OSError:
+                d.close()
+                os.unlink(dst)
+                raise
+
+        copystat(src, dst)
+    except OSError:
+        if strict:
+            raise
+        return False
+
+    return True
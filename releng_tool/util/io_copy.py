@@ -2,8 +2,11 @@
 # Copyright releng-tool
 
 from __future__ import annotations
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from releng_tool.util.critical import raise_for_critical
+from releng_tool.util.io_clone import REFLINK_UNSUPPORTED_ERRNOS
+from releng_tool.util.io_clone import _reflink
 from releng_tool.util.io_mkdir import mkdir
 from releng_tool.util.io_path import path_input
 from releng_tool.util.io_remove import path_remove
@@ -11,8 +14,31 @@ from releng_tool.util.log import err
 from shutil import Error as ShutilError
 from shutil import copyfile
 from shutil import copystat
+import errno
 import os
 
+#: number of files copied by a worker at a time
+COPY_BATCH_SIZE = 64
+
+#: maximum number of workers used to copy files of a tree
+COPY_MAX_WORKERS = 8
+
+#: minimum number of files in a tree before copying files using workers
+COPY_PARALLEL_THRESHOLD = 128
+
+#: minimum number of bytes requested per in-kernel copy
+COPY_RANGE_MIN_CHUNK = 8 * 1024 * 1024
+
+# errors indicating a filesystem cannot provide in-kernel copies
+COPY_RANGE_UNSUPPORTED_ERRNOS = (
+    errno.EBADF,
+    errno.EINVAL,
+    errno.ENOSYS,
+    errno.EOPNOTSUPP,
+    errno.EPERM,
+    errno.EXDEV,
+)
+
 
 def path_copy(src: str | bytes | os.PathLike, dst: str | bytes | os.PathLike,
     *, quiet: bool = False, critical: bool = True, dst_dir: bool | None = None,
@@ -206,6 +232,12 @@ def _copy_tree(src_folder: Path, dst_folder: Path, *,
     Attempt to copy the contents of a source folder into a target destination
     folder.
 
+    The source tree is scanned (creating directories and symbolic links in the
+    destination) before any file is copied. Files are then copied using the
+    most efficient means available (reflinks or in-kernel copies), where a
+    pool of workers is used to copy files for large trees. Directory
+    attributes are applied once all files have been copied.
+
     Args:
         src_folder: the source directory or file
         dst_folder: the destination directory
@@ -223,23 +255,168 @@ def _copy_tree(src_folder: Path, dst_folder: Path, *,
     if not mkdir(dst_folder, quiet=quiet, critical=critical):
         return False
 
-    for src in src_folder.iterdir():
-        dst = dst_folder / src.name
+    dirs = []
+    files = []
+    pending = [(os.fspath(src_folder), os.fspath(dst_folder))]
+
+    while pending:
+        src_dir, dst_dir = pending.pop()
+        dirs.append((src_dir, dst_dir))
+
+        with os.scandir(src_dir) as it:
+            entries = list(it)
+
+        for entry in entries:
+            dst = os.path.join(dst_dir, entry.name)
+
+            if entry.is_symlink():
+                target = os.readlink(entry.path)
+                if os.path.islink(dst) or os.path.isfile(dst):
+                    path_remove(dst, quiet=quiet)
+
+                os.symlink(target, dst)
+                if os.path.isfile(target) and os.path.isfile(dst):
+                    copystat(entry.path, dst)
+            elif entry.is_dir():
+                if mkdir(dst, quiet=quiet, critical=critical):
+                    pending.append((entry.path, dst))
+            else:
+                files.append((entry, dst))
+
+    _copy_files(files)
 
-        if src.is_symlink():
-            target = src.readlink()
-            if dst.is_symlink() or dst.is_file():
-                path_remove(dst, quiet=quiet)
+    # apply directory attributes after all contents have been populated, to
+    # ensure modification times are retained
+    for src_dir, dst_dir in reversed(dirs):
+        copystat(src_dir, dst_dir)
 
-            dst.symlink_to(target)
-            if target.is_file() and dst.is_file():
-                copystat(src, dst)
-        elif src.is_dir():
-            _copy_tree(src, dst, quiet=quiet, critical=critical)
+    return True
+
+
+class _CopyState:
+    """
+    tracks copy capabilities detected while copying a tree
+
+    Once a filesystem reports that it cannot provide a specific means to copy
+    a file (e.g. reflinks), no further attempts are made for the tree.
+    """
+    def __init__(self):
+        self.copy_range = hasattr(os, 'copy_file_range')
+        self.reflink = True
+
+
+def _copy_files(files: list[tuple[os.DirEntry, str]]) -> None:
+    """
+    copy a series of files
+
+    Args:
+        files: the source directory entries and destination paths to copy
+
+    Raises:
+        OSError: if a file could not be copied
+    """
+
+    state = _CopyState()
+
+    if len(files) < COPY_PARALLEL_THRESHOLD:
+        for entry, dst in files:
+            _copy_file(entry, dst, state)
+        return
+
+    def copy_batch(batch):
+        for entry, dst in batch:
+            _copy_file(entry, dst, state)
+
+    batches = [
+        files[idx:idx + COPY_BATCH_SIZE]
+        for idx in range(0, len(files), COPY_BATCH_SIZE)
+    ]
+
+    with ThreadPoolExecutor(max_workers=COPY_MAX_WORKERS) as executor:
+        futures = [executor.submit(copy_batch, batch) for batch in batches]
+        try:
+            for future in futures:
+                future.result()
+        except BaseException:
+            # stop any pending copies; the first error is reported
+            for future in futures:
+                future.cancel()
+            raise
+
+
+def _copy_file(entry: os.DirEntry, dst: str, state: _CopyState) -> None:
+    """
+    copy a file
+
+    Args:
+        entry: the source file's directory entry
+        dst: the destination file
+        state: the tracked copy capabilities for the tree
+
+    Raises:
+        OSError: if the file could not be copied
+    """
+
+    src = entry.path
+
+    # special files (e.g. fifos) are handled by a standard copy, which will
+    # report an error for these types
+    if not entry.is_file(follow_symlinks=False):
+        copyfile(src, dst, follow_symlinks=False)
+        copystat(src, dst)
+        return
+
+    if state.reflink and not os.path.lexists(dst):
+        try:
+            _reflink(src, dst, strict=True)
+        except OSError as e:
+            if e.errno not in REFLINK_UNSUPPORTED_ERRNOS:
+                raise
+            state.reflink = False
+        else:
+            return
+
+    if state.copy_range:
+        try:
+            with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+                _copy_file_range(fsrc.fileno(), fdst.fileno(),
+                    entry.stat(follow_symlinks=False).st_size)
+        except OSError as e:
+            if e.errno not in COPY_RANGE_UNSUPPORTED_ERRNOS:
+                raise
+            state.copy_range = False
         else:
-            copyfile(src, dst, follow_symlinks=False)
             copystat(src, dst)
+            return
 
-    copystat(src_folder, dst_folder)
+    copyfile(src, dst, follow_symlinks=False)
+    copystat(src, dst)
 
-    return True
+
+def _copy_file_range(src_fd: int, dst_fd: int, size: int) -> None:
+    """
+    copy the contents of a file using in-kernel copies
+
+    Args:
+        src_fd: the source file descriptor
+        dst_fd: the destination file descriptor
+        size: the expected size of the source file
+
+    Raises:
+        OSError: if the file could not be copied
+    """
+
+    # copy in large chunks, continuing past the expected size in the event
+    # the file has grown since it was scanned
+    chunk = max(size, COPY_RANGE_MIN_CHUNK)
+    copied = 0
+    while True:
+        sent = os.copy_file_range(src_fd, dst_fd, chunk)
+        if not sent:
+            break
+        copied += sent
+
+    # some filesystems (e.g. procfs) report no data for in-kernel copies;
+    # treat these as unsupported to fallback to a standard copy
+    if not copied and size:
+        raise OSError(errno.EINVAL, 'no data copied')
@@ -2,14 +2,35 @@
 # Copyright releng-tool
 
 from __future__ import annotations
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from releng_tool.util.io_path import path_input
 from releng_tool.util.log import debug
 from releng_tool.util.log import debug_extended
 from releng_tool.util.log import err
+from releng_tool.util.task_pool import run_tasks
+import contextlib
 import errno
 import os
 import stat
+import tempfile
+import threading
+
+#: maximum number of directories removed in the background at the same time
+REMOVE_DEFERRED_JOBS = 4
+
+#: maximum number of workers used to remove a directory tree
+REMOVE_MAX_WORKERS = 8
+
+#: prefix of trash entries holding directories scheduled for removal
+TRASH_PREFIX = '.releng-trash-'
+
+# whether directory contents can be removed relative to directory descriptors
+# (note: ``os.remove`` is an alias of ``os.unlink``, which is only registered
+# as the latter)
+DIR_FD_SUPPORTED = os.unlink in os.supports_dir_fd and \
+    os.scandir in os.supports_fd
 
 
 def path_remove(path: str | bytes | os.PathLike, quiet=False) -> bool:
@@ -64,6 +85,143 @@ def path_remove(path: str | bytes | os.PathLike, quiet=False) -> bool:
     return True
 
 
+def path_remove_deferred(path: str | bytes | os.PathLike,
+        *, quiet: bool = False) -> bool:
+    """
+    remove the provided path in the background
+
+    Provides a means to remove a (large) directory without waiting for all of
+    its contents to be removed. The directory is first moved into a trash
+    entry alongside the directory, allowing the original path to be reused
+    immediately. The trash entry is then removed in the background. Any stale
+    trash entries alongside the directory (e.g. from an interrupted run) are
+    also removed.
+
+    If the path is not a directory or the directory could not be moved, the
+    path is removed immediately (see ``path_remove``). Callers are expected to
+    invoke ``path_remove_wait`` to wait for any background removals.
+
+    Args:
+        path: the path to remove
+        quiet (optional): whether or not to suppress output
+
+    Returns:
+        ``True`` if the path was removed, scheduled for removal or does not
+        exist; ``False`` if the path could not be removed from the system
+    """
+
+    req_path = path_input(path)
+    if not req_path.is_dir() or req_path.is_symlink():
+        return path_remove(req_path, quiet=quiet)
+
+    container = req_path.parent
+    try:
+        trash_dir = tempfile.mkdtemp(prefix=TRASH_PREFIX, dir=container)
+    except OSError as e:
+        debug('unable to prepare trash for {}: {}', req_path, e)
+        return path_remove(req_path, quiet=quiet)
+
+    try:
+        os.rename(req_path, os.path.join(trash_dir, req_path.name))
+    except OSError as e:
+        debug('unable to move {} into trash: {}', req_path, e)
+        with contextlib.suppress(OSError):
+            os.rmdir(trash_dir)
+        return path_remove(req_path, quiet=quiet)
+
+    debug(f'removing directory (deferred): {req_path}')
+    DEFERRED_REMOVALS.schedule(trash_dir, quiet=quiet)
+
+    # remove any stale trash entries from previous runs
+    try:
+        with os.scandir(container) as it:
+            stale = [
+                entry.path for entry in it
+                if entry.name.startswith(TRASH_PREFIX) and
+                    entry.is_dir(follow_symlinks=False)
+            ]
+    except OSError:
+        stale = []
+
+    for entry in stale:
+        DEFERRED_REMOVALS.schedule(entry, quiet=True, tracked=False)
+
+    return True
+
+
+def path_remove_wait() -> bool:
+    """
+    wait for any deferred removals to complete
+
+    Returns:
+        ``True`` if all deferred removals have completed successfully;
+        ``False`` otherwise
+    """
+
+    return DEFERRED_REMOVALS.wait()
+
+
+class DeferredRemovals:
+    """
+    tracking of paths being removed in the background
+    """
+    def __init__(self):
+        self._executor: ThreadPoolExecutor | None = None
+        self._lock = threading.Lock()
+        self._paths: set[str] = set()
+        self._pending: list[tuple[Future, bool]] = []
+
+    def schedule(self, path: str, *, quiet: bool = False,
+            tracked: bool = True) -> None:
+        """
+        schedule the removal of a path
+
+        Args:
+            path: the path to remove
+            quiet (optional): whether or not to suppress output
+            tracked (optional): whether a failed removal is reported when
+                waiting on removals
+        """
+
+        with self._lock:
+            if path in self._paths:
+                return
+            self._paths.add(path)
+
+            if not self._executor:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=REMOVE_DEFERRED_JOBS,
+                    thread_name_prefix='releng-remove',
+                )
+
+            future = self._executor.submit(path_remove, path, quiet=quiet)
+            self._pending.append((future, tracked))
+
+    def wait(self) -> bool:
+        """
+        wait for any scheduled removals to complete
+
+        Returns:
+            ``True`` if all tracked removals have completed successfully;
+            ``False`` otherwise
+        """
+
+        with self._lock:
+            pending = self._pending
+            self._pending = []
+
+        rv = True
+        for future, tracked in pending:
+            if not future.result() and tracked:
+                rv = False
+
+        with self._lock:
+            if not self._pending:
+                self._paths.clear()
+
+        return rv
+
+
 def _path_remove_dir(dir_: Path) -> None:
     """
     remove the provided directory (recursive)
@@ -77,6 +235,10 @@ def _path_remove_dir(dir_: Path) -> None:
     removal processes (e.g. dealing with read-only files or other strict
     permissions setup during a build process).
 
+    Files of a directory are removed relative to the directory's descriptor
+    (when supported), where subdirectories are processed by a pool of workers.
+    Directories are removed once all of their contents have been removed.
+
     Args:
         dir_: the directory to remove
 
@@ -84,29 +246,90 @@ def _path_remove_dir(dir_: Path) -> None:
         OSError: if a path could not be removed
     """
 
+    root = os.fspath(dir_)
+    dirs = [root]
+
+    def process(path):
+        # (note: parents are always tracked before their children)
+        dirs.append(path)
+        return _path_remove_dir_files(path)
+
+    subdirs = _path_remove_dir_files(root)
+    if subdirs:
+        run_tasks(process, subdirs, REMOVE_MAX_WORKERS)
+
+    # remove directories (children before their parents)
+    for path in reversed(dirs):
+        debug_extended('removing directory: {}', path)
+        with contextlib.suppress(FileNotFoundError):
+            os.rmdir(path)
+
+
+def _path_remove_dir_files(dir_: str) -> list[str]:
+    """
+    remove the files of the provided directory
+
+    Args:
+        dir_: the directory
+
+    Returns:
+        the subdirectories of the directory (none if the directory no longer
+        exists)
+
+    Raises:
+        OSError: if a file could not be removed
+    """
+
     # ensure a caller has read/write access before hand to prepare for removal
     # (e.g. if marked as read-only) and ensure contents can be fetched as well
     try:
-        st = dir_.stat()
+        st = os.stat(dir_)
         if not (st.st_mode & stat.S_IRUSR) or not (st.st_mode & stat.S_IWUSR):
-            dir_.chmod(st.st_mode | stat.S_IRUSR | stat.S_IWUSR)
+            os.chmod(dir_, st.st_mode | stat.S_IRUSR | stat.S_IWUSR)
     except OSError:
         pass
 
-    # remove directory contents (if any)
-    for entry in dir_.iterdir():
-        path = dir_ / entry
-        if path.is_dir() and not path.is_symlink():
-            _path_remove_dir(path)
-        else:
-            _path_remove_file(path)
+    subdirs: list[str] = []
+
+    # (note: a directory may have already been removed by another request
+    # removing the same tree, such as an overlapping deferred removal)
+    if not DIR_FD_SUPPORTED:
+        try:
+            with os.scandir(dir_) as it:
+                entries = list(it)
+        except FileNotFoundError:
+            return subdirs
+
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                subdirs.append(entry.path)
+            else:
+                _path_remove_file(entry.path)
+
+        return subdirs
+
+    try:
+        fd = os.open(dir_, os.O_RDONLY | getattr(os, 'O_DIRECTORY', 0))
+    except FileNotFoundError:
+        return subdirs
+
+    try:
+        with os.scandir(fd) as it:
+            entries = list(it)
 
-    # remove directory
-    debug_extended(f'removing directory: {dir_}')
-    dir_.rmdir()
+        for entry in entries:
+            path = os.path.join(dir_, entry.name)
+            if entry.is_dir(follow_symlinks=False):
+                subdirs.append(path)
+            else:
+                _path_remove_file(path, dir_fd=fd)
+    finally:
+        os.close(fd)
 
+    return subdirs
 
-def _path_remove_file(path: Path) -> None:
+
+def _path_remove_file(path: str | Path, *, dir_fd: int | None = None) -> None:
     """
     remove the provided file
 
@@ -121,14 +344,21 @@ def _path_remove_file(path: Path) -> None:
 
     Args:
         path: the file to remove
+        dir_fd (optional): descriptor of the file's directory to remove the
+            file relative to
 
     Raises:
         OSError: if the file could not be removed
     """
 
     try:
-        debug_extended(f'removing file: {path}')
-        path.unlink(missing_ok=True)
+        debug_extended('removing file: {}', path)
+        if dir_fd is not None:
+            os.remove(os.path.basename(path), dir_fd=dir_fd)
+        else:
+            os.remove(path)
+    except FileNotFoundError:
+        pass
     except OSError as e:
         if e.errno != errno.EACCES:
             raise
@@ -136,11 +366,16 @@ def _path_remove_file(path: Path) -> None:
         # if a file could not be removed, try adding write permissions
         # and retry removal
         try:
-            st = path.stat()
+            st = os.stat(path, follow_symlinks=False)
             if (st.st_mode & stat.S_IWUSR):
                 raise
-
-            path.chmod(st.st_mode | stat.S_IWUSR)
-            path.unlink(missing_ok=True)
+            os.chmod(path, st.st_mode | stat.S_IWUSR)
+            os.remove(path)
+        except FileNotFoundError:
+            pass
         except OSError as ex2:
             raise e from ex2
+
+
+# tracking of paths being removed in the background
+DEFERRED_REMOVALS = DeferredRemovals()
@@ -5,6 +5,7 @@ from __future__ import annotations
 from collections.abc import Iterator
 from contextlib import contextmanager
 from pathlib import Path
+from releng_tool.util.exec_context import execution_context
 from releng_tool.util.io_mkdir import mkdir
 from releng_tool.util.io_path import path_input
 from releng_tool.util.log import warn
@@ -50,7 +51,10 @@ def wd(dir_: str | bytes | os.PathLike) -> Iterator[str]:
 
     os.chdir(target_dir)
     try:
-        yield str(target_dir)
+        # track the working directory in the execution context, allowing
+        # processes invoked from other threads in this context to use it
+        with execution_context(cwd=str(target_dir)):
+            yield str(target_dir)
     finally:
         try:
             os.chdir(owd)
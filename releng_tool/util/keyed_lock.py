@@ -0,0 +1,38 @@
+# SPDX-License-Identifier: BSD-2-Clause
+# Copyright releng-tool
+
+from __future__ import annotations
+from collections.abc import Iterator
+from contextlib import contextmanager
+import threading
+
+
+class KeyedLock:
+    """
+    a series of locks identified by keys
+
+    Provides a means for multiple threads to serialize work performed on a
+    shared resource (e.g. a cache directory), identified by a key, while
+    allowing work on other resources to be performed at the same time.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._locks: dict[str, threading.Lock] = {}
+
+    @contextmanager
+    def hold(self, key: str) -> Iterator[None]:
+        """
+        hold the lock for a key for a context
+
+        Blocks until the lock for the provided key can be acquired by the
+        calling thread. The lock is released at the end of the context.
+
+        Args:
+            key: the key
+        """
+
+        with self._lock:
+            lock = self._locks.setdefault(key, threading.Lock())
+
+        with lock:
+            yield
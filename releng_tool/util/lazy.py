@@ -0,0 +1,33 @@
+# SPDX-License-Identifier: BSD-2-Clause
+# Copyright releng-tool
+
+from __future__ import annotations
+from collections.abc import Callable
+from importlib import import_module
+from typing import Any
+
+
+def lazy_function(module: str, name: str) -> Callable[..., Any]:
+    """
+    return a function which imports its implementation when invoked
+
+    Provides a means for a dispatch table (e.g. a series of package type
+    implementations) to reference functions without importing each function's
+    module until it is required. This avoids each invoke of releng-tool from
+    paying the import cost of implementations it will not use.
+
+    Args:
+        module: the module providing the function
+        name: the name of the function
+
+    Returns:
+        the function
+    """
+
+    def invoke(*args, **kwargs):
+        func = getattr(import_module(module), name)
+        return func(*args, **kwargs)
+
+    invoke.__name__ = name
+    invoke.__qualname__ = name
+    return invoke
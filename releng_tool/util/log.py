@@ -2,9 +2,15 @@
 # Copyright releng-tool
 
 from __future__ import annotations
+from collections.abc import Callable
+from collections.abc import Iterator
+from contextlib import contextmanager
 from releng_tool.exceptions import RelengToolWarningAsError
+from releng_tool.util.log_file import LogFileWriter
 from releng_tool.util.string import expand as vexpand
+from typing import Any
 import sys
+import threading
 
 #: flag to track the enablement of API-mode logging
 RELENG_LOG_APIMODE_FLAG = False
@@ -30,6 +36,12 @@ RELENG_LOG_VERBOSE_FLAG = False
 #: flag to track if warnings should be treated as errors
 RELENG_LOG_WERROR_FLAG = False
 
+#: lock used to serialize writes to the output stream
+RELENG_LOG_LOCK = threading.Lock()
+
+#: thread-specific logging state (e.g. buffered messages)
+RELENG_LOG_THREAD_STATE = threading.local()
+
 
 def log(msg: str = '', *args, end: str = '\n', expand: bool = True):
     """
@@ -357,6 +369,25 @@ def __log(prefix: str, color: str, msg: str, *args,
         end (optional): the end character to print
         expand (optional): whether the message will perform variable expansion
     """
+    # if the active thread is writing messages into a log file, write all
+    # messages into the file; plain messages (e.g. command output) are only
+    # written into the file
+    sink = getattr(RELENG_LOG_THREAD_STATE, 'sink', None)
+    if sink is not None:
+        msg = str(msg)
+        if expand:
+            msg = vexpand(msg)
+        if args:
+            msg = msg.format(*args)
+        hidden = not prefix and not color
+        sink.write(f'{prefix}{msg}{end}', hidden=hidden)
+
+        if hidden:
+            return
+
+        expand = False
+        args = ()
+
     if RELENG_LOG_QUIET_FLAG:
         return
     if RELENG_LOG_NOCOLOR_FLAG:
@@ -367,12 +398,149 @@ def __log(prefix: str, color: str, msg: str, *args,
         msg = vexpand(msg)
     if args:
         msg = msg.format(*args)
-    print(
-        f'{color}{prefix}{msg}{post}',
-        end=end,
-        file=sys.stderr if RELENG_LOG_APIMODE_FLAG else sys.stdout,
-        flush=True,
-    )
+
+    # if the active thread is buffering messages, hold on to the message until
+    # the buffered context is completed
+    buffer = getattr(RELENG_LOG_THREAD_STATE, 'buffer', None)
+    if buffer is not None:
+        buffer.append(f'{color}{prefix}{msg}{post}{end}')
+        return
+
+    with RELENG_LOG_LOCK:
+        print(
+            f'{color}{prefix}{msg}{post}',
+            end=end,
+            file=sys.stderr if RELENG_LOG_APIMODE_FLAG else sys.stdout,
+            flush=True,
+        )
+
+
+@contextmanager
+def releng_log_buffered() -> Iterator[None]:
+    """
+    buffer log messages issued from the active thread
+
+    Messages logged by the active thread are held while inside this context.
+    When the context is completed, all held messages are written to the output
+    stream as a single block. This allows work performed concurrently (e.g.
+    fetching multiple packages at the same time) to produce coherent output
+    for each unit of work.
+    """
+
+    outer_buffer = getattr(RELENG_LOG_THREAD_STATE, 'buffer', None)
+    if outer_buffer is not None:
+        yield
+        return
+
+    buffer: list[str] = []
+    RELENG_LOG_THREAD_STATE.buffer = buffer
+    try:
+        yield
+    finally:
+        RELENG_LOG_THREAD_STATE.buffer = None
+        _flush_buffer(buffer)
+
+
+def releng_log_task(func: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    prepare a callable to log messages from a worker thread
+
+    Returns a callable which can be invoked from a worker thread to perform
+    work on behalf of the active thread. Messages logged by the worker are
+    held until the invoked work has completed, and are then written as a
+    single block; either into the active thread's buffered messages (if the
+    active thread is buffering messages) or to the output stream. If the
+    active thread is writing messages into a log file, the worker's messages
+    are also written into the log file.
+
+    Args:
+        func: the callable to invoke from a worker thread
+
+    Returns:
+        the prepared callable
+    """
+
+    outer_buffer = getattr(RELENG_LOG_THREAD_STATE, 'buffer', None)
+    sink = getattr(RELENG_LOG_THREAD_STATE, 'sink', None)
+
+    def invoke(*args, **kwargs):
+        buffer: list[str] = []
+        RELENG_LOG_THREAD_STATE.buffer = buffer
+        RELENG_LOG_THREAD_STATE.sink = sink
+        try:
+            return func(*args, **kwargs)
+        finally:
+            RELENG_LOG_THREAD_STATE.buffer = None
+            RELENG_LOG_THREAD_STATE.sink = None
+
+            if outer_buffer is not None:
+                outer_buffer.append(''.join(buffer))
+            else:
+                _flush_buffer(buffer)
+
+    return invoke
+
+
+def _flush_buffer(buffer: list[str]) -> None:
+    """
+    write buffered messages to the output stream
+
+    Args:
+        buffer: the buffered messages
+    """
+
+    if buffer:
+        with RELENG_LOG_LOCK:
+            print(
+                ''.join(buffer),
+                end='',
+                file=sys.stderr if RELENG_LOG_APIMODE_FLAG else sys.stdout,
+                flush=True,
+            )
+
+
+@contextmanager
+def releng_log_file(path: str) -> Iterator[None]:
+    """
+    write log messages issued from the active thread into a log file
+
+    All messages logged by the active thread while inside this context are
+    written into the provided log file (using a background writer). Plain
+    messages (e.g. output from invoked commands) are only written into the
+    log file, providing a condensed view of messages on the output stream.
+    If the context fails (i.e. raises an exception), the messages which were
+    only written into the log file are written to the output stream (unless
+    the failure is from an interrupt).
+
+    If the log file cannot be created, messages are logged as normal.
+
+    Args:
+        path: the log file to write
+    """
+
+    try:
+        writer = LogFileWriter(path)
+    except OSError as e:
+        warn('unable to create log file: {}\n    {}', path, e)
+        yield
+        return
+
+    RELENG_LOG_THREAD_STATE.sink = writer
+    try:
+        yield
+    except KeyboardInterrupt:
+        raise
+    except BaseException:
+        RELENG_LOG_THREAD_STATE.sink = None
+        writer.close()
+
+        hidden = writer.read_hidden()
+        if hidden:
+            log(hidden, end='', expand=False)
+        raise
+    finally:
+        RELENG_LOG_THREAD_STATE.sink = None
+        writer.close()
 
 
 def releng_log_configuration(*,
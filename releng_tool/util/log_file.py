@@ -0,0 +1,139 @@
+# SPDX-License-Identifier: BSD-2-Clause
+# Copyright releng-tool
+
+from __future__ import annotations
+import os
+import queue
+import threading
+
+#: buffer size used for log files
+LOG_FILE_BUFSIZE = 256 * 1024
+
+#: maximum time (in seconds) written messages are held before being flushed
+LOG_FILE_FLUSH_INTERVAL = 0.5
+
+
+class LogFileWriter:
+    """
+    a log file written from a background thread
+
+    Provides a means to write messages into a log file without the caller
+    performing any file operations. Written messages are queued and processed
+    by a background thread, where messages are written into a buffered file
+    which is flushed once no new messages have been written for a short
+    period of time.
+
+    Messages can be flagged as hidden (i.e. only written into the log file
+    and not to the output stream), where the hidden contents of a log file
+    can be read back once the log file is closed.
+
+    Args:
+        path: the log file to write
+
+    Attributes:
+        path: the log file to write
+
+    Raises:
+        OSError: if the log file could not be opened
+    """
+    def __init__(self, path: str):
+        self.path = path
+
+        container = os.path.dirname(path)
+        if container:
+            os.makedirs(container, exist_ok=True)
+
+        self._closed = False
+        # newlines are not translated, allowing the tracked (character) spans
+        # of hidden messages to match the contents read back from the file
+        self._file = open(path, 'w',  # noqa: SIM115
+            buffering=LOG_FILE_BUFSIZE, encoding='utf_8', errors='replace',
+            newline='')
+        self._hidden: list[list[int]] = []
+        self._queue: queue.SimpleQueue[tuple[str, bool] | None] = \
+            queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, daemon=True,
+            name='releng-log-' + os.path.basename(path))
+        self._thread.start()
+
+    def close(self) -> None:
+        """
+        close the log file
+
+        Waits for all written messages to be stored in the log file before
+        closing the file.
+        """
+
+        if not self._closed:
+            self._closed = True
+            self._queue.put(None)
+            self._thread.join()
+
+    def read_hidden(self) -> str:
+        """
+        read the hidden messages written into a closed log file
+
+        Returns:
+            the hidden messages; an empty string if no hidden messages exist
+            or the log file could not be read
+        """
+
+        if not self._closed or not self._hidden:
+            return ''
+
+        try:
+            with open(self.path, encoding='utf_8', errors='replace',
+                    newline='') as f:
+                contents = f.read()
+        except OSError:
+            return ''
+
+        return ''.join(contents[start:end] for start, end in self._hidden)
+
+    def write(self, msg: str, *, hidden: bool = False) -> None:
+        """
+        write a message into the log file
+
+        Args:
+            msg: the message
+            hidden (optional): whether the message is only written into the
+                log file (and not to the output stream)
+        """
+
+        self._queue.put((msg, hidden))
+
+    def _run(self) -> None:
+        """
+        process written messages until the log file is closed
+        """
+
+        dirty = False
+        offset = 0
+        try:
+            while True:
+                try:
+                    entry = self._queue.get(timeout=LOG_FILE_FLUSH_INTERVAL)
+                except queue.Empty:
+                    if dirty:
+                        self._file.flush()
+                        dirty = False
+                    continue
+
+                if entry is None:
+                    break
+
+                msg, hidden = entry
+                self._file.write(msg)
+                dirty = True
+
+                # track the (character) span of each hidden message, merging
+                # the spans of consecutive hidden messages
+                end = offset + len(msg)
+                if hidden:
+                    if self._hidden and self._hidden[-1][1] == offset:
+                        self._hidden[-1][1] = end
+                    else:
+                        self._hidden.append([offset, end])
+                offset = end
+        finally:
+            self._file.close()
@@ -0,0 +1,406 @@
+# SPDX-License-Identifier: BSD-2-Clause
+# Copyright releng-tool
+
+from __future__ import annotations
+from collections.abc import Iterable
+from collections.abc import Iterator
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from datetime import timezone
+from releng_tool.util.hash import update_hashers
+import contextlib
+import hashlib
+import os
+import stat
+import tempfile
+
+#: hash algorithm used for file digests in a manifest
+MANIFEST_HASH_TYPE = 'sha256'
+
+#: maximum number of workers used to hash files of a directory
+MANIFEST_HASH_WORKERS = 4
+
+#: separator between a manifest entry's path and each of its details
+MANIFEST_DETAILS_SEP = '\t'
+
+#: separator between a manifest entry's path and its symbolic link target
+MANIFEST_LINK_SEP = ' -> '
+
+#: change indicator for an entry added since a previous manifest
+MANIFEST_CHANGE_ADDED = '+'
+
+#: change indicator for an entry modified since a previous manifest
+MANIFEST_CHANGE_MODIFIED = '~'
+
+#: change indicator for an entry removed since a previous manifest
+MANIFEST_CHANGE_REMOVED = '-'
+
+
+@dataclass
+class ManifestEntry:
+    """
+    an entry of a directory manifest
+
+    Args:
+        path: the path of the entry (relative to the manifest's root, using
+            forward slashes)
+        dir: whether the entry is a directory (or a link to a directory)
+        link (optional): the target of the entry, if a symbolic link
+        mode (optional): the permission bits of the entry
+        size (optional): the size of the entry, if a file
+        digest (optional): the digest of the entry's contents, if a file
+    """
+    path: str
+    dir: bool = False
+    link: str | None = None
+    mode: int | None = None
+    size: int | None = None
+    digest: str | None = None
+
+    def differs(self, other: ManifestEntry) -> bool:
+        """
+        check if this entry differs from another entry
+
+        Only details tracked in both entries are compared, allowing manifests
+        generated with and without details to be compared.
+
+        Args:
+            other: the other entry
+
+        Returns:
+            whether the entries differ
+        """
+
+        if self.dir != other.dir or self.link != other.link:
+            return True
+
+        for ours, theirs in (
+                (self.mode, other.mode),
+                (self.size, other.size),
+                (self.digest, other.digest)):
+            if ours is not None and theirs is not None and ours != theirs:
+                return True
+
+        return False
+
+    def format(self) -> str:
+        """
+        return the manifest line for this entry
+
+        Returns:
+            the line (without a newline)
+        """
+
+        line = self.path
+        if self.dir:
+            line += '/'
+        if self.link is not None:
+            line += MANIFEST_LINK_SEP + self.link
+
+        details = []
+        if self.mode is not None:
+            details.append(f'mode={self.mode:04o}')
+        if self.size is not None:
+            details.append(f'size={self.size}')
+        if self.digest is not None:
+            details.append(f'{MANIFEST_HASH_TYPE}={self.digest}')
+
+        return MANIFEST_DETAILS_SEP.join([line, *details])
+
+    @staticmethod
+    def parse(line: str) -> ManifestEntry | None:
+        """
+        parse a manifest line into an entry
+
+        Args:
+            line: the line
+
+        Returns:
+            the entry; ``None`` if the line is empty or a comment
+        """
+
+        line = line.rstrip('\r\n')
+        if not line or line.startswith('#'):
+            return None
+
+        line, *details = line.split(MANIFEST_DETAILS_SEP)
+        path, sep, link = line.partition(MANIFEST_LINK_SEP)
+        entry = ManifestEntry(path, link=link if sep else None)
+
+        if entry.path.endswith('/'):
+            entry.path = entry.path[:-1]
+            entry.dir = True
+
+        for detail in details:
+            key, _, value = detail.partition('=')
+            if key == 'mode':
+                entry.mode = int(value, 8)
+            elif key == 'size':
+                entry.size = int(value)
+            elif key == MANIFEST_HASH_TYPE:
+                entry.digest = value
+
+        return entry
+
+
+def manifest_diff(old: Iterable[ManifestEntry],
+        new: Iterable[ManifestEntry]) -> Iterator[tuple[str, ManifestEntry]]:
+    """
+    compare two manifests
+
+    Compares the entries of two manifests, yielding each entry which has
+    been added, modified or removed between them. Both manifests are expected
+    to be sorted in the order generated by ``manifest_walk``, allowing the
+    manifests to be compared as they are being read/generated. Paths are
+    compared using the platform's case sensitivity, where an entry which has
+    only been renamed in case is reported as modified.
+
+    Args:
+        old: the entries of the older manifest
+        new: the entries of the newer manifest
+
+    Yields:
+        a 2-tuple of the change indicator and the entry (the newer entry for
+        additions/modifications; the older entry for removals)
+    """
+
+    old_it = iter(old)
+    new_it = iter(new)
+    old_entry = next(old_it, None)
+    new_entry = next(new_it, None)
+
+    while old_entry or new_entry:
+        if new_entry is None:
+            order = -1
+        elif old_entry is None:
+            order = 1
+        else:
+            old_key = _manifest_key(old_entry.path)
+            new_key = _manifest_key(new_entry.path)
+            order = (old_key > new_key) - (old_key < new_key)
+
+        if order < 0:
+            assert old_entry
+            yield MANIFEST_CHANGE_REMOVED, old_entry
+            old_entry = next(old_it, None)
+        elif order > 0:
+            assert new_entry
+            yield MANIFEST_CHANGE_ADDED, new_entry
+            new_entry = next(new_it, None)
+        else:
+            assert old_entry
+            assert new_entry
+            if new_entry.path != old_entry.path or \
+                    new_entry.differs(old_entry):
+                yield MANIFEST_CHANGE_MODIFIED, new_entry
+            old_entry = next(old_it, None)
+            new_entry = next(new_it, None)
+
+
+def manifest_read(manifest: str) -> Iterator[ManifestEntry]:
+    """
+    read the entries of a manifest file
+
+    Args:
+        manifest: the manifest file
+
+    Yields:
+        each entry of the manifest
+
+    Raises:
+        OSError: if the manifest could not be read
+    """
+
+    with open(manifest, encoding='utf_8') as f:
+        for line in f:
+            entry = ManifestEntry.parse(line)
+            if entry:
+                yield entry
+
+
+def manifest_walk(root: str, *,
+        details: bool = False) -> Iterator[ManifestEntry]:
+    """
+    walk a directory for manifest entries
+
+    Walks the provided directory (depth-first, sorted by name), yielding an
+    entry for each path found. Names are sorted using the platform's case
+    sensitivity (i.e. the same order as sorting the paths of a recursive
+    ``Path.rglob``). Entries are generated while walking the directory,
+    where only the entries of the directories being walked are held at any
+    time. Symbolic links to directories are not followed.
+
+    When details are requested, each entry also tracks its permission bits,
+    where files also track their size and a digest of their contents. Files
+    of a directory are hashed by a pool of workers.
+
+    Args:
+        root: the directory to walk
+        details (optional): whether to include details for each entry
+
+    Yields:
+        each entry of the directory
+    """
+
+    if not details:
+        yield from _manifest_walk(root, '', None)
+        return
+
+    with ThreadPoolExecutor(max_workers=MANIFEST_HASH_WORKERS) as executor:
+        yield from _manifest_walk(root, '', executor)
+
+
+def manifest_write(root: str, manifest: str, *, details: bool = False,
+        changes: str | None = None) -> None:
+    """
+    write a manifest for a directory
+
+    Writes a manifest file capturing the structure of the provided directory
+    (see ``manifest_walk``). Entries are written as the directory is walked,
+    and the manifest replaces any existing manifest once completed.
+
+    If a changes file is provided and a previous manifest exists, entries
+    which have been added, modified or removed since the previous manifest
+    are written into the changes file while the new manifest is generated.
+    Otherwise, any existing changes file is removed.
+
+    Args:
+        root: the directory
+        manifest: the manifest file to write
+        details (optional): whether to include details for each entry
+        changes (optional): the changes file to write
+
+    Raises:
+        OSError: if the manifest or changes could not be written
+    """
+
+    capture_dt = datetime.now().astimezone(timezone.utc).replace(microsecond=0)
+    header = f'# {capture_dt}\n'
+
+    has_previous = changes is not None and os.path.isfile(manifest)
+    if changes and not has_previous:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(changes)
+
+    container = os.path.dirname(os.path.abspath(manifest))
+    fd, tmp_manifest = tempfile.mkstemp(prefix='.manifest-', dir=container)
+    try:
+        with open(fd, 'w', encoding='utf_8') as f:
+            f.write(header)
+
+            def entries():
+                for entry in manifest_walk(root, details=details):
+                    f.write(entry.format() + '\n')
+                    yield entry
+
+            if changes and has_previous:
+                with open(changes, 'w', encoding='utf_8') as cf:
+                    cf.write(header)
+                    old = manifest_read(manifest)
+                    for change, entry in manifest_diff(old, entries()):
+                        cf.write(f'{change} {entry.format()}\n')
+            else:
+                for _ in entries():
+                    pass
+
+        os.replace(tmp_manifest, manifest)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(tmp_manifest)
+        raise
+
+
+def _manifest_key(path: str) -> list[str]:
+    """
+    return the key used to order a manifest entry's path
+
+    Args:
+        path: the path of the entry
+
+    Returns:
+        the key
+    """
+
+    return [os.path.normcase(part) for part in path.split('/')]
+
+
+def _manifest_walk(path: str, prefix: str,
+        executor: ThreadPoolExecutor | None) -> Iterator[ManifestEntry]:
+    """
+    walk a directory for manifest entries (recursive)
+
+    Args:
+        path: the directory to walk
+        prefix: the manifest path prefix for entries of this directory
+        executor: the executor used to hash files (if details are requested)
+
+    Yields:
+        each entry of the directory
+    """
+
+    try:
+        with os.scandir(path) as it:
+            dir_entries = sorted(it, key=lambda x: os.path.normcase(x.name))
+    except OSError:
+        return
+
+    # queue hashing for all files in this directory before processing entries
+    hashes: dict[str, Future] = {}
+    if executor:
+        for dir_entry in dir_entries:
+            if dir_entry.is_file(follow_symlinks=False):
+                hashes[dir_entry.name] = \
+                    executor.submit(_manifest_digest, dir_entry.path)
+
+    for dir_entry in dir_entries:
+        entry = ManifestEntry(prefix + dir_entry.name)
+
+        with contextlib.suppress(OSError):
+            entry.dir = dir_entry.is_dir()
+
+        is_link = dir_entry.is_symlink()
+        if is_link:
+            try:
+                entry.link = os.readlink(dir_entry.path)
+            except OSError:
+                entry.link = ''
+
+        if executor and not is_link:
+            try:
+                st = dir_entry.stat(follow_symlinks=False)
+            except OSError:
+                pass
+            else:
+                entry.mode = stat.S_IMODE(st.st_mode)
+                if stat.S_ISREG(st.st_mode):
+                    entry.size = st.st_size
+
+            future = hashes.get(dir_entry.name)
+            if future:
+                entry.digest = future.result()
+
+        yield entry
+
+        if dir_entry.is_dir(follow_symlinks=False):
+            yield from _manifest_walk(
+                dir_entry.path, entry.path + '/', executor)
+
+
+def _manifest_digest(path: str) -> str | None:
+    """
+    return the digest of a file's contents for a manifest
+
+    Args:
+        path: the file
+
+    Returns:
+        the digest; ``None`` if the file could not be read
+    """
+
+    hasher = hashlib.new(MANIFEST_HASH_TYPE)
+    if not update_hashers(path, [hasher]):
+        return None
+
+    return hasher.hexdigest()
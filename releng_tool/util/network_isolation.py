@@ -2,10 +2,9 @@
 # Copyright releng-tool
 
 from contextlib import contextmanager
-import os
+from releng_tool.util.exec_context import scoped_environ
 import socket
 
-
 # isolate endpoint to use a local/free random port
 LOCAL_RANDOM_PORT = ('127.0.0.1', 0)
 
@@ -46,36 +45,22 @@ def network_isolate(*, enforce: bool = True):
         'rsync_proxy': '127.0.0.1:{port}',
     }
 
-    # capture a list of any existing proxy settings that may be set
-    old_env = {
-        key: os.environ[key]
-        for entry in entries
-        for key in (entry.lower(), entry.upper())
-        if key in os.environ
-    }
-
-    try:
-        # build a socket to claim a specific port that we can use for
-        # consuming network traffic
-        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-            s.bind(LOCAL_RANDOM_PORT)
-            _, port = s.getsockname()
-
-            # configure all proxy values
-            for key, fmt in entries.items():
-                if key == 'no_proxy':
-                    continue
-                new_proxy = fmt.format(port=port)
-                os.environ[key] = new_proxy
-                os.environ[key.upper()] = new_proxy
-
-            # yield the context for any actions to be done
+    # build a socket to claim a specific port that we can use for consuming
+    # network traffic
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(LOCAL_RANDOM_PORT)
+        _, port = s.getsockname()
+
+        # configure all proxy values (restoring any original values on
+        # completion)
+        proxies = {}
+        for key, fmt in entries.items():
+            if key == 'no_proxy':
+                continue
+            new_proxy = fmt.format(port=port)
+            proxies[key] = new_proxy
+            proxies[key.upper()] = new_proxy
+
+        # yield the context for any actions to be done
+        with scoped_environ(proxies):
             yield
-    finally:
-        # clear any proxy values set
-        for key in entries:
-            os.environ.pop(key, None)
-            os.environ.pop(key.upper(), None)
-
-        # restore any original values
-        os.environ.update(old_env)
@@ -0,0 +1,162 @@
+# SPDX-License-Identifier: BSD-2-Clause
+# Copyright releng-tool
+
+from __future__ import annotations
+from collections.abc import Iterable
+from collections.abc import Iterator
+from contextlib import contextmanager
+import os
+import threading
+
+
+class ProcessGate:
+    """
+    a gate guarding process-wide state
+
+    Package stages rely on process-wide state such as the working directory
+    and environment variables. When multiple packages are processed at the
+    same time, each package (thread) must hold this gate while running any
+    logic that may depend on this state. A holder can temporarily release the
+    gate while it waits on an external process (e.g. a compiler invoked by a
+    build stage), allowing other packages to progress. When released, the
+    working directory and any package-scoped environment variables of the
+    holder are reverted to their original values, and re-applied when the
+    gate is re-acquired.
+
+    When the gate is not active (i.e. packages are processed one at a time),
+    holding or releasing the gate has no effect.
+    """
+    def __init__(self):
+        self._active = False
+        self._base_cwd = None
+        self._lock = threading.Lock()
+        self._state = threading.local()
+
+    @contextmanager
+    def activate(self) -> Iterator[None]:
+        """
+        activate the gate for a context
+
+        Provides a context where threads must hold the gate before accessing
+        process-wide state.
+        """
+
+        self._base_cwd = os.getcwd()
+        self._active = True
+        try:
+            yield
+        finally:
+            self._active = False
+            self._base_cwd = None
+
+    @contextmanager
+    def hold(self) -> Iterator[None]:
+        """
+        hold the gate for a context
+
+        Blocks until the gate can be acquired by the calling thread. The gate
+        is released at the end of the context.
+        """
+
+        if not self._active:
+            yield
+            return
+
+        with self._lock:
+            self._state.held = True
+            self._state.scopes = []
+            try:
+                yield
+            finally:
+                self._state.held = False
+                self._state.scopes = None
+
+    @contextmanager
+    def released(self) -> Iterator[None]:
+        """
+        temporarily release a held gate for a context
+
+        Allows other threads to acquire the gate while the calling thread
+        performs work which does not rely on process-wide state (e.g. waiting
+        on the output of a spawned process). Any process-wide state modified
+        by the calling thread is restored once the gate is re-acquired.
+        """
+
+        if not self._active or not getattr(self._state, 'held', False):
+            yield
+            return
+
+        cwd = os.getcwd()
+        env = self._suspend_env()
+        os.chdir(self._base_cwd)
+        self._lock.release()
+        try:
+            yield
+        finally:
+            self._lock.acquire()
+            os.chdir(cwd)
+            _apply_env(env)
+
+    @contextmanager
+    def scoped_env(self, keys: Iterable[str]) -> Iterator[None]:
+        """
+        track environment variables scoped to a context
+
+        Captures the values of the provided environment variable keys, which
+        will be restored at the end of the context. If the gate is held, the
+        keys are also tracked as scoped to the holder; ensuring the values are
+        reverted for other threads while the gate is released.
+
+        Args:
+            keys: the environment variable keys
+        """
+
+        saved = {key: os.environ.get(key) for key in keys}
+
+        scopes = getattr(self._state, 'scopes', None)
+        if scopes is not None:
+            scopes.append(saved)
+
+        try:
+            yield
+        finally:
+            if scopes:
+                scopes.pop()
+            _apply_env(saved)
+
+    def _suspend_env(self) -> dict[str, str | None]:
+        """
+        capture and revert scoped environment variables of the holder
+
+        Returns:
+            the captured environment variables
+        """
+
+        scopes = self._state.scopes
+        env = {key: os.environ.get(key) for scope in scopes for key in scope}
+
+        # restore innermost scopes first, ensuring the outermost captured
+        # values are applied last
+        for scope in reversed(scopes):
+            _apply_env(scope)
+
+        return env
+
+
+def _apply_env(env: dict[str, str | None]) -> None:
+    """
+    apply a series of environment variable values
+
+    Args:
+        env: the environment variables to apply (``None`` values are removed)
+    """
+
+    for key, value in env.items():
+        if value is not None:
+            os.environ[key] = value
+        else:
+            os.environ.pop(key, None)
+
+
+# gate guarding process-wide state when processing packages concurrently
+PROCESS_GATE = ProcessGate()
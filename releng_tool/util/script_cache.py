@@ -0,0 +1,229 @@
+# SPDX-License-Identifier: BSD-2-Clause
+# Copyright releng-tool
+
+from __future__ import annotations
+from collections.abc import Iterator
+from contextlib import contextmanager
+from importlib.util import MAGIC_NUMBER
+from releng_tool.util.log import debug
+import contextlib
+import hashlib
+import marshal
+import os
+import struct
+import sys
+import tempfile
+import types
+
+#: container (inside a cache directory) for cached script information
+SCRIPT_CACHE_DIR = '.rtcache'
+
+# extension for cached compiled scripts
+COMPILED_EXT = '.rtc'
+
+# header of a cached compiled script (magic, modification time and size)
+COMPILED_HEADER = struct.Struct('<4sqq')
+
+# module name used when running a script (consistent with ``run_path``)
+RUN_NAME = '<run_path>'
+
+# active collections of scripts being tracked (see ``track_scripts``)
+_TRACKED_SCRIPTS: list[dict[str, None]] = []
+
+
+def compile_script(script: str,
+        cache_dir: str | None = None) -> types.CodeType:
+    """
+    compile a script into a code object
+
+    Compiles the provided script into a code object. If a cache directory is
+    provided, compiled code will be stored in (and loaded from) the cache
+    directory, where a cached entry is only used if the script's path,
+    modification time and size match the cached entry.
+
+    Args:
+        script: the script
+        cache_dir (optional): the cache directory to use
+
+    Returns:
+        the code object
+
+    Raises:
+        OSError: if the script could not be read
+        SyntaxError: if the script could not be compiled
+    """
+
+    cache_file = None
+    header = None
+    if cache_dir:
+        st = os.stat(script)
+        header = COMPILED_HEADER.pack(MAGIC_NUMBER, st.st_mtime_ns, st.st_size)
+
+        ident = f'{os.path.abspath(script)}\0{script}'.encode(
+            'utf_8', errors='surrogateescape')
+        name = hashlib.sha256(ident).hexdigest()[:32] + COMPILED_EXT
+        cache_file = os.path.join(cache_dir, SCRIPT_CACHE_DIR, name)
+
+        code = _load_compiled(cache_file, header)
+        if code:
+            return code
+
+    with open(script, 'rb') as f:
+        source = f.read()
+
+    # compile without inheriting any future flags from this module
+    code = compile(source, script, 'exec', dont_inherit=True)
+
+    if cache_file and header:
+        _store_compiled(cache_file, header, code)
+
+    return code
+
+
+def record_script(script: str) -> None:
+    """
+    record a script being executed
+
+    Registers the provided script with any active script tracking (see
+    ``track_scripts``).
+
+    Args:
+        script: the script
+    """
+
+    if _TRACKED_SCRIPTS:
+        path = os.path.abspath(script)
+        for tracked in _TRACKED_SCRIPTS:
+            tracked[path] = None
+
+
+def run_script_code(code: types.CodeType, script: str,
+        init_globals: dict) -> dict:
+    """
+    run a compiled script
+
+    Executes a compiled script in the same manner as ``runpy.run_path`` would
+    run a script file.
+
+    Args:
+        code: the compiled script
+        script: the script the code was compiled from
+        init_globals: dictionary to pre-populate script's globals
+
+    Returns:
+        the resulting globals of the script
+    """
+
+    module = types.ModuleType(RUN_NAME)
+    run_globals = module.__dict__
+    run_globals.update(init_globals)
+    run_globals.update(
+        __name__=RUN_NAME,
+        __file__=script,
+        __cached__=None,
+        __doc__=None,
+        __loader__=None,
+        __package__='',
+        __spec__=None,
+    )
+
+    saved_argv0 = sys.argv[0]
+    saved_module = sys.modules.get(RUN_NAME)
+    sys.argv[0] = script
+    sys.modules[RUN_NAME] = module
+    try:
+        exec(code, run_globals)  # noqa: S102
+    finally:
+        sys.argv[0] = saved_argv0
+        if saved_module is not None:
+            sys.modules[RUN_NAME] = saved_module
+        else:
+            sys.modules.pop(RUN_NAME, None)
+
+    return run_globals.copy()
+
+
+@contextmanager
+def track_scripts() -> Iterator[dict[str, None]]:
+    """
+    track scripts executed within a context
+
+    Provides a collection which is populated with the absolute path of each
+    script executed (e.g. package definitions or included scripts) while the
+    context is active.
+
+    Yields:
+        the (ordered) collection of executed scripts
+    """
+
+    tracked: dict[str, None] = {}
+    _TRACKED_SCRIPTS.append(tracked)
+    try:
+        yield tracked
+    finally:
+        _TRACKED_SCRIPTS.remove(tracked)
+
+
+def _load_compiled(cache_file: str, header: bytes) -> types.CodeType | None:
+    """
+    load a cached compiled script
+
+    Args:
+        cache_file: the cached compiled script
+        header: the expected header of the cached entry
+
+    Returns:
+        the code object; ``None`` if no valid cached entry exists
+    """
+
+    try:
+        with open(cache_file, 'rb') as f:
+            data = f.read()
+    except OSError:
+        return None
+
+    if data[:COMPILED_HEADER.size] != header:
+        debug('stale compiled script: {}', cache_file)
+        return None
+
+    try:
+        code = marshal.loads(data[COMPILED_HEADER.size:])  # noqa: S302
+    except (EOFError, TypeError, ValueError):
+        debug('invalid compiled script: {}', cache_file)
+        return None
+
+    if not isinstance(code, types.CodeType):
+        return None
+
+    return code
+
+
+def _store_compiled(cache_file: str, header: bytes,
+        code: types.CodeType) -> None:
+    """
+    store a compiled script into the cache
+
+    Args:
+        cache_file: the cached compiled script
+        header: the header of the cached entry
+        code: the code object
+    """
+
+    container = os.path.dirname(cache_file)
+    tmp_file = None
+    try:
+        os.makedirs(container, exist_ok=True)
+
+        fd, tmp_file = tempfile.mkstemp(dir=container, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(header)
+            f.write(marshal.dumps(code))
+
+        os.replace(tmp_file, cache_file)
+        tmp_file = None
+    except OSError as e:
+        debug('unable to cache compiled script: {}\n    {}', cache_file, e)
+    finally:
+        if tmp_file:
+            with contextlib.suppress(OSError):
+                os.remove(tmp_file)
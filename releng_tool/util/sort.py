@@ -15,15 +15,22 @@ class TopologicalSorter:
     can handle being passed multiple nodes in a graph at any time; however, only
     if the graph's structure does not change (i.e. graph edges are not changed).
 
+    Nodes are visited iteratively, allowing large graphs (e.g. long chains of
+    dependencies) to be sorted. When a cyclic graph is detected, the sorter
+    will continue to visit the remaining nodes to track each cycle found.
+
     Args:
         sort_func: a function to return leaf nodes for a node being
             visited during the sorting process
 
     Attributes:
+        cycles: list of detected cycles (each a list of objects, from the
+            start of the cycle back to the same object)
         sorted: list of currently sorted objects
     """
     def __init__(self, sort_func):
         assert sort_func, 'no sort function provided'
+        self.cycles = []
         self.sorted = []
         self._state = {}
         self._sort_func = sort_func
@@ -47,9 +54,10 @@ class TopologicalSorter:
             all sorting calls (if multiple sort operations a desired) are
             completed.
         """
-        if self._visit(obj):
-            return self.sorted
-        return None
+        self._visit(obj)
+        if self.cycles:
+            return None
+        return self.sorted
 
     def reset(self):
         """
@@ -58,6 +66,7 @@ class TopologicalSorter:
         Resets tracked state information contained in the sorter and clears the
         known sorted list of vertices.
         """
+        self.cycles = []
         self.sorted = []
         self._state = {}
 
@@ -76,16 +85,39 @@ class TopologicalSorter:
             ``True``, if the sorting was successful; ``False``, if a cyclic
                 graph has been detected
         """
-        if obj not in self._state:
-            self._state[obj] = ''
-        if self._state[obj] == 'P':
+        state = self._state
+        if state.get(obj) == 'P':
             return True
-        if self._state[obj] == 'T':
-            return False
-        self._state[obj] = 'T'
-        for child in self._sort_func(obj):
-            if not self._visit(child):
-                return False
-        self._state[obj] = 'P'
-        self.sorted.append(obj)
-        return True
+
+        acyclic = True
+        path = {obj: 0}
+        stack = [(obj, iter(self._sort_func(obj)))]
+        state[obj] = 'T'
+
+        while stack:
+            node, children = stack[-1]
+            for child in children:
+                child_state = state.get(child)
+                if child_state == 'P':
+                    continue
+
+                # a temporary-marked child is on the active path; track the
+                # cycle and continue visiting other children
+                if child_state == 'T':
+                    cycle = list(path)[path[child]:]
+                    cycle.append(child)
+                    self.cycles.append(cycle)
+                    acyclic = False
+                    continue
+
+                path[child] = len(path)
+                stack.append((child, iter(self._sort_func(child))))
+                state[child] = 'T'
+                break
+            else:
+                stack.pop()
+                del path[node]
+                state[node] = 'P'
+                self.sorted.append(node)
+
+        return acyclic
@@ -2,10 +2,20 @@
 # Copyright releng-tool
 
 from collections.abc import Sequence
+from functools import lru_cache
 from typing import Any
 import os
 import re
 
+#: maximum number of compiled expansion templates to cache
+EXPAND_TEMPLATE_CACHE_SIZE = 4096
+
+# pattern to find variables in an expansion template (either an escaped
+# ``$$``/``$<whitespace>``, ``${value}``, an unterminated ``${value`` or
+# ``$value``)
+EXPAND_VAR_PATTERN = re.compile(
+    r'\$(?:(\$|\s)|\{([^}]*)\}|(\{[^}]*)\Z|([^\s${]\w*))')
+
 
 def expand(obj, kv=None):
     """
@@ -43,57 +53,37 @@ def expand(obj, kv=None):
         the expanded object
     """
     if isinstance(obj, str):
-        try:
-            idx = obj.index('$')
-        except ValueError:
+        if '$' not in obj:
             return obj
 
-        if kv:
-            final_kv = dict(os.environ)
-            final_kv.update(kv)
-        else:
-            final_kv = os.environ
-
-        rv = obj[:idx]
-        objlen = len(obj)
-
-        while idx < objlen:
-            c = obj[idx:idx + 1]
-            if c == '$':
-                nc = obj[idx + 1:idx + 2]
-                if not nc or nc == '$' or nc.isspace():
-                    rv += c
-                    idx += 1
-                elif nc == '{':
-                    try:
-                        eidx = obj.index('}', idx + 1)
-                        var = obj[idx + 2:eidx]
-
-                        if var in final_kv:
-                            rv += final_kv[var]
-                        idx = eidx
-                    except ValueError:
-                        rv += obj[idx:]
-                        break
-                else:
-                    var = nc
-                    idx += 1
-
-                    nc = obj[idx + 1:idx + 2]
-                    while nc and nc != '$' and (nc.isalnum() or nc == '_'):
-                        var += nc
-                        idx += 1
-                        nc = obj[idx + 1:idx + 2]
-
-                    if var in final_kv:
-                        rv += final_kv[var]
-            else:
-                rv += c
-            idx += 1
+        segments, tail = _compile_expand_template(obj)
+
+        env = os.environ
+        parts = []
+        for literal, var in segments:
+            parts.append(literal)
+            if kv and var in kv:
+                value = kv[var]
+
+                # permit path-like values (e.g. ``P`` script helper paths)
+                if not isinstance(value, str):
+                    value = os.fspath(value)
+                parts.append(value)
+            elif var in env:
+                parts.append(env[var])
+        parts.append(tail)
+
+        rv = ''.join(parts)
     elif isinstance(obj, dict):
         rv = {}
         for key, value in obj.items():
-            rv[expand(key, kv=kv)] = expand(value, kv=kv)
+            # avoid the overhead of expanding entries with no variables
+            # (e.g. most entries in a copied environment)
+            if isinstance(key, str) and isinstance(value, str) and \
+                    '$' not in key and '$' not in value:
+                rv[key] = value
+            else:
+                rv[expand(key, kv=kv)] = expand(value, kv=kv)
     elif isinstance(obj, list):
         rv = []
         for value in obj:
@@ -108,6 +98,45 @@ def expand(obj, kv=None):
     return rv
 
 
+@lru_cache(maxsize=EXPAND_TEMPLATE_CACHE_SIZE)
+def _compile_expand_template(template: str) -> \
+        tuple[tuple[tuple[str, str], ...], str]:
+    """
+    compile a string into a series of expansion segments
+
+    Splits a string into a series of literal/variable segments, allowing a
+    string to be quickly expanded any number of times. An escaped ``$``
+    character (followed by another ``$`` or a whitespace character) will
+    result in a single ``$`` character. Any unterminated ``${`` variable will
+    result in the remainder of the string being used as a literal.
+
+    Args:
+        template: the string to compile
+
+    Returns:
+        2-tuple of literal/variable segment pairs and the trailing literal
+    """
+
+    segments = []
+    literal = ''
+    pos = 0
+    for match in EXPAND_VAR_PATTERN.finditer(template):
+        escaped, braced, unterminated, var = match.groups()
+        if unterminated is not None:
+            break
+
+        literal += template[pos:match.start()]
+        pos = match.end()
+
+        if escaped is not None:
+            literal += '$'
+        else:
+            segments.append((literal, braced if braced is not None else var))
+            literal = ''
+
+    return tuple(segments), literal + template[pos:]
+
+
 def is_sequence_not_string(obj: Any) -> bool:
     """
     return whether or not the provided object is a non-string sequence
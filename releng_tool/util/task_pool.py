@@ -0,0 +1,74 @@
+# SPDX-License-Identifier: BSD-2-Clause
+# Copyright releng-tool
+
+from __future__ import annotations
+from collections.abc import Callable
+from collections.abc import Iterable
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
+from contextvars import copy_context
+from typing import Any
+
+
+def run_tasks(func: Callable[[Any], Iterable[Any] | None],
+        tasks: Iterable[Any], jobs: int) -> bool:
+    """
+    process a series of tasks using a pool of worker threads
+
+    Invokes the provided function for each task, using up to ``jobs`` worker
+    threads at the same time. Processing a task may produce additional tasks
+    (e.g. nested submodules of a processed submodule), which are processed
+    by the same pool of workers. If a task fails, no new tasks are started
+    and this call returns once all running tasks have completed. If a task
+    raises an exception, the exception is raised from this call once all
+    running tasks have completed. Each task is processed using a copy of the
+    caller's execution context.
+
+    Args:
+        func: the function to process a task, returning any new tasks to
+            process (or ``None`` if the task has failed)
+        tasks: the tasks to process
+        jobs: the maximum number of tasks to process at the same time
+
+    Returns:
+        ``True`` if all tasks have been processed; ``False`` otherwise
+    """
+
+    ok = True
+    with ThreadPoolExecutor(max_workers=max(jobs, 1)) as executor:
+        def submit(task):
+            # each task requires its own context copy, since a context cannot
+            # be entered by multiple threads at the same time
+            return executor.submit(copy_context().run, func, task)
+
+        running = {submit(task) for task in tasks}
+        error = None
+
+        while running:
+            done, running = wait(running, return_when=FIRST_COMPLETED)
+
+            results = []
+            for future in done:
+                try:
+                    new_tasks = future.result()
+                except BaseException as e:
+                    ok = False
+                    if error is None:
+                        error = e
+                    continue
+
+                if new_tasks is None:
+                    ok = False
+                else:
+                    results.append(new_tasks)
+
+            # only start new tasks if no completed task has failed
+            if ok:
+                for new_tasks in results:
+                    running.update(submit(task) for task in new_tasks)
+
+        if error is not None:
+            raise error
+
+    return ok
@@ -23,6 +23,16 @@ class MockServerRequestHandler(BaseHTTPRequestHandler):
     testing.
     """
 
+    def setup(self):
+        super().setup()
+
+        # track each connection made to the server
+        self.server.connections += 1
+
+        # support persistent connections if configured
+        if self.server.keep_alive:
+            self.protocol_version = 'HTTP/1.1'
+
     def do_GET(self):
         self._track_request('GET')
         self._process_rsp()
@@ -44,13 +54,23 @@ class MockServerRequestHandler(BaseHTTPRequestHandler):
         if content_length > 0:
             self.rfile.read(content_length)
 
+        headers = {}
         try:
-            code, data = self.server.rsp.pop(0)
+            rsp = self.server.rsp.pop(0)
         except IndexError:
             code = 501
             data = None
+        else:
+            # responses may optionally provide headers to include
+            code, data, *extra = rsp
+            if extra:
+                headers = extra[0]
 
         self.send_response(code)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        if self.server.keep_alive and 'Content-Length' not in headers:
+            self.send_header('Content-Length', str(len(data or b'')))
         self.end_headers()
         if data:
             self.wfile.write(data)
@@ -60,7 +80,7 @@ class MockServerRequestHandler(BaseHTTPRequestHandler):
         requests.append((self.path, dict(self.headers)))
 
 
-def build_httpd(secure=None):
+def build_httpd(secure=None, keep_alive=False):
     """
     build an http daemon
 
@@ -71,12 +91,15 @@ def build_httpd(secure=None):
 
     Args:
         secure (optional): whether or not a secure http server should be made
+        keep_alive (optional): whether or not connections can be reused
 
     Returns:
         the http server
     """
 
     httpd = HTTPServer(LOCAL_RANDOM_PORT, MockServerRequestHandler)
+    httpd.connections = 0
+    httpd.keep_alive = keep_alive
     httpd.req = {}
     httpd.rsp = []
 
@@ -111,7 +134,7 @@ def fetch_cert_files():
 
 
 @contextmanager
-def httpd_context(secure=None):
+def httpd_context(secure=None, keep_alive=False):
     """
     create an http daemon context
 
@@ -123,6 +146,7 @@ def httpd_context(secure=None):
 
     Args:
         secure (optional): whether or not a secure http server should be made
+        keep_alive (optional): whether or not connections can be reused
 
     Yields:
         the http server
@@ -132,7 +156,7 @@ def httpd_context(secure=None):
     httpd_thread = None
 
     try:
-        httpd = build_httpd(secure=secure)
+        httpd = build_httpd(secure=secure, keep_alive=keep_alive)
 
         # start accepting requests
         def serve_forever(httpd):
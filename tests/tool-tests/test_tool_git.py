@@ -2,6 +2,9 @@
 # Copyright releng-tool
 
 from releng_tool.defs import GlobalAction
+from releng_tool.fetch.git import GitExistsType
+from releng_tool.fetch.git import revision_exists
+from releng_tool.tool.git import GIT
 from releng_tool.util.io import execute
 from releng_tool.util.io import execute_rv
 from releng_tool.util.io_mkdir import mkdir
@@ -9,6 +12,7 @@ from releng_tool.util.io_temp_dir import temp_dir
 from releng_tool.util.io_touch import touch
 from releng_tool.util.io_wd import wd
 from tests.support.site_tool_test import TestSiteToolBase
+from unittest.mock import patch
 import os
 import sys
 import unittest
@@ -593,6 +597,89 @@ class TestToolGit(TestSiteToolBase):
         rv = self.engine.run()
         self.assertTrue(rv)
 
+    def test_tool_git_remote_refs(self):
+        tag = self._create_tag('remote-tag')
+
+        self.defconfig_add('VERSION', DEFAULT_BRANCH)
+        rv = self.engine.run()
+        self.assertTrue(rv)
+
+        git_dir = '--git-dir=' + self.cache_dir
+        head_hash = self._git_repo('rev-parse', 'HEAD')
+        try:
+            refs = GIT.remote_refs(git_dir, self.repo_dir)
+            self.assertIsNotNone(refs)
+            self.assertEqual(refs.get(f'refs/heads/{DEFAULT_BRANCH}'),
+                head_hash)
+            self.assertIn(f'refs/tags/{tag}', refs)
+
+            # references for the same site should be cached
+            with patch.object(GIT, 'execute_rv') as execute_rv:
+                cached_refs = GIT.remote_refs(git_dir, self.repo_dir)
+                execute_rv.assert_not_called()
+            self.assertIs(cached_refs, refs)
+        finally:
+            GIT.release_all()
+
+    def test_tool_git_remote_refs_filtered(self):
+        self.defconfig_add('VERSION', DEFAULT_BRANCH)
+        rv = self.engine.run()
+        self.assertTrue(rv)
+
+        # a reference which is neither a branch nor a tag
+        self._git_repo('update-ref', 'refs/pull/1/head', 'HEAD')
+
+        git_dir = '--git-dir=' + self.cache_dir
+        try:
+            with patch.object(GIT, 'execute_rv',
+                    wraps=GIT.execute_rv) as execute_rv:
+                refs = GIT.remote_refs(git_dir, self.repo_dir)
+
+            # only branches and tags should be requested
+            execute_rv.assert_called_once_with(git_dir,
+                'ls-remote', '--heads', '--tags', 'origin')
+            self.assertIsNotNone(refs)
+            self.assertIn(f'refs/heads/{DEFAULT_BRANCH}', refs)
+            self.assertNotIn('refs/pull/1/head', refs)
+        finally:
+            GIT.release_all()
+
+    def test_tool_git_revision_exists(self):
+        first_hash = self._create_commit('first commit')
+        tag = self._create_tag('exists-tag')
+        self._create_commit('second commit')
+
+        # fetch all references into the cache
+        self.engine.opts.quirks.append('releng.git.no_depth')
+        self.engine.opts.quirks.append('releng.git.no_quick_fetch')
+        self.defconfig_add('VERSION', DEFAULT_BRANCH)
+        rv = self.engine.run()
+        self.assertTrue(rv)
+
+        git_dir = '--git-dir=' + self.cache_dir
+        missing_hash = '0' * 40
+        try:
+            self.assertEqual(revision_exists(git_dir, DEFAULT_BRANCH),
+                GitExistsType.EXISTS_BRANCH)
+            self.assertEqual(revision_exists(git_dir, tag),
+                GitExistsType.EXISTS_TAG)
+            self.assertEqual(revision_exists(git_dir, first_hash),
+                GitExistsType.EXISTS_HASH)
+            self.assertEqual(revision_exists(git_dir, missing_hash),
+                GitExistsType.MISSING_HASH)
+            self.assertEqual(revision_exists(git_dir, 'missing-revision'),
+                GitExistsType.MISSING)
+
+            # all lookups should be resolved through a single query process
+            self.assertEqual(len(GIT._queries), 1)
+
+            self.assertEqual(GIT.resolve(git_dir, first_hash), first_hash)
+            self.assertIsNone(GIT.resolve(git_dir, 'invalid\nrevision'))
+        finally:
+            GIT.release_all()
+
+        self.assertFalse(GIT._queries)
+
     def _git(self, workdir, *args):
         with wd(workdir):
             out = []
@@ -9,6 +9,7 @@ from tests import prepare_testenv
 from tests import setpkgcfg
 from tests import setprjcfg
 from unittest.mock import patch
+import os
 
 
 class TestEnginePkgMeson(RelengToolTestCase):
@@ -97,6 +98,35 @@ class TestEnginePkgMeson(RelengToolTestCase):
             env_arg = meson_install.execute.call_args.kwargs.get('env')
             self.assertIn('DESTDIR', env_arg)
 
+    @patch('releng_tool.engine.meson.install.MESON')
+    @patch('releng_tool.engine.meson.build.MESON')
+    @patch('releng_tool.engine.meson.configure.MESON')
+    @patch.object(MESON, 'exists', return_value=True)
+    def test_engine_pkg_meson_install_replicated(self,
+            meson_exists, meson_cfg, meson_build, meson_install):
+        config = {
+            'quirk': [
+                'releng.install.replicate',
+            ],
+        }
+
+        with prepare_testenv(config=config, template='minimal') as engine:
+            setpkgcfg(engine, 'minimal', Rpk.INSTALL_TYPE, 'staging_and_target')
+            setpkgcfg(engine, 'minimal', Rpk.TYPE, 'meson')
+
+            rv = engine.run()
+            self.assertTrue(rv)
+
+            # a single installation should be performed into an interim
+            # directory, which is replicated into each destination
+            meson_install.execute.assert_called_once()
+
+            args = meson_install.execute.call_args.args[0]
+            destdir_path = args[args.index('--destdir') + 1]
+            self.assertNotEqual(destdir_path, engine.opts.staging_dir)
+            self.assertNotEqual(destdir_path, engine.opts.target_dir)
+            self.assertFalse(os.path.exists(destdir_path))
+
     @patch('releng_tool.engine.meson.install.MESON')
     @patch('releng_tool.engine.meson.build.MESON')
     @patch('releng_tool.engine.meson.configure.MESON')
@@ -7,6 +7,7 @@ from tests import RelengToolTestCase
 from tests import prepare_testenv
 from tests import setpkgcfg
 from unittest.mock import patch
+import os
 
 
 class TestEnginePkgWaf(RelengToolTestCase):
@@ -56,6 +57,35 @@ class TestEnginePkgWaf(RelengToolTestCase):
             env_arg = waf_install.execute.call_args.kwargs.get('env')
             self.assertIn('DESTDIR', env_arg)
 
+    @patch('releng_tool.engine.waf.install.WAF')
+    @patch('releng_tool.engine.waf.build.WAF')
+    @patch('releng_tool.engine.waf.configure.WAF')
+    @patch.object(WAF, 'exists', return_value=True)
+    def test_engine_pkg_waf_install_replicated(self,
+            waf_exists, waf_cfg, waf_build, waf_install):
+        config = {
+            'quirk': [
+                'releng.install.replicate',
+            ],
+        }
+
+        with prepare_testenv(config=config, template='minimal') as engine:
+            setpkgcfg(engine, 'minimal', Rpk.INSTALL_TYPE, 'staging_and_target')
+            setpkgcfg(engine, 'minimal', Rpk.TYPE, 'waf')
+
+            rv = engine.run()
+            self.assertTrue(rv)
+
+            # a single installation should be performed into an interim
+            # directory, which is replicated into each destination
+            waf_install.execute.assert_called_once()
+
+            args = waf_install.execute.call_args.args[0]
+            destdir_path = args[args.index('--destdir') + 1]
+            self.assertNotEqual(destdir_path, engine.opts.staging_dir)
+            self.assertNotEqual(destdir_path, engine.opts.target_dir)
+            self.assertFalse(os.path.exists(destdir_path))
+
     @patch('releng_tool.engine.waf.install.WAF')
     @patch('releng_tool.engine.waf.build.WAF')
     @patch('releng_tool.engine.waf.configure.WAF')
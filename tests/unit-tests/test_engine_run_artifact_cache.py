@@ -0,0 +1,115 @@
+# SPDX-License-Identifier: BSD-2-Clause
+# Copyright releng-tool
+
+from tests import RelengToolTestCase
+from tests import prepare_testenv
+from tests import prepare_workdir
+from unittest.mock import patch
+import os
+import shutil
+
+
+class TestEngineRunArtifactCache(RelengToolTestCase):
+    def test_engine_run_artifact_cache_disabled(self):
+        with prepare_testenv(template='scripts-valid') as engine:
+            self.assertIsNone(engine.opts.artifact_cache_dir)
+
+            rv = engine.run()
+            self.assertTrue(rv)
+
+    def test_engine_run_artifact_cache_output_dir(self):
+        with prepare_workdir() as artifact_dir:
+            config = {
+                'artifact_cache_dir': artifact_dir,
+            }
+
+            with prepare_testenv(config=config,
+                    template='scripts-valid') as engine:
+                rv = engine.run()
+                self.assertTrue(rv)
+
+            # a project using other output directories should not use the
+            # cached outputs of the original project
+            with prepare_testenv(config=config,
+                    template='scripts-valid') as engine, \
+                    patch('releng_tool.packages.pipeline.build_stage',
+                        return_value=True) as bs:
+                rv = engine.run()
+                self.assertTrue(rv)
+                bs.assert_called_once()
+
+            self.assertEqual(len(self._cache_entries(artifact_dir)), 2)
+
+    def test_engine_run_artifact_cache_restore(self):
+        with prepare_workdir() as artifact_dir, \
+                prepare_workdir() as output_dir:
+            config = {
+                'artifact_cache_dir': artifact_dir,
+                'out_dir': output_dir,
+            }
+
+            # populate the artifact cache from an initial project
+            with prepare_testenv(config=config,
+                    template='scripts-valid') as engine:
+                rv = engine.run()
+                self.assertTrue(rv)
+
+            # (remove the initial project's outputs)
+            shutil.rmtree(output_dir)
+
+            entries = self._cache_entries(artifact_dir)
+            self.assertEqual(len(entries), 1)
+
+            # a project with the same package definition should restore the
+            # package's outputs instead of building it
+            with prepare_testenv(config=config,
+                    template='scripts-valid') as engine, \
+                    patch('releng_tool.packages.pipeline.build_stage') as bs:
+                rv = engine.run()
+                self.assertTrue(rv)
+                bs.assert_not_called()
+
+                target_dir = engine.opts.target_dir
+                for stage in ['bootstrap', 'configure', 'build', 'install']:
+                    flag = os.path.join(target_dir, f'invoked-{stage}')
+                    self.assertTrue(os.path.exists(flag))
+
+                # post-processing is never cached
+                flag = os.path.join(target_dir, 'invoked-post')
+                self.assertTrue(os.path.exists(flag))
+
+            self.assertEqual(self._cache_entries(artifact_dir), entries)
+
+    def test_engine_run_artifact_cache_stale(self):
+        with prepare_workdir() as artifact_dir:
+            config = {
+                'artifact_cache_dir': artifact_dir,
+            }
+
+            with prepare_testenv(config=config,
+                    template='scripts-valid') as engine:
+                rv = engine.run()
+                self.assertTrue(rv)
+
+            # a project with a modified package definition should not use
+            # the cached outputs of the original package
+            with prepare_testenv(config=config,
+                    template='scripts-valid') as engine:
+                script = os.path.join(engine.opts.root_dir,
+                    'package', 'test', 'test-build.rt')
+                with open(script, 'a') as f:
+                    f.write('# modified\n')
+
+                with patch('releng_tool.packages.pipeline.build_stage',
+                        return_value=True) as bs:
+                    rv = engine.run()
+                    self.assertTrue(rv)
+                    bs.assert_called_once()
+
+            self.assertEqual(len(self._cache_entries(artifact_dir)), 2)
+
+    def _cache_entries(self, artifact_dir):
+        entries = []
+        for root, _, files in os.walk(artifact_dir):
+            entries.extend(os.path.join(root, f) for f in files)
+        return sorted(entries)
@@ -3,6 +3,7 @@
 
 from releng_tool.defs import GlobalAction
 from releng_tool.defs import PkgAction
+from releng_tool.util.io_remove import TRASH_PREFIX
 from tests import RelengToolTestCase
 from tests import mock_os_remove_permission_denied
 from tests import prepare_testenv
@@ -15,6 +16,30 @@ import os
 TEMPLATE = 'minimal'
 
 
+def removing(path, target):
+    """
+    check if a path being removed is a target directory
+
+    Directories may be moved into a trash entry before being removed, so a
+    path is considered a target if it is the target or the target's original
+    path (relative to the trash entry) matches the target.
+    """
+
+    path = str(path)
+    if path == target:
+        return True
+
+    container = path
+    while os.path.dirname(container) != container:
+        container = os.path.dirname(container)
+        if os.path.basename(container).startswith(TRASH_PREFIX):
+            original = os.path.join(os.path.dirname(container),
+                os.path.relpath(path, container))
+            return original == target
+
+    return False
+
+
 class TestEngineRunCleanFail(RelengToolTestCase):
     def run(self, result=None):
         with wd() as cache_dir, wd() as dl_dir, wd() as out_dir:
@@ -58,7 +83,7 @@ class TestEngineRunCleanFail(RelengToolTestCase):
 
     def test_engine_run_clean_fail_noperm_check_build_dir_clean(self):
         def rmcmd(path, **kwargs):  # noqa: ARG001
-            if str(path) == self.opts.build_dir:
+            if removing(path, self.opts.build_dir):
                 raise OSError('Mocked permission denied')
 
         with mock_os_remove_permission_denied(f=rmcmd):
@@ -68,7 +93,7 @@ class TestEngineRunCleanFail(RelengToolTestCase):
 
     def test_engine_run_clean_fail_noperm_check_build_dir_distclean(self):
         def rmcmd(path, **kwargs):  # noqa: ARG001
-            if str(path) == self.opts.build_dir:
+            if removing(path, self.opts.build_dir):
                 raise OSError('Mocked permission denied')
 
         with mock_os_remove_permission_denied(f=rmcmd):
@@ -78,7 +103,7 @@ class TestEngineRunCleanFail(RelengToolTestCase):
 
     def test_engine_run_clean_fail_noperm_check_build_dir_mrproper(self):
         def rmcmd(path, **kwargs):  # noqa: ARG001
-            if str(path) == self.opts.build_dir:
+            if removing(path, self.opts.build_dir):
                 raise OSError('Mocked permission denied')
 
         with mock_os_remove_permission_denied(f=rmcmd):
@@ -88,7 +113,7 @@ class TestEngineRunCleanFail(RelengToolTestCase):
 
     def test_engine_run_clean_fail_noperm_check_cache_dir_distclean(self):
         def rmcmd(path, **kwargs):  # noqa: ARG001
-            if str(path) == self.opts.cache_dir:
+            if removing(path, self.opts.cache_dir):
                 raise OSError('Mocked permission denied')
 
         with mock_os_remove_permission_denied(f=rmcmd):
@@ -98,7 +123,7 @@ class TestEngineRunCleanFail(RelengToolTestCase):
 
     def test_engine_run_clean_fail_noperm_check_dl_dir_distclean(self):
         def rmcmd(path, **kwargs):  # noqa: ARG001
-            if str(path) == self.opts.dl_dir:
+            if removing(path, self.opts.dl_dir):
                 raise OSError('Mocked permission denied')
 
         with mock_os_remove_permission_denied(f=rmcmd):
@@ -127,7 +152,7 @@ class TestEngineRunCleanFail(RelengToolTestCase):
 
     def test_engine_run_clean_fail_noperm_check_host_dir_clean(self):
         def rmcmd(path, **kwargs):  # noqa: ARG001
-            if str(path) == self.opts.host_dir:
+            if removing(path, self.opts.host_dir):
                 raise OSError('Mocked permission denied')
 
         with mock_os_remove_permission_denied(f=rmcmd):
@@ -137,7 +162,7 @@ class TestEngineRunCleanFail(RelengToolTestCase):
 
     def test_engine_run_clean_fail_noperm_check_host_dir_distclean(self):
         def rmcmd(path, **kwargs):  # noqa: ARG001
-            if str(path) == self.opts.host_dir:
+            if removing(path, self.opts.host_dir):
                 raise OSError('Mocked permission denied')
 
         with mock_os_remove_permission_denied(f=rmcmd):
@@ -147,7 +172,7 @@ class TestEngineRunCleanFail(RelengToolTestCase):
 
     def test_engine_run_clean_fail_noperm_check_host_dir_mrproper(self):
         def rmcmd(path, **kwargs):  # noqa: ARG001
-            if str(path) == self.opts.host_dir:
+            if removing(path, self.opts.host_dir):
                 raise OSError('Mocked permission denied')
 
         with mock_os_remove_permission_denied(f=rmcmd):
@@ -157,7 +182,7 @@ class TestEngineRunCleanFail(RelengToolTestCase):
 
     def test_engine_run_clean_fail_noperm_check_license_dir_clean(self):
         def rmcmd(path, **kwargs):  # noqa: ARG001
-            if str(path) == self.opts.license_dir:
+            if removing(path, self.opts.license_dir):
                 raise OSError('Mocked permission denied')
 
         with mock_os_remove_permission_denied(f=rmcmd):
@@ -167,7 +192,7 @@ class TestEngineRunCleanFail(RelengToolTestCase):
 
     def test_engine_run_clean_fail_noperm_check_license_dir_distclean(self):
         def rmcmd(path, **kwargs):  # noqa: ARG001
-            if str(path) == self.opts.license_dir:
+            if removing(path, self.opts.license_dir):
                 raise OSError('Mocked permission denied')
 
         with mock_os_remove_permission_denied(f=rmcmd):
@@ -177,7 +202,7 @@ class TestEngineRunCleanFail(RelengToolTestCase):
 
     def test_engine_run_clean_fail_noperm_check_license_dir_mrproper(self):
         def rmcmd(path, **kwargs):  # noqa: ARG001
-            if str(path) == self.opts.license_dir:
+            if removing(path, self.opts.license_dir):
                 raise OSError('Mocked permission denied')
 
         with mock_os_remove_permission_denied(f=rmcmd):
@@ -187,7 +212,7 @@ class TestEngineRunCleanFail(RelengToolTestCase):
 
     def test_engine_run_clean_fail_noperm_check_pkg_clean(self):
         def rmcmd(path, **kwargs):  # noqa: ARG001
-            if str(path) == self.pkg_build_dir:
+            if removing(path, self.pkg_build_dir):
                 raise OSError('Mocked permission denied')
 
         with mock_os_remove_permission_denied(f=rmcmd):
@@ -197,7 +222,7 @@ class TestEngineRunCleanFail(RelengToolTestCase):
 
     def test_engine_run_clean_fail_noperm_check_pkg_distclean(self):
         def rmcmd(path, **kwargs):  # noqa: ARG001
-            if str(path) == self.pkg_build_dir:
+            if removing(path, self.pkg_build_dir):
                 raise OSError('Mocked permission denied')
 
         with mock_os_remove_permission_denied(f=rmcmd):
@@ -259,7 +284,7 @@ class TestEngineRunCleanFail(RelengToolTestCase):
 
     def test_engine_run_clean_fail_noperm_check_staging_dir_clean(self):
         def rmcmd(path, **kwargs):  # noqa: ARG001
-            if str(path) == self.opts.staging_dir:
+            if removing(path, self.opts.staging_dir):
                 raise OSError('Mocked permission denied')
 
         with mock_os_remove_permission_denied(f=rmcmd):
@@ -269,7 +294,7 @@ class TestEngineRunCleanFail(RelengToolTestCase):
 
     def test_engine_run_clean_fail_noperm_check_staging_dir_distclean(self):
         def rmcmd(path, **kwargs):  # noqa: ARG001
-            if str(path) == self.opts.staging_dir:
+            if removing(path, self.opts.staging_dir):
                 raise OSError('Mocked permission denied')
 
         with mock_os_remove_permission_denied(f=rmcmd):
@@ -279,7 +304,7 @@ class TestEngineRunCleanFail(RelengToolTestCase):
 
     def test_engine_run_clean_fail_noperm_check_staging_dir_mrproper(self):
         def rmcmd(path, **kwargs):  # noqa: ARG001
-            if str(path) == self.opts.staging_dir:
+            if removing(path, self.opts.staging_dir):
                 raise OSError('Mocked permission denied')
 
         with mock_os_remove_permission_denied(f=rmcmd):
@@ -289,7 +314,7 @@ class TestEngineRunCleanFail(RelengToolTestCase):
 
     def test_engine_run_clean_fail_noperm_check_symbols_dir_clean(self):
         def rmcmd(path, **kwargs):  # noqa: ARG001
-            if str(path) == self.opts.symbols_dir:
+            if removing(path, self.opts.symbols_dir):
                 raise OSError('Mocked permission denied')
 
         with mock_os_remove_permission_denied(f=rmcmd):
@@ -299,7 +324,7 @@ class TestEngineRunCleanFail(RelengToolTestCase):
 
     def test_engine_run_clean_fail_noperm_check_symbols_dir_distclean(self):
         def rmcmd(path, **kwargs):  # noqa: ARG001
-            if str(path) == self.opts.symbols_dir:
+            if removing(path, self.opts.symbols_dir):
                 raise OSError('Mocked permission denied')
 
         with mock_os_remove_permission_denied(f=rmcmd):
@@ -309,7 +334,7 @@ class TestEngineRunCleanFail(RelengToolTestCase):
 
     def test_engine_run_clean_fail_noperm_check_symbols_dir_mrproper(self):
         def rmcmd(path, **kwargs):  # noqa: ARG001
-            if str(path) == self.opts.symbols_dir:
+            if removing(path, self.opts.symbols_dir):
                 raise OSError('Mocked permission denied')
 
         with mock_os_remove_permission_denied(f=rmcmd):
@@ -319,7 +344,7 @@ class TestEngineRunCleanFail(RelengToolTestCase):
 
     def test_engine_run_clean_fail_noperm_check_target_dir_clean(self):
         def rmcmd(path, **kwargs):  # noqa: ARG001
-            if str(path) == self.opts.target_dir:
+            if removing(path, self.opts.target_dir):
                 raise OSError('Mocked permission denied')
 
         with mock_os_remove_permission_denied(f=rmcmd):
@@ -329,7 +354,7 @@ class TestEngineRunCleanFail(RelengToolTestCase):
 
     def test_engine_run_clean_fail_noperm_check_target_dir_distclean(self):
         def rmcmd(path, **kwargs):  # noqa: ARG001
-            if str(path) == self.opts.target_dir:
+            if removing(path, self.opts.target_dir):
                 raise OSError('Mocked permission denied')
 
         with mock_os_remove_permission_denied(f=rmcmd):
@@ -339,7 +364,7 @@ class TestEngineRunCleanFail(RelengToolTestCase):
 
     def test_engine_run_clean_fail_noperm_check_target_dir_mrproper(self):
         def rmcmd(path, **kwargs):  # noqa: ARG001
-            if str(path) == self.opts.target_dir:
+            if removing(path, self.opts.target_dir):
                 raise OSError('Mocked permission denied')
 
         with mock_os_remove_permission_denied(f=rmcmd):
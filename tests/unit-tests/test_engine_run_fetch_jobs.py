@@ -0,0 +1,55 @@
+# SPDX-License-Identifier: BSD-2-Clause
+# Copyright releng-tool
+
+from tests import RelengToolTestCase
+from tests import prepare_testenv
+from tests.support import fetch_unittest_assets_dir
+import os
+
+
+class TestEngineRunFetchJobs(RelengToolTestCase):
+    @classmethod
+    def setUpClass(cls):
+        sample_files = fetch_unittest_assets_dir('sample-files')
+        cls.archive = os.path.join(sample_files, 'sample-files.tar')
+
+    def test_engine_run_fetch_jobs_invalid_site(self):
+        config = {
+            'action': 'fetch',
+            'fetch_jobs': 2,
+        }
+
+        with prepare_testenv(config=config, template='multiple') as engine:
+            missing = os.path.join(engine.opts.root_dir, 'missing.tar')
+            self._configure_site(engine, 'multiple-a', self.archive)
+            self._configure_site(engine, 'multiple-b', missing)
+
+            rv = engine.run()
+            self.assertFalse(rv)
+
+    def test_engine_run_fetch_jobs_multiple(self):
+        config = {
+            'action': 'fetch',
+            'fetch_jobs': 2,
+        }
+
+        with prepare_testenv(config=config, template='multiple') as engine:
+            self._configure_site(engine, 'multiple-a', self.archive)
+            self._configure_site(engine, 'multiple-b', self.archive)
+
+            rv = engine.run()
+            self.assertTrue(rv)
+
+            for pkg in ('multiple-a', 'multiple-b'):
+                pkg_dl_dir = os.path.join(engine.opts.dl_dir, pkg)
+                self.assertTrue(os.path.isdir(pkg_dl_dir))
+                self.assertTrue(os.listdir(pkg_dl_dir))
+
+    def _configure_site(self, engine, pkg, archive):
+        root_dir = engine.opts.root_dir
+        pkg_script = os.path.join(root_dir, 'package', pkg, f'{pkg}.rt')
+        prefix = pkg.upper().replace('-', '_')
+
+        with open(pkg_script, 'a') as f:
+            f.write(f'{prefix}_SITE = r"file://{archive}"\n')
+            f.write(f'{prefix}_VERSION = "{pkg}"\n')
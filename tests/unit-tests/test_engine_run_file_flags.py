@@ -15,3 +15,121 @@ class TestEngineRunFileFlags(RelengToolTestCase):
         with prepare_testenv(config=config, template='minimal') as engine:
             engine.run()
             self.assertTrue(os.path.exists(engine.opts.ff_devmode))
+
+    def test_engine_run_file_flag_fingerprint(self):
+        with prepare_testenv(template='scripts-valid') as engine:
+            root_dir = engine.opts.root_dir
+            target_dir = engine.opts.target_dir
+            pkg_dir = os.path.join(root_dir, 'package', 'test')
+
+            stages = [
+                'bootstrap',
+                'configure',
+                'build',
+                'install',
+                'post',
+            ]
+
+            def invoked_stages():
+                invoked = []
+                for stage in stages:
+                    flag = os.path.join(target_dir, f'invoked-{stage}')
+                    if os.path.exists(flag):
+                        invoked.append(stage)
+                        os.remove(flag)
+                return invoked
+
+            rv = engine.run()
+            self.assertTrue(rv)
+            self.assertEqual(invoked_stages(), stages)
+
+            # no changes; no stages should be invoked again
+            rv = engine.run()
+            self.assertTrue(rv)
+            self.assertEqual(invoked_stages(), [])
+
+            # a changed build script should re-run the build stage onwards
+            with open(os.path.join(pkg_dir, 'test-build.rt'), 'a') as f:
+                f.write('# modified\n')
+
+            rv = engine.run()
+            self.assertTrue(rv)
+            self.assertEqual(invoked_stages(), ['build', 'install', 'post'])
+
+            # changed configuration options should re-run the configuration
+            # stage onwards
+            with open(os.path.join(pkg_dir, 'test.rt'), 'a') as f:
+                f.write("TEST_CONF_OPTS = ['--example']\n")
+
+            rv = engine.run()
+            self.assertTrue(rv)
+            self.assertEqual(invoked_stages(), stages[1:])
+
+    def test_engine_run_file_flag_fingerprint_env(self):
+        with prepare_testenv(template='scripts-valid') as engine:
+            root_dir = engine.opts.root_dir
+            target_dir = engine.opts.target_dir
+
+            stages = [
+                'configure',
+                'build',
+                'install',
+                'post',
+            ]
+
+            def invoked_stages():
+                invoked = []
+                for stage in ['bootstrap', *stages]:
+                    flag = os.path.join(target_dir, f'invoked-{stage}')
+                    if os.path.exists(flag):
+                        invoked.append(stage)
+                        os.remove(flag)
+                return invoked
+
+            rv = engine.run()
+            self.assertTrue(rv)
+            invoked_stages()
+
+            # a changed toolchain option should re-run the configuration
+            # stage onwards
+            os.environ['CFLAGS'] = '-O2'
+
+            rv = engine.run()
+            self.assertTrue(rv)
+            self.assertEqual(invoked_stages(), stages)
+
+            # a changed project configuration value should re-run the
+            # configuration stage onwards
+            with open(os.path.join(root_dir, 'releng-tool.rt'), 'a') as f:
+                f.write("EXAMPLE_VALUE = 'example'\n")
+
+            rv = engine.run()
+            self.assertTrue(rv)
+            self.assertEqual(invoked_stages(), stages)
+
+            # no changes; no stages should be invoked again
+            rv = engine.run()
+            self.assertTrue(rv)
+            self.assertEqual(invoked_stages(), [])
+
+    def test_engine_run_file_flag_fingerprint_disabled(self):
+        with prepare_testenv(template='scripts-valid') as engine:
+            engine.opts.quirks.append('releng.disable_stage_fingerprints')
+
+            root_dir = engine.opts.root_dir
+            target_dir = engine.opts.target_dir
+            pkg_dir = os.path.join(root_dir, 'package', 'test')
+
+            rv = engine.run()
+            self.assertTrue(rv)
+
+            build_flag = os.path.join(target_dir, 'invoked-build')
+            self.assertTrue(os.path.exists(build_flag))
+            os.remove(build_flag)
+
+            with open(os.path.join(pkg_dir, 'test-build.rt'), 'a') as f:
+                f.write('# modified\n')
+
+            rv = engine.run()
+            self.assertTrue(rv)
+            self.assertFalse(os.path.exists(build_flag))
@@ -0,0 +1,114 @@
+# SPDX-License-Identifier: BSD-2-Clause
+# Copyright releng-tool
+
+from releng_tool.packages.manager import RelengPackageManager
+from tests import RelengToolTestCase
+from tests import copy_template
+from tests import prepare_testenv
+from tests import prepare_workdir
+from tests import redirect_stdout
+from unittest.mock import patch
+import os
+
+
+class TestEngineRunPackageCache(RelengToolTestCase):
+    def test_engine_run_package_cache_disabled(self):
+        with prepare_workdir() as root_dir:
+            copy_template('minimal', root_dir)
+
+            config = self._config(root_dir)
+            config['quirk'] = [
+                'releng.disable_script_cache',
+            ]
+
+            self.assertEqual(self._printpkgs(config), 1)
+            self.assertEqual(self._printpkgs(config), 1)
+
+    def test_engine_run_package_cache_printpkgs(self):
+        with prepare_workdir() as root_dir:
+            copy_template('minimal', root_dir)
+            config = self._config(root_dir)
+
+            self.assertEqual(self._printpkgs(config), 1)
+
+            # packages are restored from the cache
+            self.assertEqual(self._printpkgs(config), 0)
+
+            # a modified package definition invalidates the cache
+            pkg_script = os.path.join(
+                root_dir, 'package', 'minimal', 'minimal.rt')
+            with open(pkg_script, 'a') as f:
+                f.write('\nMINIMAL_VERSION = "1.2.3"\n')
+
+            self.assertEqual(self._printpkgs(config), 1)
+            self.assertEqual(self._printpkgs(config), 0)
+
+    def test_engine_run_package_cache_include(self):
+        with prepare_workdir() as root_dir:
+            copy_template('minimal', root_dir)
+            config = self._config(root_dir)
+
+            # a package definition including a script from a nested directory
+            pkg_dir = os.path.join(root_dir, 'package', 'minimal')
+            include_dir = os.path.join(pkg_dir, 'scripts')
+            include_script = os.path.join(include_dir, 'extra.rt')
+            os.makedirs(include_dir)
+            with open(include_script, 'w') as f:
+                f.write('EXTRA = 1\n')
+
+            with open(os.path.join(pkg_dir, 'minimal.rt'), 'a') as f:
+                f.write('\nreleng_include("scripts/extra.rt")\n')
+
+            self.assertEqual(self._printpkgs(config), 1)
+            self.assertEqual(self._printpkgs(config), 0)
+
+            # a modified included script invalidates the cache
+            with open(include_script, 'a') as f:
+                f.write('EXTRA = 2\n')
+
+            self.assertEqual(self._printpkgs(config), 1)
+            self.assertEqual(self._printpkgs(config), 0)
+
+    def test_engine_run_package_cache_stage(self):
+        with prepare_workdir() as root_dir:
+            copy_template('minimal', root_dir)
+            config = self._config(root_dir)
+
+            self.assertEqual(self._printpkgs(config), 1)
+
+            # the cache is never used for package processing
+            config['action'] = 'fetch'
+            with prepare_testenv(config=config) as engine, \
+                    patch.object(RelengPackageManager, 'load_package',
+                        autospec=True,
+                        side_effect=RelengPackageManager.load_package) as m:
+                rv = engine.run()
+                self.assertTrue(rv)
+                self.assertEqual(m.call_count, 1)
+
+    def _config(self, root_dir):
+        return {
+            'action': 'printpkgs',
+            'cache_dir': os.path.join(root_dir, 'cache'),
+            'dl_dir': os.path.join(root_dir, 'dl'),
+            'out_dir': os.path.join(root_dir, 'out'),
+            'root_dir': root_dir,
+        }
+
+    def _printpkgs(self, config):
+        env = dict(os.environ)
+
+        try:
+            with prepare_testenv(config=config) as engine, \
+                    patch.object(RelengPackageManager, 'load_package',
+                        autospec=True,
+                        side_effect=RelengPackageManager.load_package) as m, \
+                    redirect_stdout() as stream:
+                rv = engine.run()
+                self.assertTrue(rv)
+
+            self.assertIn('minimal', stream.getvalue())
+            return m.call_count
+        finally:
+            os.environ.clear()
+            os.environ.update(env)
@@ -0,0 +1,61 @@
+# SPDX-License-Identifier: BSD-2-Clause
+# Copyright releng-tool
+
+from tests import RelengToolTestCase
+from tests import prepare_testenv
+from tests import redirect_stdout
+import os
+
+
+class TestEngineRunPackageLogs(RelengToolTestCase):
+    def test_engine_run_package_logs_disabled(self):
+        with prepare_testenv(template='scripts-valid') as engine:
+            rv = engine.run()
+            self.assertTrue(rv)
+
+            self.assertFalse(os.path.exists(engine.opts.logs_dir))
+
+    def test_engine_run_package_logs_enabled(self):
+        config = {
+            'package_logs': True,
+        }
+
+        with prepare_testenv(config=config, template='scripts-valid') as engine:
+            rv = engine.run()
+            self.assertTrue(rv)
+
+            pkg_logs_dir = os.path.join(engine.opts.logs_dir, 'test')
+            for stage in ('boot', 'build', 'configure', 'install', 'post'):
+                log_file = os.path.join(pkg_logs_dir, stage + '.log')
+                self.assertTrue(os.path.isfile(log_file))
+
+    def test_engine_run_package_logs_failure(self):
+        config = {
+            'package_logs': True,
+        }
+
+        with prepare_testenv(config=config,
+                template='scripts-invalid-build') as engine:
+            build_script = os.path.join(
+                engine.opts.root_dir, 'package', 'test', 'test-build.rt')
+            with open(build_script, 'w') as f:
+                f.write('log("plain build output")\n')
+                f.write('note("noted build output")\n')
+                f.write('raise NotImplementedError\n')
+
+            with redirect_stdout() as stream:
+                rv = engine.run()
+                self.assertFalse(rv)
+
+            log_file = os.path.join(engine.opts.logs_dir, 'test', 'build.log')
+            self.assertTrue(os.path.isfile(log_file))
+
+            with open(log_file) as f:
+                contents = f.read()
+            self.assertIn('plain build output', contents)
+            self.assertIn('noted build output', contents)
+
+            # only output hidden from the console is replayed on a failure
+            output = stream.getvalue()
+            self.assertEqual(output.count('plain build output'), 1)
+            self.assertEqual(output.count('noted build output'), 1)
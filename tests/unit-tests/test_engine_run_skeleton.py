@@ -0,0 +1,54 @@
+# SPDX-License-Identifier: BSD-2-Clause
+# Copyright releng-tool
+
+from tests import RelengToolTestCase
+from tests import prepare_testenv
+import os
+
+
+class TestEngineRunSkeleton(RelengToolTestCase):
+    def test_engine_run_skeleton_changes(self):
+        with prepare_testenv(template='stage-workdir') as engine:
+            skeleton = os.path.join(engine.opts.out_dir, 'skeleton-target.txt')
+            changes = os.path.join(
+                engine.opts.out_dir, 'skeleton-target-changes.txt')
+
+            rv = engine.run()
+            self.assertTrue(rv)
+
+            with open(skeleton) as f:
+                lines = f.read().splitlines()
+            self.assertIn('verified-build', lines)
+            self.assertFalse(os.path.exists(changes))
+
+            extra = os.path.join(engine.opts.target_dir, 'extra')
+            with open(extra, 'w') as f:
+                f.write('extra')
+
+            rv = engine.run()
+            self.assertTrue(rv)
+
+            with open(skeleton) as f:
+                lines = f.read().splitlines()
+            self.assertIn('extra', lines)
+
+            with open(changes) as f:
+                lines = f.read().splitlines()
+            self.assertIn('+ extra', lines)
+
+    def test_engine_run_skeleton_details(self):
+        config = {
+            'quirk': ['releng.skeleton.details'],
+        }
+
+        with prepare_testenv(config=config, template='stage-workdir') as engine:
+            rv = engine.run()
+            self.assertTrue(rv)
+
+            skeleton = os.path.join(engine.opts.out_dir, 'skeleton-target.txt')
+            with open(skeleton) as f:
+                lines = f.read().splitlines()
+
+            entry = next(x for x in lines if x.startswith('verified-build\t'))
+            self.assertIn('\tsize=', entry)
+            self.assertIn('\tsha256=', entry)
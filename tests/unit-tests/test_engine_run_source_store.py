@@ -0,0 +1,198 @@
+# SPDX-License-Identifier: BSD-2-Clause
+# Copyright releng-tool
+
+from contextlib import contextmanager
+from pathlib import Path
+from releng_tool.defs import Rpk
+from releng_tool.packages.source_store import _archive_digest
+from releng_tool.util.hash_cache import VerifiedHashCache
+from tests import RelengToolTestCase
+from tests import prepare_testenv
+from tests import prepare_workdir
+from tests import setpkgcfg
+from tests.support import fetch_unittest_assets_dir
+from unittest.mock import patch
+import hashlib
+import os
+import shutil
+import stat
+
+
+class TestEngineRunSourceStore(RelengToolTestCase):
+    def test_engine_run_source_store_disabled(self):
+        with self._setup_engine() as engine:
+            self.assertIsNone(engine.opts.source_store_dir)
+
+            rv = engine.run()
+            self.assertTrue(rv)
+
+            self._assertExtracted(engine)
+
+    def test_engine_run_source_store_fallback(self):
+        with prepare_workdir() as store_dir:
+            config = {
+                'source_store_dir': store_dir,
+            }
+
+            with self._setup_engine(config) as engine:
+                rv = engine.run()
+                self.assertTrue(rv)
+
+            entries = self._store_entries(store_dir)
+            self.assertEqual(len(entries), 1)
+
+            # a project with the same archive will either populate its build
+            # directory from the store (if reflinks are supported) or extract
+            # the archive again
+            with self._setup_engine(config) as engine:
+                rv = engine.run()
+                self.assertTrue(rv)
+
+                self._assertExtracted(engine)
+
+                # reflinked sources are writable
+                container = self._build_file(engine)
+                self.assertTrue(os.stat(container).st_mode & stat.S_IWUSR)
+
+            self.assertEqual(self._store_entries(store_dir), entries)
+
+    def test_engine_run_source_store_hardlink(self):
+        with prepare_workdir() as store_dir:
+            config = {
+                'quirk': [
+                    'releng.source_store.hardlink',
+                ],
+                'source_store_dir': store_dir,
+            }
+
+            with self._setup_engine(config) as engine:
+                rv = engine.run()
+                self.assertTrue(rv)
+
+            entries = self._store_entries(store_dir)
+            self.assertEqual(len(entries), 1)
+
+            # stored sources are read-only
+            mode = os.stat(entries[0]).st_mode
+            self.assertFalse(mode & stat.S_IWUSR)
+
+            # a project with the same archive should populate its build
+            # directory from the store instead of extracting the archive
+            with self._setup_engine(config) as engine, \
+                    patch('releng_tool.engine.extract.extract_archive') as ea:
+                rv = engine.run()
+                self.assertTrue(rv)
+                ea.assert_not_called()
+
+                self._assertExtracted(engine)
+
+                container = self._build_file(engine)
+                self.assertTrue(os.path.samefile(container, entries[0]))
+
+    def test_engine_run_source_store_modified(self):
+        with prepare_workdir() as store_dir:
+            config = {
+                'quirk': [
+                    'releng.source_store.hardlink',
+                ],
+                'source_store_dir': store_dir,
+            }
+
+            with self._setup_engine(config) as engine:
+                rv = engine.run()
+                self.assertTrue(rv)
+
+            # a project with a different strip count should not use the
+            # stored sources of the original package
+            with self._setup_engine(config) as engine:
+                setpkgcfg(engine, 'minimal', Rpk.STRIP_COUNT, value=0)
+
+                rv = engine.run()
+                self.assertTrue(rv)
+
+            keys = []
+            for prefix in os.listdir(store_dir):
+                keys.extend(os.listdir(os.path.join(store_dir, prefix)))
+            self.assertEqual(len(keys), 2)
+
+    def test_engine_run_source_store_verified(self):
+        with prepare_workdir() as store_dir:
+            config = {
+                'quirk': [
+                    'releng.source_store.hardlink',
+                ],
+                'source_store_dir': store_dir,
+            }
+
+            # an archive verified with a strong hash is not read again when
+            # determining its key
+            with self._setup_engine(config, strong=True) as engine, \
+                    patch('releng_tool.packages.source_store._archive_digest',
+                        side_effect=_archive_digest) as digest:
+                rv = engine.run()
+                self.assertTrue(rv)
+                digest.assert_not_called()
+
+            entries = self._store_entries(store_dir)
+            self.assertEqual(len(entries), 1)
+
+            # without a verified state, the archive is read which results in
+            # the same key
+            with self._setup_engine(config, strong=True) as engine, \
+                    patch.object(VerifiedHashCache, 'verified',
+                        return_value=False), \
+                    patch('releng_tool.packages.source_store._archive_digest',
+                        side_effect=_archive_digest) as digest, \
+                    patch('releng_tool.engine.extract.extract_archive') as ea:
+                rv = engine.run()
+                self.assertTrue(rv)
+                digest.assert_called_once()
+                ea.assert_not_called()
+
+                self._assertExtracted(engine)
+
+            self.assertEqual(self._store_entries(store_dir), entries)
+
+    def _assertExtracted(self, engine):
+        self.assertTrue(os.path.isfile(self._build_file(engine)))
+
+    def _build_file(self, engine):
+        return os.path.join(engine.opts.build_dir, 'minimal',
+            'tgz-file-container.txt')
+
+    @contextmanager
+    def _setup_engine(self, cfg=None, *, strong=False):
+        dummy_site = 'http://www.example.com/test.tgz'
+
+        assets = fetch_unittest_assets_dir('sample-files')
+        archive = os.path.join(assets, 'sample-files.tgz')
+        archive_hash = os.path.join(assets, 'sample-files.tgz.hash')
+
+        with prepare_testenv(config=cfg, template='minimal') as engine:
+            setpkgcfg(engine, 'minimal', Rpk.SITE, value=dummy_site)
+            setpkgcfg(engine, 'minimal', Rpk.VERSION, value=None)
+
+            root_dir = Path(engine.opts.root_dir)
+            pkg_hash = root_dir / 'package' / 'minimal' / 'minimal.hash'
+            shutil.copy(archive_hash, pkg_hash)
+            content = pkg_hash.read_text()
+            pkg_hash.write_text(content.replace('sample-files', 'minimal'))
+
+            if strong:
+                digest = hashlib.sha256(Path(archive).read_bytes()).hexdigest()
+                with pkg_hash.open('a') as f:
+                    f.write(f'sha256 {digest} minimal.tgz\n')
+
+            def mocked_fetch(opts):
+                cache_file = opts.cache_file
+                shutil.copy(archive, cache_file)
+                return cache_file
+
+            with patch('releng_tool.engine.fetch.fetch_url', mocked_fetch):
+                yield engine
+
+    def _store_entries(self, store_dir):
+        entries = []
+        for root, _, files in os.walk(store_dir):
+            entries.extend(os.path.join(root, f) for f in files)
+        return sorted(entries)
@@ -4,12 +4,18 @@
 from releng_tool.api import RelengExtractOptions
 from releng_tool.extract.archive import extract
 from releng_tool.tool.python import PYTHON
+from releng_tool.tool.tar import TAR
+from releng_tool.tool.xz import XZ
 from tests import RelengToolTestCase
 from tests import prepare_workdir
 from tests.support import fetch_unittest_assets_dir
+from unittest.mock import patch
+from zipfile import ZipFile
 import json
 import os
 import posixpath
+import tarfile
+import unittest
 
 
 class TestExtractArchive(RelengToolTestCase):
@@ -89,6 +95,40 @@ class TestExtractArchive(RelengToolTestCase):
             'tgz-file-container.txt',
         ])
 
+    def test_extract_archive_tar_parallel(self):
+        if not TAR.exists() or not XZ.exists():
+            raise unittest.SkipTest('tar/xz not available')
+
+        if not TAR.compress_program:
+            raise unittest.SkipTest('tar does not support compress programs')
+
+        with prepare_workdir() as archive_dir:
+            container = os.path.join(archive_dir, 'container')
+            os.mkdir(container)
+            with open(os.path.join(container, 'file'), 'w') as f:
+                f.write('data')
+
+            cache_file = os.path.join(archive_dir, 'sample.tar.xz')
+            with tarfile.open(cache_file, 'w:xz') as tar:
+                tar.add(container, arcname='container')
+
+            self.opts.cache_file = cache_file
+            self.opts._jobs = 2
+
+            with patch.object(TAR, 'execute', wraps=TAR.execute) as execute:
+                extracted = extract(self.opts)
+                self.assertTrue(extracted)
+
+                tar_args = execute.call_args[0][0]
+                self.assertIn(f'--use-compress-program={XZ.tool} -T2',
+                    tar_args)
+                self.assertNotIn('--verbose', tar_args)
+
+        self._assertExtracted([
+            'container/',
+            'container/file',
+        ])
+
     def test_extract_archive_zip_default(self):
         cache_file = os.path.join(self.sample_files, 'sample-files.zip')
         self.opts.cache_file = cache_file
@@ -102,6 +142,28 @@ class TestExtractArchive(RelengToolTestCase):
             'zip-file-root',
         ])
 
+    def test_extract_archive_zip_parallel(self):
+        with prepare_workdir() as archive_dir:
+            cache_file = os.path.join(archive_dir, 'sample.zip')
+            with ZipFile(cache_file, 'w') as zip_:
+                for idx in range(8):
+                    zip_.writestr(f'root/sub-{idx % 2}/file-{idx}', 'x' * idx)
+
+            self.opts.cache_file = cache_file
+            self.opts._jobs = 4
+
+            extracted = extract(self.opts)
+            self.assertTrue(extracted)
+
+        expected = ['root/', 'root/sub-0/', 'root/sub-1/']
+        for idx in range(8):
+            expected.append(f'root/sub-{idx % 2}/file-{idx}')
+        self._assertExtracted(expected)
+
+        target = os.path.join(self.opts.work_dir, 'root', 'sub-1', 'file-7')
+        with open(target) as f:
+            self.assertEqual(f.read(), 'x' * 7)
+
     def test_extract_archive_zip_strip(self):
         cache_file = os.path.join(self.sample_files, 'sample-files.zip')
         self.opts.cache_file = cache_file
@@ -2,6 +2,7 @@
 # Copyright releng-tool
 
 from releng_tool.util.file_flags import FileFlag
+from releng_tool.util.file_flags import check_file_flag
 from releng_tool.util.file_flags import process_file_flag
 from tests import RelengToolTestCase
 from tests import prepare_workdir
@@ -18,6 +19,37 @@ class TestFileFlags(RelengToolTestCase):
             self.assertEqual(state, FileFlag.CONFIGURED)
             self.assertTrue(os.path.exists(file))
 
+    def test_ff_fingerprint(self):
+        with prepare_workdir() as work_dir:
+            file = os.path.join(work_dir, 'flag-fingerprint')
+
+            state = process_file_flag(file, flag=True, fingerprint='abc')
+            self.assertEqual(state, FileFlag.CONFIGURED)
+
+            state = check_file_flag(file, fingerprint='abc')
+            self.assertEqual(state, FileFlag.EXISTS)
+
+            state = check_file_flag(file, fingerprint='def')
+            self.assertEqual(state, FileFlag.NO_EXIST)
+            self.assertTrue(os.path.exists(file))
+
+            # existence-only checks ignore any tracked fingerprint
+            state = check_file_flag(file)
+            self.assertEqual(state, FileFlag.EXISTS)
+
+    def test_ff_fingerprint_legacy(self):
+        with prepare_workdir() as work_dir:
+            file = os.path.join(work_dir, 'flag-fingerprint-legacy')
+            with open(file, 'ab'):
+                pass
+
+            # a flag without a fingerprint is adopted
+            state = check_file_flag(file, fingerprint='abc')
+            self.assertEqual(state, FileFlag.EXISTS)
+
+            with open(file) as f:
+                self.assertEqual(f.read(), 'abc')
+
     def test_ff_forced(self):
         with prepare_workdir() as work_dir:
             file = os.path.join(work_dir, 'flag-forced')
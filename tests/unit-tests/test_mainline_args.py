@@ -122,6 +122,46 @@ class TestMainlineArgs(RelengToolTestCase):
             opts = engine.call_args.args[0]
             self.assertIn('example-path', opts.dl_dir)
 
+    def test_mainline_args_fetch_jobs_default(self):
+        with self._setup() as engine:
+            main([
+            ])
+            opts = engine.call_args.args[0]
+            self.assertEqual(opts.fetch_jobs, 1)
+
+    def test_mainline_args_fetch_jobs_invalid_negative(self):
+        with self._setup(), self.assertRaises(SystemExit):
+            main([
+                '--fetch-jobs',
+                '-1',
+            ])
+
+    def test_mainline_args_fetch_jobs_missing(self):
+        with self._setup(), self.assertRaises(SystemExit):
+            main([
+                '--fetch-jobs',
+            ])
+
+    def test_mainline_args_fetch_jobs_valid_positive(self):
+        with self._setup() as engine:
+            main([
+                '--fetch-jobs',
+                '4',
+            ])
+            opts = engine.call_args.args[0]
+            self.assertEqual(opts.fetch_jobs, 4)
+
+    def test_mainline_args_fetch_jobs_valid_zero(self):
+        with self._setup() as engine:
+            main([
+                '--fetch-jobs',
+                '0',
+                '--jobs',
+                '3',
+            ])
+            opts = engine.call_args.args[0]
+            self.assertEqual(opts.fetch_jobs, 3)
+
     def test_mainline_args_force(self):
         with self._setup() as engine:
             main([
@@ -264,6 +304,40 @@ class TestMainlineArgs(RelengToolTestCase):
             opts = engine.call_args.args[0]
             self.assertIn('example-path', opts.out_dir)
 
+    def test_mainline_args_package_jobs_default(self):
+        with self._setup() as engine:
+            main([
+            ])
+            opts = engine.call_args.args[0]
+            self.assertEqual(opts.package_jobs, 1)
+
+    def test_mainline_args_package_jobs_invalid_negative(self):
+        with self._setup(), self.assertRaises(SystemExit):
+            main([
+                '--package-jobs',
+                '-1',
+            ])
+
+    def test_mainline_args_package_jobs_valid_positive(self):
+        with self._setup() as engine:
+            main([
+                '--package-jobs',
+                '4',
+            ])
+            opts = engine.call_args.args[0]
+            self.assertEqual(opts.package_jobs, 4)
+
+    def test_mainline_args_package_jobs_valid_zero(self):
+        with self._setup() as engine:
+            main([
+                '--package-jobs',
+                '0',
+                '--jobs',
+                '3',
+            ])
+            opts = engine.call_args.args[0]
+            self.assertEqual(opts.package_jobs, 3)
+
     def test_mainline_args_profile_missing(self):
         with self._setup(), self.assertRaises(SystemExit):
             main([
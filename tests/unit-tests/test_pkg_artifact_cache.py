@@ -0,0 +1,141 @@
+# SPDX-License-Identifier: BSD-2-Clause
+# Copyright releng-tool
+
+from releng_tool.packages.artifact_cache import RelengArtifactCache
+from tests import RelengToolTestCase
+from tests import prepare_workdir
+from types import SimpleNamespace
+import os
+import shutil
+import sys
+import tarfile
+
+
+class TestPkgArtifactCache(RelengToolTestCase):
+    def run(self, result=None):
+        with prepare_workdir() as work_dir:
+            self.work_dir = work_dir
+            super().run(result)
+
+    def setUp(self):
+        self.opts = SimpleNamespace(
+            artifact_cache_dir=os.path.join(self.work_dir, 'cache'),
+            devmode=False,
+            host_dir=os.path.join(self.work_dir, 'host'),
+            staging_dir=os.path.join(self.work_dir, 'staging'),
+            sysroot_prefix='/usr',
+            target_dir=os.path.join(self.work_dir, 'target'),
+        )
+        self.pkg = SimpleNamespace(
+            local_srcs=False,
+            name='test',
+            vcs_type=None,
+        )
+
+        for root in self._roots():
+            os.makedirs(root)
+
+        self.cache = RelengArtifactCache(self.opts)
+
+    def test_pkg_artifact_cache_hardlinks(self):
+        if sys.platform == 'win32':
+            raise self.skipTest('hardlink test skipped for win32')
+
+        key = self.cache.key(self.pkg, 'fingerprint')
+        snapshot = self.cache.snapshot()
+
+        # outputs with hardlinks in the same and other output directories
+        bin_dir = os.path.join(self.opts.host_dir, 'bin')
+        os.makedirs(bin_dir)
+        file_a = os.path.join(bin_dir, 'a')
+        with open(file_a, 'w') as f:
+            f.write('content')
+        os.link(file_a, os.path.join(bin_dir, 'b'))
+
+        staged = os.path.join(self.opts.staging_dir, 'c')
+        with open(staged, 'w') as f:
+            f.write('staged')
+        os.link(staged, os.path.join(self.opts.target_dir, 'c'))
+
+        self.assertTrue(self.cache.store(self.pkg, key, snapshot))
+
+        for root in self._roots():
+            shutil.rmtree(root)
+            os.makedirs(root)
+
+        self.assertTrue(self.cache.restore(self.pkg, key))
+
+        file_b = os.path.join(bin_dir, 'b')
+        with open(file_b) as f:
+            self.assertEqual(f.read(), 'content')
+        self.assertTrue(os.path.samefile(file_a, file_b))
+
+        target = os.path.join(self.opts.target_dir, 'c')
+        with open(target) as f:
+            self.assertEqual(f.read(), 'staged')
+        self.assertTrue(os.path.samefile(staged, target))
+
+    def test_pkg_artifact_cache_key(self):
+        key = self.cache.key(self.pkg, 'fingerprint')
+        self.assertIsNotNone(key)
+
+        # output directories are tracked as part of a key
+        self.opts.target_dir = os.path.join(self.work_dir, 'target2')
+        self.assertNotEqual(self.cache.key(self.pkg, 'fingerprint'), key)
+
+    def test_pkg_artifact_cache_unsafe_link(self):
+        if sys.platform == 'win32':
+            raise self.skipTest('symlink test skipped for win32')
+
+        outside = os.path.join(self.work_dir, 'outside')
+        os.makedirs(outside)
+
+        # a link outside the output directory followed by an entry written
+        # through the link
+        key = self.cache.key(self.pkg, 'fingerprint')
+        self._write_entry(key, [
+            ('target/escape', tarfile.SYMTYPE, '../outside'),
+            ('target/escape/file', tarfile.REGTYPE, None),
+        ])
+
+        self.assertFalse(self.cache.restore(self.pkg, key))
+        self.assertFalse(os.path.lexists(
+            os.path.join(self.opts.target_dir, 'escape')))
+        self.assertEqual(os.listdir(outside), [])
+
+    def test_pkg_artifact_cache_unsafe_path(self):
+        if sys.platform == 'win32':
+            raise self.skipTest('symlink test skipped for win32')
+
+        outside = os.path.join(self.work_dir, 'outside')
+        os.makedirs(outside)
+
+        # an existing absolute link in the outputs must not be written through
+        os.symlink(outside, os.path.join(self.opts.target_dir, 'lib'))
+
+        key = self.cache.key(self.pkg, 'fingerprint')
+        self._write_entry(key, [
+            ('target/lib/file', tarfile.REGTYPE, None),
+        ])
+
+        self.assertFalse(self.cache.restore(self.pkg, key))
+        self.assertEqual(os.listdir(outside), [])
+
+    def _roots(self):
+        return [
+            self.opts.host_dir,
+            self.opts.staging_dir,
+            self.opts.target_dir,
+        ]
+
+    def _write_entry(self, key, members):
+        entry = self.cache._entry(key)
+        os.makedirs(os.path.dirname(entry))
+
+        with tarfile.open(entry, 'w') as tar:
+            for name, type_, linkname in members:
+                info = tarfile.TarInfo(name)
+                info.type = type_
+                if linkname:
+                    info.linkname = linkname
+                tar.addfile(info)
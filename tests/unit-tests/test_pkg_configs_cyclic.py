@@ -15,9 +15,12 @@ class TestPkgConfigsCyclic(TestPkgConfigsBase):
         ]
 
         with prepare_testenv(template='cyclic') as engine:
-            with self.assertRaises(RelengToolCyclicPackageDependency):
+            with self.assertRaises(RelengToolCyclicPackageDependency) as cm:
                 engine.pkgman.load(pkg_names)
 
+        self.assertIn('test-a -> test-c -> test-b -> test-a',
+            str(cm.exception))
+
     def test_pkgconfig_cyclic_implicit_loading(self):
         pkg_names = [
             'test-b',
@@ -33,5 +36,7 @@ class TestPkgConfigsCyclic(TestPkgConfigsBase):
         ]
 
         with prepare_testenv(template='cyclic') as engine:
-            with self.assertRaises(RelengToolCyclicPackageDependency):
+            with self.assertRaises(RelengToolCyclicPackageDependency) as cm:
                 engine.pkgman.load(pkg_names)
+
+        self.assertIn('test-d -> test-d', str(cm.exception))
@@ -88,6 +88,28 @@ class TestPkgJobs(RelengToolTestCase):
             test2_env = os.path.join(target_dir, 'test-2-invoke-env.json')
             self._verify_env_njobs(test2_env, 1)
 
+    def test_pkg_jobs_env_package_jobs(self):
+        config = {
+            'jobs': 9,
+            'package_jobs': 3,
+        }
+
+        with prepare_testenv(config=config, template='max-jobs') as engine:
+            rv = engine.run()
+            self.assertTrue(rv)
+
+            target_dir = engine.opts.target_dir
+
+            # job count should be shared between all three packages
+            test1_env = os.path.join(target_dir, 'test-1-invoke-env.json')
+            self._verify_env_njobs(test1_env, 3)
+
+            test2_env = os.path.join(target_dir, 'test-2-invoke-env.json')
+            self._verify_env_njobs(test2_env, 3)
+
+            test3_env = os.path.join(target_dir, 'test-3-invoke-env.json')
+            self._verify_env_njobs(test3_env, 3)
+
     def _verify_env_njobs(self, path, value):
         self.assertTrue(os.path.exists(path))
 
@@ -0,0 +1,149 @@
+# SPDX-License-Identifier: BSD-2-Clause
+# Copyright releng-tool
+
+from releng_tool.packages import clamp_jobs
+from releng_tool.packages.jobserver import JobTokenPool
+from releng_tool.packages.jobserver import granted_jobs
+from releng_tool.packages.package import RelengPackage
+from releng_tool.packages.pipeline import PipelineResult
+from releng_tool.packages.scheduler import RelengPackageScheduler
+from tests import RelengToolTestCase
+import threading
+
+
+class TestPkgScheduler(RelengToolTestCase):
+    def test_pkg_scheduler_deps_order(self):
+        pkgs = self._build_pkgs({
+            'a': [],
+            'b': [],
+            'c': ['a'],
+            'd': ['b', 'c'],
+        })
+
+        lock = threading.Lock()
+        completed = []
+
+        def process(pkg):
+            with lock:
+                for dep in pkg.deps:
+                    self.assertIn(dep.name, completed)
+                completed.append(pkg.name)
+            return PipelineResult.CONTINUE
+
+        scheduler = RelengPackageScheduler(pkgs, 4, 4)
+        rv = scheduler.run(process)
+        self.assertEqual(rv, PipelineResult.CONTINUE)
+        self.assertCountEqual(completed, ['a', 'b', 'c', 'd'])
+
+    def test_pkg_scheduler_error(self):
+        pkgs = self._build_pkgs({
+            'a': [],
+            'b': ['a'],
+        })
+
+        processed = []
+
+        def process(pkg):
+            processed.append(pkg.name)
+            return PipelineResult.ERROR
+
+        scheduler = RelengPackageScheduler(pkgs, 2, 2)
+        rv = scheduler.run(process)
+        self.assertEqual(rv, PipelineResult.ERROR)
+        self.assertEqual(processed, ['a'])
+
+    def test_pkg_scheduler_exception(self):
+        pkgs = self._build_pkgs({
+            'a': [],
+            'b': ['a'],
+        })
+
+        def process(pkg):
+            raise RuntimeError(pkg.name)
+
+        scheduler = RelengPackageScheduler(pkgs, 2, 2)
+        with self.assertRaises(RuntimeError):
+            scheduler.run(process)
+
+    def test_pkg_scheduler_job_tokens(self):
+        pkgs = self._build_pkgs({
+            'a': [],
+            'b': [],
+            'c': [],
+            'd': [],
+        })
+
+        lock = threading.Lock()
+        budgets = {}
+
+        def process(pkg):
+            with lock:
+                budgets[pkg.name] = granted_jobs()
+            return PipelineResult.CONTINUE
+
+        scheduler = RelengPackageScheduler(pkgs, 4, 8)
+        rv = scheduler.run(process)
+        self.assertEqual(rv, PipelineResult.CONTINUE)
+
+        # each package should never be granted more than their share
+        for budget in budgets.values():
+            self.assertGreaterEqual(budget, 1)
+            self.assertLessEqual(budget, 8)
+        self.assertLessEqual(budgets['a'], 2)
+
+    def test_pkg_scheduler_stop(self):
+        pkgs = self._build_pkgs({
+            'a': [],
+            'b': ['a'],
+        })
+
+        processed = []
+
+        def process(pkg):
+            processed.append(pkg.name)
+            return PipelineResult.STOP
+
+        scheduler = RelengPackageScheduler(pkgs, 2, 2)
+        rv = scheduler.run(process)
+        self.assertEqual(rv, PipelineResult.STOP)
+        self.assertEqual(processed, ['a'])
+
+    def test_pkg_jobserver_grant(self):
+        pool = JobTokenPool(4)
+        self.assertIsNone(granted_jobs())
+
+        with pool.grant(8) as granted:
+            self.assertEqual(granted, 4)
+            self.assertEqual(granted_jobs(), 4)
+
+        self.assertIsNone(granted_jobs())
+
+        with pool.grant(8, share=2) as granted:
+            self.assertEqual(granted, 2)
+
+            with pool.grant(8) as granted_remaining:
+                self.assertEqual(granted_remaining, 2)
+
+    def test_pkg_jobserver_fixed_jobs(self):
+        pool = JobTokenPool(4)
+
+        pkg = RelengPackage('test', None)
+        pkg.fixed_jobs = 3
+        self.assertEqual(clamp_jobs(pkg, 4), 3)
+
+        # a fixed job count never exceeds the granted tokens
+        with pool.grant(pkg.fixed_jobs, share=2) as granted:
+            self.assertEqual(granted, 2)
+            self.assertEqual(clamp_jobs(pkg, 4), 2)
+
+        with pool.grant(pkg.fixed_jobs) as granted:
+            self.assertEqual(granted, 3)
+            self.assertEqual(clamp_jobs(pkg, 4), 3)
+
+    def _build_pkgs(self, graph):
+        pkgs = {}
+        for name, deps in graph.items():
+            pkg = RelengPackage(name, None)
+            pkg.deps = [pkgs[dep] for dep in deps]
+            pkgs[name] = pkg
+        return list(pkgs.values())
@@ -6,9 +6,13 @@ from releng_tool.defs import PythonSetupType
 from releng_tool.defs import VcsType
 from releng_tool.packages.package import RelengPackage
 from releng_tool.prerequisites import RelengPrerequisites
+from releng_tool.tool import RelengTool
 from releng_tool.tool.python import PYTHON
 from unittest.mock import patch
 from tests import RelengToolTestCase
+from tests import prepare_workdir
+import os
+import sys
 
 
 PFX = 'releng_tool.prerequisites'
@@ -18,6 +22,29 @@ class TestPrerequisites(RelengToolTestCase):
     def setUp(self):
         self.pkg = RelengPackage('test', '1.0')
 
+    def test_prerequisites_cached_detection(self):
+        tool = RelengTool(sys.executable)
+        missing_tool = RelengTool('unknown-command-releng')
+
+        with prepare_workdir() as cache_dir, \
+                patch.dict(RelengTool.detected, clear=True):
+            prerequisites = RelengPrerequisites([], [], cache_dir=cache_dir)
+
+            missing = prerequisites._detect([tool, missing_tool])
+            self.assertEqual(missing, [missing_tool])
+            self.assertIsNone(RelengTool.cache)
+
+            cache_file = os.path.join(cache_dir, '.rtcache', 'tools.json')
+            self.assertTrue(os.path.isfile(cache_file))
+
+            # a new run should use the persisted detection for the existing
+            # tool, but always re-check the missing tool
+            RelengTool.detected.clear()
+            with patch('releng_tool.tool.execute', return_value=False) as ex:
+                missing = prerequisites._detect([tool, missing_tool])
+                self.assertEqual(missing, [missing_tool])
+                self.assertEqual(ex.call_count, 1)
+
     def test_prerequisites_exclude(self):
         prerequisites = RelengPrerequisites([], ['misc-command'])
         check = prerequisites.check(exclude=['misc-command'])
@@ -7,6 +7,8 @@ from tests import RelengToolTestCase
 from tests import prepare_testenv
 from tests.support import fetch_unittest_assets_dir
 from tests.support.http_daemon import httpd_context
+from unittest.mock import patch
+import hashlib
 import io
 import os
 import tarfile
@@ -392,3 +394,179 @@ class TestSiteUrl(RelengToolTestCase):
 
                 rv = engine.run()
                 self.assertTrue(rv)
+
+    def test_site_url_fetch_hash_streamed(self):
+        with httpd_context() as httpd:
+            host, port = httpd.server_address
+            site = f'http://{host}:{port}/test.tgz'
+
+            httpd_assets = fetch_unittest_assets_dir('sample-files')
+            archive = os.path.join(httpd_assets, 'sample-files.tgz')
+
+            with open(archive, 'rb') as f:
+                data = f.read()
+
+            headers = {
+                'Content-Length': str(len(data)),
+            }
+            httpd.rsp.append((200, data, headers))
+
+            with prepare_testenv(template='minimal') as engine:
+                pkg_dir = os.path.join(engine.opts.root_dir,
+                    'package', 'minimal')
+
+                with open(os.path.join(pkg_dir, 'minimal.rt'), 'a') as f:
+                    f.write(f'MINIMAL_SITE="{site}"\n')
+                    f.write('MINIMAL_VERSION=None\n')
+
+                digest = hashlib.sha256(data).hexdigest()
+                with open(os.path.join(pkg_dir, 'minimal.hash'), 'w') as f:
+                    f.write(f'sha256 {digest} minimal.tgz\n')
+
+                # the archive's hash should be calculated while downloading,
+                # avoiding the need to read the archive again
+                with patch('releng_tool.util.hash.update_hashers') as hashers:
+                    rv = engine.run()
+                    self.assertTrue(rv)
+                    hashers.assert_not_called()
+
+    def test_site_url_fetch_hash_streamed_mismatch(self):
+        with httpd_context() as httpd:
+            host, port = httpd.server_address
+            site = f'http://{host}:{port}/test.txt'
+
+            httpd.rsp.append((200, b'Sample text file.'))
+
+            with prepare_testenv(template='minimal') as engine:
+                pkg_dir = os.path.join(engine.opts.root_dir,
+                    'package', 'minimal')
+
+                with open(os.path.join(pkg_dir, 'minimal.rt'), 'a') as f:
+                    f.write(f'MINIMAL_SITE="{site}"\n')
+                    f.write('MINIMAL_VERSION=None\n')
+
+                digest = hashlib.sha256(b'unexpected').hexdigest()
+                with open(os.path.join(pkg_dir, 'minimal.hash'), 'w') as f:
+                    f.write(f'sha256 {digest} minimal.txt\n')
+
+                rv = engine.run()
+                self.assertFalse(rv)
+
+    def test_site_url_fetch_size_mismatch(self):
+        with httpd_context() as httpd:
+            host, port = httpd.server_address
+            site = f'http://{host}:{port}/test.txt'
+
+            data = b'Sample text file.'
+            headers = {
+                'Content-Length': str(len(data) + 10),
+            }
+            httpd.rsp.append((200, data, headers))
+
+            with prepare_testenv(template='minimal') as engine:
+                root_dir = engine.opts.root_dir
+                pkg_script = os.path.join(root_dir,
+                    'package', 'minimal', 'minimal.rt')
+
+                with open(pkg_script, 'a') as f:
+                    f.write(f'MINIMAL_SITE="{site}"\n')
+
+                rv = engine.run()
+                self.assertFalse(rv)
+
+    def test_site_url_fetch_resume(self):
+        with httpd_context() as httpd:
+            host, port = httpd.server_address
+            site = f'http://{host}:{port}/test.tgz'
+
+            httpd_assets = fetch_unittest_assets_dir('sample-files')
+            archive = os.path.join(httpd_assets, 'sample-files.tgz')
+
+            with open(archive, 'rb') as f:
+                data = f.read()
+
+            size = len(data)
+            half = size // 2
+
+            # first attempt is interrupted half-way
+            httpd.rsp.append((200, data[:half], {
+                'Content-Length': str(size),
+                'ETag': '"v1"',
+            }))
+
+            # second attempt resumes the download
+            httpd.rsp.append((206, data[half:], {
+                'Content-Length': str(size - half),
+                'Content-Range': f'bytes {half}-{size - 1}/{size}',
+                'ETag': '"v1"',
+            }))
+
+            with prepare_testenv(template='minimal') as engine:
+                self._prepare_hashed_site(engine, site, data)
+
+                with patch('releng_tool.fetch.url.RETRY_DURATION', 0):
+                    rv = engine.run()
+                self.assertTrue(rv)
+
+                outdir = os.environ['MINIMAL_BUILD_DIR']
+                stripped_file = os.path.join(outdir, 'tgz-file-container.txt')
+                self.assertTrue(os.path.exists(stripped_file))
+
+                # no partial download should remain
+                pkg_dl_dir = os.path.join(engine.opts.dl_dir, 'minimal')
+                self.assertEqual(os.listdir(pkg_dl_dir), ['minimal.tgz'])
+
+            requests = httpd.req['GET']
+            self.assertEqual(len(requests), 2)
+
+            _, initial_headers = requests[0]
+            self.assertNotIn('Range', initial_headers)
+
+            _, resume_headers = requests[1]
+            self.assertEqual(resume_headers.get('Range'), f'bytes={half}-')
+            self.assertEqual(resume_headers.get('If-Range'), '"v1"')
+
+    def test_site_url_fetch_resume_changed(self):
+        with httpd_context() as httpd:
+            host, port = httpd.server_address
+            site = f'http://{host}:{port}/test.tgz'
+
+            httpd_assets = fetch_unittest_assets_dir('sample-files')
+            archive = os.path.join(httpd_assets, 'sample-files.tgz')
+
+            with open(archive, 'rb') as f:
+                data = f.read()
+
+            size = len(data)
+
+            # first attempt is interrupted with stale content
+            httpd.rsp.append((200, b'stale-content', {
+                'Content-Length': str(size),
+                'ETag': '"v1"',
+            }))
+
+            # second attempt provides the full (changed) resource
+            httpd.rsp.append((200, data, {
+                'Content-Length': str(size),
+                'ETag': '"v2"',
+            }))
+
+            with prepare_testenv(template='minimal') as engine:
+                self._prepare_hashed_site(engine, site, data)
+
+                with patch('releng_tool.fetch.url.RETRY_DURATION', 0):
+                    rv = engine.run()
+                self.assertTrue(rv)
+
+            self.assertEqual(len(httpd.req['GET']), 2)
+
+    def _prepare_hashed_site(self, engine, site, data):
+        pkg_dir = os.path.join(engine.opts.root_dir, 'package', 'minimal')
+
+        with open(os.path.join(pkg_dir, 'minimal.rt'), 'a') as f:
+            f.write(f'MINIMAL_SITE="{site}"\n')
+            f.write('MINIMAL_VERSION=None\n')
+
+        digest = hashlib.sha256(data).hexdigest()
+        with open(os.path.join(pkg_dir, 'minimal.hash'), 'w') as f:
+            f.write(f'sha256 {digest} minimal.tgz\n')
@@ -0,0 +1,60 @@
+# SPDX-License-Identifier: BSD-2-Clause
+# Copyright releng-tool
+
+from tests import RelengToolTestCase
+import subprocess
+import sys
+
+# modules (or module prefixes) which should not be imported on startup
+DEFERRED_MODULES = [
+    'matplotlib',
+    'numpy',
+    'releng_tool.engine.autotools',
+    'releng_tool.engine.cmake',
+    'releng_tool.engine.make',
+    'releng_tool.engine.meson',
+    'releng_tool.engine.python',
+    'releng_tool.engine.sbom.',
+    'releng_tool.engine.scons',
+    'releng_tool.engine.waf',
+    'releng_tool.engine.xmake',
+    'releng_tool.extract.',
+    'releng_tool.fetch.',
+]
+
+
+class TestStartupImports(RelengToolTestCase):
+    def test_startup_imports_deferred(self):
+        """
+        verify implementations are not imported when starting releng-tool
+        """
+
+        # python's import-time tracing reports each module imported (and the
+        # time taken to import it); track the reported modules to guard
+        # against implementations being eagerly imported again
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c',
+                'import releng_tool.__main__'],
+            capture_output=True,
+            check=True,
+            text=True,
+        )
+
+        imported = set()
+        for line in result.stderr.splitlines():
+            if not line.startswith('import time:'):
+                continue
+
+            module = line.rsplit('|', 1)[-1].strip()
+            if module and module != 'imported package':
+                imported.add(module)
+
+        self.assertIn('releng_tool.__main__', imported)
+
+        for module in imported:
+            for deferred in DEFERRED_MODULES:
+                if deferred.endswith('.'):
+                    self.assertFalse(module.startswith(deferred), module)
+                else:
+                    self.assertFalse(module == deferred or
+                        module.startswith(deferred + '.'), module)
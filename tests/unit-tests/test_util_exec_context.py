@@ -0,0 +1,96 @@
+# SPDX-License-Identifier: BSD-2-Clause
+# Copyright releng-tool
+
+from releng_tool.util.exec_context import active_context
+from releng_tool.util.exec_context import context_environ
+from releng_tool.util.exec_context import execution_context
+from releng_tool.util.exec_context import scoped_environ
+from releng_tool.util.io import execute
+from releng_tool.util.task_pool import run_tasks
+from tests import RelengToolTestCase
+from tests import prepare_workdir
+import os
+import sys
+import threading
+
+
+class TestUtilExecContext(RelengToolTestCase):
+    def test_utilexeccontext_env(self):
+        key = 'RELENG_TEST_EXEC_CONTEXT'
+        self.assertIsNone(active_context())
+
+        os.environ[key] = 'base'
+        with execution_context(env={key: 'outer'}) as outer:
+            self.assertEqual(context_environ()[key], 'outer')
+
+            # process environment is not modified by a context
+            self.assertEqual(os.environ[key], 'base')
+
+            with execution_context(env={key: None}, jobs=3) as inner:
+                self.assertNotIn(key, context_environ())
+                self.assertEqual(inner.jobs, 3)
+
+            self.assertIs(active_context(), outer)
+            self.assertIsNone(outer.jobs)
+
+        self.assertIsNone(active_context())
+
+    def test_utilexeccontext_execute(self):
+        key = 'RELENG_TEST_EXEC_CONTEXT'
+        script = 'import os; print(os.getcwd()); print(os.environ["{}"])'
+        args = [sys.executable, '-c', script.format(key)]
+
+        with prepare_workdir() as work_dir:
+            with execution_context(env={key: 'value'}, cwd=work_dir):
+                out = []
+                self.assertTrue(execute(args, capture=out, expand=False))
+
+            self.assertEqual(len(out), 2)
+            self.assertTrue(os.path.samefile(out[0], work_dir))
+            self.assertEqual(out[1], 'value')
+            self.assertNotIn(key, os.environ)
+
+    def test_utilexeccontext_scoped_environ(self):
+        key = 'RELENG_TEST_EXEC_CONTEXT'
+
+        with scoped_environ({key: 'value'}):
+            self.assertEqual(os.environ[key], 'value')
+            self.assertEqual(context_environ()[key], 'value')
+
+        self.assertNotIn(key, os.environ)
+        self.assertIsNone(active_context())
+
+    def test_utilexeccontext_threads(self):
+        key = 'RELENG_TEST_EXEC_CONTEXT'
+        barrier = threading.Barrier(2)
+        results = {}
+
+        def worker(value):
+            with execution_context(env={key: value}):
+                # ensure both threads have an active context at the same time
+                barrier.wait()
+                results[value] = context_environ().get(key)
+
+        threads = [
+            threading.Thread(target=worker, args=(value,))
+            for value in ('a', 'b')
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results, {'a': 'a', 'b': 'b'})
+
+    def test_utilexeccontext_task_pool(self):
+        key = 'RELENG_TEST_EXEC_CONTEXT'
+        results = []
+
+        def task(value):
+            results.append((value, context_environ().get(key)))
+            return []
+
+        with execution_context(env={key: 'value'}):
+            self.assertTrue(run_tasks(task, ['a', 'b'], 2))
+
+        self.assertEqual(sorted(results), [('a', 'value'), ('b', 'value')])
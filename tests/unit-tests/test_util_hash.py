@@ -7,6 +7,9 @@ from releng_tool.util.hash import BadFormatHashLoadError
 from releng_tool.util.hash import load as load_hashes
 from releng_tool.util.hash import verify as verify_hashes
 from tests import RelengToolTestCase
+from tests import prepare_workdir
+from tests import redirect_stdout
+import hashlib
 import os
 
 
@@ -181,3 +184,43 @@ class TestUtilHash(RelengToolTestCase):
         file = os.path.join(samples, 'verify-success')
         result = verify_hashes(file, target_sample, exclude=exclude)
         self.assertEqual(result, HashResult.EMPTY)
+
+    def test_utilhash_verify_multiple(self):
+        with prepare_workdir() as work_dir:
+            hashes = []
+            for idx in range(8):
+                asset = f'asset-{idx}'
+                data = asset.encode('utf_8') * (idx + 1)
+                with open(os.path.join(work_dir, asset), 'wb') as f:
+                    f.write(data)
+
+                digest = hashlib.sha256(data).hexdigest()
+                hashes.append(f'sha256 {digest} {asset}')
+
+            hash_file = os.path.join(work_dir, 'hashes')
+            with open(hash_file, 'w') as f:
+                f.write('\n'.join(hashes))
+
+            result = verify_hashes(hash_file, work_dir, quiet=True)
+            self.assertEqual(result, HashResult.VERIFIED)
+
+            result = verify_hashes(hash_file, work_dir, quiet=True, jobs=1)
+            self.assertEqual(result, HashResult.VERIFIED)
+
+            # corrupt multiple assets and remove another
+            for asset in ['asset-2', 'asset-6']:
+                with open(os.path.join(work_dir, asset), 'ab') as f:
+                    f.write(b'corrupted')
+            os.remove(os.path.join(work_dir, 'asset-4'))
+
+            # all issues should be reported, with the first issue returned
+            with redirect_stdout() as stream:
+                result = verify_hashes(hash_file, work_dir, relaxed=True)
+            self.assertEqual(result, HashResult.MISMATCH)
+
+            output = stream.getvalue()
+            self.assertIn('hash mismatch detected: asset-2', output)
+            self.assertIn('missing expected file for verification: asset-4',
+                output)
+            self.assertIn('hash mismatch detected: asset-6', output)
+            self.assertNotIn('asset-0', output)
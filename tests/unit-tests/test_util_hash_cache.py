@@ -0,0 +1,131 @@
+# SPDX-License-Identifier: BSD-2-Clause
+# Copyright releng-tool
+
+from releng_tool.util.hash import HashResult
+from releng_tool.util.hash import verify as verify_hashes
+from releng_tool.util.hash_cache import VerifiedHashCache
+from tests import RelengToolTestCase
+from tests import prepare_workdir
+from unittest.mock import patch
+import hashlib
+import os
+
+
+class TestUtilHashCache(RelengToolTestCase):
+    def run(self, result=None):
+        with prepare_workdir() as work_dir:
+            self.work_dir = work_dir
+            self.db_file = os.path.join(work_dir, 'cache', '.hashdb')
+            self.asset = os.path.join(work_dir, 'asset')
+            self.hash_file = os.path.join(work_dir, 'asset.hash')
+
+            self._write_asset(b'sample')
+
+            super().run(result)
+
+    def test_utilhashcache_persisted(self):
+        cache = VerifiedHashCache(self.db_file)
+        self.assertFalse(cache.verified(self.hash_file, self.asset))
+
+        cache.record(self.hash_file, self.asset)
+        self.assertTrue(cache.verified(self.hash_file, self.asset))
+
+        # changes are only persisted when saved
+        self.assertFalse(os.path.isfile(self.db_file))
+        cache.save()
+        self.assertTrue(os.path.isfile(self.db_file))
+
+        cache = VerifiedHashCache(self.db_file)
+        self.assertTrue(cache.verified(self.hash_file, self.asset))
+
+        cache.discard(self.asset)
+        self.assertFalse(cache.verified(self.hash_file, self.asset))
+        cache.save()
+
+        cache = VerifiedHashCache(self.db_file)
+        self.assertFalse(cache.verified(self.hash_file, self.asset))
+
+    def test_utilhashcache_save_merge(self):
+        other = os.path.join(self.work_dir, 'other')
+        with open(other, 'wb') as f:
+            f.write(b'sample')
+
+        cache = VerifiedHashCache(self.db_file)
+        self.assertFalse(cache.verified(self.hash_file, self.asset))
+
+        # another run persists entries after this cache has been loaded
+        stale = VerifiedHashCache(self.db_file)
+        stale.record(self.hash_file, other)
+        stale.record(self.hash_file, self.asset)
+        stale.save()
+
+        # the other run's (stale) entry for an asset should not replace this
+        # run's entry, while other entries are retained
+        with open(self.asset, 'ab') as f:
+            f.write(b'modified')
+        cache.record(self.hash_file, self.asset)
+        cache.save()
+
+        cache = VerifiedHashCache(self.db_file)
+        self.assertTrue(cache.verified(self.hash_file, self.asset))
+        self.assertTrue(cache.verified(self.hash_file, other))
+
+    def test_utilhashcache_save_failure(self):
+        cache = VerifiedHashCache(self.db_file)
+        cache.record(self.hash_file, self.asset)
+
+        with patch('releng_tool.util.hash_cache.os.replace',
+                side_effect=OSError):
+            cache.save()
+
+        # no interim files should remain on a failed save
+        self.assertEqual(os.listdir(os.path.dirname(self.db_file)), [])
+
+    def test_utilhashcache_stale_asset(self):
+        cache = VerifiedHashCache(self.db_file)
+        cache.record(self.hash_file, self.asset)
+
+        with open(self.asset, 'ab') as f:
+            f.write(b'modified')
+
+        self.assertFalse(cache.verified(self.hash_file, self.asset))
+
+    def test_utilhashcache_stale_hash_file(self):
+        cache = VerifiedHashCache(self.db_file)
+        cache.record(self.hash_file, self.asset)
+
+        with open(self.hash_file, 'a') as f:
+            f.write('# modified\n')
+
+        self.assertFalse(cache.verified(self.hash_file, self.asset))
+
+    def test_utilhashcache_verify(self):
+        cache = VerifiedHashCache(self.db_file)
+
+        result = verify_hashes(self.hash_file, self.asset, cache=cache)
+        self.assertEqual(result, HashResult.VERIFIED)
+        self.assertTrue(cache.verified(self.hash_file, self.asset))
+
+        # a verified asset should not be hashed again
+        with patch('releng_tool.util.hash._verify') as verify:
+            result = verify_hashes(self.hash_file, self.asset, cache=cache)
+            self.assertEqual(result, HashResult.VERIFIED)
+            verify.assert_not_called()
+
+        # a mismatched asset should no longer be tracked
+        self._write_asset(b'sample', digest_data=b'other')
+        result = verify_hashes(self.hash_file, self.asset, quiet=True,
+            cache=cache)
+        self.assertEqual(result, HashResult.MISMATCH)
+        cache.save()
+
+        cache = VerifiedHashCache(self.db_file)
+        self.assertFalse(cache.verified(self.hash_file, self.asset))
+
+    def _write_asset(self, data, digest_data=None):
+        with open(self.asset, 'wb') as f:
+            f.write(data)
+
+        digest = hashlib.sha256(digest_data or data).hexdigest()
+        with open(self.hash_file, 'w') as f:
+            f.write(f'sha256 {digest} asset\n')
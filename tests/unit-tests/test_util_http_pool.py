@@ -0,0 +1,103 @@
+# SPDX-License-Identifier: BSD-2-Clause
+# Copyright releng-tool
+
+from releng_tool.util.http_pool import HttpConnectionPool
+from tests import RelengToolTestCase
+from tests.support.http_daemon import httpd_context
+from unittest.mock import patch
+from urllib.error import HTTPError
+import os
+
+
+class TestUtilHttpPool(RelengToolTestCase):
+    def setUp(self):
+        os.environ.pop('all_proxy', None)
+        os.environ.pop('http_proxy', None)
+        os.environ.pop('https_proxy', None)
+
+    def test_utilhttppool_error(self):
+        pool = HttpConnectionPool()
+
+        with httpd_context(keep_alive=True) as httpd:
+            host, port = httpd.server_address
+            site = f'http://{host}:{port}/missing'
+
+            httpd.rsp.append((404, None))
+
+            try:
+                with self.assertRaises(HTTPError) as cm, pool.urlopen(site):
+                    pass
+                self.assertEqual(cm.exception.code, 404)
+            finally:
+                pool.clear()
+
+    def test_utilhttppool_redirect(self):
+        pool = HttpConnectionPool()
+
+        with httpd_context(keep_alive=True) as httpd:
+            host, port = httpd.server_address
+            site = f'http://{host}:{port}/original'
+
+            httpd.rsp.append((302, None, {'Location': '/moved'}))
+            httpd.rsp.append((200, b'moved'))
+
+            try:
+                with pool.urlopen(site) as rsp:
+                    self.assertEqual(rsp.read(), b'moved')
+            finally:
+                pool.clear()
+
+            paths = [path for path, _ in httpd.req['GET']]
+            self.assertEqual(paths, ['/original', '/moved'])
+            self.assertEqual(httpd.connections, 1)
+
+    def test_utilhttppool_reuse(self):
+        pool = HttpConnectionPool()
+
+        with httpd_context(keep_alive=True) as httpd:
+            host, port = httpd.server_address
+
+            try:
+                for idx in range(3):
+                    data = f'response-{idx}'.encode()
+                    httpd.rsp.append((200, data))
+
+                    site = f'http://{host}:{port}/test-{idx}'
+                    with pool.urlopen(site) as rsp:
+                        self.assertEqual(rsp.read(), data)
+            finally:
+                pool.clear()
+
+            self.assertEqual(len(httpd.req['GET']), 3)
+            self.assertEqual(httpd.connections, 1)
+
+    def test_utilhttppool_ipv6(self):
+        pool = HttpConnectionPool()
+
+        # connections to an ipv6 literal without a port use the default port
+        with patch('http.client.HTTPConnection') as conn:
+            conn.return_value.request.side_effect = OSError
+
+            with self.assertRaises(OSError), \
+                    pool.urlopen('http://[::1]/test'):
+                pass
+
+            conn.assert_called_once_with('::1', 80)
+
+    def test_utilhttppool_no_reuse_on_close(self):
+        pool = HttpConnectionPool()
+
+        with httpd_context() as httpd:
+            host, port = httpd.server_address
+
+            try:
+                for idx in range(2):
+                    httpd.rsp.append((200, b'data'))
+
+                    site = f'http://{host}:{port}/test-{idx}'
+                    with pool.urlopen(site) as rsp:
+                        self.assertEqual(rsp.read(), b'data')
+            finally:
+                pool.clear()
+
+            self.assertEqual(httpd.connections, 2)
@@ -2,6 +2,7 @@
 # Copyright releng-tool
 
 from releng_tool.tool.python import PYTHON
+from releng_tool.util.io import _execute
 from releng_tool.util.io import execute
 from releng_tool.util.io import execute_rv
 from releng_tool.util.io import interpret_stem_extension as ise
@@ -14,6 +15,7 @@ from tests import RelengToolTestCase
 from tests import prepare_workdir
 from tests import redirect_stdout
 from tests.support import fetch_unittest_assets_dir
+import io
 import os
 import sys
 import unittest
@@ -187,6 +189,42 @@ class TestUtilIo(RelengToolTestCase):
         self.assertEqual(''.join(out), 'Hello')
         self.assertEqual(stream.getvalue().strip(), 'Hello')
 
+    def test_utilio_execution_output(self):
+        script = (
+            'import sys\n'
+            'for i in range(20000):\n'
+            '    sys.stdout.write(f"line-{i}\\r\\n" if i % 2 else f"line-{i}\\n")\n'
+            'sys.stdout.write("progress\\rdone")\n'
+        )
+        test_cmd = [sys.executable, '-c', script]
+
+        expected = [f'line-{i}' for i in range(20000)]
+        expected.extend(['progress', 'done'])
+
+        # verify capture of a large amount of output
+        out = []
+        tee = io.BytesIO()
+        rv = _execute(test_cmd, critical=False, capture=out, tee=tee)
+        self.assertEqual(rv, 0)
+        self.assertEqual(out, expected)
+
+        # all output should be provided to a tee (regardless of quiet)
+        raw = tee.getvalue()
+        self.assertEqual(len(raw.splitlines()), 20002)
+        self.assertTrue(raw.endswith(b'progress\rdone'))
+
+        # skip output checks if verbose mode is enabled
+        if is_verbose():
+            raise unittest.SkipTest(
+                'ignoring execution output checks while in verbose mode')
+
+        with redirect_stdout() as stream:
+            rv = _execute(test_cmd, critical=False, expand=False)
+            self.assertEqual(rv, 0)
+
+        lines = [x for x in stream.getvalue().splitlines() if x]
+        self.assertEqual(lines, expected)
+
     def test_utilio_ise(self):
         provided = 'my-file.txt'
         expected = ('my-file', 'txt')
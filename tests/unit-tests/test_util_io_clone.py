@@ -0,0 +1,156 @@
+# SPDX-License-Identifier: BSD-2-Clause
+# Copyright releng-tool
+
+from releng_tool.util.io_clone import clone_file
+from releng_tool.util.io_clone import clone_tree
+from releng_tool.util.io_clone import replicate_tree
+from tests import RelengToolTestCase
+from tests import prepare_workdir
+from unittest.mock import patch
+import errno
+import os
+
+
+def unsupported_reflink(*args, strict=False):  # noqa: ARG001
+    if strict:
+        raise OSError(errno.EOPNOTSUPP, 'unsupported')
+    return False
+
+
+class TestUtilIoClone(RelengToolTestCase):
+    def run(self, result=None):
+        with prepare_workdir() as work_dir:
+            self.work_dir = work_dir
+            self.src = os.path.join(work_dir, 'src')
+
+            container = os.path.join(self.src, 'container')
+            os.makedirs(container)
+            with open(os.path.join(container, 'file'), 'w') as f:
+                f.write('data')
+            os.symlink('container/file', os.path.join(self.src, 'link'))
+
+            super().run(result)
+
+    @patch('releng_tool.util.io_clone._reflink', unsupported_reflink)
+    def test_utilio_clone_file_hardlink(self):
+        src = os.path.join(self.src, 'container', 'file')
+        dst = os.path.join(self.work_dir, 'file')
+
+        self.assertFalse(clone_file(src, dst))
+        self.assertFalse(os.path.exists(dst))
+
+        self.assertTrue(clone_file(src, dst, hardlink=True))
+        self.assertTrue(os.path.samefile(src, dst))
+
+    @patch('releng_tool.util.io_clone._reflink', unsupported_reflink)
+    def test_utilio_clone_tree_copy(self):
+        dst = os.path.join(self.work_dir, 'dst')
+
+        self.assertTrue(clone_tree(self.src, dst, copy=True))
+
+        file = os.path.join(dst, 'container', 'file')
+        self.assertFalse(os.path.samefile(file,
+            os.path.join(self.src, 'container', 'file')))
+        with open(file) as f:
+            self.assertEqual(f.read(), 'data')
+
+        link = os.path.join(dst, 'link')
+        self.assertTrue(os.path.islink(link))
+        self.assertEqual(os.readlink(link), 'container/file')
+
+    @patch('releng_tool.util.io_clone._reflink', unsupported_reflink)
+    def test_utilio_clone_tree_hardlink(self):
+        dst = os.path.join(self.work_dir, 'dst')
+
+        self.assertTrue(clone_tree(self.src, dst, hardlink=True))
+
+        self.assertTrue(os.path.samefile(
+            os.path.join(dst, 'container', 'file'),
+            os.path.join(self.src, 'container', 'file')))
+
+    @patch('releng_tool.util.io_clone._reflink', unsupported_reflink)
+    def test_utilio_clone_tree_overwrite(self):
+        dst = os.path.join(self.work_dir, 'dst')
+        container = os.path.join(dst, 'container')
+        os.makedirs(container)
+
+        existing = os.path.join(dst, 'existing')
+        with open(existing, 'w') as f:
+            f.write('existing')
+
+        file = os.path.join(container, 'file')
+        with open(file, 'w') as f:
+            f.write('old')
+
+        link = os.path.join(dst, 'link')
+        with open(link, 'w') as f:
+            f.write('old')
+
+        # existing entries prevent a clone unless overwriting is permitted
+        self.assertFalse(clone_tree(self.src, dst, copy=True))
+        self.assertTrue(clone_tree(self.src, dst, copy=True, overwrite=True))
+
+        with open(file) as f:
+            self.assertEqual(f.read(), 'data')
+
+        self.assertTrue(os.path.islink(link))
+        self.assertTrue(os.path.isfile(existing))
+
+    @patch('releng_tool.util.io_clone._reflink', unsupported_reflink)
+    def test_utilio_clone_tree_unsupported(self):
+        dst = os.path.join(self.work_dir, 'dst')
+
+        self.assertFalse(clone_tree(self.src, dst))
+
+    @patch('releng_tool.util.io_clone._reflink', unsupported_reflink)
+    def test_utilio_replicate_tree(self):
+        dst1 = os.path.join(self.work_dir, 'dst1')
+        dst2 = os.path.join(self.work_dir, 'dst2')
+        src_file = os.path.join(self.src, 'container', 'file')
+        src_ino = os.stat(src_file).st_ino
+
+        self.assertTrue(replicate_tree(self.src, [dst1, dst2]))
+
+        # the first destination receives a copy and the last destination
+        # receives the original (moved) contents
+        dst1_file = os.path.join(dst1, 'container', 'file')
+        dst2_file = os.path.join(dst2, 'container', 'file')
+        self.assertNotEqual(os.stat(dst1_file).st_ino, src_ino)
+        self.assertEqual(os.stat(dst2_file).st_ino, src_ino)
+        self.assertTrue(os.path.islink(os.path.join(dst1, 'link')))
+        self.assertTrue(os.path.islink(os.path.join(dst2, 'link')))
+        self.assertFalse(os.path.exists(self.src))
+
+    @patch('releng_tool.util.io_clone._reflink', unsupported_reflink)
+    def test_utilio_replicate_tree_hardlink(self):
+        dst1 = os.path.join(self.work_dir, 'dst1')
+        dst2 = os.path.join(self.work_dir, 'dst2')
+
+        self.assertTrue(replicate_tree(self.src, [dst1, dst2], hardlink=True))
+
+        self.assertTrue(os.path.samefile(
+            os.path.join(dst1, 'container', 'file'),
+            os.path.join(dst2, 'container', 'file')))
+
+    @patch('releng_tool.util.io_clone._reflink', unsupported_reflink)
+    def test_utilio_replicate_tree_merged_usr(self):
+        src = os.path.join(self.work_dir, 'install')
+        os.makedirs(os.path.join(src, 'lib'))
+        with open(os.path.join(src, 'lib', 'libfoo.so'), 'w') as f:
+            f.write('libfoo')
+
+        # destinations using a merged-usr layout
+        dsts = []
+        for name in ('staging', 'target'):
+            dst = os.path.join(self.work_dir, name)
+            os.makedirs(os.path.join(dst, 'usr', 'lib'))
+            os.symlink('usr/lib', os.path.join(dst, 'lib'))
+            dsts.append(dst)
+
+        self.assertTrue(replicate_tree(src, dsts))
+
+        # each destination should retain its link and be populated the same
+        for dst in dsts:
+            self.assertTrue(os.path.islink(os.path.join(dst, 'lib')))
+            self.assertTrue(os.path.isfile(
+                os.path.join(dst, 'usr', 'lib', 'libfoo.so')))
@@ -2,6 +2,7 @@
 # Copyright releng-tool
 
 from pathlib import Path
+from releng_tool.util.io_copy import COPY_PARALLEL_THRESHOLD
 from releng_tool.util.io_copy import path_copy
 from releng_tool.util.io_copy import path_copy_into
 from releng_tool.util.io_temp_dir import temp_dir
@@ -9,6 +10,8 @@ from tests import RelengToolTestCase
 from tests import compare_contents
 from tests import prepare_workdir
 from tests.support import fetch_unittest_assets_dir
+from unittest.mock import patch
+import errno
 import os
 import platform
 import shutil
@@ -16,6 +19,10 @@ import sys
 import unittest
 
 
+def unsupported_reflink(*args, strict=False):  # noqa: ARG001
+    raise OSError(errno.EOPNOTSUPP, 'unsupported')
+
+
 class TestUtilIoCopy(RelengToolTestCase):
     @classmethod
     def setUpClass(cls):
@@ -133,6 +140,40 @@ class TestUtilIoCopy(RelengToolTestCase):
             self.assertTrue(path3.is_dir())
             self.assertTrue(path4.is_dir())
 
+    @patch('releng_tool.util.io_copy._reflink', unsupported_reflink)
+    def test_utilio_copy_large_tree(self):
+        if sys.platform == 'win32':
+            raise unittest.SkipTest('symlink test skipped for win32')
+
+        with prepare_workdir() as work_dir:
+            src = Path(work_dir) / 'src'
+            dst = Path(work_dir) / 'dst'
+            expected = self._prepare_large_tree(src)
+
+            result = path_copy(src, dst, critical=False)
+            self.assertTrue(result)
+            self._assertLargeTree(src, dst, expected)
+
+    @patch('releng_tool.util.io_copy._reflink', unsupported_reflink)
+    def test_utilio_copy_large_tree_fallback(self):
+        if sys.platform == 'win32':
+            raise unittest.SkipTest('symlink test skipped for win32')
+
+        def unsupported_copy_range(*args):  # noqa: ARG001
+            raise OSError(errno.EXDEV, 'unsupported')
+
+        with prepare_workdir() as work_dir:
+            src = Path(work_dir) / 'src'
+            dst = Path(work_dir) / 'dst'
+            expected = self._prepare_large_tree(src)
+
+            with patch('os.copy_file_range', unsupported_copy_range,
+                    create=True):
+                result = path_copy(src, dst, critical=False)
+
+            self.assertTrue(result)
+            self._assertLargeTree(src, dst, expected)
+
     def test_utilio_copy_missing(self):
         with prepare_workdir() as work_dir:
             work_dir = Path(work_dir)
@@ -419,3 +460,36 @@ class TestUtilIoCopy(RelengToolTestCase):
             self.assertTrue(result)
             self.assertTrue(path3.is_dir())
             self.assertTrue(path4.is_dir())
+
+    def _assertLargeTree(self, src, dst, expected):
+        for name, data in expected.items():
+            target = dst / name
+            self.assertEqual(target.read_text(), data)
+            self.assertEqual(target.stat().st_mtime_ns,
+                (src / name).stat().st_mtime_ns)
+
+        link = dst / 'link'
+        self.assertTrue(link.is_symlink())
+        self.assertEqual(os.readlink(link), 'dir0/file0')
+
+        # directory attributes are applied after all files are copied
+        self.assertEqual((dst / 'dir0').stat().st_mtime_ns,
+            (src / 'dir0').stat().st_mtime_ns)
+
+    def _prepare_large_tree(self, path):
+        expected = {}
+
+        # populate enough files to ensure files are copied using workers
+        for idx in range(COPY_PARALLEL_THRESHOLD * 2):
+            name = f'dir{idx % 4}/file{idx}'
+            target = path / name
+            target.parent.mkdir(parents=True, exist_ok=True)
+            target.write_text(name)
+            os.utime(target, ns=(0, idx * 1000000000))
+            expected[name] = name
+
+        (path / 'link').symlink_to('dir0/file0')
+        os.utime(path / 'dir0', ns=(0, 1000000000))
+
+        return expected
+
@@ -2,7 +2,10 @@
 # Copyright releng-tool
 
 from pathlib import Path
+from releng_tool.util.io_remove import TRASH_PREFIX
 from releng_tool.util.io_remove import path_remove
+from releng_tool.util.io_remove import path_remove_deferred
+from releng_tool.util.io_remove import path_remove_wait
 from tests import RelengToolTestCase
 from tests import mock_os_remove_permission_denied
 from tests import prepare_workdir
@@ -166,6 +169,42 @@ class TestUtilIoRemove(RelengToolTestCase):
         removed = path_remove(path)
         self.assertTrue(removed)
 
+    def test_utilio_remove_deferred(self):
+        def _(*args):
+            return os.path.join(self.work_dir, *args)
+
+        # setup
+        for idx in range(8):
+            os.makedirs(_('dir1', f'sub{idx}', 'nested'))
+            with open(_('dir1', f'sub{idx}', 'nested', 'file'), 'a') as f:
+                f.write(str(idx))
+
+        # a stale trash entry from a previous run
+        stale = _(TRASH_PREFIX + 'stale')
+        os.makedirs(_(stale, 'dir1'))
+
+        path = _('dir1')
+        removed = path_remove_deferred(path)
+        self.assertTrue(removed)
+
+        # the original path can be reused immediately
+        self.assertFalse(os.path.exists(path))
+        os.makedirs(path)
+
+        self.assertTrue(path_remove_wait())
+        self.assertTrue(os.path.isdir(path))
+        self.assertEqual(os.listdir(self.work_dir), ['dir1'])
+
+        # files and missing paths are removed immediately
+        file = _('file1')
+        with open(file, 'a') as f:
+            f.write(file)
+
+        self.assertTrue(path_remove_deferred(file))
+        self.assertFalse(os.path.exists(file))
+        self.assertTrue(path_remove_deferred(_('missing')))
+        self.assertTrue(path_remove_wait())
+
     def test_utilio_remove_failure(self):
         with mock_os_remove_permission_denied():
             def _(*args):
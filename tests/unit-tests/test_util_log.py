@@ -1,8 +1,12 @@
 # SPDX-License-Identifier: BSD-2-Clause
 # Copyright releng-tool
 
+from releng_tool.util.log import log
 from releng_tool.util.log import note
+from releng_tool.util.log import releng_log_buffered
+from releng_tool.util.log import releng_log_file
 from tests import redirect_stdout
+from tests import prepare_workdir
 from tests import RelengToolTestCase
 import os
 
@@ -15,3 +19,98 @@ class TestUtilLog(RelengToolTestCase):
             note('this is an $KEYWORD message')
 
         self.assertIn('this is an example message', stream.getvalue())
+
+    def test_utilio_log_buffered(self):
+        with redirect_stdout() as stream:
+            with releng_log_buffered():
+                note('first buffered message')
+                note('second buffered message')
+                self.assertEqual(stream.getvalue(), '')
+
+            output = stream.getvalue()
+
+        self.assertIn('first buffered message', output)
+        self.assertIn('second buffered message', output)
+        self.assertLess(
+            output.index('first buffered message'),
+            output.index('second buffered message'),
+        )
+
+    def test_utilio_log_file(self):
+        with prepare_workdir() as work_dir:
+            log_file = os.path.join(work_dir, 'logs', 'example.log')
+
+            with redirect_stdout() as stream:
+                with releng_log_file(log_file):
+                    log('plain message')
+                    note('noted message')
+
+                output = stream.getvalue()
+
+            self.assertNotIn('plain', output)
+            self.assertIn('noted message', output)
+
+            with open(log_file) as f:
+                contents = f.read()
+
+            self.assertIn('plain message', contents)
+            self.assertIn('noted message', contents)
+
+    def test_utilio_log_file_failure(self):
+        with prepare_workdir() as work_dir:
+            log_file = os.path.join(work_dir, 'example.log')
+
+            with redirect_stdout() as stream:
+                with self.assertRaises(RuntimeError), releng_log_file(log_file):
+                    log('plain message')
+                    note('noted message')
+                    log('another plain message')
+                    raise RuntimeError
+
+                output = stream.getvalue()
+
+            # only messages hidden from the output stream are replayed
+            self.assertEqual(output.count('plain message'), 2)
+            self.assertEqual(output.count('noted message'), 1)
+            self.assertLess(
+                output.index('noted message'),
+                output.index('another plain message'),
+            )
+
+            # messages are logged as normal after the context
+            with redirect_stdout() as stream:
+                log('another message')
+
+            self.assertIn('another message', stream.getvalue())
+
+    def test_utilio_log_file_failure_newlines(self):
+        with prepare_workdir() as work_dir:
+            log_file = os.path.join(work_dir, 'example.log')
+
+            with redirect_stdout() as stream:
+                with self.assertRaises(RuntimeError), releng_log_file(log_file):
+                    log('first\r\ntool\routput')
+                    note('noted\r\nmessage\r')
+                    log('hidden message')
+                    raise RuntimeError
+
+                output = stream.getvalue()
+
+            # carriage returns written before a hidden message do not shift
+            # the replayed contents
+            self.assertTrue(output.endswith(
+                'first\r\ntool\routput\nhidden message\n'))
+
+    def test_utilio_log_file_interrupt(self):
+        with prepare_workdir() as work_dir:
+            log_file = os.path.join(work_dir, 'example.log')
+
+            with redirect_stdout() as stream:
+                with self.assertRaises(KeyboardInterrupt), \
+                        releng_log_file(log_file):
+                    log('plain message')
+                    raise KeyboardInterrupt
+
+                output = stream.getvalue()
+
+            self.assertNotIn('plain message', output)
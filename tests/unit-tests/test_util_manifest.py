@@ -0,0 +1,218 @@
+# SPDX-License-Identifier: BSD-2-Clause
+# Copyright releng-tool
+
+from pathlib import Path
+from releng_tool.util.manifest import ManifestEntry
+from releng_tool.util.manifest import manifest_diff
+from releng_tool.util.manifest import manifest_read
+from releng_tool.util.manifest import manifest_walk
+from releng_tool.util.manifest import manifest_write
+from tests import RelengToolTestCase
+from tests import prepare_workdir
+from unittest.mock import patch
+import hashlib
+import os
+import sys
+
+
+class TestUtilManifest(RelengToolTestCase):
+    def run(self, result=None):
+        with prepare_workdir() as work_dir:
+            self.work_dir = Path(work_dir)
+            self.root = self.work_dir / 'root'
+            self.root.mkdir()
+            super().run(result)
+
+    def _populate(self):
+        for dir_ in ('a/b', 'a-c', 'd'):
+            (self.root / dir_).mkdir(parents=True)
+
+        (self.root / 'a' / 'b' / 'file1').write_text('file1')
+        (self.root / 'a-c' / 'file2').write_text('file2')
+        (self.root / 'file3').write_text('file3')
+
+    def test_utilmanifest_diff(self):
+        old = [
+            ManifestEntry('a', dir=True),
+            ManifestEntry('a/file1', size=1),
+            ManifestEntry('a/file2', size=2),
+            ManifestEntry('b'),
+        ]
+        new = [
+            ManifestEntry('a', dir=True),
+            ManifestEntry('a/file1', size=3),
+            ManifestEntry('a/file3'),
+            ManifestEntry('b'),
+            ManifestEntry('c', link='b'),
+        ]
+
+        changes = [
+            (change, entry.path) for change, entry in manifest_diff(old, new)
+        ]
+        self.assertEqual(changes, [
+            ('~', 'a/file1'),
+            ('-', 'a/file2'),
+            ('+', 'a/file3'),
+            ('+', 'c'),
+        ])
+
+        # entries without details are not considered modified
+        old = [ManifestEntry('a', mode=0o644, size=1)]
+        new = [ManifestEntry('a')]
+        self.assertEqual(list(manifest_diff(old, new)), [])
+
+    def test_utilmanifest_diff_case_insensitive(self):
+        old = [
+            ManifestEntry('a'),
+            ManifestEntry('B'),
+        ]
+        new = [
+            ManifestEntry('a'),
+            ManifestEntry('b'),
+        ]
+
+        # entries are matched using the platform's case sensitivity, where a
+        # rename in case is reported as a modification
+        with patch('os.path.normcase', str.lower):
+            changes = [
+                (change, entry.path)
+                for change, entry in manifest_diff(old, new)
+            ]
+        self.assertEqual(changes, [
+            ('~', 'b'),
+        ])
+
+    def test_utilmanifest_format_parse(self):
+        entries = [
+            ManifestEntry('a'),
+            ManifestEntry('a b/c', dir=True),
+            ManifestEntry('d', dir=True, link='../e'),
+            ManifestEntry('f', mode=0o755, size=12, digest='abc'),
+        ]
+
+        for entry in entries:
+            self.assertEqual(ManifestEntry.parse(entry.format()), entry)
+
+        self.assertEqual(entries[1].format(), 'a b/c/')
+        self.assertEqual(entries[2].format(), 'd/ -> ../e')
+        self.assertIsNone(ManifestEntry.parse('# comment\n'))
+        self.assertIsNone(ManifestEntry.parse('\n'))
+
+    def test_utilmanifest_walk(self):
+        self._populate()
+
+        # order matches a sorted recursive glob of the directory
+        expected = [
+            p.relative_to(self.root).as_posix()
+            for p in sorted(self.root.rglob('*'))
+        ]
+
+        entries = list(manifest_walk(str(self.root)))
+        self.assertEqual([entry.path for entry in entries], expected)
+        self.assertTrue(all(entry.mode is None for entry in entries))
+
+        entries = {
+            entry.path: entry
+            for entry in manifest_walk(str(self.root), details=True)
+        }
+
+        file3 = entries['file3']
+        self.assertFalse(file3.dir)
+        self.assertEqual(file3.size, len('file3'))
+        self.assertEqual(file3.digest,
+            hashlib.sha256(b'file3').hexdigest())
+
+        dir_ = entries['a']
+        self.assertTrue(dir_.dir)
+        self.assertIsNotNone(dir_.mode)
+        self.assertIsNone(dir_.size)
+        self.assertIsNone(dir_.digest)
+
+    def test_utilmanifest_walk_case_insensitive(self):
+        for name in ('a', 'B', 'c'):
+            (self.root / name).write_text(name)
+
+        # case-insensitive platforms order entries ignoring case
+        with patch('os.path.normcase', str.lower):
+            entries = list(manifest_walk(str(self.root)))
+        self.assertEqual([entry.path for entry in entries], ['a', 'B', 'c'])
+
+        entries = list(manifest_walk(str(self.root)))
+        expected = sorted(['a', 'B', 'c'], key=os.path.normcase)
+        self.assertEqual([entry.path for entry in entries], expected)
+
+    def test_utilmanifest_walk_symlink(self):
+        if sys.platform == 'win32':
+            raise self.skipTest('symlink test skipped for win32')
+
+        self._populate()
+        os.symlink('a', self.root / 'link')
+
+        entries = {
+            entry.path: entry
+            for entry in manifest_walk(str(self.root), details=True)
+        }
+
+        # links to directories are reported but not followed
+        link = entries['link']
+        self.assertTrue(link.dir)
+        self.assertEqual(link.link, 'a')
+        self.assertIsNone(link.digest)
+        self.assertNotIn('link/b', entries)
+
+    def test_utilmanifest_write(self):
+        self._populate()
+        manifest = str(self.work_dir / 'manifest.txt')
+        changes = str(self.work_dir / 'changes.txt')
+
+        # no changes are reported without a previous manifest
+        manifest_write(str(self.root), manifest, changes=changes)
+        self.assertTrue(os.path.isfile(manifest))
+        self.assertFalse(os.path.exists(changes))
+
+        with open(manifest) as f:
+            lines = f.read().splitlines()
+        self.assertTrue(lines[0].startswith('# '))
+        self.assertIn('a/', lines)
+        self.assertIn('a/b/file1', lines)
+
+        (self.root / 'a-c' / 'file2').unlink()
+        (self.root / 'file3').write_text('updated')
+        (self.root / 'd' / 'file4').write_text('file4')
+
+        manifest_write(str(self.root), manifest, details=True,
+            changes=changes)
+
+        entries = list(manifest_read(manifest))
+        self.assertTrue(all(entry.mode is not None for entry in entries))
+
+        with open(changes) as f:
+            lines = [
+                line.split('\t')[0] for line in f.read().splitlines()
+                if not line.startswith('#')
+            ]
+        self.assertEqual(lines, [
+            '- a-c/file2',
+            '+ d/file4',
+        ])
+
+        # modified details are reported when both manifests track them
+        (self.root / 'file3').write_text('updated again')
+        manifest_write(str(self.root), manifest, details=True,
+            changes=changes)
+
+        with open(changes) as f:
+            lines = [
+                line.split('\t')[0] for line in f.read().splitlines()
+                if not line.startswith('#')
+            ]
+        self.assertEqual(lines, [
+            '~ file3',
+        ])
+
+        # no leftover temporary files
+        self.assertEqual(sorted(os.listdir(self.work_dir)), [
+            'changes.txt',
+            'manifest.txt',
+            'root',
+        ])
@@ -0,0 +1,48 @@
+# SPDX-License-Identifier: BSD-2-Clause
+# Copyright releng-tool
+
+from releng_tool.util.process_gate import ProcessGate
+from tests import RelengToolTestCase
+import os
+import threading
+
+
+class TestUtilProcessGate(RelengToolTestCase):
+    def test_util_process_gate_inactive(self):
+        gate = ProcessGate()
+
+        with gate.hold(), gate.scoped_env(['GATE_TEST']):
+            os.environ['GATE_TEST'] = 'value'
+
+            with gate.released():
+                self.assertEqual(os.environ.get('GATE_TEST'), 'value')
+
+        self.assertNotIn('GATE_TEST', os.environ)
+
+    def test_util_process_gate_released(self):
+        gate = ProcessGate()
+        other_env = {}
+
+        def other():
+            with gate.hold():
+                other_env['value'] = os.environ.get('GATE_TEST')
+
+        with gate.activate(), gate.hold():
+            with gate.scoped_env(['GATE_TEST']):
+                os.environ['GATE_TEST'] = 'value'
+
+                # another thread should not be able to run until released
+                thread = threading.Thread(target=other)
+                thread.start()
+                thread.join(timeout=0.1)
+                self.assertTrue(thread.is_alive())
+
+                with gate.released():
+                    thread.join()
+
+                # scoped environment should be restored when re-acquired
+                self.assertEqual(os.environ.get('GATE_TEST'), 'value')
+
+        self.assertIn('value', other_env)
+        self.assertIsNone(other_env['value'])
+        self.assertNotIn('GATE_TEST', os.environ)
@@ -0,0 +1,84 @@
+# SPDX-License-Identifier: BSD-2-Clause
+# Copyright releng-tool
+
+from releng_tool.util.script_cache import SCRIPT_CACHE_DIR
+from releng_tool.util.script_cache import compile_script
+from releng_tool.util.script_cache import run_script_code
+from tests import RelengToolTestCase
+from tests import prepare_workdir
+import os
+import sys
+
+
+class TestUtilScriptCache(RelengToolTestCase):
+    def test_utilscriptcache_cached(self):
+        with prepare_workdir() as work_dir:
+            cache_dir = os.path.join(work_dir, 'cache')
+            script = os.path.join(work_dir, 'script.rt')
+
+            with open(script, 'w') as f:
+                f.write('VALUE = 1\n')
+            st = os.stat(script)
+
+            code = compile_script(script, cache_dir)
+            rv = run_script_code(code, script, {})
+            self.assertEqual(rv['VALUE'], 1)
+
+            cached = os.listdir(os.path.join(cache_dir, SCRIPT_CACHE_DIR))
+            self.assertEqual(len(cached), 1)
+
+            # a script with the same modification time and size will use the
+            # cached compiled script
+            with open(script, 'w') as f:
+                f.write('VALUE = 2\n')
+            os.utime(script, ns=(st.st_atime_ns, st.st_mtime_ns))
+
+            code = compile_script(script, cache_dir)
+            rv = run_script_code(code, script, {})
+            self.assertEqual(rv['VALUE'], 1)
+
+            # a modified script is re-compiled
+            with open(script, 'w') as f:
+                f.write('VALUE = 30\n')
+
+            code = compile_script(script, cache_dir)
+            rv = run_script_code(code, script, {})
+            self.assertEqual(rv['VALUE'], 30)
+
+    def test_utilscriptcache_no_cache(self):
+        with prepare_workdir() as work_dir:
+            script = os.path.join(work_dir, 'script.rt')
+
+            with open(script, 'w') as f:
+                f.write('VALUE = 1\n')
+
+            code = compile_script(script)
+            rv = run_script_code(code, script, {})
+            self.assertEqual(rv['VALUE'], 1)
+
+            self.assertEqual(os.listdir(work_dir), ['script.rt'])
+
+    def test_utilscriptcache_run(self):
+        with prepare_workdir() as work_dir:
+            script = os.path.join(work_dir, 'script.rt')
+
+            with open(script, 'w') as f:
+                f.write('''\
+import sys
+ARGV0 = sys.argv[0]
+FILE = __file__
+NAME = __name__
+RESULT = INPUT + 1
+''')
+
+            argv0 = sys.argv[0]
+
+            code = compile_script(script)
+            rv = run_script_code(code, script, {'INPUT': 1})
+            self.assertEqual(rv['ARGV0'], script)
+            self.assertEqual(rv['FILE'], script)
+            self.assertEqual(rv['NAME'], '<run_path>')
+            self.assertEqual(rv['RESULT'], 2)
+
+            self.assertEqual(sys.argv[0], argv0)
+            self.assertNotIn('<run_path>', sys.modules)
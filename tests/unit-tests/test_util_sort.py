@@ -1,6 +1,7 @@
 # SPDX-License-Identifier: BSD-2-Clause
 # Copyright releng-tool
 
+from itertools import pairwise
 from releng_tool.util.sort import TopologicalSorter
 from tests import RelengToolTestCase
 
@@ -160,5 +161,40 @@ class TestUtilSort(RelengToolTestCase):
         self.assertEqual(self.sorter.sorted,
             [a, g, r, h, f, e, b, m, n, o, p, x, j, i, c, q, k, d])
 
+    def test_utilsort_topologicalsorter_cycles(self):
+        """
+        ensure all detected cycles are tracked
+        """
+        # a -> b -> c -> a
+        #       \-> d -> e -> d
+        a = TestObj('a')
+        b = TestObj('b')
+        c = TestObj('c')
+        d = TestObj('d')
+        e = TestObj('e')
+        a.children.append(b)
+        b.children.extend([c, d])
+        c.children.append(a)
+        d.children.append(e)
+        e.children.append(d)
+
+        sorted_ = self.sorter.sort(a)
+        self.assertIsNone(sorted_)
+        self.assertEqual(self.sorter.cycles, [
+            [a, b, c, a],
+            [d, e, d],
+        ])
+
+    def test_utilsort_topologicalsorter_deep(self):
+        """
+        ensure long chains can be sorted
+        """
+        objs = [TestObj(str(idx)) for idx in range(5000)]
+        for obj, child in pairwise(objs):
+            obj.children.append(child)
+
+        sorted_ = self.sorter.sort(objs[0])
+        self.assertEqual(sorted_, list(reversed(objs)))
+
     def tearDown(self):
         self.sorter.reset()
@@ -37,6 +37,10 @@ class TestUtilStrings(RelengToolTestCase):
         assertExpand(self, '$$escaped', '$escaped')
         assertExpand(self, '${__RELENGTEST}', 'override',
             kv={'__RELENGTEST': 'override'})
+        assertExpand(self, '${__RELENGTEST}-$__RELENGKV', 'test-value',
+            kv={'__RELENGKV': 'value'})
+        assertExpand(self, '${__RELENGTEST} $$ ${invalid $__RELENGTEST',
+            'test $ ${invalid $__RELENGTEST')
         assertExpand(self, ['a', 'b', 'c'], ['a', 'b', 'c'])
         assertExpand(self,
             ['${__RELENGTEST}', 'b', '${__RELENGTEST}'], ['test', 'b', 'test'])
@@ -45,6 +49,8 @@ class TestUtilStrings(RelengToolTestCase):
         assertExpand(self, {'key': 'value'}, {'key': 'value'})
         assertExpand(self,
             {'${__RELENGTEST}': '${__RELENGTEST}'}, {'test': 'test'})
+        assertExpand(self,
+            {'key': 'value', 'a': '$__RELENGTEST'}, {'key': 'value', 'a': 'test'})
 
         os.environ.pop('__RELENGTEST', None)
         assertExpand(self, '$__RELENGTEST', '')
@@ -0,0 +1,51 @@
+# SPDX-License-Identifier: BSD-2-Clause
+# Copyright releng-tool
+
+from releng_tool.util.task_pool import run_tasks
+from tests import RelengToolTestCase
+
+
+class TestUtilTaskPool(RelengToolTestCase):
+    def test_utiltaskpool_failure(self):
+        processed = []
+
+        def task(value):
+            processed.append(value)
+            if value == 'root':
+                return ['fail', 'other']
+            if value == 'fail':
+                return None
+            return ['child']
+
+        # with a single worker, the failing task completes first; new tasks
+        # from other (completed) tasks should not be started
+        rv = run_tasks(task, ['root'], 1)
+        self.assertFalse(rv)
+        self.assertEqual(processed, ['root', 'fail', 'other'])
+
+    def test_utiltaskpool_nested(self):
+        processed = []
+
+        def task(value):
+            processed.append(value)
+            if len(value) < 3:  # noqa: PLR2004
+                return [value + 'a', value + 'b']
+            return []
+
+        rv = run_tasks(task, ['a', 'b'], 3)
+        self.assertTrue(rv)
+
+        # two root tasks, four second-level tasks and eight leaf tasks
+        self.assertEqual(len(processed), 14)
+        self.assertEqual(len(set(processed)), 14)
+        self.assertIn('abb', processed)
+        self.assertIn('baa', processed)
+
+    def test_utiltaskpool_raises(self):
+        def task(value):
+            if value == 'bad':
+                raise ValueError(value)
+            return []
+
+        with self.assertRaises(ValueError):
+            run_tasks(task, ['good', 'bad'], 2)